@@ -0,0 +1,427 @@
+"""Нагрузочный тест API портфелей.
+
+Генератор моделирует пользователей, которые создают портфели, проводят по ним сделки
+и читают их. Каждый виртуальный пользователь работает только со своими портфелями,
+поэтому продажи не конфликтуют между собой и ошибки в отчёте — это ошибки сервиса,
+а не генератора.
+
+Примеры:
+    # In-process через ASGI-транспорт, временная SQLite-база
+    python -m benchmarks.loadtest --concurrency 50 --duration 30
+
+    # Через локальный сокет: поднимает uvicorn с теми же заглушками
+    python -m benchmarks.loadtest --target socket --concurrency 100
+
+    # Без БД: in-memory репозиторий и UoW
+    python -m benchmarks.loadtest --backend memory
+
+    # Опрос портфелей условными GET (If-None-Match)
+    python -m benchmarks.loadtest --mix create=1,transact=1,poll=8
+
+    # Уже запущенный сервис (зависимости — на стороне сервиса)
+    python -m benchmarks.loadtest --base-url http://localhost:8080 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from src.adapters.factory import (
+    InMemoryPortfolioRepositoryFactory,
+    SQLAlchemyPortfolioRepositoryFactory,
+)
+from src.adapters.orm import metadata
+from src.entrypoints.fastapi_app import create_app
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.database.memory import InMemoryStore
+from src.infrastructure.database.partitions import partition_horizon
+from src.service_layer.dependencies import (
+    get_portfolio_cache,
+    get_transaction_horizon,
+    get_uow,
+    get_user_service,
+)
+from src.service_layer.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+from src.service_layer.users_service import ABCUserService
+
+API_PREFIX = '/api/v1/portfolio'
+ASSETS = ('MOEX:SBER', 'MOEX:GAZP', 'MOEX:LKOH', 'NASDAQ:AAPL', 'NASDAQ:MSFT', 'NYSE:KO')
+DEFAULT_MIX = 'create=1,transact=5,read=3,list=1'
+PERCENTILES = (50, 90, 95, 99)
+
+
+class StubUserService(ABCUserService):
+    """Заглушка users-сервиса: любой пользователь существует, ответ — через ``latency`` секунд."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self._latency = latency
+
+    async def get_by_id(self, user_id: uuid.UUID) -> dict:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return {'id': str(user_id)}
+
+
+@dataclass
+class OperationStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+
+@dataclass
+class LoadReport:
+    duration: float
+    concurrency: int
+    operations: dict[str, OperationStats]
+
+    @property
+    def total_requests(self) -> int:
+        return sum(op.count for op in self.operations.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(op.error_count for op in self.operations.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.total_requests / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.total_errors / self.total_requests if self.total_requests else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'duration_seconds': self.duration,
+            'concurrency': self.concurrency,
+            'requests': self.total_requests,
+            'throughput_rps': self.throughput,
+            'error_rate': self.error_rate,
+            'operations': {
+                name: {
+                    'requests': op.count,
+                    'error_rate': op.error_count / op.count if op.count else 0.0,
+                    'errors': dict(op.errors),
+                    'latency_ms': _latency_summary(op.latencies),
+                }
+                for name, op in sorted(self.operations.items())
+            },
+        }
+
+    def format_table(self) -> str:
+        header = f'{"operation":<10} {"requests":>9} {"errors":>7} ' + ' '.join(
+            f'{key:>8}' for key in (*(f'p{p}' for p in PERCENTILES), 'max')
+        )
+        lines = [
+            f'Длительность: {self.duration:.1f} c, конкурентность: {self.concurrency}',
+            f'Запросов: {self.total_requests}, пропускная способность: '
+            f'{self.throughput:.1f} rps, ошибки: {self.error_rate:.2%}',
+            '',
+            header + '  (мс)',
+        ]
+        for name, op in sorted(self.operations.items()):
+            summary = _latency_summary(op.latencies)
+            values = ' '.join(f'{summary[key]:>8.2f}' for key in summary)
+            lines.append(f'{name:<10} {op.count:>9} {op.error_count:>7} {values}')
+        return '\n'.join(lines)
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    summary = {f'p{p}': _percentile(ordered, p) * 1000 for p in PERCENTILES}
+    summary['max'] = (ordered[-1] if ordered else 0.0) * 1000
+    return summary
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def parse_mix(raw: str) -> dict[str, float]:
+    mix = {}
+    for part in raw.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(VirtualUser.OPERATIONS)
+    if unknown:
+        raise ValueError(f'Неизвестные операции в смеси: {", ".join(sorted(unknown))}')
+    return mix
+
+
+class VirtualUser:
+    """Один пользователь API со своим набором портфелей и позиций."""
+
+    OPERATIONS = ('create', 'transact', 'read', 'poll', 'list')
+
+    def __init__(self, client: httpx.AsyncClient, stats: dict[str, OperationStats], seed: int):
+        self._client = client
+        self._stats = stats
+        self._rng = random.Random(seed)
+        self.user_id = uuid.uuid4()
+        self.portfolios: dict[str, dict[str, Decimal]] = {}
+        self.etags: dict[str, str] = {}
+
+    async def run(self, mix: dict[str, float], deadline: float) -> None:
+        names, weights = list(mix), list(mix.values())
+        await self.create()
+        while time.perf_counter() < deadline:
+            operation = self._rng.choices(names, weights)[0]
+            await getattr(self, operation)()
+
+    async def create(self) -> None:
+        payload = {'user_id': str(self.user_id), 'name': 'load', 'currency': 'RUB'}
+        resp = await self._request('create', 'POST', '/portfolios', json=payload)
+        if resp is not None and resp.status_code == 200:
+            self.portfolios[resp.json()['id']] = {}
+
+    async def transact(self) -> None:
+        if not self.portfolios:
+            return await self.create()
+
+        portfolio_id = self._rng.choice(list(self.portfolios))
+        holdings = self.portfolios[portfolio_id]
+        if holdings and self._rng.random() < 0.3:
+            asset_id = self._rng.choice(list(holdings))
+            quantity = max(Decimal(1), holdings[asset_id] // 2)
+            tx_type = 'SELL'
+        else:
+            asset_id = self._rng.choice(ASSETS)
+            quantity = Decimal(self._rng.randint(1, 20))
+            tx_type = 'BUY'
+
+        price = Decimal(self._rng.randint(1000, 50000)) / 100
+        payload = {
+            'portfolio_id': portfolio_id,
+            'asset_id': asset_id,
+            'transaction_type': tx_type,
+            'quantity': str(quantity),
+            'price_per_unit': str(price),
+            'total_amount': str(quantity * price),
+            'executed_at': '2025-01-01T10:00:00+00:00',
+            'currency': 'RUB',
+        }
+        resp = await self._request('transact', 'POST', '/transactions', json=payload)
+        if resp is not None and resp.status_code == 200:
+            delta = quantity if tx_type == 'BUY' else -quantity
+            holdings[asset_id] = holdings.get(asset_id, Decimal(0)) + delta
+            if not holdings[asset_id]:
+                del holdings[asset_id]
+
+    async def read(self) -> None:
+        if not self.portfolios:
+            return await self.create()
+        portfolio_id = self._rng.choice(list(self.portfolios))
+        await self._request('read', 'GET', f'/portfolios/{portfolio_id}')
+
+    async def poll(self) -> None:
+        """Условный GET, как у клиента, который периодически опрашивает портфель."""
+        if not self.portfolios:
+            return await self.create()
+        portfolio_id = self._rng.choice(list(self.portfolios))
+        etag = self.etags.get(portfolio_id)
+        headers = {'If-None-Match': etag} if etag else {}
+        resp = await self._request('poll', 'GET', f'/portfolios/{portfolio_id}', headers=headers)
+        if resp is not None and resp.status_code == 200:
+            self.etags[portfolio_id] = resp.headers['ETag']
+
+    async def list(self) -> None:
+        await self._request('list', 'GET', f'/users/{self.user_id}/portfolios')
+
+    async def _request(self, operation: str, method: str, path: str, **kwargs: Any):
+        stats = self._stats[operation]
+        start = time.perf_counter()
+        try:
+            resp = await self._client.request(method, API_PREFIX + path, **kwargs)
+        except httpx.HTTPError as e:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.errors[type(e).__name__] += 1
+            return None
+        stats.latencies.append(time.perf_counter() - start)
+        if resp.status_code >= 400:
+            stats.errors[str(resp.status_code)] += 1
+        return resp
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    duration: float,
+    mix: dict[str, float],
+    seed: int = 0,
+) -> LoadReport:
+    """Запускает ``concurrency`` виртуальных пользователей на ``duration`` секунд."""
+    stats: dict[str, OperationStats] = defaultdict(OperationStats)
+    users = [VirtualUser(client, stats, seed + i) for i in range(concurrency)]
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(user.run(mix, deadline) for user in users))
+    return LoadReport(
+        duration=time.perf_counter() - start,
+        concurrency=concurrency,
+        operations=dict(stats),
+    )
+
+
+async def build_app(
+    database_url: str | None,
+    user_service_latency: float,
+) -> tuple[FastAPI, AsyncEngine | None]:
+    """Создаёт приложение из ``create_app()`` с локальным хранилищем и заглушкой users-сервиса.
+
+    Без ``database_url`` используется in-memory бэкенд — замер без стоимости БД.
+    """
+    user_service = StubUserService(latency=user_service_latency)
+    app = create_app()
+    app.dependency_overrides[get_user_service] = lambda: user_service
+    portfolio_cache = TTLCache('portfolios', maxsize=10_000, ttl=300.0)
+    app.dependency_overrides[get_portfolio_cache] = lambda: portfolio_cache
+    app.dependency_overrides[get_transaction_horizon] = lambda: partition_horizon(3)
+
+    if database_url is None:
+        store = InMemoryStore()
+        repo_factory = InMemoryPortfolioRepositoryFactory()
+        app.dependency_overrides[get_uow] = lambda: InMemoryUnitOfWork(store, repo_factory)
+        return app, None
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    sql_repo_factory = SQLAlchemyPortfolioRepositoryFactory()
+    app.dependency_overrides[get_uow] = lambda: SqlAlchemyUnitOfWork(
+        session_factory,
+        sql_repo_factory,
+    )
+    return app, engine
+
+
+@asynccontextmanager
+async def serve(app: FastAPI, host: str = '127.0.0.1') -> AsyncIterator[str]:
+    """Поднимает uvicorn на свободном локальном порту и возвращает базовый URL."""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        port = sock.getsockname()[1]
+
+    config = uvicorn.Config(app, host=host, port=port, lifespan='off', log_level='warning')
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    try:
+        yield f'http://{host}:{port}'
+    finally:
+        server.should_exit = True
+        await task
+
+
+@asynccontextmanager
+async def open_client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(
+        max_connections=args.concurrency,
+        max_keepalive_connections=args.concurrency,
+    )
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits) as client:
+            yield client
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # In-memory SQLite у каждого соединения пула своя, поэтому по умолчанию — файл.
+        database_url = args.database_url or f'sqlite+aiosqlite:///{tmp}/loadtest.db'
+        if args.backend == 'memory':
+            database_url = None
+        async with _local_app_client(args, database_url, limits) as client:
+            yield client
+
+
+@asynccontextmanager
+async def _local_app_client(
+    args: argparse.Namespace,
+    database_url: str | None,
+    limits: httpx.Limits,
+) -> AsyncIterator[httpx.AsyncClient]:
+    app, engine = await build_app(database_url, args.user_service_latency)
+    try:
+        if args.target == 'socket':
+            async with serve(app) as base_url:
+                async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+                    yield client
+        else:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://loadtest') as client:
+                yield client
+    finally:
+        if engine is not None:
+            await engine.dispose()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Нагрузочный тест API eebook-portfolio')
+    parser.add_argument('--concurrency', type=int, default=20, help='виртуальных пользователей')
+    parser.add_argument('--duration', type=float, default=10.0, help='длительность, секунды')
+    parser.add_argument(
+        '--mix',
+        default=DEFAULT_MIX,
+        help='веса операций: create,transact,read,list',
+    )
+    parser.add_argument('--target', choices=('asgi', 'socket'), default='asgi')
+    parser.add_argument('--base-url', help='URL уже запущенного сервиса (вместо in-process)')
+    parser.add_argument('--backend', choices=('sqlalchemy', 'memory'), default='sqlalchemy')
+    parser.add_argument('--database-url', help='по умолчанию — временный файл SQLite')
+    parser.add_argument('--user-service-latency', type=float, default=0.0, help='секунды')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='сохранить отчёт в JSON')
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> LoadReport:
+    args = parse_args(argv)
+    async with open_client(args) as client:
+        report = await run_load(
+            client,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            mix=parse_mix(args.mix),
+            seed=args.seed,
+        )
+
+    print(report.format_table())
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,204 @@
+"""Масштабирование пропускной способности по числу воркеров.
+
+Для каждого числа воркеров поднимает сервер через ``src.entrypoints.cli.serve``
+(те же воркеры uvicorn, что и в проде), даёт ту же нагрузку, что ``loadtest``,
+и печатает пропускную способность и ускорение относительно одного воркера.
+Каждый воркер создаёт свой engine уже после старта процесса, пул — из бюджета
+соединений, поделённого между воркерами.
+
+Приложение — с заглушкой users-сервиса и без lifespan (Vault не нужен). Хранилище
+должно быть общим для воркеров: по умолчанию это файл SQLite, но он сериализует
+записи, поэтому для честного замера нужен Postgres через ``--database-url``.
+
+Примеры:
+    python -m benchmarks.scaling --workers 1,2,4 --duration 15
+    python -m benchmarks.scaling --database-url postgresql+asyncpg://... --budget 40
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.loadtest import StubUserService, parse_mix, run_load
+from src.adapters.factory import SQLAlchemyPortfolioRepositoryFactory
+from src.adapters.orm import metadata
+from src.entrypoints.fastapi_app import create_app
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.database.engine import pool_limits
+from src.infrastructure.database.partitions import partition_horizon
+from src.service_layer.dependencies import (
+    get_portfolio_cache,
+    get_transaction_horizon,
+    get_uow,
+    get_user_service,
+)
+from src.service_layer.uow import SqlAlchemyUnitOfWork
+
+DEFAULT_MIX = 'create=1,read=7,list=2'
+STARTUP_TIMEOUT = 30.0
+
+
+def worker_app() -> FastAPI:
+    """Фабрика приложения; вызывается в каждом воркере, поэтому engine у воркера свой."""
+    pool_size, max_overflow = pool_limits(
+        pool_size=5,
+        max_overflow=10,
+        budget=int(budget) if (budget := os.environ.get('SCALING_DB_BUDGET')) else None,
+        workers=int(os.environ.get('WEB_CONCURRENCY', '1')),
+    )
+    engine = create_async_engine(
+        os.environ['SCALING_DATABASE_URL'],
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    repo_factory = SQLAlchemyPortfolioRepositoryFactory()
+    user_service = StubUserService()
+    portfolio_cache = TTLCache('portfolios', maxsize=10_000, ttl=300.0)
+
+    app = create_app()
+    app.dependency_overrides[get_user_service] = lambda: user_service
+    app.dependency_overrides[get_portfolio_cache] = lambda: portfolio_cache
+    app.dependency_overrides[get_transaction_horizon] = lambda: partition_horizon(3)
+    app.dependency_overrides[get_uow] = lambda: SqlAlchemyUnitOfWork(session_factory, repo_factory)
+    return app
+
+
+async def create_schema(database_url: str) -> None:
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, env: dict[str, str]) -> subprocess.Popen:
+    command = [
+        sys.executable,
+        '-m',
+        'src.entrypoints.cli.serve',
+        '--app',
+        'benchmarks.scaling:worker_app',
+        '--factory',
+        '--lifespan',
+        'off',
+        '--host',
+        '127.0.0.1',
+        '--port',
+        str(port),
+        '--workers',
+        str(workers),
+        '--log-level',
+        'warning',
+    ]
+    return subprocess.Popen(command, env=env)
+
+
+async def wait_ready(base_url: str, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f'сервер завершился с кодом {server.returncode}')
+            try:
+                await client.get('/api/openapi.json')
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError('сервер не поднялся за отведённое время')
+
+
+async def measure(args: argparse.Namespace, workers: int, env: dict[str, str]) -> dict:
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = start_server(workers, port, env)
+    try:
+        await wait_ready(base_url, server)
+        limits = httpx.Limits(
+            max_connections=args.concurrency,
+            max_keepalive_connections=args.concurrency,
+        )
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            report = await run_load(
+                client,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                mix=parse_mix(args.mix),
+            )
+    finally:
+        server.terminate()
+        server.wait(timeout=STARTUP_TIMEOUT)
+
+    p99 = max(
+        (op['latency_ms']['p99'] for op in report.to_dict()['operations'].values()),
+        default=0.0,
+    )
+    return {
+        'workers': workers,
+        'throughput': report.throughput,
+        'p99_ms': p99,
+        'error_rate': report.error_rate,
+    }
+
+
+def parse_workers(value: str) -> list[int]:
+    counts = sorted({int(part) for part in value.split(',')})
+    if not counts or counts[0] < 1:
+        raise argparse.ArgumentTypeError(f'ожидаются положительные числа: {value}')
+    return counts
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    cores = os.cpu_count() or 1
+    default_workers = ','.join(str(n) for n in (1, 2, 4, 8) if n <= cores) or '1'
+    parser = argparse.ArgumentParser(description='Масштабирование по числу воркеров')
+    parser.add_argument('--workers', type=parse_workers, default=parse_workers(default_workers))
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--database-url', help='по умолчанию — временный файл SQLite')
+    parser.add_argument('--budget', type=int, help='бюджет соединений на все воркеры')
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> list[dict]:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f'sqlite+aiosqlite:///{tmp}/scaling.db'
+        await create_schema(database_url)
+        env = {**os.environ, 'SCALING_DATABASE_URL': database_url}
+        if args.budget is not None:
+            env['SCALING_DB_BUDGET'] = str(args.budget)
+
+        results = []
+        for workers in args.workers:
+            results.append(await measure(args, workers, env))
+
+    base = results[0]['throughput'] / results[0]['workers'] or 1.0
+    print(f'{"workers":>7} {"rps":>9} {"speedup":>8} {"p99, ms":>9} {"errors":>7}')
+    for r in results:
+        print(
+            f'{r["workers"]:>7} {r["throughput"]:>9.0f} {r["throughput"] / base:>8.2f} '
+            f'{r["p99_ms"]:>9.1f} {r["error_rate"]:>7.2%}',
+        )
+    return results
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Пропускная способность доменной модели портфеля.
+
+Каждый раунд применяет пачку из ``TRANSACTIONS_PER_ROUND`` транзакций к свежему портфелю,
+поэтому ``TRANSACTIONS_PER_ROUND / mean`` — число транзакций в секунду. Портфель и
+транзакции готовятся в ``setup`` и не входят в замер. Генератор случайных чисел
+инициализируется фиксированным seed, чтобы нагрузка была одинаковой между запусками.
+"""
+
+import datetime
+import random
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from benchmarks.conftest import SEED
+from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.enums import TransactionType
+
+TRANSACTIONS_PER_ROUND = 1000
+HOLDING_COUNTS = [1, 10, 100, 1000]
+WORKLOADS = {'buy': 1.0, 'sell': 0.0, 'mixed': 0.7}
+
+_EXECUTED_AT = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+
+
+def _asset(i: int) -> str:
+    return f'MOEX:A{i:04d}'
+
+
+def _make_portfolio(holdings_count: int) -> Portfolio:
+    holdings = [
+        Holding(_asset(i), quantity=Decimal('1000000'), average_cost=Decimal('100.25'))
+        for i in range(holdings_count)
+    ]
+    return Portfolio(user_id=uuid.uuid4(), name='bench', currency='RUB', holdings=holdings)
+
+
+def _make_transactions(portfolio: Portfolio, holdings_count: int, buy_ratio: float, rng):
+    transactions = []
+    for _ in range(TRANSACTIONS_PER_ROUND):
+        tx_type = TransactionType.BUY if rng.random() < buy_ratio else TransactionType.SELL
+        quantity = Decimal(rng.randint(1, 100))
+        price = Decimal(rng.randint(9000, 11000)) / 100
+        transactions.append(
+            Transaction(
+                portfolio_id=portfolio.id,
+                asset_id=_asset(rng.randrange(holdings_count)),
+                transaction_type=tx_type,
+                quantity=quantity,
+                price_per_unit=price,
+                total_amount=quantity * price,
+                executed_at=_EXECUTED_AT,
+                currency='RUB',
+            ),
+        )
+    return transactions
+
+
+def _replay(portfolio: Portfolio, transactions: list[Transaction]) -> None:
+    for tx in transactions:
+        portfolio.execute_transaction(tx)
+
+
+@pytest.mark.parametrize('holdings_count', HOLDING_COUNTS)
+@pytest.mark.parametrize('workload', list(WORKLOADS))
+def test_execute_transaction(benchmark, workload, holdings_count):
+    benchmark.group = f'execute_transaction:{workload}'
+    benchmark.extra_info['transactions_per_round'] = TRANSACTIONS_PER_ROUND
+    rng = random.Random(SEED)
+
+    def setup():
+        portfolio = _make_portfolio(holdings_count)
+        transactions = _make_transactions(portfolio, holdings_count, WORKLOADS[workload], rng)
+        return (portfolio, transactions), {}
+
+    benchmark.pedantic(_replay, setup=setup, rounds=30, warmup_rounds=2)
+
+
+@pytest.mark.benchmark(group='construction')
+def test_holding_construction(benchmark):
+    quantity, cost = Decimal('280.2'), Decimal('281.43')
+    benchmark(Holding, 'MOEX:SBER', quantity, cost)
+
+
+@pytest.mark.benchmark(group='construction')
+def test_transaction_construction(benchmark):
+    portfolio_id = uuid.uuid4()
+    quantity, price = Decimal('10'), Decimal('150.5')
+    benchmark(
+        Transaction,
+        portfolio_id,
+        'NASDAQ:AAPL',
+        TransactionType.BUY,
+        quantity,
+        price,
+        quantity * price,
+        _EXECUTED_AT,
+        'USD',
+    )
@@ -0,0 +1,89 @@
+"""Decimal против фиксированной точки: replay транзакций и оценка портфеля.
+
+Нагрузка та же, что в ``test_domain.py`` (смешанный поток покупок и продаж). Для
+фиксированной точки замеряются два варианта: с конвертацией каждой транзакции на входе
+(``replay``) и на заранее сконвертированных транзакциях (``execute_transaction``) —
+разница показывает стоимость границы Decimal → int.
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from benchmarks.conftest import SEED
+from benchmarks.test_domain import (
+    WORKLOADS,
+    _asset,
+    _make_portfolio,
+    _make_transactions,
+    _replay,
+)
+from src.domain.fixed_point import FixedPointPortfolio, FixedPointTransaction, to_fixed
+
+HOLDINGS_COUNT = 100
+WORKLOAD = 'mixed'
+
+
+def _setup(rng):
+    portfolio = _make_portfolio(HOLDINGS_COUNT)
+    transactions = _make_transactions(portfolio, HOLDINGS_COUNT, WORKLOADS[WORKLOAD], rng)
+    return portfolio, transactions
+
+
+def _replay_fixed(portfolio, transactions):
+    for tx in transactions:
+        portfolio.execute_transaction(tx)
+
+
+@pytest.mark.benchmark(group='replay')
+def test_replay_decimal(benchmark):
+    rng = random.Random(SEED)
+    benchmark.pedantic(_replay, setup=lambda: (_setup(rng), {}), rounds=30, warmup_rounds=2)
+
+
+@pytest.mark.benchmark(group='replay')
+def test_replay_fixed_point_with_conversion(benchmark):
+    rng = random.Random(SEED)
+
+    def setup():
+        portfolio, transactions = _setup(rng)
+        return (FixedPointPortfolio.from_portfolio(portfolio), transactions), {}
+
+    benchmark.pedantic(
+        lambda p, txs: p.replay(txs),
+        setup=setup,
+        rounds=30,
+        warmup_rounds=2,
+    )
+
+
+@pytest.mark.benchmark(group='replay')
+def test_replay_fixed_point(benchmark):
+    rng = random.Random(SEED)
+
+    def setup():
+        portfolio, transactions = _setup(rng)
+        fixed = [FixedPointTransaction.from_transaction(tx) for tx in transactions]
+        return (FixedPointPortfolio.from_portfolio(portfolio), fixed), {}
+
+    benchmark.pedantic(_replay_fixed, setup=setup, rounds=30, warmup_rounds=2)
+
+
+@pytest.fixture(scope='module')
+def prices():
+    rng = random.Random(SEED)
+    return {_asset(i): Decimal(rng.randint(9000, 11000)) / 100 for i in range(HOLDINGS_COUNT)}
+
+
+@pytest.mark.benchmark(group='valuation')
+def test_market_value_decimal(benchmark, prices):
+    portfolio = _make_portfolio(HOLDINGS_COUNT)
+    benchmark(lambda: sum(h.quantity * prices[h.asset_id] for h in portfolio.holdings))
+
+
+@pytest.mark.benchmark(group='valuation')
+def test_market_value_fixed_point(benchmark, prices):
+    portfolio = FixedPointPortfolio.from_portfolio(_make_portfolio(HOLDINGS_COUNT))
+    fixed_prices = {asset_id: to_fixed(price) for asset_id, price in prices.items()}
+    benchmark(portfolio.market_value, fixed_prices)
@@ -0,0 +1,67 @@
+"""Накладные расходы PrometheusMiddleware на один запрос.
+
+Запуск:
+    pytest benchmarks/test_metrics_overhead.py
+
+Оба бенчмарка прогоняют пачку запросов через минимальное ASGI-приложение — с middleware
+и без. Разница между ними, делённая на размер пачки, и есть стоимость инструментации.
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.entrypoints.middlewares.metrics import PrometheusMiddleware
+
+REQUESTS_PER_ROUND = 1000
+OVERHEAD_BUDGET_SECONDS = 50e-6
+
+_ROUTE = SimpleNamespace(path='/api/v1/portfolio/portfolios/{portfolio_id}')
+
+
+async def _app(scope, receive, send):
+    scope['route'] = _ROUTE
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+async def _receive():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def _send(message):
+    pass
+
+
+async def _drive(app, n: int) -> None:
+    for _ in range(n):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/v1/portfolio/portfolios/1'}
+        await app(scope, _receive, _send)
+
+
+@pytest.mark.benchmark(group='metrics-middleware')
+def test_bare_app(benchmark, loop):
+    benchmark(lambda: loop.run_until_complete(_drive(_app, REQUESTS_PER_ROUND)))
+
+
+@pytest.mark.benchmark(group='metrics-middleware')
+def test_instrumented_app(benchmark, loop):
+    app = PrometheusMiddleware(_app)
+    benchmark(lambda: loop.run_until_complete(_drive(app, REQUESTS_PER_ROUND)))
+
+
+def test_overhead_within_budget(loop):
+    app = PrometheusMiddleware(_app)
+
+    def best_of(target, repeats: int = 7) -> float:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            loop.run_until_complete(_drive(target, REQUESTS_PER_ROUND))
+            timings.append(time.perf_counter() - start)
+        return min(timings) / REQUESTS_PER_ROUND
+
+    overhead = best_of(app) - best_of(_app)
+    print(f'\nНакладные расходы PrometheusMiddleware: {overhead * 1e6:.2f} мкс/запрос')
+    assert overhead < OVERHEAD_BUDGET_SECONDS
@@ -0,0 +1,43 @@
+"""Холодный старт: импорт приложения и bootstrap.
+
+Импорт меряется в отдельном процессе — в текущем модули уже закешированы в
+``sys.modules``. Bootstrap гоняется на in-memory бэкенде без Vault, то есть замеряется
+собственная стоимость фаз старта без сетевых зависимостей; на реальном окружении
+разбивку по фазам пишет в лог ``StartupTimer``.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from src.bootstrap import bootstrap
+from src.config.settings import get_settings
+
+
+class _NoopSettingsLoader:
+    async def load(self):
+        pass
+
+
+@pytest.mark.benchmark(group='startup')
+def test_import_app(benchmark):
+    cmd = [sys.executable, '-c', 'import src.entrypoints.fastapi_app']
+    benchmark.pedantic(subprocess.run, args=(cmd,), kwargs={'check': True}, rounds=5)
+
+
+@pytest.mark.benchmark(group='startup')
+def test_bootstrap_memory_backend(benchmark, loop, monkeypatch):
+    for name in ('FASTAPI_SECRET', 'POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_DB'):
+        monkeypatch.setenv(name, 'bench')
+    monkeypatch.setenv('POSTGRES_HOST', 'localhost')
+    monkeypatch.setenv('POSTGRES_PORT', '5432')
+    monkeypatch.setenv('REPOSITORY_BACKEND', 'memory')
+    monkeypatch.setattr('src.bootstrap.SettingsLoader', _NoopSettingsLoader)
+
+    def _cold_bootstrap():
+        get_settings.cache_clear()
+        return loop.run_until_complete(bootstrap())
+
+    benchmark(_cold_bootstrap)
+    get_settings.cache_clear()
@@ -0,0 +1,116 @@
+"""Стоимость построения SQL-выражений на горячем пути репозитория.
+
+Сравниваются два способа выполнить один и тот же запрос: выражение, собираемое на каждый
+вызов (как было раньше), и заранее собранное выражение модуля ``repository`` с bindparam.
+Разница — это CPU на построение конструкции и вычисление ключа кеша компиляции.
+
+Запуск с замером процессорного, а не настенного времени:
+
+    pytest benchmarks/test_statements.py --benchmark-timer=time.process_time
+"""
+
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, select
+
+from src.adapters import repository
+from src.adapters.assets import AssetRegistry
+from src.adapters.orm import holding_table, portfolio_table, transaction_table
+from src.domain.domain import Portfolio
+
+STATEMENTS_PER_ROUND = 200
+
+_EXECUTED_AT = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+
+
+@pytest.fixture(scope='module')
+def portfolio_id(loop, session_factory):
+    portfolio = Portfolio(user_id=uuid.uuid4(), name='bench', currency='RUB')
+
+    async def _add():
+        async with session_factory() as session:
+            await repository.SqlAlchemyPortfolioRepository(session).add(portfolio)
+            await session.commit()
+
+    loop.run_until_complete(_add())
+    return portfolio.id
+
+
+@pytest.fixture(scope='module')
+def asset_key(loop, session_factory):
+    async def _resolve():
+        async with session_factory() as session:
+            keys = await AssetRegistry().keys(session, ['MOEX:SBER'])
+            await session.commit()
+        return keys['MOEX:SBER']
+
+    return loop.run_until_complete(_resolve())
+
+
+def _transaction_params(portfolio_id, asset_key):
+    return {
+        'id': uuid.uuid4(),
+        'portfolio_id': portfolio_id,
+        'asset_key': asset_key,
+        'transaction_type': 'BUY',
+        'quantity': Decimal('1'),
+        'price_per_unit': Decimal('100'),
+        'total_amount': Decimal('100'),
+        'executed_at': _EXECUTED_AT,
+        'currency': 'RUB',
+    }
+
+
+async def _get_by_id_rebuilt(session, portfolio_id, asset_key):
+    await session.execute(select(portfolio_table).where(portfolio_table.c.id == portfolio_id))
+    await session.execute(
+        select(holding_table).where(holding_table.c.portfolio_id == portfolio_id),
+    )
+
+
+async def _get_by_id_prebuilt(session, portfolio_id, asset_key):
+    params = {'portfolio_id': portfolio_id}
+    await session.execute(repository._SELECT_PORTFOLIO_BY_ID, params)
+    await session.execute(repository._SELECT_HOLDINGS_BY_PORTFOLIO_ID, params)
+
+
+async def _add_transaction_rebuilt(session, portfolio_id, asset_key):
+    params = _transaction_params(portfolio_id, asset_key)
+    await session.execute(insert(transaction_table).values(**params))
+
+
+async def _add_transaction_prebuilt(session, portfolio_id, asset_key):
+    params = _transaction_params(portfolio_id, asset_key)
+    await session.execute(repository._INSERT_TRANSACTION, params)
+
+
+VARIANTS = {
+    'get_by_id': (_get_by_id_rebuilt, _get_by_id_prebuilt),
+    'add_transaction': (_add_transaction_rebuilt, _add_transaction_prebuilt),
+}
+
+
+@pytest.mark.parametrize('prebuilt', [False, True], ids=['rebuilt', 'prebuilt'])
+@pytest.mark.parametrize('operation', list(VARIANTS))
+def test_statement(
+    benchmark,
+    loop,
+    session_factory,
+    portfolio_id,
+    asset_key,
+    operation,
+    prebuilt,
+):
+    benchmark.group = f'statements:{operation}'
+    op = VARIANTS[operation][prebuilt]
+
+    async def _round():
+        async with session_factory() as session:
+            for _ in range(STATEMENTS_PER_ROUND):
+                await op(session, portfolio_id, asset_key)
+            await session.rollback()
+
+    benchmark(lambda: loop.run_until_complete(_round()))
@@ -0,0 +1,145 @@
+"""Справочник активов: целочисленные ключи вместо строковых идентификаторов в БД.
+
+Позиции и транзакции хранят ``asset_key`` — ссылку на строку ``assets`` — вместо
+строки вроде ``"MOEX:SBER"`` в каждой строке таблиц и индексов. Внешний API
+и доменная модель по-прежнему работают со строковым ``asset_id``; перевод
+выполняет репозиторий через ``AssetRegistry``.
+
+Реестр процесса загружается целиком при старте и дополняется по мере надобности:
+неизвестный код ищется в БД, а при отсутствии — добавляется. Строки кодов
+интернируются, поэтому все позиции и транзакции одного актива, прочитанные из БД,
+ссылаются на один и тот же объект строки.
+
+В реестр процесса попадают только записи, уже зафиксированные в БД. Актив,
+добавленный в текущей транзакции, до её фиксации виден лишь своей сессии
+(``session.info``): при откате транзакции ключа не станет, и реестр не должен
+его выдавать.
+"""
+
+import logging
+import sys
+from collections.abc import Iterable
+
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.adapters.orm import asset_table
+
+logger = logging.getLogger(__name__)
+
+_SELECT_ASSETS = select(asset_table.c.id, asset_table.c.code)
+_SELECT_ASSETS_BY_CODES = _SELECT_ASSETS.where(
+    asset_table.c.code.in_(bindparam('codes', expanding=True)),
+)
+_SELECT_ASSETS_BY_KEYS = _SELECT_ASSETS.where(
+    asset_table.c.id.in_(bindparam('asset_keys', expanding=True)),
+)
+# Один и тот же актив могут одновременно добавлять несколько реплик.
+_INSERT_ASSETS = {
+    'postgresql': postgresql.insert(asset_table).on_conflict_do_nothing(index_elements=['code']),
+    'sqlite': sqlite.insert(asset_table).on_conflict_do_nothing(index_elements=['code']),
+}
+
+# Ключи ``session.info``: активы, добавленные в незафиксированной транзакции, и признак
+# того, что реестр уже подписан на фиксацию и откат этой сессии.
+_PENDING = 'pending_assets'
+_TRACKED = 'pending_assets_tracked'
+
+
+class AssetRegistry:
+    """Двустороннее отображение кода актива в ключ, общее для процесса.
+
+    Note:
+        Не защищён блокировками: рассчитан на один event loop.
+
+    """
+
+    def __init__(self) -> None:
+        self._keys: dict[str, int] = {}
+        self._codes: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    async def load(self, session) -> int:
+        """Загружает весь справочник; возвращает число активов."""
+        rows = await session.execute(_SELECT_ASSETS)
+        for row in rows:
+            self._register(row.id, row.code)
+        logger.info('Справочник активов загружен: %d', len(self))
+        return len(self)
+
+    async def keys(self, session, codes: Iterable[str]) -> dict[str, int]:
+        """Ключи активов по кодам; недостающие активы добавляются в БД в ``session``."""
+        pending: dict[str, int] = session.info.get(_PENDING, {})
+        found: dict[str, int] = {}
+        missing = []
+        for code in set(codes):
+            key = self._keys.get(code, pending.get(code))
+            if key is None:
+                missing.append(code)
+            else:
+                found[code] = key
+        if not missing:
+            return found
+
+        rows = await session.execute(_SELECT_ASSETS_BY_CODES, {'codes': missing})
+        for row in rows:
+            self._register(row.id, row.code)
+            found[row.code] = row.id
+        missing = [code for code in missing if code not in found]
+        if not missing:
+            return found
+
+        dialect = session.get_bind().dialect.name
+        await session.execute(_INSERT_ASSETS[dialect], [{'code': code} for code in missing])
+        rows = await session.execute(_SELECT_ASSETS_BY_CODES, {'codes': missing})
+        pending = self._track(session)
+        for row in rows:
+            pending[row.code] = row.id
+            found[row.code] = row.id
+        return found
+
+    async def codes(self, session, keys: Iterable[int]) -> dict[int, str]:
+        """Коды активов по ключам; неизвестные ключи дочитываются из БД."""
+        found: dict[int, str] = {}
+        missing = []
+        for key in set(keys):
+            code = self._codes.get(key)
+            if code is None:
+                missing.append(key)
+            else:
+                found[key] = code
+        if not missing:
+            return found
+
+        pending = {key: code for code, key in session.info.get(_PENDING, {}).items()}
+        rows = await session.execute(_SELECT_ASSETS_BY_KEYS, {'asset_keys': missing})
+        for row in rows:
+            if row.id in pending:
+                found[row.id] = sys.intern(row.code)
+            else:
+                found[row.id] = self._register(row.id, row.code)
+        return found
+
+    def _track(self, session) -> dict[str, int]:
+        if not session.info.get(_TRACKED):
+            session.info[_TRACKED] = True
+            sync_session = session.sync_session
+            event.listen(sync_session, 'after_commit', self._on_commit)
+            event.listen(sync_session, 'after_rollback', self._on_rollback)
+        return session.info.setdefault(_PENDING, {})
+
+    def _on_commit(self, session) -> None:
+        for code, key in session.info.pop(_PENDING, {}).items():
+            self._register(key, code)
+
+    @staticmethod
+    def _on_rollback(session) -> None:
+        session.info.pop(_PENDING, None)
+
+    def _register(self, key: int, code: str) -> str:
+        code = sys.intern(code)
+        self._keys[code] = key
+        self._codes[key] = code
+        return code
@@ -0,0 +1,189 @@
+"""Репозиторий портфелей с общим кешем реплик перед БД.
+
+Портфель кладётся в кеш под ключом с версией: ``portfolio:<id>:<version>``. Версия
+увеличивается при каждом изменении портфеля, поэтому запись под таким ключом
+никогда не устаревает, и ей не страшны гонки записи в кеш с изменением в БД.
+Актуальная версия читается из БД дешёвым запросом без позиций — в той же
+транзакции, что и остальные чтения, поэтому репозиторий можно использовать
+и в пишущих единицах работы. Старые версии вытесняются по TTL.
+
+При изменении или удалении портфеля репозиторий публикует ``portfolio:<id>``
+в канал инвалидации, и реплики сбрасывают копии портфеля из своих кешей процесса.
+Публикация идёт до фиксации транзакции: реплика может успеть снова загрузить
+старую версию, но копии в кешах процесса всё равно сверяются с версией в БД,
+так что сообщение лишь освобождает память раньше TTL.
+"""
+
+import datetime
+import json
+from collections.abc import Iterable, Sequence
+from decimal import Decimal
+from uuid import UUID
+
+from src.adapters.factory import ABCPortfolioRepositoryFactory
+from src.adapters.repository import AbstractPortfolioRepository
+from src.domain.domain import Holding, Portfolio, PortfolioSummary, Transaction
+from src.infrastructure.redis_cache import SharedCache
+from src.infrastructure.tracing.tracing import traced
+
+INVALIDATION_CHANNEL = 'invalidate'
+
+
+def dump_portfolio(portfolio: Portfolio) -> bytes:
+    return json.dumps(
+        {
+            'id': str(portfolio.id),
+            'user_id': str(portfolio.user_id),
+            'name': portfolio.name,
+            'currency': portfolio.currency,
+            'created_at': portfolio.created_at.isoformat(),
+            'version': portfolio.version,
+            'holdings': [
+                [h.asset_id, str(h.quantity), str(h.average_cost)] for h in portfolio.holdings
+            ],
+        },
+        separators=(',', ':'),
+    ).encode()
+
+
+def load_portfolio(data: bytes) -> Portfolio:
+    raw = json.loads(data)
+    return Portfolio(
+        user_id=UUID(raw['user_id']),
+        name=raw['name'],
+        currency=raw['currency'],
+        created_at=datetime.datetime.fromisoformat(raw['created_at']),
+        holdings=[Holding(a, Decimal(q), Decimal(c)) for a, q, c in raw['holdings']],
+        portfolio_id=UUID(raw['id']),
+        version=raw['version'],
+    )
+
+
+class CachedPortfolioRepository(AbstractPortfolioRepository):
+    """Читает портфели через общий кеш, остальное передаёт репозиторию ``inner``.
+
+    Args:
+        inner: Репозиторий поверх БД в текущей единице работы.
+        cache: Общий кеш реплик.
+        ttl: Время жизни записи портфеля в кеше, в секундах.
+
+    """
+
+    def __init__(self, inner: AbstractPortfolioRepository, cache: SharedCache, ttl: float) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.ttl = ttl
+
+    def _key(self, portfolio_id: UUID, version: int) -> str:
+        return self.cache.key('portfolio', portfolio_id, version)
+
+    @traced('cached_repository.get_by_id')
+    async def get_by_id(self, portfolio_id: UUID) -> Portfolio | None:
+        version = await self.inner.get_version(portfolio_id)
+        if version is None:
+            return None
+        data = await self.cache.get(self._key(portfolio_id, version))
+        if data is not None:
+            return load_portfolio(data)
+        portfolio = await self.inner.get_by_id(portfolio_id)
+        if portfolio is not None:
+            await self._store([portfolio])
+        return portfolio
+
+    @traced('cached_repository.get_by_user_id')
+    async def get_by_user_id(self, user_id: UUID) -> list[Portfolio]:
+        versions = await self.inner.get_versions_by_user_id(user_id)
+        keys = [self._key(portfolio_id, version) for portfolio_id, version in versions.items()]
+        cached = await self.cache.get_many(keys)
+        found = {
+            portfolio_id: load_portfolio(data)
+            for portfolio_id, data in zip(versions, cached, strict=True)
+            if data is not None
+        }
+        missing = [portfolio_id for portfolio_id in versions if portfolio_id not in found]
+        if missing:
+            loaded = await self.inner.get_many(missing)
+            await self._store(loaded.values())
+            found.update(loaded)
+        return [found[portfolio_id] for portfolio_id in versions if portfolio_id in found]
+
+    async def get_many(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        return await self.inner.get_many(portfolio_ids)
+
+    async def get_for_update(self, portfolio_id: UUID) -> Portfolio | None:
+        return await self.inner.get_for_update(portfolio_id)
+
+    async def get_many_for_update(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        return await self.inner.get_many_for_update(portfolio_ids)
+
+    async def add(self, portfolio: Portfolio) -> None:
+        await self.inner.add(portfolio)
+
+    async def add_many(self, portfolios: Sequence[Portfolio]) -> None:
+        await self.inner.add_many(portfolios)
+
+    async def get_summaries_by_user_id(self, user_id: UUID) -> list[PortfolioSummary]:
+        return await self.inner.get_summaries_by_user_id(user_id)
+
+    async def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        return await self.inner.get_recently_active_ids(limit)
+
+    async def get_version(self, portfolio_id: UUID) -> int | None:
+        return await self.inner.get_version(portfolio_id)
+
+    async def get_versions_by_user_id(self, user_id: UUID) -> dict[UUID, int]:
+        return await self.inner.get_versions_by_user_id(user_id)
+
+    async def update(self, portfolio: Portfolio) -> None:
+        await self.inner.update(portfolio)
+        await self._invalidate(portfolio.id)
+
+    async def update_many(self, portfolios: Sequence[Portfolio]) -> None:
+        await self.inner.update_many(portfolios)
+        for portfolio in portfolios:
+            await self._invalidate(portfolio.id)
+
+    async def delete(self, portfolio_id: UUID) -> None:
+        await self.inner.delete(portfolio_id)
+        await self._invalidate(portfolio_id)
+
+    async def add_transaction(self, transaction: Transaction) -> None:
+        await self.inner.add_transaction(transaction)
+
+    async def add_transactions(self, transactions: Sequence[Transaction]) -> None:
+        await self.inner.add_transactions(transactions)
+
+    async def get_existing_transaction_ids(
+        self,
+        transaction_ids: Iterable[UUID],
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> set[UUID]:
+        return await self.inner.get_existing_transaction_ids(transaction_ids, since, until)
+
+    async def get_transactions(
+        self,
+        portfolio_id: UUID,
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> list[Transaction]:
+        return await self.inner.get_transactions(portfolio_id, since, until)
+
+    async def _invalidate(self, portfolio_id: UUID) -> None:
+        await self.cache.publish(INVALIDATION_CHANNEL, f'portfolio:{portfolio_id}')
+
+    async def _store(self, portfolios: Iterable[Portfolio]) -> None:
+        await self.cache.set_many(
+            {self._key(p.id, p.version): dump_portfolio(p) for p in portfolios},
+            self.ttl,
+        )
+
+
+class CachedPortfolioRepositoryFactory(ABCPortfolioRepositoryFactory):
+    def __init__(self, inner: ABCPortfolioRepositoryFactory, cache: SharedCache, ttl: float):
+        self.inner = inner
+        self.cache = cache
+        self.ttl = ttl
+
+    def create(self, session) -> CachedPortfolioRepository:
+        return CachedPortfolioRepository(self.inner.create(session), self.cache, self.ttl)
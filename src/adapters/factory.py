@@ -2,7 +2,13 @@ import abc
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.adapters.repository import AbstractPortfolioRepository, SqlAlchemyPortfolioRepository
+from src.adapters.assets import AssetRegistry
+from src.adapters.repository import (
+    AbstractPortfolioRepository,
+    InMemoryPortfolioRepository,
+    SqlAlchemyPortfolioRepository,
+)
+from src.infrastructure.database.memory import InMemorySession
 
 
 class ABCPortfolioRepositoryFactory(abc.ABC):
@@ -15,5 +21,13 @@ class ABCPortfolioRepositoryFactory(abc.ABC):
 
 
 class SQLAlchemyPortfolioRepositoryFactory(ABCPortfolioRepositoryFactory):
+    def __init__(self, assets: AssetRegistry | None = None) -> None:
+        self.assets = assets if assets is not None else AssetRegistry()
+
     def create(self, session: AsyncSession) -> SqlAlchemyPortfolioRepository:
-        return SqlAlchemyPortfolioRepository(session)
+        return SqlAlchemyPortfolioRepository(session, self.assets)
+
+
+class InMemoryPortfolioRepositoryFactory(ABCPortfolioRepositoryFactory):
+    def create(self, session: InMemorySession) -> InMemoryPortfolioRepository:  # type: ignore[override]
+        return InMemoryPortfolioRepository(session)
@@ -0,0 +1,123 @@
+import datetime
+from collections.abc import AsyncIterator
+from uuid import UUID
+
+from sqlalchemy import RowMapping, bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.adapters.orm import asset_table, holding_table, portfolio_table, transaction_table
+from src.adapters.repository import transaction_from_row
+from src.domain.domain import Holding, Portfolio, Transaction
+
+# Пакетное чтение не держит справочник активов: код актива подставляется соединением
+# со справочником под прежним именем столбца ``asset_id``.
+_HOLDINGS = select(holding_table, asset_table.c.code.label('asset_id')).join(
+    asset_table,
+    asset_table.c.id == holding_table.c.asset_key,
+)
+_TRANSACTIONS = select(transaction_table, asset_table.c.code.label('asset_id')).join(
+    asset_table,
+    asset_table.c.id == transaction_table.c.asset_key,
+)
+
+# Диапазоны задаются границами id: и портфели, и транзакции, и позиции выбираются
+# по индексу на id/portfolio_id без длинных списков IN.
+_SELECT_PORTFOLIO_IDS = select(portfolio_table.c.id).order_by(portfolio_table.c.id)
+_SELECT_PORTFOLIOS_IN_RANGE = select(portfolio_table).where(
+    portfolio_table.c.id.between(bindparam('lower'), bindparam('upper')),
+)
+_SELECT_HOLDINGS_IN_RANGE = _HOLDINGS.where(
+    holding_table.c.portfolio_id.between(bindparam('lower'), bindparam('upper')),
+)
+_SELECT_TRANSACTIONS_IN_RANGE = _TRANSACTIONS.where(
+    transaction_table.c.portfolio_id.between(bindparam('lower'), bindparam('upper')),
+).order_by(
+    transaction_table.c.portfolio_id,
+    transaction_table.c.executed_at,
+    transaction_table.c.id,
+)
+
+# Для выгрузки: новые строки ищутся по времени записи, а читаются в порядке executed_at,
+# чтобы файлы одного месяца писались подряд.
+_SELECT_TRANSACTIONS_RECORDED_BETWEEN = _TRANSACTIONS.where(
+    transaction_table.c.recorded_at > bindparam('after'),
+    transaction_table.c.recorded_at <= bindparam('until'),
+).order_by(transaction_table.c.executed_at, transaction_table.c.id)
+_SELECT_ALL_HOLDINGS = _HOLDINGS.order_by(holding_table.c.portfolio_id)
+
+
+class SqlAlchemyLedgerReader:
+    """Потоковое чтение портфелей и журнала транзакций для пакетной обработки.
+
+    В отличие от репозитория, работает с диапазонами id портфелей и не держит
+    весь результат в памяти: id и транзакции читаются порциями по ``yield_per`` строк.
+    """
+
+    def __init__(self, session: AsyncSession, yield_per: int = 1000) -> None:
+        self.session = session
+        self.yield_per = yield_per
+
+    async def iter_portfolio_ids(self) -> AsyncIterator[UUID]:
+        """Все id портфелей по возрастанию."""
+        result = await self.session.stream_scalars(
+            _SELECT_PORTFOLIO_IDS.execution_options(yield_per=self.yield_per),
+        )
+        async for portfolio_id in result:
+            yield portfolio_id
+
+    async def get_portfolios_in_range(self, lower: UUID, upper: UUID) -> dict[UUID, Portfolio]:
+        """Портфели с id в ``[lower, upper]`` вместе с сохранёнными позициями."""
+        params = {'lower': lower, 'upper': upper}
+        rows = await self.session.execute(_SELECT_PORTFOLIOS_IN_RANGE, params)
+        portfolios = {
+            p.id: Portfolio(
+                user_id=p.user_id,
+                name=p.name,
+                currency=p.currency,
+                created_at=p.created_at,
+                portfolio_id=p.id,
+                version=p.version,
+            )
+            for p in rows.fetchall()
+        }
+
+        rows_h = await self.session.execute(_SELECT_HOLDINGS_IN_RANGE, params)
+        for h in rows_h.fetchall():
+            portfolio = portfolios.get(h.portfolio_id)
+            if portfolio is not None:
+                portfolio.holdings.append(Holding(h.asset_id, h.quantity, h.average_cost))
+        return portfolios
+
+    async def stream_transactions(self, lower: UUID, upper: UUID) -> AsyncIterator[Transaction]:
+        """Транзакции портфелей из диапазона в порядке воспроизведения.
+
+        Порядок — по портфелю, затем по ``executed_at`` и ``id`` для одинакового времени.
+        Полная сверка читает всю историю, поэтому здесь просматриваются все партиции.
+        """
+        result = await self.session.stream(
+            _SELECT_TRANSACTIONS_IN_RANGE.execution_options(yield_per=self.yield_per),
+            {'lower': lower, 'upper': upper},
+        )
+        async for row in result:
+            yield transaction_from_row(row, row.asset_id)
+
+    async def stream_transaction_rows(
+        self,
+        after: datetime.datetime,
+        until: datetime.datetime,
+    ) -> AsyncIterator[RowMapping]:
+        """Строки транзакций, записанные в БД в интервале ``(after, until]``."""
+        result = await self.session.stream(
+            _SELECT_TRANSACTIONS_RECORDED_BETWEEN.execution_options(yield_per=self.yield_per),
+            {'after': after, 'until': until},
+        )
+        async for row in result.mappings():
+            yield row
+
+    async def stream_holding_rows(self) -> AsyncIterator[RowMapping]:
+        """Все строки позиций; один запрос — один согласованный снимок."""
+        result = await self.session.stream(
+            _SELECT_ALL_HOLDINGS.execution_options(yield_per=self.yield_per),
+        )
+        async for row in result.mappings():
+            yield row
@@ -1,9 +1,31 @@
 import uuid
 
-from sqlalchemy import UUID, Column, DateTime, ForeignKey, MetaData, Numeric, String, Table, func
+from sqlalchemy import (
+    UUID,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    func,
+    text,
+)
 
 metadata = MetaData()
 
+# Справочник активов: строковый идентификатор актива хранится один раз, а позиции
+# и транзакции ссылаются на него компактным целочисленным ключом (см. assets.py).
+asset_table = Table(
+    'assets',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('code', String(100), nullable=False, unique=True),
+)
+
 portfolio_table = Table(
     'portfolios',
     metadata,
@@ -12,6 +34,7 @@ portfolio_table = Table(
     Column('name', String(100), nullable=False),
     Column('currency', String(10), nullable=False),
     Column('created_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column('version', Integer, nullable=False, server_default='1'),
 )
 
 holding_table = Table(
@@ -25,11 +48,14 @@ holding_table = Table(
         nullable=False,
         index=True,
     ),
-    Column('asset_id', String(100), nullable=False),
+    Column('asset_key', Integer, ForeignKey('assets.id'), nullable=False),
     Column('quantity', Numeric(precision=20, scale=10), nullable=False),
     Column('average_cost', Numeric(precision=20, scale=10), nullable=False),
 )
 
+# В Postgres таблица секционирована по месяцам executed_at (см. partitions.py), поэтому
+# executed_at входит в первичный ключ: уникальность в секционированной таблице
+# обеспечивается только ключами, содержащими ключ секционирования.
 transaction_table = Table(
     'transactions',
     metadata,
@@ -39,13 +65,37 @@ transaction_table = Table(
         UUID(as_uuid=True),
         ForeignKey('portfolios.id'),
         nullable=False,
-        index=True,
     ),
-    Column('asset_id', String(100), nullable=False),
+    Column('asset_key', Integer, ForeignKey('assets.id'), nullable=False),
     Column('transaction_type', String(20), nullable=False),
     Column('quantity', Numeric(precision=20, scale=10), nullable=False),
     Column('price_per_unit', Numeric(precision=20, scale=10), nullable=False),
     Column('total_amount', Numeric(precision=20, scale=10), nullable=False),
-    Column('executed_at', DateTime(timezone=True), nullable=False),
+    Column('executed_at', DateTime(timezone=True), primary_key=True),
     Column('currency', String(10), nullable=False),
+    # Время записи в БД: по нему выгрузка для аналитики находит новые строки,
+    # даже если executed_at задним числом.
+    Column('recorded_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index('ix_transactions_portfolio_id_executed_at', 'portfolio_id', 'executed_at'),
+    Index('ix_transactions_recorded_at', 'recorded_at'),
+    postgresql_partition_by='RANGE (executed_at)',
+)
+
+portfolio_summary_table = Table(
+    'portfolio_summaries',
+    metadata,
+    Column(
+        'portfolio_id',
+        UUID(as_uuid=True),
+        ForeignKey('portfolios.id', ondelete='CASCADE'),
+        primary_key=True,
+    ),
+    Column('holdings_count', Integer, nullable=False, server_default='0'),
+    Column('total_cost', Numeric(precision=20, scale=10), nullable=False, server_default='0'),
+    Column('last_transaction_at', DateTime(timezone=True), nullable=True),
+    # Время записи последней транзакции (не executed_at), а без транзакций — создание
+    # портфеля; поддерживается репозиторием, чтобы выборка недавно активных портфелей
+    # шла по индексу.
+    Column('last_activity_at', DateTime(timezone=True), nullable=False),
+    Index('ix_portfolio_summaries_last_activity_at', text('last_activity_at DESC')),
 )
@@ -1,17 +1,25 @@
 import abc
+import datetime
 import uuid
+from collections.abc import Iterable, Sequence
 from uuid import UUID
 
+from sqlalchemy import bindparam, case, func, insert, or_, select
 from sqlalchemy import delete as sa_delete
-from sqlalchemy import insert, select
 from sqlalchemy import update as sa_update
 
+from src.adapters.assets import AssetRegistry
 from src.adapters.orm import (
     holding_table,
+    portfolio_summary_table,
     portfolio_table,
     transaction_table,
 )
-from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.domain import Holding, Portfolio, PortfolioSummary, Transaction
+from src.domain.enums import TransactionType
+from src.domain.exceptions import PortfolioVersionConflictError
+from src.infrastructure.database.memory import InMemorySession
+from src.infrastructure.tracing.tracing import traced
 
 
 class AbstractPortfolioRepository(abc.ABC):
@@ -19,16 +27,72 @@ class AbstractPortfolioRepository(abc.ABC):
     async def add(self, portfolio: Portfolio) -> None:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def add_many(self, portfolios: Sequence[Portfolio]) -> None:
+        """Добавляет пачку новых портфелей за фиксированное число запросов."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def get_by_id(self, portfolio_id: UUID) -> Portfolio | None:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def get_for_update(self, portfolio_id: UUID) -> Portfolio | None:
+        """Как ``get_by_id``, но блокирует портфель до конца транзакции."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def get_by_user_id(self, user_id: UUID) -> list[Portfolio]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def get_many(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        """Портфели по списку id; отсутствующие id в результат не попадают."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_many_for_update(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        """Как ``get_many``, но блокирует портфели до конца транзакции в порядке id."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_summaries_by_user_id(self, user_id: UUID) -> list[PortfolioSummary]:
+        """Сводки по портфелям пользователя без загрузки позиций."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        """Id портфелей с самой свежей активностью: последней транзакцией или созданием."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_version(self, portfolio_id: UUID) -> int | None:
+        """Версия портфеля без загрузки позиций; None, если портфеля нет."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_versions_by_user_id(self, user_id: UUID) -> dict[UUID, int]:
+        """Версии всех портфелей пользователя без загрузки позиций."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def update(self, portfolio: Portfolio) -> None:
+        """Сохраняет портфель, если его версия не изменилась с момента чтения.
+
+        Raises:
+            PortfolioVersionConflictError: если портфель успели изменить.
+
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def update_many(self, portfolios: Sequence[Portfolio]) -> None:
+        """Сохраняет изменения пачки портфелей за фиксированное число запросов.
+
+        Raises:
+            PortfolioVersionConflictError: если хотя бы один портфель успели изменить.
+
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -39,116 +103,562 @@ class AbstractPortfolioRepository(abc.ABC):
     async def add_transaction(self, transaction: Transaction) -> None:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def add_transactions(self, transactions: Sequence[Transaction]) -> None:
+        """Сохраняет пачку транзакций и сдвигает время последней транзакции в сводках."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_existing_transaction_ids(
+        self,
+        transaction_ids: Iterable[UUID],
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> set[UUID]:
+        """Какие из транзакций с ``since <= executed_at <= until`` уже сохранены."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_transactions(
+        self,
+        portfolio_id: UUID,
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> list[Transaction]:
+        """Транзакции портфеля с ``since <= executed_at < until`` в порядке исполнения."""
+        raise NotImplementedError
+
+
+def transaction_from_row(row, asset_id: str) -> Transaction:
+    return Transaction(
+        portfolio_id=row.portfolio_id,
+        asset_id=asset_id,
+        transaction_type=TransactionType(row.transaction_type),
+        quantity=row.quantity,
+        price_per_unit=row.price_per_unit,
+        total_amount=row.total_amount,
+        executed_at=row.executed_at,
+        currency=row.currency,
+        transaction_id=row.id,
+    )
+
+
+# Запросы горячего пути собираются один раз при импорте: SQLAlchemy не тратит время
+# на построение конструкций и вычисление ключа кеша компиляции на каждый вызов.
+# Значения передаются через bindparam, поэтому текст SQL стабилен — это же позволяет
+# asyncpg переиспользовать подготовленные выражения.
+_SELECT_PORTFOLIO_BY_ID = select(portfolio_table).where(
+    portfolio_table.c.id == bindparam('portfolio_id'),
+)
+_SELECT_PORTFOLIO_BY_ID_FOR_UPDATE = _SELECT_PORTFOLIO_BY_ID.with_for_update()
+_SELECT_PORTFOLIOS_BY_USER_ID = select(portfolio_table).where(
+    portfolio_table.c.user_id == bindparam('user_id'),
+)
+_SELECT_PORTFOLIOS_BY_IDS = select(portfolio_table).where(
+    portfolio_table.c.id.in_(bindparam('portfolio_ids', expanding=True)),
+)
+# Блокировки берутся в порядке id: две пачки с общими портфелями не ждут друг друга
+# крест-накрест.
+_SELECT_PORTFOLIOS_BY_IDS_FOR_UPDATE = _SELECT_PORTFOLIOS_BY_IDS.order_by(
+    portfolio_table.c.id,
+).with_for_update()
+_SELECT_VERSION_BY_ID = select(portfolio_table.c.version).where(
+    portfolio_table.c.id == bindparam('portfolio_id'),
+)
+_SELECT_VERSIONS_BY_USER_ID = select(portfolio_table.c.id, portfolio_table.c.version).where(
+    portfolio_table.c.user_id == bindparam('user_id'),
+)
+_SELECT_HOLDINGS_BY_PORTFOLIO_ID = select(holding_table).where(
+    holding_table.c.portfolio_id == bindparam('portfolio_id'),
+)
+_SELECT_HOLDINGS_BY_PORTFOLIO_IDS = select(holding_table).where(
+    holding_table.c.portfolio_id.in_(bindparam('portfolio_ids', expanding=True)),
+)
+_SELECT_SUMMARIES_BY_USER_ID = (
+    select(
+        portfolio_table.c.id,
+        portfolio_table.c.name,
+        portfolio_table.c.currency,
+        portfolio_table.c.created_at,
+        portfolio_table.c.version,
+        func.coalesce(portfolio_summary_table.c.holdings_count, 0).label('holdings_count'),
+        func.coalesce(portfolio_summary_table.c.total_cost, 0).label('total_cost'),
+        portfolio_summary_table.c.last_transaction_at,
+    )
+    .select_from(
+        portfolio_table.outerjoin(
+            portfolio_summary_table,
+            portfolio_summary_table.c.portfolio_id == portfolio_table.c.id,
+        ),
+    )
+    .where(portfolio_table.c.user_id == bindparam('user_id'))
+)
+# Активность портфеля — запись последней транзакции, а если их не было — создание. Её хранит
+# сводка в last_activity_at, и выборка читает только начало индекса по этой колонке.
+_SELECT_RECENTLY_ACTIVE_IDS = (
+    select(portfolio_summary_table.c.portfolio_id)
+    .order_by(portfolio_summary_table.c.last_activity_at.desc())
+    .limit(bindparam('limit'))
+)
+# Окно по executed_at задаётся простыми сравнениями с параметрами — так Postgres
+# отсекает лишние помесячные партиции (в том числе для подготовленных выражений).
+_SELECT_TRANSACTIONS_BY_PORTFOLIO_ID = (
+    select(transaction_table)
+    .where(
+        transaction_table.c.portfolio_id == bindparam('portfolio_id'),
+        transaction_table.c.executed_at >= bindparam('since'),
+        transaction_table.c.executed_at < bindparam('until'),
+    )
+    .order_by(transaction_table.c.executed_at, transaction_table.c.id)
+)
+_INSERT_PORTFOLIO = insert(portfolio_table)
+_INSERT_HOLDING = insert(holding_table)
+_INSERT_TRANSACTION = insert(transaction_table)
+_INSERT_SUMMARY = insert(portfolio_summary_table)
+_UPDATE_SUMMARY_HOLDINGS = (
+    sa_update(portfolio_summary_table)
+    .where(portfolio_summary_table.c.portfolio_id == bindparam('summary_portfolio_id'))
+    .values(
+        holdings_count=bindparam('new_holdings_count'),
+        total_cost=bindparam('new_total_cost'),
+    )
+)
+# Транзакции могут приходить не по порядку исполнения: время только сдвигается вперёд.
+# last_transaction_at — наибольший executed_at и только растёт; last_activity_at —
+# время записи: транзакция задним или будущим числом — такая же недавняя активность.
+_UPDATE_SUMMARY_LAST_TRANSACTION = (
+    sa_update(portfolio_summary_table)
+    .where(portfolio_summary_table.c.portfolio_id == bindparam('summary_portfolio_id'))
+    .values(
+        last_transaction_at=case(
+            (
+                or_(
+                    portfolio_summary_table.c.last_transaction_at.is_(None),
+                    portfolio_summary_table.c.last_transaction_at < bindparam('executed_at'),
+                ),
+                bindparam('executed_at'),
+            ),
+            else_=portfolio_summary_table.c.last_transaction_at,
+        ),
+        last_activity_at=func.now(),
+    )
+)
+_SELECT_EXISTING_TRANSACTION_IDS = select(transaction_table.c.id).where(
+    transaction_table.c.id.in_(bindparam('transaction_ids', expanding=True)),
+    # Окно по executed_at ограничивает поиск нужными партициями.
+    transaction_table.c.executed_at >= bindparam('since'),
+    transaction_table.c.executed_at <= bindparam('until'),
+)
+_DELETE_HOLDINGS_BY_PORTFOLIO_IDS = sa_delete(holding_table).where(
+    holding_table.c.portfolio_id.in_(bindparam('portfolio_ids', expanding=True)),
+)
+# Версия в условии — оптимистическая блокировка: портфель, изменённый после чтения,
+# не обновляется, и запись с устаревшими позициями не затирает чужую.
+_UPDATE_PORTFOLIO = (
+    sa_update(portfolio_table)
+    .where(
+        portfolio_table.c.id == bindparam('portfolio_id'),
+        portfolio_table.c.version == bindparam('expected_version'),
+    )
+    .values(
+        name=bindparam('new_name'),
+        currency=bindparam('new_currency'),
+        version=portfolio_table.c.version + 1,
+    )
+)
+_DELETE_HOLDINGS_BY_PORTFOLIO_ID = sa_delete(holding_table).where(
+    holding_table.c.portfolio_id == bindparam('portfolio_id'),
+)
+_DELETE_SUMMARY = sa_delete(portfolio_summary_table).where(
+    portfolio_summary_table.c.portfolio_id == bindparam('portfolio_id'),
+)
+_DELETE_PORTFOLIO = sa_delete(portfolio_table).where(
+    portfolio_table.c.id == bindparam('portfolio_id'),
+)
+
 
 class SqlAlchemyPortfolioRepository(AbstractPortfolioRepository):
-    def __init__(self, session):
+    """Репозиторий портфелей поверх сессии SQLAlchemy.
+
+    Args:
+        session: Сессия текущей единицы работы.
+        assets: Справочник активов процесса; без него у репозитория свой, пустой.
+
+    """
+
+    def __init__(self, session, assets: AssetRegistry | None = None):
         self.session = session
+        self.assets = assets if assets is not None else AssetRegistry()
 
+    @traced('repository.add')
     async def add(self, portfolio: Portfolio) -> None:
-        stmt = insert(portfolio_table).values(
-            id=portfolio.id,
-            user_id=portfolio.user_id,
-            name=portfolio.name,
-            currency=portfolio.currency,
-            created_at=portfolio.created_at,
-        )
-        await self.session.execute(stmt)
-
-        for h in portfolio.holdings:
-            stmt_h = insert(holding_table).values(
-                id=uuid.uuid4(),
-                portfolio_id=portfolio.id,
-                asset_id=h.asset_id,
-                quantity=h.quantity,
-                average_cost=h.average_cost,
-            )
-            await self.session.execute(stmt_h)
+        await self._insert_portfolios([portfolio])
 
+    @traced('repository.add_many')
+    async def add_many(self, portfolios: Sequence[Portfolio]) -> None:
+        await self._insert_portfolios(portfolios)
+
+    @traced('repository.get_by_id')
     async def get_by_id(self, portfolio_id) -> Portfolio | None:
-        row = await self.session.execute(
-            select(portfolio_table).where(portfolio_table.c.id == portfolio_id),
-        )
+        return await self._get(_SELECT_PORTFOLIO_BY_ID, portfolio_id)
+
+    @traced('repository.get_for_update')
+    async def get_for_update(self, portfolio_id) -> Portfolio | None:
+        return await self._get(_SELECT_PORTFOLIO_BY_ID_FOR_UPDATE, portfolio_id)
+
+    async def _get(self, statement, portfolio_id) -> Portfolio | None:
+        row = await self.session.execute(statement, {'portfolio_id': portfolio_id})
         p_data = row.first()
         if not p_data:
             return None
 
         row_h = await self.session.execute(
-            select(holding_table).where(holding_table.c.portfolio_id == portfolio_id),
+            _SELECT_HOLDINGS_BY_PORTFOLIO_ID,
+            {'portfolio_id': portfolio_id},
         )
-        holdings = [Holding(h.asset_id, h.quantity, h.average_cost) for h in row_h.fetchall()]
+        rows = row_h.fetchall()
+        codes = await self.assets.codes(self.session, (h.asset_key for h in rows))
+        holdings = [Holding(codes[h.asset_key], h.quantity, h.average_cost) for h in rows]
+        return self._to_portfolio(p_data, holdings)
 
+    @traced('repository.get_by_user_id')
+    async def get_by_user_id(self, user_id) -> list[Portfolio]:
+        row = await self.session.execute(_SELECT_PORTFOLIOS_BY_USER_ID, {'user_id': user_id})
+        portfolios_data = row.fetchall()
+        holdings = await self._load_holdings([p.id for p in portfolios_data])
+        return [self._to_portfolio(p, holdings.get(p.id, [])) for p in portfolios_data]
+
+    @traced('repository.get_many')
+    async def get_many(self, portfolio_ids) -> dict[UUID, Portfolio]:
+        return await self._get_many(_SELECT_PORTFOLIOS_BY_IDS, portfolio_ids)
+
+    @traced('repository.get_many_for_update')
+    async def get_many_for_update(self, portfolio_ids) -> dict[UUID, Portfolio]:
+        return await self._get_many(_SELECT_PORTFOLIOS_BY_IDS_FOR_UPDATE, portfolio_ids)
+
+    async def _get_many(self, statement, portfolio_ids) -> dict[UUID, Portfolio]:
+        ids = list(dict.fromkeys(portfolio_ids))
+        if not ids:
+            return {}
+
+        row = await self.session.execute(statement, {'portfolio_ids': ids})
+        portfolios_data = row.fetchall()
+        holdings = await self._load_holdings([p.id for p in portfolios_data])
+        return {p.id: self._to_portfolio(p, holdings.get(p.id, [])) for p in portfolios_data}
+
+    @traced('repository.get_summaries_by_user_id')
+    async def get_summaries_by_user_id(self, user_id) -> list[PortfolioSummary]:
+        rows = await self.session.execute(_SELECT_SUMMARIES_BY_USER_ID, {'user_id': user_id})
+        return [
+            PortfolioSummary(
+                portfolio_id=r.id,
+                name=r.name,
+                currency=r.currency,
+                created_at=r.created_at,
+                version=r.version,
+                holdings_count=r.holdings_count,
+                total_cost=r.total_cost,
+                last_transaction_at=r.last_transaction_at,
+            )
+            for r in rows.fetchall()
+        ]
+
+    @traced('repository.get_recently_active_ids')
+    async def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        rows = await self.session.execute(_SELECT_RECENTLY_ACTIVE_IDS, {'limit': limit})
+        return list(rows.scalars())
+
+    @traced('repository.get_version')
+    async def get_version(self, portfolio_id) -> int | None:
+        row = await self.session.execute(_SELECT_VERSION_BY_ID, {'portfolio_id': portfolio_id})
+        return row.scalar_one_or_none()
+
+    @traced('repository.get_versions_by_user_id')
+    async def get_versions_by_user_id(self, user_id) -> dict[UUID, int]:
+        rows = await self.session.execute(_SELECT_VERSIONS_BY_USER_ID, {'user_id': user_id})
+        return dict(rows.all())
+
+    @traced('repository.update')
+    async def update(self, portfolio: Portfolio) -> None:
+        await self.update_many([portfolio])
+
+    @traced('repository.update_many')
+    async def update_many(self, portfolios: Sequence[Portfolio]) -> None:
+        """Обновляет портфели, их позиции и сводки — по одному запросу на таблицу.
+
+        Портфель обновляется, только если его версия в БД та же, что при чтении.
+        Число обновлённых строк executemany сообщают не все драйверы (asyncpg — нет);
+        пачку без этой проверки защищают блокировки ``get_many_for_update``.
+        """
+        if not portfolios:
+            return
+        result = await self.session.execute(
+            _UPDATE_PORTFOLIO,
+            [
+                {
+                    'portfolio_id': p.id,
+                    'expected_version': p.version,
+                    'new_name': p.name,
+                    'new_currency': p.currency,
+                }
+                for p in portfolios
+            ],
+        )
+        dialect = self.session.get_bind().dialect
+        if len(portfolios) == 1 or dialect.supports_sane_multi_rowcount:
+            if result.rowcount != len(portfolios):
+                raise PortfolioVersionConflictError([p.id for p in portfolios])
+        await self.session.execute(
+            _DELETE_HOLDINGS_BY_PORTFOLIO_IDS,
+            {'portfolio_ids': [p.id for p in portfolios]},
+        )
+        await self._insert_holdings(portfolios)
+        await self.session.execute(
+            _UPDATE_SUMMARY_HOLDINGS,
+            [
+                {
+                    'summary_portfolio_id': p.id,
+                    'new_holdings_count': len(p.holdings),
+                    'new_total_cost': p.cost_basis(),
+                }
+                for p in portfolios
+            ],
+        )
+        for portfolio in portfolios:
+            portfolio.version += 1
+
+    @traced('repository.delete')
+    async def delete(self, portfolio_id) -> None:
+        params = {'portfolio_id': portfolio_id}
+        await self.session.execute(_DELETE_HOLDINGS_BY_PORTFOLIO_ID, params)
+        await self.session.execute(_DELETE_SUMMARY, params)
+        await self.session.execute(_DELETE_PORTFOLIO, params)
+
+    @traced('repository.add_transaction')
+    async def add_transaction(self, transaction: Transaction) -> None:
+        await self.add_transactions([transaction])
+
+    @traced('repository.add_transactions')
+    async def add_transactions(self, transactions: Sequence[Transaction]) -> None:
+        if not transactions:
+            return
+        keys = await self.assets.keys(self.session, (t.asset_id for t in transactions))
+        await self.session.execute(
+            _INSERT_TRANSACTION,
+            [
+                {
+                    'id': t.id,
+                    'portfolio_id': t.portfolio_id,
+                    'asset_key': keys[t.asset_id],
+                    'transaction_type': t.type.value,
+                    'quantity': t.quantity,
+                    'price_per_unit': t.price_per_unit,
+                    'total_amount': t.total_amount,
+                    'executed_at': t.executed_at,
+                    'currency': t.currency,
+                }
+                for t in transactions
+            ],
+        )
+        last: dict[UUID, datetime.datetime] = {}
+        for t in transactions:
+            if t.portfolio_id not in last or last[t.portfolio_id] < t.executed_at:
+                last[t.portfolio_id] = t.executed_at
+        await self.session.execute(
+            _UPDATE_SUMMARY_LAST_TRANSACTION,
+            [
+                {'summary_portfolio_id': portfolio_id, 'executed_at': executed_at}
+                for portfolio_id, executed_at in last.items()
+            ],
+        )
+
+    @traced('repository.get_existing_transaction_ids')
+    async def get_existing_transaction_ids(self, transaction_ids, since, until) -> set[UUID]:
+        ids = list(transaction_ids)
+        if not ids:
+            return set()
+        rows = await self.session.execute(
+            _SELECT_EXISTING_TRANSACTION_IDS,
+            {'transaction_ids': ids, 'since': since, 'until': until},
+        )
+        return set(rows.scalars())
+
+    @traced('repository.get_transactions')
+    async def get_transactions(self, portfolio_id, since, until) -> list[Transaction]:
+        rows = await self.session.execute(
+            _SELECT_TRANSACTIONS_BY_PORTFOLIO_ID,
+            {'portfolio_id': portfolio_id, 'since': since, 'until': until},
+        )
+        rows = rows.fetchall()
+        codes = await self.assets.codes(self.session, (t.asset_key for t in rows))
+        return [transaction_from_row(t, codes[t.asset_key]) for t in rows]
+
+    async def _load_holdings(self, portfolio_ids: Sequence[UUID]) -> dict[UUID, list[Holding]]:
+        """Позиции нескольких портфелей одним запросом ``IN``, сгруппированные по портфелю."""
+        holdings: dict[UUID, list[Holding]] = {}
+        if not portfolio_ids:
+            return holdings
+
+        row_h = await self.session.execute(
+            _SELECT_HOLDINGS_BY_PORTFOLIO_IDS,
+            {'portfolio_ids': list(portfolio_ids)},
+        )
+        rows = row_h.fetchall()
+        codes = await self.assets.codes(self.session, (h.asset_key for h in rows))
+        for h in rows:
+            holdings.setdefault(h.portfolio_id, []).append(
+                Holding(codes[h.asset_key], h.quantity, h.average_cost),
+            )
+        return holdings
+
+    @staticmethod
+    def _to_portfolio(p_data, holdings: list[Holding]) -> Portfolio:
         return Portfolio(
             user_id=p_data.user_id,
             name=p_data.name,
             currency=p_data.currency,
             holdings=holdings,
             created_at=p_data.created_at,
+            portfolio_id=p_data.id,
+            version=p_data.version,
         )
 
-    async def get_by_user_id(self, user_id) -> list[Portfolio]:
-        row = await self.session.execute(
-            select(portfolio_table).where(portfolio_table.c.user_id == user_id),
+    async def _insert_portfolios(self, portfolios: Sequence[Portfolio]) -> None:
+        """Вставляет портфели, их позиции и сводки — по одному executemany на таблицу.
+
+        Для INSERT SQLAlchemy собирает executemany в многострочный ``VALUES``, поэтому
+        пачка портфелей стоит три запроса независимо от размера.
+        """
+        if not portfolios:
+            return
+        await self.session.execute(
+            _INSERT_PORTFOLIO,
+            [
+                {
+                    'id': p.id,
+                    'user_id': p.user_id,
+                    'name': p.name,
+                    'currency': p.currency,
+                    'created_at': p.created_at,
+                    'version': p.version,
+                }
+                for p in portfolios
+            ],
+        )
+        await self._insert_holdings(portfolios)
+        await self.session.execute(
+            _INSERT_SUMMARY,
+            [
+                {
+                    'portfolio_id': p.id,
+                    'holdings_count': len(p.holdings),
+                    'total_cost': p.cost_basis(),
+                    'last_activity_at': p.created_at,
+                }
+                for p in portfolios
+            ],
         )
-        portfolios_data = row.fetchall()
-        portfolios = []
 
-        for p_data in portfolios_data:
-            row_h = await self.session.execute(
-                select(holding_table).where(holding_table.c.portfolio_id == p_data.id),
-            )
-            holdings = [Holding(h.asset_id, h.quantity, h.average_cost) for h in row_h.fetchall()]
-            portfolios.append(
-                Portfolio(
-                    user_id=p_data.user_id,
-                    name=p_data.name,
-                    currency=p_data.currency,
-                    holdings=holdings,
-                    created_at=p_data.created_at,
-                ),
-            )
-        return portfolios
+    async def _insert_holdings(self, portfolios: Sequence[Portfolio]) -> None:
+        """Вставляет все позиции портфелей одним executemany вместо запроса на позицию."""
+        keys = await self.assets.keys(
+            self.session,
+            (h.asset_id for p in portfolios for h in p.holdings),
+        )
+        rows = [
+            {
+                'id': uuid.uuid4(),
+                'portfolio_id': p.id,
+                'asset_key': keys[h.asset_id],
+                'quantity': h.quantity,
+                'average_cost': h.average_cost,
+            }
+            for p in portfolios
+            for h in p.holdings
+        ]
+        if not rows:
+            return
+        await self.session.execute(_INSERT_HOLDING, rows)
+
+
+class InMemoryPortfolioRepository(AbstractPortfolioRepository):
+    """Репозиторий поверх ``InMemorySession``: без БД, с той же семантикой commit/rollback."""
+
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    @traced('repository.add')
+    async def add(self, portfolio: Portfolio) -> None:
+        self.session.put(portfolio)
+
+    @traced('repository.add_many')
+    async def add_many(self, portfolios: Sequence[Portfolio]) -> None:
+        for portfolio in portfolios:
+            self.session.put(portfolio)
+
+    @traced('repository.get_by_id')
+    async def get_by_id(self, portfolio_id) -> Portfolio | None:
+        return self.session.get(portfolio_id)
+
+    @traced('repository.get_for_update')
+    async def get_for_update(self, portfolio_id) -> Portfolio | None:
+        # Блокировок нет: изменённый параллельно портфель отвергнет проверка версии.
+        return self.session.get(portfolio_id)
 
+    @traced('repository.get_by_user_id')
+    async def get_by_user_id(self, user_id) -> list[Portfolio]:
+        return self.session.get_by_user_id(user_id)
+
+    @traced('repository.get_many')
+    async def get_many(self, portfolio_ids) -> dict[UUID, Portfolio]:
+        return self.session.get_many(portfolio_ids)
+
+    @traced('repository.get_many_for_update')
+    async def get_many_for_update(self, portfolio_ids) -> dict[UUID, Portfolio]:
+        return self.session.get_many(portfolio_ids)
+
+    @traced('repository.get_summaries_by_user_id')
+    async def get_summaries_by_user_id(self, user_id) -> list[PortfolioSummary]:
+        return self.session.get_summaries_by_user_id(user_id)
+
+    @traced('repository.get_recently_active_ids')
+    async def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        return self.session.get_recently_active_ids(limit)
+
+    @traced('repository.get_version')
+    async def get_version(self, portfolio_id) -> int | None:
+        return self.session.get_version(portfolio_id)
+
+    @traced('repository.get_versions_by_user_id')
+    async def get_versions_by_user_id(self, user_id) -> dict[UUID, int]:
+        return self.session.get_versions_by_user_id(user_id)
+
+    @traced('repository.update')
     async def update(self, portfolio: Portfolio) -> None:
-        stmt = (
-            sa_update(portfolio_table)
-            .where(portfolio_table.c.id == portfolio.id)
-            .values(
-                name=portfolio.name,
-                currency=portfolio.currency,
-            )
-        )
-        await self.session.execute(stmt)
-
-        stmt_del = sa_delete(holding_table).where(holding_table.c.portfolio_id == portfolio.id)
-        await self.session.execute(stmt_del)
-
-        for h in portfolio.holdings:
-            stmt_h = insert(holding_table).values(
-                id=uuid.uuid4(),
-                portfolio_id=portfolio.id,
-                asset_id=h.asset_id,
-                quantity=h.quantity,
-                average_cost=h.average_cost,
-            )
-            await self.session.execute(stmt_h)
+        self.session.update(portfolio)
 
-    async def delete(self, portfolio_id) -> None:
-        stmt_h = sa_delete(holding_table).where(holding_table.c.portfolio_id == portfolio_id)
-        await self.session.execute(stmt_h)
+    @traced('repository.update_many')
+    async def update_many(self, portfolios: Sequence[Portfolio]) -> None:
+        for portfolio in portfolios:
+            await self.update(portfolio)
 
-        stmt = sa_delete(portfolio_table).where(portfolio_table.c.id == portfolio_id)
-        await self.session.execute(stmt)
+    @traced('repository.delete')
+    async def delete(self, portfolio_id) -> None:
+        self.session.delete(portfolio_id)
 
+    @traced('repository.add_transaction')
     async def add_transaction(self, transaction: Transaction) -> None:
-        stmt = insert(transaction_table).values(
-            id=transaction.id,
-            portfolio_id=transaction.portfolio_id,
-            asset_id=transaction.asset_id,
-            transaction_type=transaction.transaction_type,  # type: ignore
-            quantity=transaction.quantity,
-            price_per_unit=transaction.price_per_unit,
-            total_amount=transaction.total_amount,
-            executed_at=transaction.executed_at,
-            currency=transaction.currency,
-        )
-        await self.session.execute(stmt)
+        self.session.add_transaction(transaction)
+
+    @traced('repository.add_transactions')
+    async def add_transactions(self, transactions: Sequence[Transaction]) -> None:
+        for transaction in transactions:
+            self.session.add_transaction(transaction)
+
+    @traced('repository.get_existing_transaction_ids')
+    async def get_existing_transaction_ids(self, transaction_ids, since, until) -> set[UUID]:
+        return self.session.existing_transaction_ids(transaction_ids)
+
+    @traced('repository.get_transactions')
+    async def get_transactions(self, portfolio_id, since, until) -> list[Transaction]:
+        return self.session.get_transactions(portfolio_id, since, until)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from typing import Any, Final
@@ -148,7 +149,11 @@ class VaultClient:
 
         """
         try:
-            secret = self._client.secrets.kv.v2.read_secret_version(path=path)
+            # hvac синхронный: запрос уходит в поток, чтобы не блокировать event loop.
+            secret = await asyncio.to_thread(
+                self._client.secrets.kv.v2.read_secret_version,
+                path=path,
+            )
             data = secret['data']['data']
             logger.debug('Успешно прочитан секрет из Vault')
 
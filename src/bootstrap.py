@@ -1,23 +1,95 @@
+import asyncio
 import logging
 
 from src.config.loader import SettingsLoader
-from src.config.settings import Settings
+from src.config.settings import Settings, get_settings
 from src.exceptions import BootstrapInitializationError
-from src.infrastructure.database.engine import get_engine
+from src.infrastructure.database.engine import get_engine, get_session_factory, prewarm_pool
+from src.infrastructure.database.partitions import ensure_transaction_partitions
 from src.infrastructure.logging.logger import configure_logging
+from src.infrastructure.startup import StartupTimer
+from src.infrastructure.tracing.tracing import configure_tracing
+from src.service_layer.dependencies import (
+    get_asset_registry,
+    get_portfolio_cache,
+    get_uow,
+    get_user_service,
+)
+from src.service_layer.warmup import warm_caches
 
 logger = logging.getLogger(__name__)
 
 
 async def bootstrap() -> Settings:
+    """Инициализирует компоненты приложения и логирует время каждой фазы старта.
+
+    Секреты нужны всем остальным шагам, поэтому загружаются первыми; после этого
+    трассировка и прогрев пула соединений идут параллельно. Последним прогреваются
+    кеши: до конца bootstrap под не готов принимать трафик.
+    """
+    timer = StartupTimer()
     try:
-        configure_logging()
-        await SettingsLoader().load()
-        settings = Settings()  # type: ignore
-        _ = get_engine()
+        with timer.phase('logging'):
+            configure_logging()
+        with timer.phase('secrets'):
+            # Конструктор VaultClient синхронно аутентифицируется в Vault.
+            loader = await asyncio.to_thread(SettingsLoader)
+            await loader.load()
+        with timer.phase('settings'):
+            settings = get_settings()
+
+        await asyncio.gather(
+            _configure_tracing(timer, settings),
+            _init_database(timer, settings),
+        )
+        await _warm_caches(timer, settings)
+        timer.report()
         logger.info('Bootstrap успешно инициализировал компоненты')
         return settings
 
     except Exception as e:
         logger.exception('Bootstrap failed')
         raise BootstrapInitializationError(f'Failed to bootstrap application: {str(e)}') from e
+
+
+async def _configure_tracing(timer: StartupTimer, settings: Settings) -> None:
+    with timer.phase('tracing'):
+        await asyncio.to_thread(configure_tracing, settings)
+
+
+async def _init_database(timer: StartupTimer, settings: Settings) -> None:
+    if settings.REPOSITORY_BACKEND != 'sqlalchemy':
+        return
+    with timer.phase('database'):
+        engine = get_engine()
+        await prewarm_pool(engine, settings.DB_POOL_PREWARM_SIZE)
+        try:
+            await ensure_transaction_partitions(engine, settings.DB_TRANSACTION_PARTITIONS_AHEAD)
+        except Exception:
+            # Вставки не теряются — их примет default-партиция; сервис стартует дальше.
+            logger.exception('Не удалось создать партиции таблицы транзакций')
+        try:
+            async with get_session_factory()() as session:
+                await get_asset_registry().load(session)
+        except Exception:
+            # Реестр дочитает активы из БД по мере обращения к ним.
+            logger.exception('Не удалось загрузить справочник активов')
+
+
+async def _warm_caches(timer: StartupTimer, settings: Settings) -> None:
+    if not settings.WARMUP_ENABLED:
+        return
+    with timer.phase('warmup'):
+        try:
+            await warm_caches(
+                get_uow,
+                get_user_service(),
+                get_portfolio_cache(),
+                limit=settings.WARMUP_PORTFOLIOS_LIMIT,
+                batch_size=settings.WARMUP_BATCH_SIZE,
+                concurrency=settings.WARMUP_CONCURRENCY,
+                timeout=settings.WARMUP_TIMEOUT_MS / 1000,
+            )
+        except Exception:
+            # Холодный кеш замедляет первые запросы, но не мешает обслуживать их.
+            logger.exception('Не удалось прогреть кеши')
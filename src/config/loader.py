@@ -1,8 +1,8 @@
+import asyncio
 import logging
 import os
 
 from src.adapters.interfaces import ISecretsProvider
-from src.adapters.vault_client import VaultClient
 from src.config.exceptions import SettingsLoaderInitializationError
 
 logger = logging.getLogger(__name__)
@@ -13,7 +13,12 @@ class SettingsLoader:
 
     def __init__(self, secrets_provider: ISecretsProvider | None = None) -> None:
         try:
-            self._sp = secrets_provider or VaultClient()
+            if secrets_provider is None:
+                # hvac тянет за собой requests — импортируем, только когда Vault нужен.
+                from src.adapters.vault_client import VaultClient
+
+                secrets_provider = VaultClient()
+            self._sp = secrets_provider
             logger.info(f'{SettingsLoader.__name__} успешно инициализирован')
         except Exception as e:
             logger.exception(f'Ошибка при инициализации {SettingsLoader.__name__}')
@@ -26,8 +31,8 @@ class SettingsLoader:
         secret_paths = [
             'eebook/portfolio',
         ]
-        for path in secret_paths:
-            data = await self._sp.get_secret(path)
+        secrets = await asyncio.gather(*(self._sp.get_secret(path) for path in secret_paths))
+        for data in secrets:
             for key, value in data.items():
                 os.environ[key] = str(value)
         logger.info('Секреты успешно загружены в окружение')
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +14,75 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int
     POSTGRES_HOST: str
 
+    ENVIRONMENT: Literal['development', 'test', 'production'] = 'production'
+    REPOSITORY_BACKEND: Literal['sqlalchemy', 'memory'] = 'sqlalchemy'
+
+    WEB_CONCURRENCY: int = 1
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_CONNECTION_BUDGET: int | None = None
+    DB_POOL_PREWARM_SIZE: int = 5
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_PGBOUNCER: bool = False
+    DB_TRANSACTION_PARTITIONS_AHEAD: int = 3
+    DB_PARTITIONS_CRON: str = '17 3 * * *'
+    DB_POOL_PROBE_INTERVAL_MS: float = 30000.0
+
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_READ_MAX_CONCURRENCY: int = 30
+    ADMISSION_WRITE_MAX_CONCURRENCY: int = 15
+    ADMISSION_MIN_CONCURRENCY: int = 2
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 1000.0
+    ADMISSION_LATENCY_TARGET_MS: float = 250.0
+
+    USER_SERVICE_URL: str = 'http://eebook-users-app-1:8000'
+    USER_SERVICE_DEADLINE_MS: float = 3000.0
+    USER_SERVICE_ATTEMPT_TIMEOUT_MS: float = 1000.0
+    USER_SERVICE_MAX_ATTEMPTS: int = 3
+    USER_SERVICE_HEDGE_AFTER_MS: float | None = None
+    USER_SERVICE_BREAKER_FAILURE_THRESHOLD: int = 5
+    USER_SERVICE_BREAKER_RESET_TIMEOUT_MS: float = 30000.0
+
+    CACHE_PORTFOLIOS_SIZE: int = 10_000
+    CACHE_PORTFOLIOS_TTL_MS: float = 300_000.0
+    CACHE_USERS_SIZE: int = 50_000
+    CACHE_USERS_TTL_MS: float = 600_000.0
+
+    REDIS_URL: str | None = None
+    REDIS_KEY_PREFIX: str = 'eebook-portfolio'
+    REDIS_SOCKET_TIMEOUT_MS: float = 100.0
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5
+    REDIS_BREAKER_RESET_TIMEOUT_MS: float = 5000.0
+    REDIS_PORTFOLIOS_TTL_MS: float = 3_600_000.0
+    REDIS_USERS_TTL_MS: float = 600_000.0
+
+    WARMUP_ENABLED: bool = True
+    WARMUP_PORTFOLIOS_LIMIT: int = 2_000
+    WARMUP_BATCH_SIZE: int = 100
+    WARMUP_CONCURRENCY: int = 4
+    WARMUP_TIMEOUT_MS: float = 15_000.0
+
+    JOURNAL_ENABLED: bool = False
+    JOURNAL_DIR: str = 'var/journal'
+    JOURNAL_SEGMENT_MAX_BYTES: int = 64 * 1024 * 1024
+    JOURNAL_FSYNC_INTERVAL_MS: float = 2.0
+    JOURNAL_FLUSH_INTERVAL_MS: float = 1000.0
+    JOURNAL_FLUSH_BATCH_SIZE: int = 1000
+
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEADER_LOCK_ID: int = 7_301_942_015
+    SCHEDULER_LEADER_CHECK_INTERVAL_MS: float = 5000.0
+
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    N_PLUS_ONE_THRESHOLD: int = 5
+
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATIO: float = 1.0
+    TRACING_EXPORTER: Literal['console', 'file'] = 'console'
+    TRACING_FILE_PATH: str = 'traces.jsonl'
+
     class Config:
         env_file_encoding = 'utf-8'
         extra = 'allow'
@@ -23,5 +95,7 @@ class Settings(BaseSettings):
         )
 
 
+@lru_cache
 def get_settings() -> Settings:
+    """Настройки процесса; читаются один раз, после загрузки секретов в bootstrap."""
     return Settings()  # type: ignore
@@ -95,6 +95,7 @@ class Transaction:
         total_amount: Decimal,
         executed_at: datetime.datetime,
         currency: str,
+        transaction_id: uuid.UUID | None = None,
     ) -> None:
         if quantity <= 0:
             raise InvalidTransactionDataError('Количество в транзакции должно быть положительным')
@@ -103,7 +104,7 @@ class Transaction:
         if total_amount < 0:
             raise InvalidTransactionDataError('Общая сумма не может быть отрицательной')
 
-        self.id = uuid.uuid4()
+        self.id = transaction_id or uuid.uuid4()
         self.portfolio_id = portfolio_id
         self.asset_id = asset_id
         self.type = transaction_type
@@ -138,6 +139,7 @@ class Portfolio:
         currency (str): базовая валюта портфеля (все расчёты приводятся к ней).
         created_at (datetime): дата создания.
         holdings (List[Holding]): текущие позиции по активам.
+        version (int): номер версии; увеличивается при каждом сохранении изменений.
 
     Example:
         portfolio = Portfolio(user_id, "Рост", "RUB")
@@ -146,7 +148,7 @@ class Portfolio:
 
     """
 
-    __slots__ = ('id', 'user_id', 'name', 'currency', 'created_at', 'holdings')
+    __slots__ = ('id', 'user_id', 'name', 'currency', 'created_at', 'holdings', 'version')
 
     def __init__(
         self,
@@ -155,13 +157,32 @@ class Portfolio:
         currency: str,
         created_at: datetime.datetime | None = None,
         holdings: list[Holding] | None = None,
+        portfolio_id: uuid.UUID | None = None,
+        version: int = 1,
     ) -> None:
-        self.id = uuid.uuid4()
+        self.id = portfolio_id or uuid.uuid4()
         self.user_id = user_id
         self.name = name.strip()
         self.currency = currency
         self.created_at = created_at or datetime.datetime.now(datetime.UTC)
         self.holdings = list(holdings) if holdings is not None else []
+        self.version = version
+
+    def copy(self) -> 'Portfolio':
+        """Возвращает независимую копию портфеля вместе с позициями."""
+        return Portfolio(
+            user_id=self.user_id,
+            name=self.name,
+            currency=self.currency,
+            created_at=self.created_at,
+            holdings=[Holding(h.asset_id, h.quantity, h.average_cost) for h in self.holdings],
+            portfolio_id=self.id,
+            version=self.version,
+        )
+
+    def cost_basis(self) -> Decimal:
+        """Суммарная стоимость покупки всех позиций (количество × средняя цена)."""
+        return sum((h.quantity * h.average_cost for h in self.holdings), Decimal(0))
 
     def get_holding(self, asset_id: str) -> Holding | None:
         """Возвращает существующую позицию по активу или None, если её нет."""
@@ -247,3 +268,134 @@ class Portfolio:
 
     def __repr__(self) -> str:
         return f"Portfolio(id={self.id}, name='{self.name}', holdings={len(self.holdings)} assets)"
+
+
+class PortfolioSummary:
+    """Сводка по портфелю без состава позиций — для списков и дашбордов.
+
+    Агрегаты хранятся денормализованно и обновляются в той же транзакции БД,
+    что и позиции портфеля, поэтому для их чтения не нужно загружать ``Holding``.
+
+    Attributes:
+        portfolio_id (UUID): идентификатор портфеля.
+        name (str): название портфеля.
+        currency (str): базовая валюта портфеля.
+        created_at (datetime): дата создания портфеля.
+        version (int): версия портфеля.
+        holdings_count (int): количество позиций.
+        total_cost (Decimal): суммарная стоимость покупки позиций в валюте портфеля.
+        last_transaction_at (datetime | None): время последней транзакции, если она была.
+
+    """
+
+    __slots__ = (
+        'portfolio_id',
+        'name',
+        'currency',
+        'created_at',
+        'version',
+        'holdings_count',
+        'total_cost',
+        'last_transaction_at',
+    )
+
+    def __init__(
+        self,
+        portfolio_id: uuid.UUID,
+        name: str,
+        currency: str,
+        created_at: datetime.datetime,
+        version: int,
+        holdings_count: int,
+        total_cost: Decimal,
+        last_transaction_at: datetime.datetime | None = None,
+    ) -> None:
+        self.portfolio_id = portfolio_id
+        self.name = name
+        self.currency = currency
+        self.created_at = created_at
+        self.version = version
+        self.holdings_count = holdings_count
+        self.total_cost = total_cost
+        self.last_transaction_at = last_transaction_at
+
+    @classmethod
+    def from_portfolio(
+        cls,
+        portfolio: Portfolio,
+        last_transaction_at: datetime.datetime | None = None,
+    ) -> 'PortfolioSummary':
+        return cls(
+            portfolio_id=portfolio.id,
+            name=portfolio.name,
+            currency=portfolio.currency,
+            created_at=portfolio.created_at,
+            version=portfolio.version,
+            holdings_count=len(portfolio.holdings),
+            total_cost=portfolio.cost_basis(),
+            last_transaction_at=last_transaction_at,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PortfolioSummary(portfolio_id={self.portfolio_id}, name='{self.name}', "
+            f'holdings={self.holdings_count}, total_cost={self.total_cost})'
+        )
+
+
+class UserPortfolioSummary:
+    """Сводка по всем портфелям пользователя.
+
+    Стоимость суммируется отдельно по валютам: портфели в разных валютах
+    без курса конвертации складывать нельзя.
+
+    Attributes:
+        user_id (UUID): владелец портфелей.
+        portfolios_count (int): количество портфелей.
+        holdings_count (int): суммарное количество позиций.
+        total_cost_by_currency (dict[str, Decimal]): стоимость покупки позиций по валютам.
+        last_transaction_at (datetime | None): время последней транзакции по всем портфелям.
+
+    """
+
+    __slots__ = (
+        'user_id',
+        'portfolios_count',
+        'holdings_count',
+        'total_cost_by_currency',
+        'last_transaction_at',
+    )
+
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        portfolios_count: int = 0,
+        holdings_count: int = 0,
+        total_cost_by_currency: dict[str, Decimal] | None = None,
+        last_transaction_at: datetime.datetime | None = None,
+    ) -> None:
+        self.user_id = user_id
+        self.portfolios_count = portfolios_count
+        self.holdings_count = holdings_count
+        self.total_cost_by_currency = total_cost_by_currency or {}
+        self.last_transaction_at = last_transaction_at
+
+    @classmethod
+    def from_summaries(
+        cls,
+        user_id: uuid.UUID,
+        summaries: list[PortfolioSummary],
+    ) -> 'UserPortfolioSummary':
+        result = cls(user_id)
+        for summary in summaries:
+            result.portfolios_count += 1
+            result.holdings_count += summary.holdings_count
+            result.total_cost_by_currency[summary.currency] = (
+                result.total_cost_by_currency.get(summary.currency, Decimal(0)) + summary.total_cost
+            )
+            if summary.last_transaction_at is not None and (
+                result.last_transaction_at is None
+                or summary.last_transaction_at > result.last_transaction_at
+            ):
+                result.last_transaction_at = summary.last_transaction_at
+        return result
@@ -1,3 +1,6 @@
+from uuid import UUID
+
+
 class PortfolioDomainError(Exception):
     """Базовое исключение для ошибок в домене портфеля."""
 
@@ -25,6 +28,14 @@ class InsufficientHoldingsError(InvalidPortfolioOperationError):
         self.available = available
 
 
+class PortfolioNotFoundError(PortfolioDomainError):
+    """Портфель, к которому относится операция, не найден."""
+
+    def __init__(self, portfolio_id: UUID):
+        super().__init__(f'Портфель {portfolio_id} не найден')
+        self.portfolio_id = portfolio_id
+
+
 class TransactionMismatchError(PortfolioDomainError):
     """Транзакция не принадлежит указанному портфелю."""
 
@@ -35,3 +46,13 @@ class InvalidTransactionDataError(PortfolioDomainError):
     """Некорректные данные в транзакции (отрицательная цена, нулевое количество и т.д.)."""
 
     pass
+
+
+class PortfolioVersionConflictError(PortfolioDomainError):
+    """Портфель изменён другой транзакцией после того, как его прочитали."""
+
+    def __init__(self, portfolio_ids: list[UUID]):
+        super().__init__(
+            'Портфель изменён параллельным запросом: ' + ', '.join(map(str, portfolio_ids)),
+        )
+        self.portfolio_ids = portfolio_ids
@@ -0,0 +1,240 @@
+"""Арифметика с фиксированной точкой для количеств и цен.
+
+Величины хранятся целыми числами, масштабированными на ``SCALE = 10**10`` — это ровно
+шкала колонок ``Numeric(20, 10)``. Сложение и вычитание в таком представлении точны,
+а единственное деление (пересчёт средней стоимости при покупке) округляется
+к ближайшему с половиной вверх — так же, как Postgres округляет ``numeric`` при записи
+в колонку с меньшей шкалой. Поэтому результат совпадает с Decimal-путём, прошедшим
+через сохранение в БД после каждой операции.
+
+Режим опциональный и используется при сверке позиций (``reconcile --fixed-point``):
+``FixedPointPortfolio`` строится из ``Portfolio``, транзакции конвертируются по мере
+чтения из БД, а результат переводится обратно в ``Portfolio``; внутри — только
+операции над ``int``, без округления до шкалы колонок после каждой транзакции.
+"""
+
+import datetime
+import uuid
+from collections.abc import Iterable, Mapping
+from decimal import ROUND_HALF_UP, Decimal
+
+from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.enums import TransactionType
+from src.domain.exceptions import (
+    InsufficientHoldingsError,
+    InvalidPortfolioOperationError,
+    TransactionMismatchError,
+)
+
+SCALE_DIGITS = 10
+SCALE = 10**SCALE_DIGITS
+QUANTUM = Decimal(1).scaleb(-SCALE_DIGITS)
+
+
+def to_fixed(value: Decimal) -> int:
+    """Переводит Decimal в масштабированное целое с округлением половины вверх."""
+    return int(value.scaleb(SCALE_DIGITS).to_integral_value(ROUND_HALF_UP))
+
+
+def from_fixed(raw: int) -> Decimal:
+    """Переводит масштабированное целое обратно в Decimal со шкалой ``SCALE_DIGITS``."""
+    return Decimal(raw).scaleb(-SCALE_DIGITS)
+
+
+def div_half_up(numerator: int, denominator: int) -> int:
+    """Целочисленное деление неотрицательных чисел с округлением половины вверх."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+class FixedPointHolding:
+    """Позиция в масштабированных целых: ``quantity`` и ``average_cost`` умножены на SCALE."""
+
+    __slots__ = ('asset_id', 'quantity', 'average_cost')
+
+    def __init__(self, asset_id: str, quantity: int, average_cost: int) -> None:
+        self.asset_id = asset_id
+        self.quantity = quantity
+        self.average_cost = average_cost
+
+    @classmethod
+    def from_holding(cls, holding: Holding) -> 'FixedPointHolding':
+        return cls(holding.asset_id, to_fixed(holding.quantity), to_fixed(holding.average_cost))
+
+    def to_holding(self) -> Holding:
+        return Holding(self.asset_id, from_fixed(self.quantity), from_fixed(self.average_cost))
+
+    def __repr__(self) -> str:
+        return (
+            f"FixedPointHolding(asset_id='{self.asset_id}', "
+            f'quantity={from_fixed(self.quantity)}, '
+            f'average_cost={from_fixed(self.average_cost)})'
+        )
+
+
+class FixedPointTransaction:
+    """Данные транзакции, нужные для применения к портфелю, в масштабированных целых."""
+
+    __slots__ = ('id', 'portfolio_id', 'asset_id', 'type', 'quantity', 'price_per_unit')
+
+    def __init__(
+        self,
+        transaction_id: uuid.UUID,
+        portfolio_id: uuid.UUID,
+        asset_id: str,
+        transaction_type: TransactionType,
+        quantity: int,
+        price_per_unit: int,
+    ) -> None:
+        self.id = transaction_id
+        self.portfolio_id = portfolio_id
+        self.asset_id = asset_id
+        self.type = transaction_type
+        self.quantity = quantity
+        self.price_per_unit = price_per_unit
+
+    @classmethod
+    def from_transaction(cls, transaction: Transaction) -> 'FixedPointTransaction':
+        return cls(
+            transaction_id=transaction.id,
+            portfolio_id=transaction.portfolio_id,
+            asset_id=transaction.asset_id,
+            transaction_type=transaction.type,
+            quantity=to_fixed(transaction.quantity),
+            price_per_unit=to_fixed(transaction.price_per_unit),
+        )
+
+
+class FixedPointPortfolio:
+    """Портфель с арифметикой фиксированной точки — быстрый вариант ``Portfolio``.
+
+    Бизнес-правила и исключения те же, что у ``Portfolio``. Позиции хранятся в словаре
+    по ``asset_id`` с сохранением порядка добавления, поэтому поиск позиции не зависит
+    от их количества.
+    """
+
+    __slots__ = ('id', 'user_id', 'name', 'currency', 'created_at', 'holdings', 'version')
+
+    def __init__(
+        self,
+        portfolio_id: uuid.UUID,
+        user_id: uuid.UUID,
+        name: str,
+        currency: str,
+        created_at: datetime.datetime,
+        holdings: Iterable[FixedPointHolding] = (),
+        version: int = 1,
+    ) -> None:
+        self.id = portfolio_id
+        self.user_id = user_id
+        self.name = name
+        self.currency = currency
+        self.created_at = created_at
+        self.holdings = {h.asset_id: h for h in holdings}
+        self.version = version
+
+    @classmethod
+    def from_portfolio(cls, portfolio: Portfolio) -> 'FixedPointPortfolio':
+        return cls(
+            portfolio_id=portfolio.id,
+            user_id=portfolio.user_id,
+            name=portfolio.name,
+            currency=portfolio.currency,
+            created_at=portfolio.created_at,
+            holdings=(FixedPointHolding.from_holding(h) for h in portfolio.holdings),
+            version=portfolio.version,
+        )
+
+    def to_portfolio(self) -> Portfolio:
+        return Portfolio(
+            user_id=self.user_id,
+            name=self.name,
+            currency=self.currency,
+            created_at=self.created_at,
+            holdings=[h.to_holding() for h in self.holdings.values()],
+            portfolio_id=self.id,
+            version=self.version,
+        )
+
+    def replay(self, transactions: Iterable[Transaction]) -> None:
+        """Применяет последовательность транзакций, конвертируя каждую на входе."""
+        for transaction in transactions:
+            self.execute_transaction(FixedPointTransaction.from_transaction(transaction))
+
+    def execute_transaction(self, transaction: FixedPointTransaction) -> None:
+        """Применяет операцию к портфелю. Семантика — как у ``Portfolio.execute_transaction``.
+
+        Raises:
+            TransactionMismatchError: если transaction.portfolio_id != self.id.
+            InsufficientHoldingsError: при попытке продать больше, чем есть.
+            InvalidPortfolioOperationError: при неподдерживаемом типе транзакции.
+
+        """
+        if transaction.portfolio_id != self.id:
+            raise TransactionMismatchError(
+                f'Транзакция {transaction.id} относится к портфелю {transaction.portfolio_id}, '
+                f'но применена к портфелю {self.id}',
+            )
+
+        if transaction.type is TransactionType.BUY:
+            self._handle_buy(transaction)
+        elif transaction.type is TransactionType.SELL:
+            self._handle_sell(transaction)
+        elif transaction.type is TransactionType.DIVIDEND:
+            pass
+        else:
+            raise InvalidPortfolioOperationError(
+                f'Неподдерживаемый тип транзакции: {transaction.type.name}',
+            )
+
+    def market_value(self, prices: Mapping[str, int]) -> Decimal:
+        """Рыночная стоимость позиций, округлённая до шкалы колонок.
+
+        Цены передаются уже в масштабированных целых (см. ``to_fixed``): один снимок цен
+        обычно переиспользуется для оценки многих портфелей. Произведения копятся
+        в шкале ``SCALE**2`` и округляются один раз в конце.
+
+        Raises:
+            KeyError: если для какой-либо позиции нет цены.
+
+        """
+        total = sum(h.quantity * prices[asset_id] for asset_id, h in self.holdings.items())
+        return from_fixed(div_half_up(total, SCALE))
+
+    def _handle_buy(self, transaction: FixedPointTransaction) -> None:
+        holding = self.holdings.get(transaction.asset_id)
+        if holding is None:
+            self.holdings[transaction.asset_id] = FixedPointHolding(
+                transaction.asset_id,
+                transaction.quantity,
+                transaction.price_per_unit,
+            )
+            return
+
+        total_cost = (
+            holding.quantity * holding.average_cost
+            + transaction.quantity * transaction.price_per_unit
+        )
+        total_quantity = holding.quantity + transaction.quantity
+        # total_cost в шкале SCALE**2, total_quantity — в SCALE: частное сразу в шкале SCALE.
+        holding.average_cost = div_half_up(total_cost, total_quantity)
+        holding.quantity = total_quantity
+
+    def _handle_sell(self, transaction: FixedPointTransaction) -> None:
+        holding = self.holdings.get(transaction.asset_id)
+        available = holding.quantity if holding is not None else 0
+        if available < transaction.quantity:
+            raise InsufficientHoldingsError(
+                asset_id=transaction.asset_id,
+                requested=float(from_fixed(transaction.quantity)),
+                available=float(from_fixed(available)),
+            )
+
+        holding.quantity -= transaction.quantity  # type: ignore[union-attr]
+        if holding.quantity == 0:  # type: ignore[union-attr]
+            del self.holdings[transaction.asset_id]
+
+    def __repr__(self) -> str:
+        return (
+            f"FixedPointPortfolio(id={self.id}, name='{self.name}', "
+            f'holdings={len(self.holdings)} assets)'
+        )
@@ -2,10 +2,21 @@ import datetime
 from decimal import Decimal
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 from src.domain.enums import TransactionType
 
+MAX_BATCH_PORTFOLIO_IDS = 100
+MAX_BULK_CREATE_PORTFOLIOS = 100
+
+# Пределы колонок таблицы transactions (src/adapters/orm.py): значение за ними
+# БД не сохранит, а из журнала приёма такая транзакция уже не вернётся клиенту ошибкой.
+MAX_ASSET_ID_LENGTH = 100
+MAX_CURRENCY_LENGTH = 10
+# Numeric(20, 10): десять знаков до запятой и десять после.
+AMOUNT_QUANTUM = Decimal('1e-10')
+MAX_AMOUNT = Decimal(10) ** 10
+
 
 class CreatePortfolio(BaseModel):
     user_id: UUID
@@ -13,12 +24,74 @@ class CreatePortfolio(BaseModel):
     currency: str
 
 
+class BulkCreatePortfolios(BaseModel):
+    portfolios: list[CreatePortfolio] = Field(min_length=1, max_length=MAX_BULK_CREATE_PORTFOLIOS)
+
+
 class UpdatePortfolio(BaseModel):
     portfolio_id: UUID
     name: str
     currency: str
 
 
+class HoldingResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    asset_id: str
+    quantity: Decimal
+    average_cost: Decimal
+
+
+class PortfolioResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    user_id: UUID
+    name: str
+    currency: str
+    created_at: datetime.datetime
+    version: int
+    holdings: list[HoldingResponse]
+
+
+class PortfolioSummaryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID = Field(validation_alias='portfolio_id')
+    name: str
+    currency: str
+    created_at: datetime.datetime
+    version: int
+    holdings_count: int
+    total_cost: Decimal
+    last_transaction_at: datetime.datetime | None
+
+
+class UserSummaryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: UUID
+    portfolios_count: int
+    holdings_count: int
+    total_cost_by_currency: dict[str, Decimal]
+    last_transaction_at: datetime.datetime | None
+
+
+class BatchGetPortfolios(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=MAX_BATCH_PORTFOLIO_IDS)
+
+
+class BatchPortfolioItem(BaseModel):
+    """Результат по одному id: ``portfolio`` заполнен, только если ``found``."""
+
+    found: bool
+    portfolio: PortfolioResponse | None = None
+
+
+class BatchPortfoliosResponse(BaseModel):
+    portfolios: dict[UUID, BatchPortfolioItem]
+
+
 class AddTransaction(BaseModel):
     portfolio_id: UUID
     asset_id: str
@@ -28,3 +101,17 @@ class AddTransaction(BaseModel):
     total_amount: Decimal
     executed_at: datetime.datetime
     currency: str
+
+
+class TransactionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    portfolio_id: UUID
+    asset_id: str
+    transaction_type: TransactionType = Field(validation_alias='type')
+    quantity: Decimal
+    price_per_unit: Decimal
+    total_amount: Decimal
+    executed_at: datetime.datetime
+    currency: str
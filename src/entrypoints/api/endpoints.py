@@ -1,22 +1,108 @@
+import datetime
 import logging
+import math
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from starlette.responses import JSONResponse
 
 from src.config.settings import Settings, get_settings
 from src.domain.domain import Portfolio, Transaction
-from src.entity.models import AddTransaction, CreatePortfolio, UpdatePortfolio
-from src.service_layer.dependencies import get_uow, get_user_service
+from src.domain.exceptions import (
+    PortfolioDomainError,
+    PortfolioNotFoundError,
+    PortfolioVersionConflictError,
+)
+from src.entity.models import (
+    AMOUNT_QUANTUM,
+    MAX_AMOUNT,
+    MAX_ASSET_ID_LENGTH,
+    MAX_CURRENCY_LENGTH,
+    AddTransaction,
+    BatchGetPortfolios,
+    BatchPortfolioItem,
+    BatchPortfoliosResponse,
+    BulkCreatePortfolios,
+    CreatePortfolio,
+    PortfolioResponse,
+    PortfolioSummaryResponse,
+    TransactionResponse,
+    UpdatePortfolio,
+    UserSummaryResponse,
+)
+from src.entrypoints.api.etag import (
+    etag_matches,
+    not_modified,
+    portfolio_etag,
+    portfolios_etag,
+    set_etag,
+)
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.journal import Journal, JournalClosedError
+from src.infrastructure.singleflight import SingleFlight
+from src.infrastructure.tracing.tracing import traced
+from src.service_layer.dependencies import (
+    get_journal,
+    get_portfolio_cache,
+    get_transaction_horizon,
+    get_uow,
+    get_user_service,
+)
+from src.service_layer.exceptions import UserServiceCircuitOpenError, UserServiceUnavailableError
+from src.service_layer.ingestion import journal_transaction
 from src.service_layer.portfolio_service import ABCUserService, PortfolioService
 from src.service_layer.uow import AbstractUnitOfWork
 
 router = APIRouter(prefix='/api/v1/portfolio', tags=['users'])
 
+HISTORY_DEFAULT_WINDOW = datetime.timedelta(days=90)
+
 logger = logging.getLogger(__name__)
 
+# Одновременные чтения одного портфеля (или портфелей одного пользователя) из разных
+# запросов выполняют один запрос в БД; каждый запрос получает свою копию результата.
+_portfolio_loads = SingleFlight(
+    'get_portfolio',
+    clone=lambda p: p.copy() if p is not None else None,
+)
+_user_portfolio_loads = SingleFlight(
+    'get_user_portfolios',
+    clone=lambda portfolios: [p.copy() for p in portfolios],
+)
+
+
+def _user_service_unavailable(error: UserServiceUnavailableError) -> HTTPException:
+    retry_after = 1
+    if isinstance(error, UserServiceCircuitOpenError):
+        retry_after = max(math.ceil(error.retry_after), 1)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail='User service unavailable',
+        headers={'Retry-After': str(retry_after)},
+    )
+
+
+async def _load_portfolio(
+    uow: AbstractUnitOfWork,
+    user_service: ABCUserService,
+    portfolio_id: UUID,
+) -> Portfolio | None:
+    async with uow as u:
+        return await PortfolioService(u.portfolio, user_service).get_by_id(portfolio_id)
+
+
+async def _load_user_portfolios(
+    uow: AbstractUnitOfWork,
+    user_service: ABCUserService,
+    user_id: UUID,
+) -> list[Portfolio]:
+    async with uow as u:
+        return await PortfolioService(u.portfolio, user_service).get_by_user_id(user_id)
+
 
 @router.get('/health')
+@traced('endpoint.health')
 async def health(settings: Settings = Depends(get_settings)) -> JSONResponse:
     content = {
         'status': 'ok',
@@ -26,6 +112,7 @@ async def health(settings: Settings = Depends(get_settings)) -> JSONResponse:
 
 
 @router.post('/portfolios')
+@traced('endpoint.create_portfolio')
 async def create_portfolio(
     portfolio_create_entity: CreatePortfolio,
     uow: AbstractUnitOfWork = Depends(get_uow),
@@ -37,78 +124,200 @@ async def create_portfolio(
         currency=portfolio_create_entity.currency,
     )
     async with uow as u:
-        service = PortfolioService(u.users, user_service)
+        service = PortfolioService(u.portfolio, user_service)
         try:
             await service.add(portfolio)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
+        except UserServiceUnavailableError as e:
+            raise _user_service_unavailable(e) from e
         await u.commit()
     return {'id': str(portfolio.id)}
 
 
-@router.get('/portfolios/{portfolio_id}')
+@router.post('/portfolios/bulk')
+@traced('endpoint.create_portfolios_bulk')
+async def create_portfolios_bulk(
+    bulk: BulkCreatePortfolios,
+    uow: AbstractUnitOfWork = Depends(get_uow),
+    user_service: ABCUserService = Depends(get_user_service),
+):
+    portfolios = [
+        Portfolio(user_id=item.user_id, name=item.name, currency=item.currency)
+        for item in bulk.portfolios
+    ]
+    async with uow as u:
+        service = PortfolioService(u.portfolio, user_service)
+        try:
+            await service.add_many(portfolios)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        except UserServiceUnavailableError as e:
+            raise _user_service_unavailable(e) from e
+        await u.commit()
+    return {'ids': [str(portfolio.id) for portfolio in portfolios]}
+
+
+@router.get('/portfolios/{portfolio_id}', response_model=PortfolioResponse)
+@traced('endpoint.get_portfolio')
 async def get_portfolio(
     portfolio_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     uow: AbstractUnitOfWork = Depends(get_uow),
     user_service: ABCUserService = Depends(get_user_service),
+    cache: TTLCache = Depends(get_portfolio_cache),
 ):
     async with uow as u:
-        service = PortfolioService(u.users, user_service)
-        portfolio = await service.get_by_id(portfolio_id)
+        # Дешёвая проверка по версии: позиции не загружаются, если клиент актуален
+        # или в кеше процесса лежит та же версия портфеля.
+        version = await PortfolioService(u.portfolio, user_service).get_version(portfolio_id)
+    if version is None:
+        cache.invalidate(portfolio_id)
+        raise HTTPException(status_code=404, detail='Portfolio not found')
+    etag = portfolio_etag(portfolio_id, version)
+    if if_none_match and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    cached = cache.get(portfolio_id)
+    if cached is not None and cached.version == version:
+        portfolio = cached.copy()
+    else:
+        portfolio = await _portfolio_loads.do(
+            portfolio_id,
+            lambda: _load_portfolio(uow, user_service, portfolio_id),
+        )
         if not portfolio:
             raise HTTPException(status_code=404, detail='Portfolio not found')
-    return portfolio.__dict__
+        cache.set(portfolio_id, portfolio.copy())
+    set_etag(response, portfolio_etag(portfolio.id, portfolio.version))
+    return PortfolioResponse.model_validate(portfolio)
+
+
+@router.post('/portfolios/batch', response_model=BatchPortfoliosResponse)
+@traced('endpoint.get_portfolios_batch')
+async def get_portfolios_batch(
+    batch: BatchGetPortfolios,
+    uow: AbstractUnitOfWork = Depends(get_uow),
+    user_service: ABCUserService = Depends(get_user_service),
+):
+    async with uow as u:
+        service = PortfolioService(u.portfolio, user_service)
+        portfolios = await service.get_many(batch.ids)
 
+    items = {}
+    for portfolio_id in batch.ids:
+        portfolio = portfolios.get(portfolio_id)
+        if portfolio is None:
+            items[portfolio_id] = BatchPortfolioItem(found=False)
+        else:
+            items[portfolio_id] = BatchPortfolioItem(
+                found=True,
+                portfolio=PortfolioResponse.model_validate(portfolio),
+            )
+    return BatchPortfoliosResponse(portfolios=items)
 
-@router.get('/users/{user_id}/portfolios')
+
+@router.get(
+    '/users/{user_id}/portfolios',
+    response_model=list[PortfolioResponse] | list[PortfolioSummaryResponse],
+)
+@traced('endpoint.get_user_portfolios')
 async def get_user_portfolios(
     user_id: UUID,
+    response: Response,
+    view: Literal['full', 'summary'] = 'full',
+    if_none_match: str | None = Header(default=None),
     uow: AbstractUnitOfWork = Depends(get_uow),
     user_service: ABCUserService = Depends(get_user_service),
 ):
     async with uow as u:
-        service = PortfolioService(u.users, user_service)
-        portfolios = await service.get_by_user_id(user_id)
-    return [p.__dict__ for p in portfolios]
+        service = PortfolioService(u.portfolio, user_service)
+        if if_none_match:
+            etag = portfolios_etag(await service.get_versions_by_user_id(user_id))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+        if view == 'summary':
+            # Режим сводок: только агрегаты из portfolio_summaries, позиции не читаются.
+            summaries = await service.get_summaries_by_user_id(user_id)
+            set_etag(response, portfolios_etag({s.portfolio_id: s.version for s in summaries}))
+            return [PortfolioSummaryResponse.model_validate(s) for s in summaries]
+
+    portfolios = await _user_portfolio_loads.do(
+        user_id,
+        lambda: _load_user_portfolios(uow, user_service, user_id),
+    )
+    set_etag(response, portfolios_etag({p.id: p.version for p in portfolios}))
+    return [PortfolioResponse.model_validate(p) for p in portfolios]
+
+
+@router.get('/users/{user_id}/summary', response_model=UserSummaryResponse)
+@traced('endpoint.get_user_summary')
+async def get_user_summary(
+    user_id: UUID,
+    uow: AbstractUnitOfWork = Depends(get_uow),
+    user_service: ABCUserService = Depends(get_user_service),
+):
+    async with uow as u:
+        service = PortfolioService(u.portfolio, user_service)
+        summary = await service.get_user_summary(user_id)
+    return UserSummaryResponse.model_validate(summary)
 
 
 @router.put('/portfolios/{portfolio_id}')
+@traced('endpoint.update_portfolio')
 async def update_portfolio(
     update_portfolio_entity: UpdatePortfolio,
     uow: AbstractUnitOfWork = Depends(get_uow),
     user_service: ABCUserService = Depends(get_user_service),
 ):
     async with uow as u:
-        service = PortfolioService(u.users, user_service)
+        service = PortfolioService(u.portfolio, user_service)
         portfolio = await service.get_by_id(update_portfolio_entity.portfolio_id)
         if not portfolio:
             raise HTTPException(status_code=404, detail='Portfolio not found')
         portfolio.name = update_portfolio_entity.name
         portfolio.currency = update_portfolio_entity.currency
-        await service.update(portfolio)
-        await u.commit()
+        try:
+            await service.update(portfolio)
+            await u.commit()
+        except PortfolioVersionConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
     return {'status': 'updated'}
 
 
 @router.delete('/portfolios/{portfolio_id}')
+@traced('endpoint.delete_portfolio')
 async def delete_portfolio(
     portfolio_id: UUID,
     uow: AbstractUnitOfWork = Depends(get_uow),
     user_service: ABCUserService = Depends(get_user_service),
 ):
     async with uow as u:
-        service = PortfolioService(u.users, user_service)
+        service = PortfolioService(u.portfolio, user_service)
         await service.delete(portfolio_id)
         await u.commit()
     return {'status': 'deleted'}
 
 
 @router.post('/transactions')
+@traced('endpoint.add_transaction')
 async def add_transaction(
     add_transaction_entity: AddTransaction,
     uow: AbstractUnitOfWork = Depends(get_uow),
     user_service: ABCUserService = Depends(get_user_service),
+    journal: Journal | None = Depends(get_journal),
+    horizon: datetime.datetime = Depends(get_transaction_horizon),
 ):
+    # Транзакция за месяц без партиции легла бы в default и не дала бы её создать.
+    if _as_utc(add_transaction_entity.executed_at) >= horizon:
+        raise HTTPException(
+            status_code=400,
+            detail=f'executed_at must be earlier than {horizon.isoformat()}',
+        )
+    if error := _column_limit_error(add_transaction_entity):
+        raise HTTPException(status_code=400, detail=error)
     transaction = Transaction(
         portfolio_id=add_transaction_entity.portfolio_id,
         asset_id=add_transaction_entity.asset_id,
@@ -119,8 +328,77 @@ async def add_transaction(
         executed_at=add_transaction_entity.executed_at,
         currency=add_transaction_entity.currency,
     )
+    if journal is not None:
+        # Транзакция применяется к портфелю позже, при переносе журнала в БД.
+        transaction.executed_at = _as_utc(transaction.executed_at)
+        try:
+            await journal_transaction(journal, transaction)
+        except (JournalClosedError, OSError):
+            logger.warning('Журнал приёма недоступен, транзакция %s пишется в БД', transaction.id)
+        else:
+            return JSONResponse(
+                content={'id': str(transaction.id), 'status': 'accepted'},
+                status_code=status.HTTP_202_ACCEPTED,
+            )
     async with uow as u:
-        service = PortfolioService(u.users, user_service)
-        await service.add_transaction(transaction)
-        await u.commit()
+        service = PortfolioService(u.portfolio, user_service)
+        try:
+            await service.add_transaction(transaction)
+            await u.commit()
+        except PortfolioNotFoundError as e:
+            raise HTTPException(status_code=404, detail='Portfolio not found') from e
+        except PortfolioVersionConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        except PortfolioDomainError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
     return {'id': str(transaction.id)}
+
+
+@router.get('/portfolios/{portfolio_id}/transactions', response_model=list[TransactionResponse])
+@traced('endpoint.get_portfolio_transactions')
+async def get_portfolio_transactions(
+    portfolio_id: UUID,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+    uow: AbstractUnitOfWork = Depends(get_uow),
+    user_service: ABCUserService = Depends(get_user_service),
+    horizon: datetime.datetime = Depends(get_transaction_horizon),
+):
+    # Окно по времени обязательно для запроса: по нему БД читает только нужные партиции.
+    # По умолчанию оно доходит до горизонта приёма, а не до текущего момента:
+    # транзакции с будущей датой исполнения тоже хранятся и должны быть видны.
+    until = _as_utc(until) if until else None
+    if since is not None:
+        since = _as_utc(since)
+    else:
+        since = (until or datetime.datetime.now(datetime.UTC)) - HISTORY_DEFAULT_WINDOW
+    until = until or horizon
+    if since >= until:
+        raise HTTPException(status_code=400, detail='since must be earlier than until')
+
+    async with uow as u:
+        service = PortfolioService(u.portfolio, user_service)
+        transactions = await service.get_transactions(portfolio_id, since, until)
+    return [TransactionResponse.model_validate(t) for t in transactions]
+
+
+def _column_limit_error(entity: AddTransaction) -> str | None:
+    """Проверяет, что транзакция помещается в колонки БД; возвращает текст ошибки."""
+    if len(entity.asset_id) > MAX_ASSET_ID_LENGTH:
+        return f'asset_id must be at most {MAX_ASSET_ID_LENGTH} characters'
+    if len(entity.currency) > MAX_CURRENCY_LENGTH:
+        return f'currency must be at most {MAX_CURRENCY_LENGTH} characters'
+    for field in ('quantity', 'price_per_unit', 'total_amount'):
+        value = getattr(entity, field)
+        # БД округляет до десяти знаков после запятой, и округление может дать переполнение.
+        if (
+            not value.is_finite()
+            or abs(value) >= MAX_AMOUNT
+            or abs(value.quantize(AMOUNT_QUANTUM)) >= MAX_AMOUNT
+        ):
+            return f'{field} must be less than {MAX_AMOUNT} in absolute value'
+    return None
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo else value.replace(tzinfo=datetime.UTC)
@@ -0,0 +1,42 @@
+import hashlib
+from collections.abc import Mapping
+from uuid import UUID
+
+from starlette.responses import Response
+
+# Клиент обязан перепроверять ответ, но может делать это условным запросом.
+CACHE_CONTROL = 'no-cache'
+
+
+def portfolio_etag(portfolio_id: UUID, version: int) -> str:
+    """Сильный ETag портфеля: меняется при каждом сохранении, т.е. вместе с версией."""
+    return f'"{portfolio_id}.{version}"'
+
+
+def portfolios_etag(versions: Mapping[UUID, int]) -> str:
+    """Сильный ETag списка портфелей: хеш пар (id, версия) в детерминированном порядке.
+
+    Меняется при изменении любого портфеля, а также при добавлении или удалении.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for portfolio_id, version in sorted(versions.items()):
+        digest.update(f'{portfolio_id}.{version};'.encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверяет ``If-None-Match`` по правилам RFC 9110: слабое сравнение, ``*`` и списки."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = CACHE_CONTROL
@@ -0,0 +1,32 @@
+import os
+
+from fastapi import APIRouter
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from starlette.responses import Response
+
+from src.infrastructure.metrics.metrics import MULTIPROC_DIR_ENV
+
+router = APIRouter(tags=['metrics'])
+
+
+def _registry() -> CollectorRegistry:
+    """Реестр для выдачи: с несколькими воркерами — сводка по всем процессам.
+
+    Иначе запрос попадает в один из воркеров и видит только его счётчики.
+    """
+    if not os.environ.get(MULTIPROC_DIR_ENV):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,85 @@
+"""Обслуживание помесячных партиций таблицы транзакций.
+
+Запуск::
+
+    python -m src.entrypoints.cli.partitions list
+    python -m src.entrypoints.cli.partitions ensure --months-ahead 6
+    python -m src.entrypoints.cli.partitions detach --before 2024-01
+"""
+
+import argparse
+import asyncio
+import datetime
+import sys
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config.loader import SettingsLoader
+from src.config.settings import get_settings
+from src.infrastructure.database.partitions import (
+    detach_partitions_before,
+    ensure_partitions,
+    list_partitions,
+)
+from src.infrastructure.logging.logger import configure_logging
+
+
+def parse_month(value: str) -> datetime.date:
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m').date()
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f'ожидается месяц в формате YYYY-MM: {value}') from e
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Партиции таблицы транзакций')
+    parser.add_argument('--database-url', help='по умолчанию — из настроек сервиса (Vault)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='показать партиции')
+
+    ensure = commands.add_parser('ensure', help='создать партиции наперёд')
+    ensure.add_argument('--months-ahead', type=int, help='по умолчанию — из настроек')
+
+    detach = commands.add_parser('detach', help='отсоединить старые партиции для архивации')
+    detach.add_argument(
+        '--before',
+        type=parse_month,
+        required=True,
+        help='отсоединить партиции месяцев раньше указанного (YYYY-MM)',
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> list[str]:
+    engine = create_async_engine(args.database_url or await _database_url_from_settings())
+    try:
+        if args.command == 'list':
+            async with engine.connect() as conn:
+                return await list_partitions(conn)
+        if args.command == 'ensure':
+            months = args.months_ahead
+            if months is None:
+                months = get_settings().DB_TRANSACTION_PARTITIONS_AHEAD
+            return await ensure_partitions(engine, months)
+        async with engine.begin() as conn:
+            return await detach_partitions_before(conn, args.before)
+    finally:
+        await engine.dispose()
+
+
+async def _database_url_from_settings() -> str:
+    await SettingsLoader().load()
+    return get_settings().postgres_uri
+
+
+def main(argv: list[str] | None = None) -> int:
+    configure_logging()
+    names = asyncio.run(run(parse_args(argv)))
+    for name in names:
+        print(name)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
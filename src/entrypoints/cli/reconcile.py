@@ -0,0 +1,306 @@
+"""Параллельная сверка и перестройка позиций по журналу транзакций.
+
+Портфели делятся на шарды — непрерывные диапазоны id по ``--shard-size`` портфелей.
+Шарды обрабатываются в ``ProcessPoolExecutor``: воспроизведение транзакций — чистый
+CPU, и процессы обходят GIL. Каждый процесс держит свой event loop и свой engine.
+
+Итог каждого шарда дописывается строкой JSON в файл ``--checkpoint``. При повторном
+запуске с тем же файлом портфели из уже сверенных диапазонов пропускаются, а их
+результаты входят в итоговый отчёт.
+
+Запуск::
+
+    python -m src.entrypoints.cli.reconcile --workers 8 --report report.json
+    python -m src.entrypoints.cli.reconcile --repair --checkpoint reconcile.jsonl
+    python -m src.entrypoints.cli.reconcile --fixed-point --workers 8
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from src.adapters.ledger import SqlAlchemyLedgerReader
+from src.config.loader import SettingsLoader
+from src.config.settings import get_settings
+from src.infrastructure.logging.logger import configure_logging
+from src.service_layer.reconciliation import ShardReport, reconcile_range
+
+logger = logging.getLogger(__name__)
+
+_worker_loop: asyncio.AbstractEventLoop | None = None
+_worker_engine: AsyncEngine | None = None
+
+
+@dataclass(slots=True)
+class ReconciliationReport:
+    """Сводный отчёт по всем шардам прогона, включая восстановленные из checkpoint."""
+
+    shards: list[ShardReport] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def portfolios(self) -> int:
+        return sum(s.portfolios for s in self.shards)
+
+    @property
+    def transactions(self) -> int:
+        return sum(s.transactions for s in self.shards)
+
+    @property
+    def mismatched_portfolios(self) -> int:
+        return sum(s.mismatched_portfolios for s in self.shards)
+
+    @property
+    def repaired_portfolios(self) -> int:
+        return sum(s.repaired_portfolios for s in self.shards)
+
+    @property
+    def replay_errors(self) -> int:
+        return sum(len(s.replay_errors) for s in self.shards)
+
+    @property
+    def conflicts(self) -> int:
+        return sum(len(s.conflicts) for s in self.shards)
+
+    @property
+    def unresolved(self) -> int:
+        """Портфели, которые после прогона всё ещё не совпадают с журналом."""
+        return self.mismatched_portfolios - self.repaired_portfolios + self.replay_errors
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'portfolios': self.portfolios,
+            'transactions': self.transactions,
+            'mismatched_portfolios': self.mismatched_portfolios,
+            'repaired_portfolios': self.repaired_portfolios,
+            'replay_errors': {
+                str(pid): error for s in self.shards for pid, error in s.replay_errors.items()
+            },
+            'conflicts': [str(pid) for s in self.shards for pid in s.conflicts],
+            'mismatches': [m.to_dict() for s in self.shards for m in s.mismatches],
+            'elapsed_seconds': round(self.elapsed, 3),
+        }
+
+    def format_summary(self) -> str:
+        return '\n'.join(
+            (
+                f'Портфелей проверено:   {self.portfolios}',
+                f'Транзакций воспроизведено: {self.transactions}',
+                f'Портфелей с расхождениями: {self.mismatched_portfolios}',
+                f'Исправлено:            {self.repaired_portfolios}',
+                f'Ошибок воспроизведения: {self.replay_errors}',
+                f'Изменились при сверке: {self.conflicts}',
+                f'Время:                 {self.elapsed:.1f} с',
+            ),
+        )
+
+
+class Checkpoint:
+    """Журнал завершённых шардов в формате JSON Lines.
+
+    Хранит только границы и итог шарда, поэтому устойчив к изменению набора портфелей
+    между запусками: пропускаются id, попадающие в уже сверенные диапазоны.
+    """
+
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self.reports: list[ShardReport] = []
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.reports = [
+                    ShardReport.from_dict(json.loads(line)) for line in f if line.strip()
+                ]
+        ranges = sorted((r.lower, r.upper) for r in self.reports)
+        self._lowers = [lower for lower, _ in ranges]
+        self._uppers = [upper for _, upper in ranges]
+
+    def is_done(self, portfolio_id: UUID) -> bool:
+        i = bisect.bisect_right(self._lowers, portfolio_id) - 1
+        return i >= 0 and portfolio_id <= self._uppers[i]
+
+    def append(self, report: ShardReport) -> None:
+        self.reports.append(report)
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(report.to_dict()) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+
+async def plan_shards(
+    engine: AsyncEngine,
+    shard_size: int,
+    checkpoint: Checkpoint,
+) -> list[tuple[UUID, UUID, int]]:
+    """Делит ещё не сверенные портфели на диапазоны ``(lower, upper, count)``.
+
+    id читаются потоком; в памяти остаются только границы шардов.
+    """
+    shards = []
+    lower = upper = None
+    count = 0
+    async with async_sessionmaker(engine)() as session:
+        async for portfolio_id in SqlAlchemyLedgerReader(session).iter_portfolio_ids():
+            if checkpoint.is_done(portfolio_id):
+                # Шард не должен перекрывать уже сверенный диапазон.
+                if count:
+                    shards.append((lower, upper, count))
+                    count = 0
+                continue
+            if not count:
+                lower = portfolio_id
+            upper = portfolio_id
+            count += 1
+            if count == shard_size:
+                shards.append((lower, upper, count))
+                count = 0
+    if count:
+        shards.append((lower, upper, count))
+    return shards  # type: ignore[return-value]
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_loop, _worker_engine
+    configure_logging('WARNING')
+    _worker_loop = asyncio.new_event_loop()
+    _worker_engine = create_async_engine(database_url)
+
+
+def _reconcile_shard(
+    lower: UUID,
+    upper: UUID,
+    repair: bool,
+    repair_batch_size: int,
+    fixed_point: bool = False,
+) -> dict[str, Any]:
+    assert _worker_loop is not None and _worker_engine is not None
+    session_factory = async_sessionmaker(_worker_engine, expire_on_commit=False)
+    report = _worker_loop.run_until_complete(
+        reconcile_range(session_factory, lower, upper, repair, repair_batch_size, fixed_point),
+    )
+    return report.to_dict()
+
+
+def run(args: argparse.Namespace, database_url: str) -> ReconciliationReport:
+    start = time.perf_counter()
+    checkpoint = Checkpoint(args.checkpoint)
+    if checkpoint.reports:
+        logger.info('Из checkpoint восстановлено шардов: %d', len(checkpoint.reports))
+
+    shards = asyncio.run(_plan(database_url, args.shard_size, checkpoint))
+    total = sum(count for _, _, count in shards)
+    logger.info('К сверке: %d портфелей в %d шардах', total, len(shards))
+
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(database_url,),
+    ) as pool:
+        shard_by_future = {
+            pool.submit(
+                _reconcile_shard,
+                lower,
+                upper,
+                args.repair,
+                args.repair_batch_size,
+                args.fixed_point,
+            ): (lower, upper, count)
+            for lower, upper, count in shards
+        }
+        for future in as_completed(shard_by_future):
+            lower, upper, count = shard_by_future[future]
+            report = ShardReport.from_dict(future.result())
+            checkpoint.append(report)
+            done += count
+            elapsed = time.perf_counter() - start
+            eta = elapsed / done * (total - done) if done else 0.0
+            logger.info(
+                'Шард %s..%s: %d портфелей, расхождений %d, исправлено %d; '
+                'всего %d/%d (%.0f%%), осталось ~%.0f с',
+                lower,
+                upper,
+                report.portfolios,
+                report.mismatched_portfolios,
+                report.repaired_portfolios,
+                done,
+                total,
+                done / total * 100,
+                eta,
+            )
+
+    return ReconciliationReport(
+        shards=checkpoint.reports,
+        elapsed=time.perf_counter() - start,
+    )
+
+
+async def _plan(
+    database_url: str,
+    shard_size: int,
+    checkpoint: Checkpoint,
+) -> list[tuple[UUID, UUID, int]]:
+    engine = create_async_engine(database_url)
+    try:
+        return await plan_shards(engine, shard_size, checkpoint)
+    finally:
+        await engine.dispose()
+
+
+async def _database_url_from_settings() -> str:
+    await SettingsLoader().load()
+    return get_settings().postgres_uri
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Сверка позиций портфелей с воспроизведением журнала транзакций',
+    )
+    parser.add_argument('--database-url', help='по умолчанию — из настроек сервиса (Vault)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shard-size', type=int, default=500, help='портфелей в шарде')
+    parser.add_argument('--repair', action='store_true', help='исправить расхождения')
+    parser.add_argument(
+        '--repair-batch-size',
+        type=int,
+        default=100,
+        help='исправленных портфелей на одну транзакцию БД',
+    )
+    parser.add_argument(
+        '--fixed-point',
+        action='store_true',
+        help='воспроизводить журнал в арифметике фиксированной точки',
+    )
+    parser.add_argument('--checkpoint', help='файл прогресса для возобновления прогона')
+    parser.add_argument('--report', dest='report_path', help='сохранить полный отчёт в JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI. Возвращает 1, если остались неисправленные расхождения."""
+    configure_logging()
+    args = parse_args(argv)
+    database_url = args.database_url or asyncio.run(_database_url_from_settings())
+
+    report = run(args, database_url)
+
+    print(report.format_summary())
+    if args.report_path:
+        with open(args.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return 1 if report.unresolved else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
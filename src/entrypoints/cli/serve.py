@@ -0,0 +1,116 @@
+"""Запуск HTTP-сервера в одном или нескольких процессах-воркерах.
+
+Воркеры uvicorn стартуют через ``spawn``: каждый заново импортирует приложение,
+а engine, пул соединений, кеши и планировщик создаются в lifespan уже внутри
+воркера. Общих с родителем соединений у воркеров нет.
+
+Пул каждого воркера выводится из бюджета соединений пода: раннер выставляет
+``WEB_CONCURRENCY``, и ``DB_CONNECTION_BUDGET`` делится поровну между воркерами
+(см. ``pool_limits``). Без бюджета у каждого воркера пул ``DB_POOL_SIZE`` +
+``DB_MAX_OVERFLOW``, и соединений в N раз больше.
+
+Перезапуск воркеров: с ``--max-requests`` воркер после стольких запросов (плюс
+случайные ``--max-requests-jitter``, чтобы воркеры не уходили разом) перестаёт
+принимать новые, дожидается текущих не дольше ``--graceful-timeout`` и завершается,
+а супервизор поднимает ему замену. ``SIGHUP`` супервизору перезапускает воркеров
+по одному: новый начинает принимать запросы до остановки старого.
+
+Метрики: с несколькими воркерами Prometheus-клиент каждого пишет значения в файлы
+``PROMETHEUS_MULTIPROC_DIR``, а ``/metrics`` любого воркера отдаёт сводку по всем.
+Раннер очищает каталог при старте (по умолчанию — временный): файлы прошлого
+запуска исказили бы счётчики.
+
+Запуск::
+
+    python -m src.entrypoints.cli.serve --workers 4
+    python -m src.entrypoints.cli.serve --workers 0 --max-requests 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+
+def default_workers() -> int:
+    return int(os.environ.get('WEB_CONCURRENCY', '1'))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='HTTP-сервер eebook-portfolio')
+    parser.add_argument('--app', default='src.entrypoints.fastapi_app:app')
+    parser.add_argument(
+        '--factory',
+        action='store_true',
+        help='--app указывает на функцию, создающую приложение',
+    )
+    parser.add_argument(
+        '--lifespan',
+        choices=('auto', 'on', 'off'),
+        default='on',
+        help='off — без bootstrap (Vault, БД, планировщик); для стендов с заглушками',
+    )
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=default_workers(),
+        help='число воркеров; 0 — по числу ядер (по умолчанию WEB_CONCURRENCY или 1)',
+    )
+    parser.add_argument('--max-requests', type=int, help='перезапускать воркер после N запросов')
+    parser.add_argument('--max-requests-jitter', type=int, default=0)
+    parser.add_argument(
+        '--graceful-timeout',
+        type=float,
+        default=30.0,
+        help='сколько секунд ждать текущие запросы при остановке воркера',
+    )
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error('--workers не может быть отрицательным')
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    return args
+
+
+def prepare_multiprocess_metrics(workers: int) -> str | None:
+    """Готовит пустой каталог метрик для воркеров; с одним воркером он не нужен."""
+    if workers <= 1:
+        return None
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or tempfile.mkdtemp(prefix='prometheus-')
+    os.makedirs(path, exist_ok=True)
+    # Удаляются только файлы значений: каталог могли указать не пустым.
+    for stale in Path(path).glob('*.db'):
+        stale.unlink()
+    # Переменная должна быть в окружении до импорта prometheus_client воркером.
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = path
+    return path
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    # Воркеры наследуют окружение: по нему настройки делят бюджет соединений.
+    os.environ['WEB_CONCURRENCY'] = str(args.workers)
+    prepare_multiprocess_metrics(args.workers)
+    uvicorn.run(
+        args.app,
+        factory=args.factory,
+        host=args.host,
+        port=args.port,
+        lifespan=args.lifespan,
+        workers=args.workers,
+        limit_max_requests=args.max_requests,
+        limit_max_requests_jitter=args.max_requests_jitter,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 
-from src.entrypoints.api import endpoints
+from src.entrypoints.api import endpoints, metrics
+from src.entrypoints.middlewares.admission import AdmissionControlMiddleware
+from src.entrypoints.middlewares.metrics import PrometheusMiddleware
+from src.entrypoints.middlewares.query_stats import QueryStatsMiddleware
 from src.infrastructure.lifespan import lifespan
 
 
@@ -15,7 +18,12 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(AdmissionControlMiddleware)
+    app.add_middleware(PrometheusMiddleware)
+
     app.include_router(endpoints.router)
+    app.include_router(metrics.router)
 
     return app
 
@@ -0,0 +1,88 @@
+import logging
+import time
+from collections.abc import Iterable, Mapping
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.infrastructure.admission import AdaptiveLimiter, AdmissionRejectedError
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+# POST-эндпоинты, которые только читают данные (тело запроса нужно лишь для списка id).
+READ_PATHS = frozenset({'/api/v1/portfolio/portfolios/batch'})
+
+
+def route_class(scope: Scope) -> str:
+    if scope['method'] in READ_METHODS or scope['path'] in READ_PATHS:
+        return 'read'
+    return 'write'
+
+
+class AdmissionControlMiddleware:
+    """ASGI-middleware для контроля допуска запросов и сброса избыточной нагрузки.
+
+    Запросы делятся на классы ``read``/``write`` по HTTP-методу, у каждого класса свой
+    ``AdaptiveLimiter``. Если запрос не получил слот, middleware сразу отвечает 503
+    с заголовком ``Retry-After``, не доводя его до пула соединений БД.
+
+    Ограничители берутся из аргумента ``limiters`` или из ``app.state.admission_limiters``,
+    которые создаёт lifespan после загрузки настроек. Если их нет — запросы проходят
+    без ограничений.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiters: Mapping[str, AdaptiveLimiter] | None = None,
+        retry_after: int = 1,
+        excluded_paths: Iterable[str] = ('/metrics', '/api/v1/portfolio/health'),
+    ) -> None:
+        self.app = app
+        self._limiters = limiters
+        self._retry_after = str(retry_after)
+        self._excluded_paths = frozenset(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'] in self._excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        limiters = self._limiters_for(scope)
+        if limiters is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[route_class(scope)]
+        try:
+            await limiter.acquire()
+        except AdmissionRejectedError as e:
+            logger.debug('Запрос отклонён (%s): %s %s', e.reason, scope['method'], scope['path'])
+            response = JSONResponse(
+                {'detail': 'Service overloaded, retry later'},
+                status_code=503,
+                headers={'Retry-After': self._retry_after},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.perf_counter() - start, overloaded=status_code >= 500)
+
+    def _limiters_for(self, scope: Scope) -> Mapping[str, AdaptiveLimiter] | None:
+        if self._limiters is not None:
+            return self._limiters
+        app = scope.get('app')
+        return getattr(app.state, 'admission_limiters', None) if app is not None else None
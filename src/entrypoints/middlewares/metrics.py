@@ -0,0 +1,76 @@
+import time
+from collections.abc import Iterable
+
+from prometheus_client import Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.infrastructure.metrics.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class PrometheusMiddleware:
+    """ASGI-middleware для сбора метрик HTTP-запросов.
+
+    Пишет длительность запроса в разрезе метода, шаблона маршрута и статуса ответа,
+    а также ведёт счётчик запросов в обработке. В метку ``route`` попадает шаблон
+    (``/portfolios/{portfolio_id}``), а не фактический путь, чтобы не раздувать
+    кардинальность метрик.
+
+    Примечание:
+        Реализовано как "чистое" ASGI-middleware без ``BaseHTTPMiddleware``:
+        тело ответа не буферизуется, а дочерние метрики кешируются по набору меток,
+        поэтому накладные расходы на запрос — единицы микросекунд.
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: Iterable[str] = ('/metrics',)) -> None:
+        self.app = app
+        self._excluded_paths = frozenset(excluded_paths)
+        self._durations: dict[tuple[str, str, int], Histogram] = {}
+        self._in_progress: dict[str, Gauge] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'] in self._excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        in_progress = self._in_progress_for(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            self._duration_for(method, route_template(scope), status_code).observe(elapsed)
+
+    def _in_progress_for(self, method: str) -> Gauge:
+        gauge = self._in_progress.get(method)
+        if gauge is None:
+            gauge = self._in_progress[method] = HTTP_REQUESTS_IN_PROGRESS.labels(method=method)
+        return gauge
+
+    def _duration_for(self, method: str, route: str, status_code: int) -> Histogram:
+        key = (method, route, status_code)
+        histogram = self._durations.get(key)
+        if histogram is None:
+            histogram = self._durations[key] = HTTP_REQUEST_DURATION.labels(
+                method=method,
+                route=route,
+                status_code=str(status_code),
+            )
+        return histogram
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get('route')
+    return getattr(route, 'path', UNMATCHED_ROUTE)
@@ -0,0 +1,34 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.entrypoints.middlewares.metrics import route_template
+from src.infrastructure.database.instrumentation import check_repeated_queries, track_queries
+from src.infrastructure.metrics.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST
+
+
+class QueryStatsMiddleware:
+    """ASGI-middleware, собирающее статистику SQL-запросов на каждый HTTP-запрос.
+
+    Количество запросов и суммарное время в БД пишутся в метрики в разрезе маршрута.
+    После обработки запроса статистика проверяется на N+1: в зависимости от окружения
+    результат игнорируется, логируется или приводит к ``RepeatedQueriesError``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # Запросы, завершившиеся ошибкой, тоже учитываются: часто именно они
+                # нагружают БД сильнее всего.
+                route = route_template(scope)
+                DB_QUERIES_PER_REQUEST.labels(route=route).observe(stats.count)
+                DB_TIME_PER_REQUEST.labels(route=route).observe(stats.total_time)
+
+        check_repeated_queries(stats, source=f'{scope["method"]} {route}')
@@ -0,0 +1,160 @@
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Callable
+
+from src.config.settings import Settings
+from src.infrastructure.metrics.metrics import (
+    ADMISSION_CONCURRENCY_LIMIT,
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_REJECTED,
+)
+
+
+class AdmissionRejectedError(Exception):
+    """Запрос не допущен к обработке: очередь переполнена или истёк срок ожидания."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdaptiveLimiter:
+    """Адаптивный ограничитель числа одновременно обрабатываемых запросов (AIMD).
+
+    Пока запросы укладываются в ``latency_target``, лимит растёт примерно на единицу
+    за каждые ``limit`` успешных запросов; на медленный или завершившийся ошибкой 5xx
+    запрос лимит умножается на ``backoff``. Так лимит сам опускается, когда деградирует
+    БД, и восстанавливается, когда она приходит в норму.
+
+    Снижение — не чаще раза за окно перегрузки: его вызывают только запросы,
+    допущенные после предыдущего снижения. Запросы, которые уже выполнялись в момент
+    снижения, застали тот же эпизод медленной БД, и без этого правила тридцать
+    одновременных медленных запросов опустили бы лимит в ``backoff ** 30`` раз.
+
+    Запросы сверх лимита ждут в очереди FIFO длиной не больше ``max_queue`` и не дольше
+    ``queue_timeout`` секунд; иначе — ``AdmissionRejectedError``.
+
+    Note:
+        Состояние не защищено блокировками: все методы вызываются из одного event loop
+        и не содержат точек переключения между проверкой и изменением счётчиков.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        min_limit: int = 1,
+        max_queue: int = 100,
+        queue_timeout: float = 1.0,
+        latency_target: float = 0.25,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._clock = clock
+
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._last_decrease = -math.inf
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+        self._limit_gauge = ADMISSION_CONCURRENCY_LIMIT.labels(route_class=name)
+        self._in_flight_gauge = ADMISSION_IN_FLIGHT.labels(route_class=name)
+        self._queue_wait = ADMISSION_QUEUE_WAIT.labels(route_class=name)
+        self._limit_gauge.set(self.limit)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Занимает слот; при необходимости ждёт в очереди.
+
+        Raises:
+            AdmissionRejectedError: очередь заполнена (``queue_full``) или слот
+                не освободился за ``queue_timeout`` (``timeout``).
+
+        """
+        if not self._waiters and self.in_flight < int(self.limit):
+            self._take_slot()
+            self._queue_wait.observe(0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject('queue_full')
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передан этому запросу, но обрабатываться он не будет.
+                self._free_slot()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, TimeoutError):
+                self._queue_wait.observe(time.perf_counter() - start)
+                self._reject('timeout')
+            raise
+        self._queue_wait.observe(time.perf_counter() - start)
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """Освобождает слот и корректирует лимит по результату запроса.
+
+        Args:
+            latency: Длительность обработки запроса по часам ``clock``, в секундах.
+            overloaded: Запрос завершился ошибкой перегрузки (5xx).
+
+        """
+        now = self._clock()
+        if overloaded or latency > self.latency_target:
+            if now - latency >= self._last_decrease:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._limit_gauge.set(self.limit)
+        self._free_slot()
+
+    def _take_slot(self) -> None:
+        self.in_flight += 1
+        self._in_flight_gauge.set(self.in_flight)
+
+    def _free_slot(self) -> None:
+        self.in_flight -= 1
+        self._in_flight_gauge.set(self.in_flight)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._take_slot()
+                waiter.set_result(None)
+
+    def _reject(self, reason: str) -> None:
+        ADMISSION_REJECTED.labels(route_class=self.name, reason=reason).inc()
+        raise AdmissionRejectedError(reason)
+
+
+def build_admission_limiters(settings: Settings) -> dict[str, AdaptiveLimiter]:
+    """Создаёт ограничители для классов маршрутов ``read`` и ``write`` из настроек."""
+    common = {
+        'min_limit': settings.ADMISSION_MIN_CONCURRENCY,
+        'max_queue': settings.ADMISSION_QUEUE_SIZE,
+        'queue_timeout': settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+        'latency_target': settings.ADMISSION_LATENCY_TARGET_MS / 1000,
+    }
+    return {
+        'read': AdaptiveLimiter('read', settings.ADMISSION_READ_MAX_CONCURRENCY, **common),
+        'write': AdaptiveLimiter('write', settings.ADMISSION_WRITE_MAX_CONCURRENCY, **common),
+    }
@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from src.infrastructure.metrics.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """Кеш процесса с ограничением по размеру (LRU) и времени жизни записи.
+
+    Значения хранятся как есть: изменяемые объекты нужно копировать при записи
+    и чтении на стороне вызывающего. ``None`` как значение не поддерживается —
+    ``get`` возвращает его при промахе.
+
+    Note:
+        Как и остальные структуры процесса, кеш не защищён блокировками: все вызовы
+        идут из одного event loop и не содержат точек переключения.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            CACHE_REQUESTS.labels(cache=self.name, result='miss').inc()
+            return None
+        self._entries.move_to_end(key)
+        CACHE_REQUESTS.labels(cache=self.name, result='hit').inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
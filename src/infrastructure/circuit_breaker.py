@@ -0,0 +1,123 @@
+import enum
+import logging
+import time
+from collections.abc import Callable
+
+from src.infrastructure.metrics.metrics import CIRCUIT_BREAKER_REJECTED, CIRCUIT_BREAKER_STATE
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(enum.IntEnum):
+    """Состояние выключателя; значение — то, что выставляется в метрику."""
+
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitOpenError(Exception):
+    """Вызов не выполнен: выключатель разомкнут."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f'Circuit breaker {name} разомкнут, повтор через {retry_after:.1f} с')
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Выключатель (circuit breaker) для вызовов внешней зависимости.
+
+    После ``failure_threshold`` неудач подряд выключатель размыкается, и вызовы
+    сразу получают ``CircuitOpenError``, не занимая соединение и время запроса.
+    Через ``reset_timeout`` секунд он переходит в полуоткрытое состояние и пропускает
+    не больше ``half_open_max_calls`` пробных вызовов одновременно: успех пробы
+    замыкает выключатель, неудача — снова размыкает на ``reset_timeout``.
+
+    Использование: ``before_call()`` перед вызовом, ``record(success)`` — ровно один
+    раз после него, в том числе при отмене.
+
+    Note:
+        Как и ``AdaptiveLimiter``, состояние не защищено блокировками: методы
+        вызываются из одного event loop и не содержат точек переключения.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._state = CircuitState.CLOSED
+        CIRCUIT_BREAKER_STATE.labels(name=name).set(self._state)
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state is CircuitState.OPEN and self._retry_after() <= 0:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def before_call(self) -> None:
+        """Резервирует право на вызов.
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут или все пробы уже заняты.
+
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return
+        if state is CircuitState.HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return
+        CIRCUIT_BREAKER_REJECTED.labels(name=self.name).inc()
+        raise CircuitOpenError(self.name, max(self._retry_after(), 0.0))
+
+    def record(self, success: bool) -> None:
+        if self._state is CircuitState.HALF_OPEN:
+            self._probes -= 1
+            if success:
+                self.failures = 0
+                self._transition(CircuitState.CLOSED)
+            else:
+                self._open()
+        elif self._state is CircuitState.CLOSED:
+            if success:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._open()
+        # В состоянии OPEN приходят только ответы на вызовы, начатые до размыкания.
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self.reset_timeout - self._clock()
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._probes = 0
+        self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        if state is self._state:
+            return
+        logger.warning(
+            'Circuit breaker %s: %s -> %s',
+            self.name,
+            self._state.name,
+            state.name,
+        )
+        self._state = state
+        CIRCUIT_BREAKER_STATE.labels(name=self.name).set(state)
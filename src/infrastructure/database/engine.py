@@ -1,5 +1,9 @@
+import asyncio
 import logging
+import os
+import uuid
 from functools import lru_cache
+from typing import Any
 
 import sqlalchemy.exc as sa_exceptions
 from sqlalchemy.ext.asyncio import (
@@ -9,16 +13,73 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from src.config.settings import get_settings
+from src.config.settings import Settings, get_settings
 from src.infrastructure.database.exceptions import (
     DatabaseArgumentError,
     DatabaseConnectionError,
     DatabaseTimeoutError,
 )
+from src.infrastructure.database.instrumentation import (
+    QueryInstrumentationConfig,
+    instrument_engine,
+    repeated_queries_action_for,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def asyncpg_connect_args(settings: Settings) -> dict[str, Any]:
+    """Параметры подключения asyncpg с явно настроенным кешем подготовленных выражений.
+
+    Кешей два: ``statement_cache_size`` — собственный кеш asyncpg, и
+    ``prepared_statement_cache_size`` — кеш диалекта SQLAlchemy. Оба живут на уровне
+    соединения, поэтому работают только при прямом подключении к Postgres.
+
+    За pgbouncer в режиме transaction/statement соединение с сервером меняется между
+    транзакциями, и подготовленное выражение может оказаться на другом бэкенде. Поэтому
+    при ``DB_PGBOUNCER`` кеши выключаются, а выражения получают уникальные имена, чтобы
+    не конфликтовать с чужими на том же серверном соединении.
+    """
+    args: dict[str, Any] = {'command_timeout': 10}
+    if settings.DB_PGBOUNCER:
+        args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f'__asyncpg_{uuid.uuid4()}__',
+        )
+    else:
+        args.update(
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            prepared_statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        )
+    return args
+
+
+def pool_limits(
+    pool_size: int,
+    max_overflow: int,
+    budget: int | None,
+    workers: int,
+) -> tuple[int, int]:
+    """Размер пула и ``max_overflow`` одного воркера с учётом бюджета соединений пода.
+
+    Бюджет делится поровну между ``workers`` воркерами, и ``pool_size + max_overflow``
+    воркера его долю не превышает. Без бюджета значения возвращаются как есть.
+
+    Raises:
+        ValueError: Если бюджета не хватает даже на одно соединение на воркер.
+
+    """
+    if budget is None:
+        return pool_size, max_overflow
+    workers = max(workers, 1)
+    per_worker = budget // workers
+    if per_worker < 1:
+        raise ValueError(f'Бюджет соединений {budget} меньше числа воркеров ({workers})')
+    pool_size = min(pool_size, per_worker)
+    return pool_size, min(max_overflow, per_worker - pool_size)
+
+
 @lru_cache
 def get_engine() -> AsyncEngine:
     """Ленивая инициализация engine. Настройки должны быть загружены до вызова.
@@ -33,16 +94,34 @@ def get_engine() -> AsyncEngine:
     settings = get_settings()
 
     try:
+        pool_size, max_overflow = pool_limits(
+            settings.DB_POOL_SIZE,
+            settings.DB_MAX_OVERFLOW,
+            settings.DB_CONNECTION_BUDGET,
+            settings.WEB_CONCURRENCY,
+        )
         engine = create_async_engine(
             settings.postgres_uri,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
             pool_timeout=30,
             pool_pre_ping=True,
             pool_recycle=300,
-            connect_args={'command_timeout': 10},
+            connect_args=asyncpg_connect_args(settings),
+        )
+        instrument_engine(
+            engine,
+            QueryInstrumentationConfig(
+                slow_query_threshold=settings.SLOW_QUERY_THRESHOLD_MS / 1000,
+                repeated_queries_threshold=settings.N_PLUS_ONE_THRESHOLD,
+                repeated_queries_action=repeated_queries_action_for(settings.ENVIRONMENT),
+            ),
+        )
+        logger.info(
+            'Асинхронный движок БД успешно создан: pool_size=%d, max_overflow=%d',
+            pool_size,
+            max_overflow,
         )
-        logger.info('Асинхронный движок БД успешно создан')
         return engine
 
     except sa_exceptions.TimeoutError as e:
@@ -54,12 +133,35 @@ def get_engine() -> AsyncEngine:
     except sa_exceptions.SQLAlchemyError as e:
         logger.exception('Ошибка SQLAlchemy при создании движка')
         raise DatabaseConnectionError(f'Ошибка SQLAlchemy при создании движка: {str(e)}') from e
+    except ValueError as e:
+        logger.exception('Некорректный бюджет соединений с БД')
+        raise DatabaseArgumentError(str(e)) from e
     except Exception as e:
         error_msg = f'Непредвиденная ошибка при создании движка БД: {str(e)}'
         logger.critical(error_msg, exc_info=True)
         raise DatabaseConnectionError(error_msg) from e
 
 
+async def prewarm_pool(engine: AsyncEngine, size: int) -> int:
+    """Заранее открывает ``size`` соединений пула, чтобы первые запросы не ждали подключения.
+
+    Соединения открываются конкурентно и сразу возвращаются в пул. Размер ограничен
+    ``pool_size``: overflow-соединения при возврате закрываются, греть их бессмысленно.
+
+    Returns:
+        int: Количество прогретых соединений.
+
+    """
+    size = min(size, engine.sync_engine.pool.size())
+    if size <= 0:
+        return 0
+
+    connections = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    await asyncio.gather(*(conn.close() for conn in connections))
+    logger.info('Пул соединений прогрет: %d соединений', size)
+    return size
+
+
 @lru_cache
 def get_session_factory() -> async_sessionmaker[AsyncSession]:
     """Ленивая инициализация асинхронной session factory."""
@@ -68,3 +170,20 @@ def get_session_factory() -> async_sessionmaker[AsyncSession]:
         bind=engine,
         expire_on_commit=False,
     )  # type: ignore
+
+
+def _forget_engine_after_fork() -> None:
+    """Сбрасывает engine, унаследованный дочерним процессом при fork.
+
+    Сокеты соединений пула после fork общие с родителем, и два процесса, пишущие
+    в одно соединение, портят протокол. ``dispose(close=False)`` отцепляет пул,
+    не закрывая чужие соединения, а следующий ``get_engine`` в дочернем процессе
+    создаёт свой engine.
+    """
+    if get_engine.cache_info().currsize:
+        get_engine().sync_engine.dispose(close=False)
+    get_engine.cache_clear()
+    get_session_factory.cache_clear()
+
+
+os.register_at_fork(after_in_child=_forget_engine_after_fork)
@@ -12,3 +12,9 @@ class DatabaseArgumentError(Exception):
     """Ошибка аргументов подключения к базе данных."""
 
     pass
+
+
+class RepeatedQueriesError(Exception):
+    """Обнаружены повторяющиеся однотипные SQL-запросы (N+1) в рамках одного запроса."""
+
+    pass
@@ -0,0 +1,186 @@
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Literal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.infrastructure.database.exceptions import RepeatedQueriesError
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('src.infrastructure.database.slow_queries')
+
+RepeatedQueriesAction = Literal['ignore', 'warn', 'raise']
+
+_REPEATED_QUERIES_ACTIONS: dict[str, RepeatedQueriesAction] = {
+    'development': 'warn',
+    'test': 'raise',
+    'production': 'ignore',
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAM = re.compile(r'\$\d+|%\(\w+\)s|\?')
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\([^()]*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Статистика SQL-запросов в рамках одного HTTP-запроса (или другого блока кода)."""
+
+    count: int = 0
+    total_time: float = 0.0
+    fingerprints: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement_fingerprint: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.fingerprints[statement_fingerprint] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Возвращает отпечатки запросов, выполненных не менее ``threshold`` раз."""
+        return {fp: n for fp, n in self.fingerprints.items() if n >= threshold}
+
+
+@dataclass(slots=True)
+class QueryInstrumentationConfig:
+    """Параметры инструментации SQL-запросов.
+
+    Attributes:
+        slow_query_threshold: порог в секундах, начиная с которого запрос пишется
+            в slow-query лог.
+        repeated_queries_threshold: сколько структурно одинаковых запросов за один
+            HTTP-запрос считаются признаком N+1.
+        repeated_queries_action: реакция на N+1 — игнорировать, писать предупреждение
+            в лог или выбрасывать ``RepeatedQueriesError`` (режим тестов).
+
+    """
+
+    slow_query_threshold: float = 0.2
+    repeated_queries_threshold: int = 5
+    repeated_queries_action: RepeatedQueriesAction = 'ignore'
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+_config = QueryInstrumentationConfig()
+
+
+def repeated_queries_action_for(environment: str) -> RepeatedQueriesAction:
+    return _REPEATED_QUERIES_ACTIONS.get(environment, 'ignore')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Приводит SQL-запрос к структурному отпечатку.
+
+    Литералы и bind-параметры заменяются на ``?``, списки ``IN (...)`` и
+    ``VALUES (...), (...)`` схлопываются, пробелы нормализуются. Запросы,
+    отличающиеся только значениями параметров, получают одинаковый отпечаток.
+
+    Example:
+        >>> fingerprint("SELECT * FROM holdings WHERE portfolio_id = $1")
+        'SELECT * FROM holdings WHERE portfolio_id = ?'
+
+    """
+    result = _STRING_LITERAL.sub('?', statement)
+    result = _BIND_PARAM.sub('?', result)
+    result = _NUMBER_LITERAL.sub('?', result)
+    result = _IN_LIST.sub('IN (...)', result)
+    result = _VALUES_LIST.sub('VALUES (...)', result)
+    return _WHITESPACE.sub(' ', result).strip()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Собирает статистику SQL-запросов, выполненных внутри блока.
+
+    Статистика хранится в contextvar, поэтому корректно работает для конкурентных
+    запросов в одном event loop.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def check_repeated_queries(stats: QueryStats, source: str) -> None:
+    """Проверяет статистику на повторяющиеся запросы (N+1) согласно конфигурации.
+
+    Args:
+        stats: Собранная статистика запросов.
+        source: Описание источника для сообщения (например, ``GET /portfolios/{id}``).
+
+    Raises:
+        RepeatedQueriesError: Если обнаружен N+1 и инструментация работает в режиме ``raise``.
+
+    """
+    if _config.repeated_queries_action == 'ignore':
+        return
+
+    repeated = stats.repeated(_config.repeated_queries_threshold)
+    if not repeated:
+        return
+
+    details = '; '.join(f'{n}x {fp}' for fp, n in repeated.items())
+    message = f'Повторяющиеся SQL-запросы (возможен N+1) в {source}: {details}'
+    if _config.repeated_queries_action == 'raise':
+        raise RepeatedQueriesError(message)
+    logger.warning(message)
+
+
+def instrument_engine(engine: AsyncEngine, config: QueryInstrumentationConfig) -> None:
+    """Подключает к движку обработчики событий для учёта SQL-запросов.
+
+    Для каждого запроса замеряется длительность; если активен ``track_queries``,
+    запрос учитывается в текущей статистике. Запросы дольше порога пишутся в
+    логгер ``src.infrastructure.database.slow_queries`` вместе с отпечатком.
+    Запросы, завершившиеся ошибкой (таймаут, deadlock, нарушение ограничения),
+    учитываются так же: среди них как раз самые долгие.
+    """
+    global _config
+    _config = config
+
+    sync_engine = engine.sync_engine
+
+    def _record(statement: str, duration: float, failed: bool = False) -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(fingerprint(statement), duration)
+
+        if duration >= config.slow_query_threshold:
+            slow_query_logger.warning(
+                'Медленный запрос%s (%.1f мс): %s',
+                ' с ошибкой' if failed else '',
+                duration * 1000,
+                fingerprint(statement),
+            )
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        _record(statement, time.perf_counter() - conn.info['query_start_time'].pop())
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _handle_error(context: Any) -> None:
+        # after_cursor_execute при ошибке не вызывается: время старта снимается здесь,
+        # иначе список копился бы на соединении пула. Ошибки вне выполнения запроса
+        # (подключение, чтение результата) времени старта не оставляют.
+        connection = context.connection
+        started = connection.info.get('query_start_time') if connection is not None else None
+        if not started or context.statement is None:
+            return
+        _record(context.statement, time.perf_counter() - started.pop(), failed=True)
@@ -0,0 +1,245 @@
+import datetime
+import logging
+from collections.abc import Iterable
+from functools import lru_cache
+from uuid import UUID
+
+from src.domain.domain import Portfolio, PortfolioSummary, Transaction
+from src.domain.exceptions import PortfolioVersionConflictError
+
+logger = logging.getLogger(__name__)
+
+_DELETED = None
+
+
+class InMemoryStore:
+    """Хранилище портфелей в памяти процесса — замена Postgres для бенчмарков и демо.
+
+    Держит зафиксированное состояние и индекс портфелей по ``user_id``. Изменения
+    вносятся только через ``InMemorySession.commit``, которая применяет подготовленные
+    изменения целиком, без точек переключения event loop — поэтому для асинхронного
+    кода фиксация атомарна.
+
+    Note:
+        Данные не переживают перезапуск процесса и не разделяются между воркерами.
+
+    """
+
+    def __init__(self) -> None:
+        self.portfolios: dict[UUID, Portfolio] = {}
+        self.portfolio_ids_by_user: dict[UUID, set[UUID]] = {}
+        self.transactions: dict[UUID, Transaction] = {}
+        self.last_transaction_at: dict[UUID, datetime.datetime] = {}
+        # Время записи последней транзакции, а не её executed_at — как в SQL-сводке.
+        self.last_activity_at: dict[UUID, datetime.datetime] = {}
+        self.transactions_by_portfolio: dict[UUID, list[Transaction]] = {}
+
+    def session(self) -> 'InMemorySession':
+        return InMemorySession(self)
+
+    def clear(self) -> None:
+        self.portfolios.clear()
+        self.portfolio_ids_by_user.clear()
+        self.transactions.clear()
+        self.last_transaction_at.clear()
+        self.last_activity_at.clear()
+        self.transactions_by_portfolio.clear()
+
+    def _put(self, portfolio: Portfolio) -> None:
+        previous = self.portfolios.get(portfolio.id)
+        if previous is not None and previous.user_id != portfolio.user_id:
+            self._unindex(previous)
+        self.portfolios[portfolio.id] = portfolio
+        self.portfolio_ids_by_user.setdefault(portfolio.user_id, set()).add(portfolio.id)
+
+    def _delete(self, portfolio_id: UUID) -> None:
+        portfolio = self.portfolios.pop(portfolio_id, None)
+        self.last_transaction_at.pop(portfolio_id, None)
+        self.last_activity_at.pop(portfolio_id, None)
+        if portfolio is not None:
+            self._unindex(portfolio)
+
+    def _add_transaction(self, transaction: Transaction) -> None:
+        self.transactions[transaction.id] = transaction
+        self.transactions_by_portfolio.setdefault(transaction.portfolio_id, []).append(transaction)
+        last = self.last_transaction_at.get(transaction.portfolio_id)
+        if last is None or last < transaction.executed_at:
+            self.last_transaction_at[transaction.portfolio_id] = transaction.executed_at
+        self.last_activity_at[transaction.portfolio_id] = datetime.datetime.now(datetime.UTC)
+
+    def _unindex(self, portfolio: Portfolio) -> None:
+        ids = self.portfolio_ids_by_user.get(portfolio.user_id)
+        if ids is not None:
+            ids.discard(portfolio.id)
+            if not ids:
+                del self.portfolio_ids_by_user[portfolio.user_id]
+
+
+class InMemorySession:
+    """Сессия над ``InMemoryStore`` с семантикой транзакции.
+
+    Изменения копируются в промежуточный буфер (copy-on-write) и видны только внутри
+    сессии; ``commit`` переносит их в хранилище, ``rollback`` — отбрасывает. Чтение
+    возвращает копии, поэтому изменение объекта без вызова репозитория не меняет
+    ни буфер, ни хранилище — как и с SQLAlchemy-репозиторием.
+
+    Обновлённые портфели запоминают версию, с которой их прочитали из хранилища:
+    ``commit`` сверяет её с зафиксированной и отвергает всю сессию, если портфель
+    успела изменить другая сессия.
+    """
+
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+        self._staged_portfolios: dict[UUID, Portfolio | None] = {}
+        self._staged_transactions: list[Transaction] = []
+        self._read_versions: dict[UUID, int] = {}
+
+    def get(self, portfolio_id: UUID) -> Portfolio | None:
+        portfolio = self._lookup(portfolio_id)
+        return portfolio.copy() if portfolio is not None else None
+
+    def get_version(self, portfolio_id: UUID) -> int | None:
+        portfolio = self._lookup(portfolio_id)
+        return portfolio.version if portfolio is not None else None
+
+    def get_by_user_id(self, user_id: UUID) -> list[Portfolio]:
+        return sorted(
+            (p.copy() for p in self._user_portfolios(user_id)),
+            key=lambda p: p.created_at,
+        )
+
+    def get_many(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        portfolios = ((pid, self._lookup(pid)) for pid in portfolio_ids)
+        return {pid: p.copy() for pid, p in portfolios if p is not None}
+
+    def get_summaries_by_user_id(self, user_id: UUID) -> list[PortfolioSummary]:
+        staged_last: dict[UUID, datetime.datetime] = {}
+        for transaction in self._staged_transactions:
+            last = staged_last.get(transaction.portfolio_id)
+            if last is None or last < transaction.executed_at:
+                staged_last[transaction.portfolio_id] = transaction.executed_at
+
+        summaries = []
+        for portfolio in sorted(self._user_portfolios(user_id), key=lambda p: p.created_at):
+            candidates = [
+                t
+                for t in (
+                    self._store.last_transaction_at.get(portfolio.id),
+                    staged_last.get(portfolio.id),
+                )
+                if t is not None
+            ]
+            summaries.append(
+                PortfolioSummary.from_portfolio(portfolio, max(candidates, default=None)),
+            )
+        return summaries
+
+    def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        """Как в SQL-репозитории: по последней зафиксированной активности."""
+        last = self._store.last_activity_at
+
+        def activity(portfolio: Portfolio) -> datetime.datetime:
+            return last.get(portfolio.id) or portfolio.created_at
+
+        portfolios = sorted(self._store.portfolios.values(), key=activity, reverse=True)
+        return [p.id for p in portfolios[:limit]]
+
+    def get_versions_by_user_id(self, user_id: UUID) -> dict[UUID, int]:
+        return {p.id: p.version for p in self._user_portfolios(user_id)}
+
+    def get_transactions(
+        self,
+        portfolio_id: UUID,
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> list[Transaction]:
+        candidates = [
+            *self._store.transactions_by_portfolio.get(portfolio_id, ()),
+            *(t for t in self._staged_transactions if t.portfolio_id == portfolio_id),
+        ]
+        return sorted(
+            (t for t in candidates if since <= t.executed_at < until),
+            key=lambda t: (t.executed_at, t.id),
+        )
+
+    def exists(self, portfolio_id: UUID) -> bool:
+        if portfolio_id in self._staged_portfolios:
+            return self._staged_portfolios[portfolio_id] is not None
+        return portfolio_id in self._store.portfolios
+
+    def put(self, portfolio: Portfolio) -> None:
+        self._staged_portfolios[portfolio.id] = portfolio.copy()
+
+    def update(self, portfolio: Portfolio) -> None:
+        """Кладёт изменённый портфель и увеличивает его версию.
+
+        Raises:
+            PortfolioVersionConflictError: если версия портфеля уже не та, что при чтении,
+                или портфель удалён.
+
+        """
+        current = self._lookup(portfolio.id)
+        if current is None or current.version != portfolio.version:
+            raise PortfolioVersionConflictError([portfolio.id])
+        if portfolio.id not in self._staged_portfolios:
+            self._read_versions[portfolio.id] = portfolio.version
+        portfolio.version += 1
+        self.put(portfolio)
+
+    def delete(self, portfolio_id: UUID) -> None:
+        self._staged_portfolios[portfolio_id] = _DELETED
+
+    def add_transaction(self, transaction: Transaction) -> None:
+        self._staged_transactions.append(transaction)
+
+    def existing_transaction_ids(self, transaction_ids: Iterable[UUID]) -> set[UUID]:
+        staged = {t.id for t in self._staged_transactions}
+        return {tid for tid in transaction_ids if tid in self._store.transactions or tid in staged}
+
+    def _lookup(self, portfolio_id: UUID) -> Portfolio | None:
+        if portfolio_id in self._staged_portfolios:
+            return self._staged_portfolios[portfolio_id]
+        return self._store.portfolios.get(portfolio_id)
+
+    def _user_portfolios(self, user_id: UUID) -> list[Portfolio]:
+        ids = set(self._store.portfolio_ids_by_user.get(user_id, ()))
+        ids.update(
+            pid
+            for pid, p in self._staged_portfolios.items()
+            if p is not None and p.user_id == user_id
+        )
+        portfolios = (self._lookup(pid) for pid in ids)
+        return [p for p in portfolios if p is not None and p.user_id == user_id]
+
+    def commit(self) -> None:
+        conflicts = [
+            portfolio_id
+            for portfolio_id, version in self._read_versions.items()
+            if self._store.portfolios.get(portfolio_id) is None
+            or self._store.portfolios[portfolio_id].version != version
+        ]
+        if conflicts:
+            raise PortfolioVersionConflictError(conflicts)
+        for portfolio_id, portfolio in self._staged_portfolios.items():
+            if portfolio is _DELETED:
+                self._store._delete(portfolio_id)
+            else:
+                self._store._put(portfolio)
+        for transaction in self._staged_transactions:
+            self._store._add_transaction(transaction)
+        self.rollback()
+
+    def rollback(self) -> None:
+        self._staged_portfolios.clear()
+        self._staged_transactions.clear()
+        self._read_versions.clear()
+
+    def close(self) -> None:
+        self.rollback()
+
+
+@lru_cache
+def get_memory_store() -> InMemoryStore:
+    """Общее для процесса хранилище in-memory бэкенда."""
+    logger.info('Используется in-memory хранилище портфелей')
+    return InMemoryStore()
@@ -0,0 +1,31 @@
+"""add portfolio version
+
+Revision ID: 3c1f9a7d2b4e
+Revises: 019fe3c6f841
+Create Date: 2025-11-12 10:15:42.118304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a7d2b4e'
+down_revision: Union[str, Sequence[str], None] = '019fe3c6f841'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'portfolios',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('portfolios', 'version')
@@ -0,0 +1,67 @@
+"""add portfolio summaries
+
+Revision ID: 7e2b5c9a4d13
+Revises: 3c1f9a7d2b4e
+Create Date: 2025-11-20 14:02:37.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b5c9a4d13'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a7d2b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'portfolio_summaries',
+        sa.Column('portfolio_id', sa.UUID(), nullable=False),
+        sa.Column('holdings_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column(
+            'total_cost',
+            sa.Numeric(precision=20, scale=10),
+            server_default='0',
+            nullable=False,
+        ),
+        sa.Column('last_transaction_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('portfolio_id'),
+    )
+    op.execute(
+        """
+        INSERT INTO portfolio_summaries (
+            portfolio_id, holdings_count, total_cost, last_transaction_at
+        )
+        SELECT
+            p.id,
+            COALESCE(h.holdings_count, 0),
+            COALESCE(h.total_cost, 0),
+            t.last_transaction_at
+        FROM portfolios p
+        LEFT JOIN (
+            SELECT
+                portfolio_id,
+                COUNT(*) AS holdings_count,
+                SUM(quantity * average_cost) AS total_cost
+            FROM holdings
+            GROUP BY portfolio_id
+        ) h ON h.portfolio_id = p.id
+        LEFT JOIN (
+            SELECT portfolio_id, MAX(executed_at) AS last_transaction_at
+            FROM transactions
+            GROUP BY portfolio_id
+        ) t ON t.portfolio_id = p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('portfolio_summaries')
@@ -0,0 +1,118 @@
+"""partition transactions by executed_at
+
+Revision ID: b8d4e1f07a2c
+Revises: 7e2b5c9a4d13
+Create Date: 2025-11-27 09:41:05.271836
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4e1f07a2c'
+down_revision: Union[str, Sequence[str], None] = '7e2b5c9a4d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько месяцев вперёд создать партиции сразу; дальше их создаёт сервис при старте.
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    'id, portfolio_id, asset_id, transaction_type, quantity, price_per_unit, '
+    'total_amount, executed_at, currency'
+)
+
+
+def _month_starts(first: datetime.date, last: datetime.date) -> list[datetime.date]:
+    months = []
+    current = first.replace(day=1)
+    while current <= last:
+        months.append(current)
+        current = (current + datetime.timedelta(days=32)).replace(day=1)
+    return months
+
+
+def _create_month_partition(start: datetime.date) -> None:
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    op.execute(
+        f'CREATE TABLE transactions_y{start.year}m{start.month:02d} '
+        f'PARTITION OF transactions '
+        f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') "
+        f"TO ('{end.isoformat()} 00:00:00+00')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('ALTER TABLE transactions RENAME TO transactions_legacy')
+    op.execute('ALTER TABLE transactions_legacy RENAME CONSTRAINT transactions_pkey TO transactions_legacy_pkey')
+    op.execute('ALTER INDEX ix_transactions_portfolio_id RENAME TO ix_transactions_legacy_portfolio_id')
+
+    op.create_table(
+        'transactions',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('portfolio_id', sa.UUID(), nullable=False),
+        sa.Column('asset_id', sa.String(length=100), nullable=False),
+        sa.Column('transaction_type', sa.String(length=20), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('price_per_unit', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('executed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('currency', sa.String(length=10), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ),
+        sa.PrimaryKeyConstraint('id', 'executed_at'),
+        postgresql_partition_by='RANGE (executed_at)',
+    )
+    op.create_index(
+        'ix_transactions_portfolio_id_executed_at',
+        'transactions',
+        ['portfolio_id', 'executed_at'],
+        unique=False,
+    )
+
+    bind = op.get_bind()
+    oldest = bind.execute(
+        sa.text("SELECT min(executed_at) AT TIME ZONE 'UTC' FROM transactions_legacy")
+    ).scalar()
+    today = datetime.datetime.now(datetime.UTC).date()
+    last = today
+    for _ in range(MONTHS_AHEAD):
+        last = (last.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+    for start in _month_starts(oldest.date() if oldest else today, last):
+        _create_month_partition(start)
+    # Страховка: строки вне созданных диапазонов не теряются. Должна оставаться пустой —
+    # иначе создание партиции на соответствующий месяц завершится ошибкой.
+    op.execute('CREATE TABLE transactions_default PARTITION OF transactions DEFAULT')
+
+    op.execute(f'INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_legacy')
+    op.drop_table('transactions_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('ALTER TABLE transactions RENAME TO transactions_partitioned')
+    op.create_table(
+        'transactions',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('portfolio_id', sa.UUID(), nullable=False),
+        sa.Column('asset_id', sa.String(length=100), nullable=False),
+        sa.Column('transaction_type', sa.String(length=20), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('price_per_unit', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=20, scale=10), nullable=False),
+        sa.Column('executed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('currency', sa.String(length=10), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ),
+        sa.PrimaryKeyConstraint('id', name='transactions_legacy_pkey'),
+    )
+    op.execute(
+        f'INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_partitioned'
+    )
+    # Партиции удаляются вместе с родительской таблицей.
+    op.drop_table('transactions_partitioned')
+    op.execute('ALTER TABLE transactions RENAME CONSTRAINT transactions_legacy_pkey TO transactions_pkey')
+    op.create_index(op.f('ix_transactions_portfolio_id'), 'transactions', ['portfolio_id'], unique=False)
@@ -0,0 +1,39 @@
+"""add transaction recorded_at
+
+Revision ID: d2a6f3c81e95
+Revises: b8d4e1f07a2c
+Create Date: 2025-12-03 16:20:11.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6f3c81e95'
+down_revision: Union[str, Sequence[str], None] = 'b8d4e1f07a2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующие строки получают время миграции: их заберёт первая полная выгрузка.
+    op.add_column(
+        'transactions',
+        sa.Column(
+            'recorded_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+    )
+    op.create_index('ix_transactions_recorded_at', 'transactions', ['recorded_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_recorded_at', table_name='transactions')
+    op.drop_column('transactions', 'recorded_at')
@@ -0,0 +1,62 @@
+"""add assets and integer asset keys
+
+Revision ID: e4f19a2b7c58
+Revises: d2a6f3c81e95
+Create Date: 2026-10-19 11:42:37.215804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f19a2b7c58'
+down_revision: Union[str, Sequence[str], None] = 'd2a6f3c81e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('holdings', 'transactions')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'assets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('code', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('code'),
+    )
+    op.execute(
+        'INSERT INTO assets (code) '
+        'SELECT asset_id FROM holdings UNION SELECT asset_id FROM transactions '
+        'ORDER BY 1',
+    )
+    # Обновление transactions переписывает все строки таблицы (ALTER и UPDATE
+    # на секционированной таблице доходят до каждой партиции) — на большой таблице
+    # миграцию стоит запускать в окно обслуживания.
+    for table in TABLES:
+        op.add_column(table, sa.Column('asset_key', sa.Integer(), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET asset_key = assets.id FROM assets '
+            f'WHERE assets.code = {table}.asset_id',
+        )
+        op.alter_column(table, 'asset_key', nullable=False)
+        op.create_foreign_key(f'{table}_asset_key_fkey', table, 'assets', ['asset_key'], ['id'])
+        op.drop_column(table, 'asset_id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('asset_id', sa.String(length=100), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET asset_id = assets.code FROM assets '
+            f'WHERE assets.id = {table}.asset_key',
+        )
+        op.alter_column(table, 'asset_id', nullable=False)
+        op.drop_constraint(f'{table}_asset_key_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'asset_key')
+    op.drop_table('assets')
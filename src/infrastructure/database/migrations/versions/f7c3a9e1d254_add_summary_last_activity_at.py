@@ -0,0 +1,51 @@
+"""add last_activity_at to portfolio summaries
+
+Revision ID: f7c3a9e1d254
+Revises: e4f19a2b7c58
+Create Date: 2026-10-19 15:08:41.603127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c3a9e1d254'
+down_revision: Union[str, Sequence[str], None] = 'e4f19a2b7c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'portfolio_summaries',
+        sa.Column('last_activity_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    # Активность — время записи транзакции (recorded_at), а не её executed_at.
+    op.execute(
+        """
+        UPDATE portfolio_summaries s
+        SET last_activity_at = COALESCE(
+            (SELECT max(t.recorded_at) FROM transactions t WHERE t.portfolio_id = s.portfolio_id),
+            p.created_at
+        )
+        FROM portfolios p
+        WHERE p.id = s.portfolio_id
+        """
+    )
+    op.alter_column('portfolio_summaries', 'last_activity_at', nullable=False)
+    op.create_index(
+        'ix_portfolio_summaries_last_activity_at',
+        'portfolio_summaries',
+        [sa.text('last_activity_at DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_portfolio_summaries_last_activity_at', table_name='portfolio_summaries')
+    op.drop_column('portfolio_summaries', 'last_activity_at')
@@ -0,0 +1,197 @@
+"""Помесячные партиции таблицы транзакций.
+
+Таблица ``transactions`` в Postgres секционирована по диапазону ``executed_at``
+(см. миграцию ``b8d4e1f07a2c``). Партиция на месяц называется ``transactions_yYYYYmMM``
+и покрывает ``[первое число месяца, первое число следующего)`` в UTC.
+
+Партиции создаются заранее — на текущий месяц и ``months_ahead`` вперёд — при старте
+сервиса и командой ``python -m src.entrypoints.cli.partitions ensure``. Старые партиции
+отсоединяются командой ``detach``: таблица остаётся в БД как обычная и её можно
+выгрузить в архив и удалить, не трогая горячие данные.
+
+Строки за месяц без партиции попадают в ``transactions_default``, и создать партицию
+этого месяца потом уже нельзя: Postgres отказывает, если в default есть строки
+из её диапазона. Поэтому API не принимает транзакции позже ``partition_horizon``,
+а каждый месяц создаётся в своей транзакции — сбой одного не откатывает остальные.
+"""
+
+import datetime
+import logging
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS_TABLE = 'transactions'
+
+_PARTITION_NAME_RE = re.compile(r'^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$')
+
+_SELECT_PARTITIONS = text(
+    """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = :table
+    ORDER BY child.relname
+    """,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class MonthPartition:
+    """Партиция таблицы ``table`` за месяц, начинающийся с ``start``."""
+
+    table: str
+    start: datetime.date
+
+    @classmethod
+    def for_date(cls, table: str, value: datetime.date) -> 'MonthPartition':
+        return cls(table, value.replace(day=1))
+
+    @classmethod
+    def from_name(cls, name: str) -> 'MonthPartition | None':
+        """Разбирает имя партиции; ``None`` для таблиц с другим именованием (например, default)."""
+        match = _PARTITION_NAME_RE.match(name)
+        if match is None:
+            return None
+        return cls(
+            match['table'],
+            datetime.date(int(match['year']), int(match['month']), 1),
+        )
+
+    @property
+    def name(self) -> str:
+        return f'{self.table}_y{self.start.year}m{self.start.month:02d}'
+
+    @property
+    def end(self) -> datetime.date:
+        return self.next().start
+
+    def next(self) -> 'MonthPartition':
+        if self.start.month == 12:
+            return MonthPartition(self.table, self.start.replace(year=self.start.year + 1, month=1))
+        return MonthPartition(self.table, self.start.replace(month=self.start.month + 1))
+
+    def create_sql(self) -> str:
+        # Границы явно в UTC: иначе литерал timestamptz трактуется в часовом поясе сессии.
+        return (
+            f'CREATE TABLE IF NOT EXISTS {self.name} PARTITION OF {self.table} '
+            f"FOR VALUES FROM ('{self.start.isoformat()} 00:00:00+00') "
+            f"TO ('{self.end.isoformat()} 00:00:00+00')"
+        )
+
+    def detach_sql(self) -> str:
+        return f'ALTER TABLE {self.table} DETACH PARTITION {self.name}'
+
+
+def months_ahead(
+    table: str,
+    today: datetime.date,
+    count: int,
+) -> list[MonthPartition]:
+    """Партиции на месяц ``today`` и ``count`` следующих месяцев."""
+    partition = MonthPartition.for_date(table, today)
+    partitions = [partition]
+    for _ in range(count):
+        partition = partition.next()
+        partitions.append(partition)
+    return partitions
+
+
+def partition_horizon(count: int, today: datetime.date | None = None) -> datetime.datetime:
+    """Граница ``executed_at``, до которой партиции заведомо созданы.
+
+    Партиции создаются на ``count`` месяцев вперёд, но новый месяц — только при
+    ближайшем запуске ``ensure``; последний месяц в запас не входит.
+    """
+    today = today or datetime.datetime.now(datetime.UTC).date()
+    last = months_ahead(TRANSACTIONS_TABLE, today, max(count - 1, 0))[-1]
+    return datetime.datetime.combine(last.end, datetime.time(), tzinfo=datetime.UTC)
+
+
+def partitions_before(names: list[str], table: str, cutoff: datetime.date) -> list[MonthPartition]:
+    """Партиции ``table`` из ``names``, целиком лежащие раньше ``cutoff``."""
+    partitions = (MonthPartition.from_name(name) for name in names)
+    return sorted(
+        (p for p in partitions if p is not None and p.table == table and p.end <= cutoff),
+        key=lambda p: p.start,
+    )
+
+
+async def list_partitions(conn: AsyncConnection, table: str = TRANSACTIONS_TABLE) -> list[str]:
+    rows = await conn.execute(_SELECT_PARTITIONS, {'table': table})
+    return list(rows.scalars().all())
+
+
+async def ensure_partitions(
+    engine: AsyncEngine,
+    count: int,
+    table: str = TRANSACTIONS_TABLE,
+    today: datetime.date | None = None,
+) -> list[str]:
+    """Создаёт недостающие партиции на текущий и ``count`` следующих месяцев.
+
+    Каждая партиция создаётся в своей транзакции. Месяц, который создать не удалось
+    (например, его строки уже лежат в default-партиции), пропускается с ошибкой
+    в логе, остальные создаются.
+
+    Returns:
+        list[str]: Имена созданных партиций.
+
+    """
+    today = today or datetime.datetime.now(datetime.UTC).date()
+    async with engine.connect() as conn:
+        existing = set(await list_partitions(conn, table))
+    created = []
+    for partition in months_ahead(table, today, count):
+        if partition.name in existing:
+            continue
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(partition.create_sql()))
+        except DBAPIError:
+            logger.exception('Партиция %s не создана', partition.name)
+            continue
+        created.append(partition.name)
+    if created:
+        logger.info('Созданы партиции %s: %s', table, ', '.join(created))
+    return created
+
+
+async def detach_partitions_before(
+    conn: AsyncConnection,
+    cutoff: datetime.date,
+    table: str = TRANSACTIONS_TABLE,
+) -> list[str]:
+    """Отсоединяет партиции, целиком лежащие раньше ``cutoff``.
+
+    Отсоединённые таблицы остаются в БД под тем же именем: их можно выгрузить
+    в архив и удалить отдельно.
+
+    Note:
+        ``DETACH PARTITION ... CONCURRENTLY`` не используется: Postgres не выполняет
+        его, если у таблицы есть default-партиция, а ``transactions_default`` есть
+        всегда. Обычный ``DETACH`` ненадолго блокирует запись в таблицу.
+
+    Returns:
+        list[str]: Имена отсоединённых партиций.
+
+    """
+    detached = []
+    for partition in partitions_before(await list_partitions(conn, table), table, cutoff):
+        await conn.execute(text(partition.detach_sql()))
+        detached.append(partition.name)
+        logger.info('Партиция %s отсоединена', partition.name)
+    return detached
+
+
+async def ensure_transaction_partitions(engine: AsyncEngine, count: int) -> list[str]:
+    """Создаёт партиции транзакций наперёд; на не-Postgres БД ничего не делает."""
+    if engine.dialect.name != 'postgresql':
+        return []
+    return await ensure_partitions(engine, count)
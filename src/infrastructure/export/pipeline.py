@@ -0,0 +1,188 @@
+"""Выгрузка транзакций и позиций в Parquet для аналитики.
+
+Раскладка каталога выгрузки::
+
+    <root>/transactions/month=2025-01/bucket=07/part-<run_id>-00001.parquet
+    <root>/holdings/snapshot=20250131T000000Z/bucket=07/part-<run_id>-00001.parquet
+    <root>/_export_state.json
+
+Транзакции неизменяемы и выгружаются инкрементально: в состоянии хранится
+high-water mark по ``recorded_at`` (время записи в БД), и каждый прогон дописывает
+только строки из ``(high_water_mark, now - lag]``. Отставание ``lag`` нужно, потому что
+``recorded_at`` — время начала транзакции БД: строка с меньшим временем может
+закоммититься уже после чтения. Позиции изменяемы, поэтому каждый прогон пишет
+их полный снимок в отдельную партицию ``snapshot``.
+"""
+
+import datetime
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.adapters.ledger import SqlAlchemyLedgerReader
+from src.domain.fixed_point import QUANTUM
+from src.infrastructure.export.parquet import (
+    HOLDINGS_SCHEMA,
+    TRANSACTIONS_SCHEMA,
+    PartitionedParquetWriter,
+    portfolio_bucket,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_export_state.json'
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+
+
+@dataclass(slots=True)
+class ExportState:
+    """Состояние инкрементальной выгрузки, хранится рядом с данными."""
+
+    transactions_high_water_mark: datetime.datetime | None = None
+    last_run_id: str | None = None
+
+    @classmethod
+    def load(cls, root: Path) -> 'ExportState':
+        path = root / STATE_FILE
+        if not path.exists():
+            return cls()
+        data = json.loads(path.read_text(encoding='utf-8'))
+        mark = data.get('transactions_high_water_mark')
+        return cls(
+            transactions_high_water_mark=datetime.datetime.fromisoformat(mark) if mark else None,
+            last_run_id=data.get('last_run_id'),
+        )
+
+    def save(self, root: Path) -> None:
+        """Атомарно перезаписывает файл состояния."""
+        mark = self.transactions_high_water_mark
+        data = {
+            'transactions_high_water_mark': mark.isoformat() if mark else None,
+            'last_run_id': self.last_run_id,
+        }
+        root.mkdir(parents=True, exist_ok=True)
+        tmp_path = root / f'.{STATE_FILE}.tmp'
+        tmp_path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+        os.replace(tmp_path, root / STATE_FILE)
+
+
+@dataclass(slots=True)
+class ExportResult:
+    table: str
+    rows: int = 0
+    files: list[Path] = field(default_factory=list)
+
+
+async def export_transactions(
+    session: AsyncSession,
+    root: Path,
+    state: ExportState,
+    run_id: str,
+    until: datetime.datetime,
+    buckets: int,
+    batch_size: int = 10_000,
+) -> ExportResult:
+    """Дописывает транзакции, записанные после high-water mark и не позже ``until``.
+
+    High-water mark в ``state`` сдвигается на ``until`` только после того, как файлы
+    опубликованы; сохранить ``state`` должен вызывающий код.
+    """
+    after = state.transactions_high_water_mark or EPOCH
+    writer = PartitionedParquetWriter(
+        root / 'transactions',
+        TRANSACTIONS_SCHEMA,
+        run_id,
+        max_buffered_rows=max(batch_size * 4, 1),
+    )
+    reader = SqlAlchemyLedgerReader(session, yield_per=batch_size)
+    try:
+        async for row in reader.stream_transaction_rows(after, until):
+            executed_at = _as_utc(row['executed_at'])
+            partition = (
+                ('month', executed_at.strftime('%Y-%m')),
+                ('bucket', f'{portfolio_bucket(row["portfolio_id"], buckets):03d}'),
+            )
+            writer.write(partition, _transaction_record(row, executed_at))
+        files = writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+    state.transactions_high_water_mark = until
+    logger.info('Выгружено транзакций: %d в %d файлов', writer.rows_written, len(files))
+    return ExportResult('transactions', writer.rows_written, files)
+
+
+async def export_holdings_snapshot(
+    session: AsyncSession,
+    root: Path,
+    run_id: str,
+    snapshot_at: datetime.datetime,
+    buckets: int,
+    batch_size: int = 10_000,
+) -> ExportResult:
+    """Пишет полный снимок позиций в партицию ``snapshot=<время>``."""
+    snapshot = snapshot_at.astimezone(datetime.UTC).strftime('%Y%m%dT%H%M%SZ')
+    writer = PartitionedParquetWriter(
+        root / 'holdings',
+        HOLDINGS_SCHEMA,
+        run_id,
+        max_buffered_rows=max(batch_size * 4, 1),
+    )
+    reader = SqlAlchemyLedgerReader(session, yield_per=batch_size)
+    try:
+        async for row in reader.stream_holding_rows():
+            partition = (
+                ('snapshot', snapshot),
+                ('bucket', f'{portfolio_bucket(row["portfolio_id"], buckets):03d}'),
+            )
+            writer.write(
+                partition,
+                {
+                    'portfolio_id': str(row['portfolio_id']),
+                    'asset_id': row['asset_id'],
+                    'quantity': _money(row['quantity']),
+                    'average_cost': _money(row['average_cost']),
+                },
+            )
+        files = writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+    logger.info('Выгружено позиций: %d в %d файлов', writer.rows_written, len(files))
+    return ExportResult('holdings', writer.rows_written, files)
+
+
+def _transaction_record(row: RowMapping, executed_at: datetime.datetime) -> dict[str, Any]:
+    return {
+        'id': str(row['id']),
+        'portfolio_id': str(row['portfolio_id']),
+        'asset_id': row['asset_id'],
+        'transaction_type': row['transaction_type'],
+        'quantity': _money(row['quantity']),
+        'price_per_unit': _money(row['price_per_unit']),
+        'total_amount': _money(row['total_amount']),
+        'executed_at': executed_at,
+        'currency': row['currency'],
+        'recorded_at': _as_utc(row['recorded_at']),
+    }
+
+
+def _money(value: Decimal) -> Decimal:
+    # decimal128(20, 10) не принимает значения с большей шкалой без округления.
+    return Decimal(value).quantize(QUANTUM, ROUND_HALF_UP)
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # SQLite возвращает время без часового пояса; в БД оно всегда в UTC.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.UTC)
+    return value.astimezone(datetime.UTC)
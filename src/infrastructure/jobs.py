@@ -0,0 +1,85 @@
+"""Фоновые задачи сервиса и сборка планировщика из настроек."""
+
+import functools
+import logging
+
+from sqlalchemy import QueuePool, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config.settings import Settings
+from src.infrastructure.database.engine import get_engine
+from src.infrastructure.database.partitions import ensure_transaction_partitions
+from src.infrastructure.metrics.metrics import (
+    DB_POOL_CONNECTIONS,
+    DB_POOL_PROBE_DURATION,
+    observe_duration,
+)
+from src.infrastructure.scheduler import (
+    AdvisoryLockLeaderElection,
+    CronSchedule,
+    IntervalSchedule,
+    Job,
+    Scheduler,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def probe_pool(engine: AsyncEngine) -> None:
+    """Проверяет, что пул выдаёт рабочее соединение, и публикует его заполненность."""
+    with observe_duration(DB_POOL_PROBE_DURATION):
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+    pool = engine.sync_engine.pool
+    if isinstance(pool, QueuePool):
+        DB_POOL_CONNECTIONS.labels(state='checked_out').set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(state='idle').set(pool.checkedin())
+
+
+async def ensure_partitions(engine: AsyncEngine, months_ahead: int) -> None:
+    created = await ensure_transaction_partitions(engine, months_ahead)
+    if created:
+        logger.info('Созданы партиции транзакций: %s', ', '.join(created))
+
+
+def build_scheduler(settings: Settings) -> Scheduler | None:
+    """Собирает планировщик с задачами сервиса; None, если он выключен или задач нет."""
+    if not settings.SCHEDULER_ENABLED or settings.REPOSITORY_BACKEND != 'sqlalchemy':
+        return None
+
+    engine = get_engine()
+    jobs = [
+        # Пул у каждого пода свой, поэтому проверка — на всех подах.
+        Job(
+            'db_pool_probe',
+            functools.partial(probe_pool, engine),
+            IntervalSchedule(settings.DB_POOL_PROBE_INTERVAL_MS / 1000),
+            jitter=settings.DB_POOL_PROBE_INTERVAL_MS / 1000 / 10,
+            leader_only=False,
+            timeout=5.0,
+        ),
+        Job(
+            'ensure_transaction_partitions',
+            functools.partial(
+                ensure_partitions,
+                engine,
+                settings.DB_TRANSACTION_PARTITIONS_AHEAD,
+            ),
+            CronSchedule(settings.DB_PARTITIONS_CRON),
+            jitter=60.0,
+            timeout=300.0,
+        ),
+    ]
+
+    leader = None
+    if engine.dialect.name == 'postgresql':
+        if settings.DB_PGBOUNCER:
+            logger.warning(
+                'Выбор лидера через advisory lock ненадёжен за pgbouncer в режиме transaction',
+            )
+        leader = AdvisoryLockLeaderElection(engine, settings.SCHEDULER_LEADER_LOCK_ID)
+    return Scheduler(
+        jobs,
+        leader=leader,
+        leader_check_interval=settings.SCHEDULER_LEADER_CHECK_INTERVAL_MS / 1000,
+    )
@@ -0,0 +1,315 @@
+"""Локальный журнал приёма: дозапись на диск с общим fsync и ротацией сегментов.
+
+Журнал — каталог ``slot-<n>`` в ``JOURNAL_DIR`` с файлами ``segment-<номер>.log``.
+Запись в сегменте — заголовок (длина и crc32 данных) и сами данные. Дописывается
+только последний, активный сегмент; заполненный сегмент закрывается, и начинается
+следующий. Закрытые сегменты читает и удаляет тот, кто переносит записи дальше.
+
+Запись подтверждается только после ``fsync``, но ``fsync`` один на пачку: записи,
+пришедшие за ``fsync_interval``, пишутся и сбрасываются на диск вместе. Один fsync
+стоит столько же, сколько запись одной строки, поэтому под нагрузкой журнал
+принимает на порядки больше записей в секунду, чем БД — транзакций.
+
+Каталог слота занимает один процесс (``flock`` на ``.lock``), так что воркеры
+одного пода пишут каждый в свой слот. Блокировка снимается и при падении процесса:
+слот без владельца подхватывает любой другой процесс (см. ``orphaned_slots``).
+Запись, оборванная падением посреди ``write``, не проходит проверку crc; чтение
+сегмента останавливается на ней — подтверждена она не была. Если ``write`` или
+``fsync`` вернули ошибку, а процесс жив, хвост пачки обрезается (или начинается
+новый сегмент): иначе следующие подтверждённые записи легли бы за повреждённой
+и при чтении отбросились бы вместе с ней.
+"""
+
+import asyncio
+import contextlib
+import errno
+import fcntl
+import itertools
+import logging
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+from src.infrastructure.metrics.metrics import JOURNAL_FSYNC_BATCH, JOURNAL_FSYNC_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Длина данных и их crc32.
+_HEADER = struct.Struct('>II')
+_LOCK_FILE = '.lock'
+
+
+class JournalClosedError(RuntimeError):
+    """Журнал не запущен или уже остановлен."""
+
+
+def encode_record(payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_segment(path: Path) -> list[bytes]:
+    """Читает записи сегмента до конца файла или до первой повреждённой записи."""
+    data = path.read_bytes()
+    records = []
+    offset = 0
+    while offset < len(data):
+        start = offset + _HEADER.size
+        if start > len(data):
+            break
+        length, crc = _HEADER.unpack_from(data, offset)
+        payload = data[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        records.append(payload)
+        offset = start + length
+    if offset < len(data):
+        logger.warning(
+            'Сегмент %s оборван на смещении %d из %d; хвост отброшен',
+            path,
+            offset,
+            len(data),
+        )
+    return records
+
+
+def segments(slot: Path) -> list[Path]:
+    return sorted(slot.glob('segment-*.log'))
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.stem.removeprefix('segment-'))
+
+
+def _try_lock(slot: Path) -> int | None:
+    fd = os.open(slot / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """Журнал одного процесса в свободном слоте каталога ``root``.
+
+    Args:
+        root: Каталог журнала, общий для воркеров пода.
+        segment_max_bytes: Размер, после которого активный сегмент закрывается.
+        fsync_interval: Сколько секунд копить записи перед общим fsync; 0 — сбрасывать
+            всё, что накопилось, пока шёл предыдущий fsync.
+
+    Note:
+        Не защищён блокировками: рассчитан на один event loop.
+
+    """
+
+    def __init__(self, root: str | Path, segment_max_bytes: int, fsync_interval: float) -> None:
+        self.root = Path(root)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_interval = fsync_interval
+        self.slot: Path | None = None
+        self._lock_fd: int | None = None
+        self._file: BinaryIO | None = None
+        self._active: Path | None = None
+        self._number = 0
+        self._size = 0
+        self._pending: list[tuple[bytes, asyncio.Future[None]]] = []
+        self._wakeup = asyncio.Event()
+        # Запись пачки и закрытие сегмента не должны идти одновременно.
+        self._file_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        self.slot, self._lock_fd = await asyncio.to_thread(self._acquire_slot)
+        existing = segments(self.slot)
+        # Сегменты прошлого владельца слота остаются закрытыми и ждут переноса.
+        self._number = _segment_number(existing[-1]) if existing else 0
+        await asyncio.to_thread(self._open_next)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name='journal-writer')
+        logger.info('Журнал приёма: слот %s, закрытых сегментов %d', self.slot, len(existing))
+
+    async def stop(self) -> None:
+        """Дописывает принятые записи и освобождает слот."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await task
+        await asyncio.to_thread(self._close)
+
+    async def append(self, payload: bytes) -> None:
+        """Добавляет запись; возвращает управление после fsync пачки с ней.
+
+        Raises:
+            JournalClosedError: если журнал не запущен или останавливается.
+            OSError: если запись на диск не удалась.
+
+        """
+        if self._task is None or self._stopping:
+            raise JournalClosedError('Журнал приёма не запущен')
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((encode_record(payload), future))
+        self._wakeup.set()
+        await future
+
+    async def seal(self) -> None:
+        """Закрывает активный сегмент, если в нём есть записи, и начинает следующий."""
+        async with self._file_lock:
+            if self._file is not None and self._size:
+                await asyncio.to_thread(self._rotate)
+
+    def sealed_segments(self, slot: Path | None = None) -> list[Path]:
+        """Закрытые сегменты слота по порядку записи; по умолчанию — своего."""
+        slot = slot or self.slot
+        if slot is None:
+            return []
+        return [path for path in segments(slot) if path != self._active]
+
+    @contextlib.contextmanager
+    def orphaned_slots(self) -> Iterator[list[Path]]:
+        """Блокирует слоты, у которых нет живого владельца, на время блока.
+
+        Такие слоты остаются после падения процесса или после уменьшения числа
+        воркеров; их сегменты нужно перенести, иначе записи не попадут в БД.
+        """
+        locks = []
+        try:
+            for slot in sorted(self.root.glob('slot-*')):
+                if slot == self.slot or not slot.is_dir():
+                    continue
+                fd = _try_lock(slot)
+                if fd is not None:
+                    locks.append((slot, fd))
+            yield [slot for slot, _ in locks]
+        finally:
+            for _, fd in locks:
+                os.close(fd)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.fsync_interval and not self._stopping:
+                await asyncio.sleep(self.fsync_interval)
+            self._wakeup.clear()
+            if self._pending:
+                await self._write_pending()
+            if self._stopping and not self._pending:
+                return
+
+    async def _write_pending(self) -> None:
+        batch, self._pending = self._pending, []
+        try:
+            async with self._file_lock:
+                await asyncio.to_thread(self._write, [record for record, _ in batch])
+        except OSError as e:
+            logger.exception('Не удалось записать %d записей в журнал приёма', len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        JOURNAL_FSYNC_BATCH.observe(len(batch))
+        for _, future in batch:
+            # Запрос мог быть отменён, но запись уже на диске и будет перенесена.
+            if not future.done():
+                future.set_result(None)
+
+    def _acquire_slot(self) -> tuple[Path, int]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        for n in itertools.count():
+            slot = self.root / f'slot-{n}'
+            slot.mkdir(exist_ok=True)
+            fd = _try_lock(slot)
+            if fd is not None:
+                return slot, fd
+        raise AssertionError('unreachable')
+
+    def _write(self, records: list[bytes]) -> None:
+        if self._file is None:
+            # После ошибки записи не удалось открыть новый сегмент — пробуем снова.
+            self._open_next()
+        assert self._file is not None
+        start = time.perf_counter()
+        data = b''.join(records)
+        try:
+            self._write_all(data)
+            os.fsync(self._file.fileno())
+        except OSError:
+            self._discard_tail()
+            raise
+        JOURNAL_FSYNC_DURATION.observe(time.perf_counter() - start)
+        self._size += len(data)
+        if self._size >= self.segment_max_bytes:
+            self._rotate()
+
+    def _write_all(self, data: bytes) -> None:
+        assert self._file is not None
+        view = memoryview(data)
+        while view:
+            # Небуферизованный файл может записать не всё за один вызов.
+            written = self._file.write(view)
+            if not written:
+                raise OSError(errno.EIO, f'Запись в {self._active} не продвинулась')
+            view = view[written:]
+
+    def _discard_tail(self) -> None:
+        """Убирает из активного сегмента всё, что дописано после подтверждённых записей."""
+        assert self._file is not None
+        try:
+            self._file.truncate(self._size)
+            os.fsync(self._file.fileno())
+            return
+        except OSError:
+            logger.exception('Не удалось обрезать сегмент %s; начинается новый', self._active)
+        # Сегмент с повреждённым хвостом закрывается: записи до хвоста перенесутся,
+        # а новые пойдут в чистый сегмент.
+        with contextlib.suppress(OSError):
+            self._file.close()
+        self._file = None
+        self._active = None
+        try:
+            self._open_next()
+        except OSError:
+            logger.exception('Не удалось начать новый сегмент журнала приёма')
+            if self._file is None:
+                self._active = None
+
+    def _open_next(self) -> None:
+        assert self.slot is not None
+        self._number += 1
+        self._active = self.slot / f'segment-{self._number:012d}.log'
+        self._file = open(self._active, 'ab', buffering=0)
+        self._size = 0
+        # Новый файл должен пережить падение вместе со своими записями.
+        _fsync_dir(self.slot)
+
+    def _rotate(self) -> None:
+        assert self._file is not None
+        self._file.close()
+        self._open_next()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if self._active is not None and not self._size:
+                self._active.unlink(missing_ok=True)
+            self._active = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
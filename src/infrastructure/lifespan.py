@@ -5,16 +5,75 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from src.bootstrap import bootstrap
+from src.infrastructure.admission import build_admission_limiters
 from src.infrastructure.database.engine import get_engine
+from src.infrastructure.jobs import build_scheduler
+from src.infrastructure.journal import Journal
+from src.infrastructure.metrics.metrics import mark_process_dead
+from src.infrastructure.tracing.tracing import shutdown_tracing
+from src.service_layer.dependencies import (
+    build_invalidation_subscriber,
+    build_journal,
+    get_shared_cache,
+)
+from src.service_layer.ingestion import JournalFlusher
 
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    scheduler = None
+    subscriber = None
+    ingestion = None
     try:
-        await bootstrap()
+        settings = await bootstrap()
+        if settings.ADMISSION_CONTROL_ENABLED:
+            app.state.admission_limiters = build_admission_limiters(settings)
+        scheduler = build_scheduler(settings)
+        if scheduler is not None:
+            scheduler.start()
+        app.state.scheduler = scheduler
+        subscriber = build_invalidation_subscriber()
+        if subscriber is not None:
+            subscriber.start()
+        ingestion = await _start_ingestion(app)
         yield
     finally:
-        engine = get_engine()
-        await engine.dispose()
+        # Задачи используют engine, поэтому останавливаются до его закрытия.
+        if ingestion is not None:
+            await _stop_ingestion(app, *ingestion)
+        if scheduler is not None:
+            await scheduler.stop()
+        if subscriber is not None:
+            await subscriber.stop()
+        if get_shared_cache.cache_info().currsize and (shared := get_shared_cache()):
+            await shared.client.aclose()
+        if get_engine.cache_info().currsize:
+            await get_engine().dispose()
+        shutdown_tracing()
+        mark_process_dead()
+
+
+async def _start_ingestion(app: FastAPI) -> tuple[Journal, JournalFlusher] | None:
+    built = build_journal()
+    if built is None:
+        return None
+    journal, flusher = built
+    await journal.start()
+    # Сначала переносятся сегменты, оставшиеся после падения, потом принимаются новые.
+    try:
+        await flusher.flush()
+    except Exception:
+        # Сегменты остаются на диске, их перенесёт фоновый перенос; падение здесь
+        # перезапускало бы под на том же сегменте.
+        logger.exception('Журнал приёма не перенесён при запуске; перенос повторится в фоне')
+    flusher.start()
+    app.state.journal = journal
+    return journal, flusher
+
+
+async def _stop_ingestion(app: FastAPI, journal: Journal, flusher: JournalFlusher) -> None:
+    app.state.journal = None
+    await flusher.stop()
+    await journal.stop()
@@ -0,0 +1,230 @@
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+# С несколькими воркерами каждый пишет значения в файлы этого каталога, а /metrics
+# сводит их (см. ``src.entrypoints.api.metrics``). ``multiprocess_mode`` у gauge
+# задаёт, как сводить: ``livesum`` — сумма по живым воркерам, ``livemax`` — максимум.
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+# Бакеты под латентность API: основная масса запросов укладывается в единицы-десятки мс,
+# хвосты (ретраи users-сервиса, ожидание пула) — в секунды.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Длительность обработки HTTP-запросов',
+    ['method', 'route', 'status_code'],
+    buckets=LATENCY_BUCKETS,
+)
+
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'Количество HTTP-запросов, обрабатываемых в данный момент',
+    ['method'],
+    multiprocess_mode='livesum',
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request',
+    'Количество SQL-запросов на один HTTP-запрос',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    'db_time_per_request_seconds',
+    'Суммарное время SQL-запросов на один HTTP-запрос',
+    ['route'],
+    buckets=LATENCY_BUCKETS,
+)
+
+UOW_OPERATION_DURATION = Histogram(
+    'uow_operation_duration_seconds',
+    'Длительность commit/rollback в Unit of Work',
+    ['operation', 'outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+
+USER_SERVICE_REQUEST_DURATION = Histogram(
+    'user_service_request_duration_seconds',
+    'Длительность одной попытки запроса к users-сервису',
+    ['operation', 'outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+
+STARTUP_PHASE_DURATION = Gauge(
+    'app_startup_phase_duration_seconds',
+    'Длительность фаз запуска приложения (phase="total" — общее время старта)',
+    ['phase'],
+    multiprocess_mode='livemax',
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    'admission_queue_wait_seconds',
+    'Время ожидания слота в очереди контроля допуска',
+    ['route_class'],
+    buckets=(0.0, *LATENCY_BUCKETS),
+)
+
+ADMISSION_REJECTED = Counter(
+    'admission_rejected_total',
+    'Запросы, отклонённые контролем допуска (503)',
+    ['route_class', 'reason'],
+)
+
+ADMISSION_CONCURRENCY_LIMIT = Gauge(
+    'admission_concurrency_limit',
+    'Текущий адаптивный лимит одновременно обрабатываемых запросов',
+    ['route_class'],
+    multiprocess_mode='livesum',
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_in_flight',
+    'Запросы, допущенные к обработке и ещё не завершённые',
+    ['route_class'],
+    multiprocess_mode='livesum',
+)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    'circuit_breaker_state',
+    'Состояние выключателя: 0 — замкнут, 1 — полуоткрыт, 2 — разомкнут',
+    ['name'],
+    multiprocess_mode='livemax',
+)
+
+CIRCUIT_BREAKER_REJECTED = Counter(
+    'circuit_breaker_rejected_total',
+    'Вызовы, отклонённые разомкнутым выключателем без обращения к зависимости',
+    ['name'],
+)
+
+USER_SERVICE_HEDGED_REQUESTS = Counter(
+    'user_service_hedged_requests_total',
+    'Дублирующие (hedged) запросы к users-сервису, отправленные из-за медленного ответа',
+    ['operation'],
+)
+
+SCHEDULER_JOB_DURATION = Histogram(
+    'scheduler_job_duration_seconds',
+    'Длительность запусков фоновых задач планировщика',
+    ['job', 'outcome'],
+    buckets=(*LATENCY_BUCKETS, 30.0, 60.0, 300.0),
+)
+
+SCHEDULER_JOB_SKIPPED = Counter(
+    'scheduler_job_skipped_total',
+    'Пропущенные запуски фоновых задач: not_leader — не лидер, overlap — ещё идёт прошлый',
+    ['job', 'reason'],
+)
+
+SCHEDULER_IS_LEADER = Gauge(
+    'scheduler_is_leader',
+    '1, если процесс — лидер планировщика и выполняет задачи уровня кластера',
+    multiprocess_mode='livemax',
+)
+
+DB_POOL_PROBE_DURATION = Histogram(
+    'db_pool_probe_duration_seconds',
+    'Длительность проверки пула: получение соединения и SELECT 1',
+    ['outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Соединения пула по состоянию (checked_out — выданы, idle — свободны)',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Обращения к кешам по результату (hit/miss; error — общий кеш недоступен)',
+    ['cache', 'result'],
+)
+
+WARMUP_LOADED = Counter(
+    'warmup_loaded_total',
+    'Записи, загруженные в кеши при прогреве на старте',
+    ['cache'],
+)
+
+JOURNAL_FSYNC_DURATION = Histogram(
+    'journal_fsync_duration_seconds',
+    'Длительность записи пачки в журнал приёма транзакций вместе с fsync',
+    buckets=LATENCY_BUCKETS,
+)
+
+JOURNAL_FSYNC_BATCH = Histogram(
+    'journal_fsync_batch_records',
+    'Записей журнала, подтверждённых одним fsync',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+# appended — принято в журнал; applied, duplicate, rejected — итог переноса в БД.
+JOURNAL_TRANSACTIONS = Counter(
+    'journal_transactions_total',
+    'Транзакции, прошедшие через журнал приёма, по результату',
+    ['result'],
+)
+
+JOURNAL_PENDING_SEGMENTS = Gauge(
+    'journal_pending_segments',
+    'Закрытые сегменты журнала, ещё не перенесённые в БД',
+    multiprocess_mode='livesum',
+)
+
+# Доля объединённых загрузок: follower / (leader + follower).
+SINGLEFLIGHT_CALLS = Counter(
+    'singleflight_calls_total',
+    'Вызовы объединяемых загрузок: leader выполнил запрос в БД, follower дождался чужого',
+    ['operation', 'role'],
+)
+
+
+@contextmanager
+def observe_duration(histogram: Histogram, **labels: str) -> Iterator[None]:
+    """Замеряет длительность блока и записывает её в гистограмму.
+
+    К переданным меткам добавляется метка ``outcome``: ``success`` при нормальном
+    завершении блока или имя класса исключения, если блок завершился ошибкой.
+
+    Args:
+        histogram: Гистограмма с меткой ``outcome`` среди прочих.
+        **labels: Значения остальных меток гистограммы.
+
+    """
+    outcome = 'success'
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - start)
+
+
+def mark_process_dead() -> None:
+    """Убирает live-gauge завершающегося воркера из сводки по процессам."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,183 @@
+"""Общий для всех реплик кеш на сервере с протоколом Redis.
+
+Второй уровень после ``TTLCache`` процесса: при двадцати репликах за round-robin
+балансировщиком кеш процесса видит лишь долю запросов к каждому ключу, а общий
+кеш — все. Кеш необязателен: любая ошибка сервера считается промахом, и данные
+читаются из источника (БД или сервиса пользователей). Пока сервер недоступен,
+выключатель не даёт каждому запросу ждать таймаута соединения.
+
+Нужен extra ``redis``; без ``REDIS_URL`` общий кеш не используется.
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from src.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.infrastructure.metrics.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def connect_redis(url: str, socket_timeout: float) -> Any:
+    """Создаёт асинхронный клиент ``redis``; соединения открываются при первом запросе."""
+    try:
+        from redis.asyncio import Redis
+    except ImportError as e:
+        raise RuntimeError('Для REDIS_URL нужен пакет redis: pip install ".[redis]"') from e
+    return Redis.from_url(
+        url,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=socket_timeout,
+    )
+
+
+class SharedCache:
+    """Ключ-значение поверх клиента ``redis.asyncio`` с откатом на промах при ошибках.
+
+    Все ключи получают префикс ``prefix``. Значения — байты; сериализация на стороне
+    вызывающего. Ошибки сервера не пробрасываются: чтение возвращает промах, запись
+    и публикация пропускаются.
+
+    Args:
+        client: Клиент ``redis.asyncio.Redis`` (или совместимый, например fakeredis).
+        prefix: Префикс ключей и каналов, чтобы сервисы не пересекались на одном сервере.
+        breaker: Выключатель для вызовов сервера.
+
+    """
+
+    def __init__(self, client: Any, prefix: str, breaker: CircuitBreaker) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.breaker = breaker
+
+    def key(self, *parts: object) -> str:
+        return ':'.join([self.prefix, *map(str, parts)])
+
+    async def get(self, key: str) -> bytes | None:
+        [value] = await self.get_many([key])
+        return value
+
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        values = await self._call('mget', lambda: self.client.mget(keys))
+        if values is None:
+            CACHE_REQUESTS.labels(cache='shared', result='error').inc(len(keys))
+            return [None] * len(keys)
+        for value in values:
+            result = 'miss' if value is None else 'hit'
+            CACHE_REQUESTS.labels(cache='shared', result=result).inc()
+        return values
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        if not items:
+            return
+
+        async def send() -> None:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, value, px=int(ttl * 1000))
+                await pipe.execute()
+
+        await self._call('set', send)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._call('delete', lambda: self.client.delete(*keys))
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._call('publish', lambda: self.client.publish(self.key(channel), message))
+
+    async def _call(self, operation: str, send: Callable[[], Any]) -> Any:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            return None
+        try:
+            result = await send()
+        except asyncio.CancelledError:
+            self.breaker.record(success=False)
+            raise
+        except Exception as e:
+            self.breaker.record(success=False)
+            logger.warning('Общий кеш недоступен (%s): %r', operation, e)
+            return None
+        self.breaker.record(success=True)
+        return result
+
+
+class InvalidationSubscriber:
+    """Слушает канал инвалидации и удаляет устаревшие записи из кешей процесса.
+
+    Сообщение — ``<вид>:<ключ>``, например ``portfolio:<uuid>``; обработчик для вида
+    получает ключ. Публикует их тот, кто изменил данные. Сообщения pub/sub
+    не сохраняются: пока соединения нет, они теряются, поэтому кеши процесса всё равно
+    ограничены TTL, а портфели дополнительно сверяются с версией в БД.
+
+    Args:
+        cache: Общий кеш; используется его клиент и префикс канала.
+        channel: Имя канала без префикса.
+        handlers: Обработчики по виду сообщения.
+        reconnect_delay: Пауза перед повторной подпиской после ошибки, в секундах.
+
+    """
+
+    def __init__(
+        self,
+        cache: SharedCache,
+        channel: str,
+        handlers: dict[str, Callable[[str], None]],
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self.cache = cache
+        self.channel = cache.key(channel)
+        self.handlers = handlers
+        self.reconnect_delay = reconnect_delay
+        self._task: asyncio.Task[None] | None = None
+        self.subscribed = asyncio.Event()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name='cache-invalidation')
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def handle(self, message: str) -> None:
+        kind, _, key = message.partition(':')
+        handler = self.handlers.get(kind)
+        if handler is None:
+            logger.debug('Неизвестное сообщение инвалидации: %s', message)
+            return
+        try:
+            handler(key)
+        except ValueError:
+            logger.warning('Некорректное сообщение инвалидации: %s', message)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Подписка на инвалидацию кеша прервана')
+            self.subscribed.clear()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen(self) -> None:
+        pubsub = self.cache.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            self.subscribed.set()
+            async for message in pubsub.listen():
+                data = message['data']
+                self.handle(data.decode() if isinstance(data, bytes) else data)
+        finally:
+            await pubsub.aclose()
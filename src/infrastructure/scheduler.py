@@ -0,0 +1,338 @@
+"""Планировщик фоновых задач внутри процесса приложения.
+
+Задачи запускаются по интервалу (``IntervalSchedule``) или по cron-выражению
+(``CronSchedule``, время в UTC). Каждая задача крутится в своей asyncio-задаче
+и выполняется последовательно, поэтому два запуска одной задачи не пересекаются:
+если запуск затянулся, пропущенные срабатывания не догоняются.
+
+Задачи с ``leader_only=True`` выполняются только на лидере. Лидер выбирается
+через ``LeaderElection`` — в кластере это advisory lock в Postgres, так что задача
+выполняется один раз на кластер, а не на каждом поде.
+"""
+
+import abc
+import asyncio
+import datetime
+import logging
+import random
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.infrastructure.metrics.metrics import (
+    SCHEDULER_IS_LEADER,
+    SCHEDULER_JOB_DURATION,
+    SCHEDULER_JOB_SKIPPED,
+    observe_duration,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Schedule(Protocol):
+    def next_run(self, after: datetime.datetime) -> datetime.datetime:
+        """Ближайшее время запуска строго после ``after``."""
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class IntervalSchedule:
+    seconds: float
+
+    def next_run(self, after: datetime.datetime) -> datetime.datetime:
+        return after + datetime.timedelta(seconds=self.seconds)
+
+
+# (имя поля, минимум, максимум); день недели: 0 и 7 — воскресенье, как в crontab.
+_CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+)
+# Больше итераций поиск не делает: выражение вроде ``0 0 31 2 *`` никогда не сработает.
+_CRON_MAX_STEPS = 10_000
+
+
+def _parse_cron_field(expr: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in expr.split(','):
+        step = 1
+        if '/' in part:
+            part, step_expr = part.split('/', 1)
+            step = int(step_expr)
+            if step < 1:
+                raise ValueError(f'шаг должен быть положительным: {expr}')
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_expr, end_expr = part.split('-', 1)
+            start, end = int(start_expr), int(end_expr)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f'значение вне диапазона {low}-{high}: {expr}')
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Расписание в формате crontab из пяти полей: минута, час, день, месяц, день недели.
+
+    Поддерживаются ``*``, списки через запятую, диапазоны ``a-b`` и шаг ``/n``.
+    Как и в cron, если ограничены и день месяца, и день недели, достаточно совпадения
+    одного из них. Время — UTC.
+    """
+
+    __slots__ = (
+        'day_any',
+        'days',
+        'expression',
+        'hours',
+        'minutes',
+        'months',
+        'weekday_any',
+        'weekdays',
+    )
+
+    def __init__(self, expression: str) -> None:
+        parts = expression.split()
+        if len(parts) != len(_CRON_FIELDS):
+            raise ValueError(f'ожидается 5 полей cron: {expression!r}')
+        fields = [
+            _parse_cron_field(part, low, high)
+            for part, (_, low, high) in zip(parts, _CRON_FIELDS, strict=True)
+        ]
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self.day_any = parts[2] == '*'
+        self.weekday_any = parts[4] == '*'
+        self.next_run(datetime.datetime(2000, 1, 1, tzinfo=datetime.UTC))
+
+    def __repr__(self) -> str:
+        return f'CronSchedule({self.expression!r})'
+
+    def next_run(self, after: datetime.datetime) -> datetime.datetime:
+        t = after.astimezone(datetime.UTC).replace(second=0, microsecond=0)
+        t += datetime.timedelta(minutes=1)
+        for _ in range(_CRON_MAX_STEPS):
+            if t.month not in self.months:
+                year, month = (t.year + 1, 1) if t.month == 12 else (t.year, t.month + 1)
+                t = t.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + datetime.timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f'cron-выражение никогда не срабатывает: {self.expression!r}')
+
+    def _day_matches(self, t: datetime.datetime) -> bool:
+        in_days = t.day in self.days
+        # weekday() считает с понедельника, cron — с воскресенья.
+        in_weekdays = (t.weekday() + 1) % 7 in self.weekdays
+        if self.day_any or self.weekday_any:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    """Периодическая задача.
+
+    Attributes:
+        name: Имя для логов и меток метрик.
+        func: Корутина без аргументов.
+        schedule: Расписание запусков.
+        jitter: Случайная задержка до ``jitter`` секунд к каждому запуску, чтобы
+            поды не обращались к БД одновременно.
+        leader_only: Выполнять только на лидере (один раз на кластер).
+        timeout: Предельная длительность запуска в секундах.
+
+    """
+
+    name: str
+    func: Callable[[], Awaitable[object]]
+    schedule: Schedule
+    jitter: float = 0.0
+    leader_only: bool = True
+    timeout: float | None = None
+
+
+class LeaderElection(abc.ABC):
+    @abc.abstractmethod
+    async def acquire(self) -> bool:
+        """Пытается стать или остаться лидером; вызывается периодически."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def release(self) -> None:
+        raise NotImplementedError
+
+
+class AdvisoryLockLeaderElection(LeaderElection):
+    """Лидер — процесс, удерживающий сессионный advisory lock ``lock_id`` в Postgres.
+
+    Блокировка живёт, пока открыто соединение, поэтому лидер держит одно соединение
+    из пула постоянно, а остальные поды подключаются только на время попытки. Если
+    лидер упал или потерял соединение, Postgres снимает блокировку, и её забирает
+    следующий под при очередной попытке.
+
+    Note:
+        Сессионные блокировки несовместимы с pgbouncer в режиме transaction:
+        серверное соединение меняется между транзакциями.
+
+    """
+
+    def __init__(self, engine: AsyncEngine, lock_id: int) -> None:
+        self.engine = engine
+        self.lock_id = lock_id
+        self._conn: AsyncConnection | None = None
+
+    async def acquire(self) -> bool:
+        if self._conn is not None:
+            try:
+                await self._conn.execute(text('SELECT 1'))
+                return True
+            except Exception:
+                logger.exception('Соединение лидера потеряно, лидерство сброшено')
+                await self._close()
+
+        conn = await self.engine.connect()
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            acquired = await conn.scalar(
+                text('SELECT pg_try_advisory_lock(:lock_id)'),
+                {'lock_id': self.lock_id},
+            )
+        except BaseException:
+            await conn.close()
+            raise
+        if acquired:
+            self._conn = conn
+        else:
+            await conn.close()
+        return bool(acquired)
+
+    async def release(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            await self._conn.execute(
+                text('SELECT pg_advisory_unlock(:lock_id)'),
+                {'lock_id': self.lock_id},
+            )
+        finally:
+            await self._close()
+
+    async def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await conn.close()
+
+
+class Scheduler:
+    """Запускает задачи по расписанию до вызова ``stop``.
+
+    Без ``leader`` процесс считается единственным и выполняет все задачи. С ``leader``
+    лидерство проверяется каждые ``leader_check_interval`` секунд; задачи
+    с ``leader_only`` на остальных процессах пропускаются.
+
+    Note:
+        Если лидерство потеряно во время запуска, запуск доводится до конца — новый
+        лидер может начать ту же задачу раньше. Задачи должны быть идемпотентными.
+
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        leader: LeaderElection | None = None,
+        leader_check_interval: float = 5.0,
+    ) -> None:
+        self.jobs = list(jobs)
+        self.leader = leader
+        self.leader_check_interval = leader_check_interval
+        self._is_leader = leader is None
+        self._running: set[str] = set()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self) -> None:
+        if self.leader is not None:
+            self._tasks.append(asyncio.create_task(self._leadership_loop()))
+        for job in self.jobs:
+            self._tasks.append(asyncio.create_task(self._job_loop(job), name=f'job:{job.name}'))
+        logger.info('Планировщик запущен: %d задач', len(self.jobs))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.leader is not None:
+            try:
+                await self.leader.release()
+            except Exception:
+                logger.exception('Не удалось освободить лидерство')
+            self._set_leader(False)
+
+    async def run_job(self, job: Job) -> bool:
+        """Выполняет задачу один раз, если она не запущена и процесс вправе её выполнять.
+
+        Returns:
+            bool: True, если задача запускалась (даже если завершилась ошибкой).
+
+        """
+        if job.leader_only and not self._is_leader:
+            SCHEDULER_JOB_SKIPPED.labels(job=job.name, reason='not_leader').inc()
+            return False
+        if job.name in self._running:
+            SCHEDULER_JOB_SKIPPED.labels(job=job.name, reason='overlap').inc()
+            return False
+
+        self._running.add(job.name)
+        try:
+            with observe_duration(SCHEDULER_JOB_DURATION, job=job.name):
+                async with asyncio.timeout(job.timeout):
+                    await job.func()
+        except Exception:
+            logger.exception('Фоновая задача %s завершилась ошибкой', job.name)
+        finally:
+            self._running.discard(job.name)
+        return True
+
+    async def _job_loop(self, job: Job) -> None:
+        while True:
+            now = datetime.datetime.now(datetime.UTC)
+            delay = (job.schedule.next_run(now) - now).total_seconds()
+            await asyncio.sleep(max(delay, 0.0) + random.uniform(0.0, job.jitter))
+            await self.run_job(job)
+
+    async def _leadership_loop(self) -> None:
+        assert self.leader is not None
+        while True:
+            try:
+                is_leader = await self.leader.acquire()
+            except Exception:
+                logger.exception('Ошибка выбора лидера')
+                is_leader = False
+            self._set_leader(is_leader)
+            await asyncio.sleep(self.leader_check_interval)
+
+    def _set_leader(self, is_leader: bool) -> None:
+        if is_leader != self._is_leader:
+            logger.info('Лидерство планировщика: %s', 'получено' if is_leader else 'потеряно')
+        self._is_leader = is_leader
+        SCHEDULER_IS_LEADER.set(int(is_leader))
@@ -0,0 +1,52 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from src.infrastructure.metrics.metrics import SINGLEFLIGHT_CALLS
+
+
+class SingleFlight:
+    """Объединяет одновременные загрузки одного ключа в одну.
+
+    Первый вызов ``do`` для ключа (ведущий) запускает загрузку отдельной задачей;
+    вызовы с тем же ключом, пришедшие до её завершения (ведомые), ждут ту же задачу.
+    Результат не кешируется: после завершения загрузки следующий вызов начнёт новую.
+
+    Каждый вызывающий получает свой экземпляр результата через ``clone`` — общий
+    объект никому не отдаётся, и изменения одного запроса не видны другим.
+
+    Загрузка защищена ``asyncio.shield``: отмена ведущего запроса (клиент отключился)
+    не прерывает её для ведомых. Исключение загрузки получают все её ожидающие.
+
+    Note:
+        Загрузка выполняется вне транзакции вызывающего, поэтому объединять можно
+        только чтения, которым не нужно видеть собственные незафиксированные изменения.
+
+    """
+
+    def __init__(self, operation: str, clone: Callable[[Any], Any]) -> None:
+        self.operation = operation
+        self.clone = clone
+        self._flights: dict[Hashable, asyncio.Task[Any]] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.labels(operation=self.operation, role='leader').inc()
+            task = asyncio.ensure_future(load())
+            self._flights[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            SINGLEFLIGHT_CALLS.labels(operation=self.operation, role='follower').inc()
+        return self.clone(await asyncio.shield(task))
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Исключение уже получили ожидающие; без этого asyncio пишет
+            # «Task exception was never retrieved», если ждать было некому.
+            task.exception()
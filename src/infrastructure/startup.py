@@ -0,0 +1,40 @@
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from src.infrastructure.metrics.metrics import STARTUP_PHASE_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Замеряет фазы запуска приложения и выводит итоговый отчёт.
+
+    Фазы могут выполняться конкурентно: каждая меряется от своего начала до конца,
+    а ``total`` — от создания таймера до вызова ``report``. Поэтому сумма фаз может
+    превышать ``total`` — это и есть выигрыш от параллельного старта.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def report(self) -> float:
+        """Логирует длительность фаз, пишет их в метрики и возвращает общее время старта."""
+        total = time.perf_counter() - self._start
+        for name, duration in self.phases.items():
+            STARTUP_PHASE_DURATION.labels(phase=name).set(duration)
+        STARTUP_PHASE_DURATION.labels(phase='total').set(total)
+
+        details = ', '.join(f'{name}={d * 1000:.1f} мс' for name, d in self.phases.items())
+        logger.info('Старт приложения за %.1f мс: %s', total * 1000, details)
+        return total
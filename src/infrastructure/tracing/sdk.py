@@ -0,0 +1,57 @@
+import threading
+from collections.abc import Sequence
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from src.config.settings import Settings
+
+
+class JsonLinesFileSpanExporter(SpanExporter):
+    """Экспортёр спанов в локальный файл в формате JSON Lines (один span на строку).
+
+    Формат совпадает с ``ReadableSpan.to_json`` и удобен для офлайн-анализа
+    (``jq``, pandas, DuckDB).
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = ''.join(span.to_json(indent=None) + '\n' for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            self._file.flush()
+        return True
+
+
+def build_span_exporter(settings: Settings, service_name: str) -> SpanExporter:
+    if settings.TRACING_EXPORTER == 'file':
+        return JsonLinesFileSpanExporter(settings.TRACING_FILE_PATH)
+    return ConsoleSpanExporter(service_name=service_name)
+
+
+def build_tracer_provider(settings: Settings, service_name: str) -> TracerProvider:
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(build_span_exporter(settings, service_name)))
+    return provider
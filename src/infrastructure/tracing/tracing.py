@@ -0,0 +1,64 @@
+import functools
+import logging
+from collections.abc import Awaitable, Callable
+from typing import ParamSpec, TypeVar
+
+from opentelemetry import trace
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'eebook-portfolio'
+
+P = ParamSpec('P')
+R = TypeVar('R')
+
+# ProxyTracer: до вызова configure_tracing спаны не записываются (no-op),
+# после — делегируются в настроенный TracerProvider.
+tracer = trace.get_tracer(SERVICE_NAME)
+
+
+def traced(span_name: str) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Декоратор для корутин: выполняет вызов внутри span с именем ``span_name``.
+
+    Исключения записываются в span, и ему выставляется статус ERROR.
+    Сигнатура функции сохраняется, поэтому декоратор безопасен для эндпоинтов FastAPI.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with tracer.start_as_current_span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_tracing(settings: Settings) -> None:
+    """Настраивает глобальный TracerProvider согласно конфигурации.
+
+    Сэмплирование — ``ParentBased(TraceIdRatioBased)``: решение принимается для корневого
+    span, дочерние наследуют его, поэтому трассы не рвутся на середине.
+    """
+    if not settings.TRACING_ENABLED:
+        return
+
+    # SDK импортируется только при включённой трассировке: для no-op хватает API.
+    from src.infrastructure.tracing.sdk import build_tracer_provider
+
+    trace.set_tracer_provider(build_tracer_provider(settings, SERVICE_NAME))
+    logger.info(
+        'Трассировка включена: экспорт=%s, доля сэмплирования=%s',
+        settings.TRACING_EXPORTER,
+        settings.TRACING_SAMPLE_RATIO,
+    )
+
+
+def shutdown_tracing() -> None:
+    """Сбрасывает буферизованные спаны и останавливает TracerProvider."""
+    shutdown = getattr(trace.get_tracer_provider(), 'shutdown', None)
+    if shutdown is not None:
+        shutdown()
@@ -1,23 +1,161 @@
+import datetime
 import logging
+from functools import lru_cache
+from uuid import UUID
 
-from src.adapters.factory import ABCPortfolioRepositoryFactory, SQLAlchemyPortfolioRepositoryFactory
+from fastapi import Request
+
+from src.adapters.assets import AssetRegistry
+from src.adapters.cached_repository import INVALIDATION_CHANNEL, CachedPortfolioRepositoryFactory
+from src.adapters.factory import (
+    ABCPortfolioRepositoryFactory,
+    InMemoryPortfolioRepositoryFactory,
+    SQLAlchemyPortfolioRepositoryFactory,
+)
+from src.config.settings import get_settings
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.circuit_breaker import CircuitBreaker
 from src.infrastructure.database.engine import get_session_factory
-from src.service_layer.uow import AbstractUnitOfWork, SqlAlchemyUnitOfWork
-from src.service_layer.users_service import ABCUserService, UserService
+from src.infrastructure.database.memory import get_memory_store
+from src.infrastructure.database.partitions import partition_horizon
+from src.infrastructure.journal import Journal
+from src.infrastructure.redis_cache import InvalidationSubscriber, SharedCache, connect_redis
+from src.service_layer.ingestion import JournalFlusher
+from src.service_layer.uow import AbstractUnitOfWork, InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+from src.service_layer.users_service import ABCUserService, CachingUserService, UserService
 
 logger = logging.getLogger(__name__)
 
 
 def get_repo_factory() -> ABCPortfolioRepositoryFactory:
-    return SQLAlchemyPortfolioRepositoryFactory()
+    settings = get_settings()
+    factory: ABCPortfolioRepositoryFactory
+    if settings.REPOSITORY_BACKEND == 'memory':
+        factory = InMemoryPortfolioRepositoryFactory()
+    else:
+        factory = SQLAlchemyPortfolioRepositoryFactory(get_asset_registry())
+    shared = get_shared_cache()
+    if shared is not None:
+        factory = CachedPortfolioRepositoryFactory(
+            factory,
+            shared,
+            ttl=settings.REDIS_PORTFOLIOS_TTL_MS / 1000,
+        )
+    return factory
+
+
+@lru_cache
+def get_asset_registry() -> AssetRegistry:
+    """Справочник активов процесса; заполняется при старте и по мере появления активов."""
+    return AssetRegistry()
 
 
 def get_uow() -> AbstractUnitOfWork:
+    if get_settings().REPOSITORY_BACKEND == 'memory':
+        return InMemoryUnitOfWork(store=get_memory_store(), repo_factory=get_repo_factory())
     return SqlAlchemyUnitOfWork(
         session_factory=get_session_factory(),
         repo_factory=get_repo_factory(),
     )
 
 
+@lru_cache
+def get_shared_cache() -> SharedCache | None:
+    """Общий кеш реплик; None, если ``REDIS_URL`` не задан."""
+    settings = get_settings()
+    if settings.REDIS_URL is None:
+        return None
+    return SharedCache(
+        connect_redis(settings.REDIS_URL, settings.REDIS_SOCKET_TIMEOUT_MS / 1000),
+        settings.REDIS_KEY_PREFIX,
+        CircuitBreaker(
+            'redis',
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.REDIS_BREAKER_RESET_TIMEOUT_MS / 1000,
+        ),
+    )
+
+
+def build_invalidation_subscriber() -> InvalidationSubscriber | None:
+    """Подписка, сбрасывающая записи кешей процесса по сообщениям других реплик."""
+    shared = get_shared_cache()
+    if shared is None:
+        return None
+    portfolio_cache = get_portfolio_cache()
+    handlers = {'portfolio': lambda key: portfolio_cache.invalidate(UUID(key))}
+    user_service = get_user_service()
+    if isinstance(user_service, CachingUserService):
+        user_cache = user_service.cache
+        handlers['user'] = lambda key: user_cache.invalidate(UUID(key))
+    return InvalidationSubscriber(shared, INVALIDATION_CHANNEL, handlers)
+
+
+def build_journal() -> tuple[Journal, JournalFlusher] | None:
+    """Журнал приёма транзакций и его перенос в БД; None, если журнал выключен."""
+    settings = get_settings()
+    if not settings.JOURNAL_ENABLED:
+        return None
+    journal = Journal(
+        settings.JOURNAL_DIR,
+        segment_max_bytes=settings.JOURNAL_SEGMENT_MAX_BYTES,
+        fsync_interval=settings.JOURNAL_FSYNC_INTERVAL_MS / 1000,
+    )
+    flusher = JournalFlusher(
+        journal,
+        get_uow,
+        get_user_service(),
+        batch_size=settings.JOURNAL_FLUSH_BATCH_SIZE,
+        interval=settings.JOURNAL_FLUSH_INTERVAL_MS / 1000,
+    )
+    return journal, flusher
+
+
+def get_journal(request: Request) -> Journal | None:
+    """Журнал приёма процесса, если он запущен в lifespan."""
+    return getattr(request.app.state, 'journal', None)
+
+
+def get_transaction_horizon() -> datetime.datetime:
+    """Граница ``executed_at`` для новых транзакций: дальше партиций ещё нет."""
+    return partition_horizon(get_settings().DB_TRANSACTION_PARTITIONS_AHEAD)
+
+
+@lru_cache
+def get_portfolio_cache() -> TTLCache:
+    """Кеш портфелей процесса; записи сверяются с версией в БД перед выдачей."""
+    settings = get_settings()
+    return TTLCache(
+        'portfolios',
+        maxsize=settings.CACHE_PORTFOLIOS_SIZE,
+        ttl=settings.CACHE_PORTFOLIOS_TTL_MS / 1000,
+    )
+
+
+@lru_cache
 def get_user_service() -> ABCUserService:
-    return UserService(base_url='http://eebook-users-app-1:8000')
+    """Один клиент на процесс: состояние выключателя и кеш общие для всех запросов."""
+    settings = get_settings()
+    hedge_after = settings.USER_SERVICE_HEDGE_AFTER_MS
+    client = UserService(
+        base_url=settings.USER_SERVICE_URL,
+        max_retries=settings.USER_SERVICE_MAX_ATTEMPTS,
+        deadline=settings.USER_SERVICE_DEADLINE_MS / 1000,
+        attempt_timeout=settings.USER_SERVICE_ATTEMPT_TIMEOUT_MS / 1000,
+        hedge_after=hedge_after / 1000 if hedge_after is not None else None,
+        breaker=CircuitBreaker(
+            'user_service',
+            failure_threshold=settings.USER_SERVICE_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.USER_SERVICE_BREAKER_RESET_TIMEOUT_MS / 1000,
+        ),
+    )
+    cache = TTLCache(
+        'users',
+        maxsize=settings.CACHE_USERS_SIZE,
+        ttl=settings.CACHE_USERS_TTL_MS / 1000,
+    )
+    return CachingUserService(
+        client,
+        cache,
+        shared=get_shared_cache(),
+        shared_ttl=settings.REDIS_USERS_TTL_MS / 1000,
+    )
@@ -14,3 +14,11 @@ class UserServiceUnavailableError(UserServiceError):
     """Сервис недоступен (5xx, таймаут и т.п.)."""
 
     pass
+
+
+class UserServiceCircuitOpenError(UserServiceUnavailableError):
+    """Запрос не отправлялся: выключатель users-сервиса разомкнут."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,249 @@
+"""Приём транзакций через локальный журнал и их перенос в БД пачками.
+
+В пиковые минуты (открытие биржи) запись каждой транзакции отдельной транзакцией
+БД упирается в Postgres, и запросы выходят по таймауту. С включённым журналом
+``POST /transactions`` проверяет транзакцию, дописывает её в журнал и отвечает
+``202`` после fsync, не обращаясь к БД. Фоновый перенос раз в
+``JOURNAL_FLUSH_INTERVAL_MS`` закрывает активный сегмент и применяет записи
+пачками по ``JOURNAL_FLUSH_BATCH_SIZE``: несколько запросов на пачку вместо
+нескольких на транзакцию.
+
+Сегмент удаляется только после фиксации всех его пачек. Если процесс упал раньше,
+сегмент остаётся на диске и переносится снова после рестарта; уже сохранённые
+транзакции распознаются по id и пропускаются.
+
+Чего журнал не даёт: транзакция видна в чтениях только после переноса, а ошибки
+предметной области (нет портфеля, не хватает позиции) обнаруживаются уже после
+ответа клиенту. Такие транзакции, как и те, что отвергла БД (пачка с ними делится,
+пока запись не останется одна), пишутся в ``rejected.jsonl`` в каталоге журнала
+и учитываются в метрике ``journal_transactions_total{result="rejected"}``.
+"""
+
+import asyncio
+import contextlib
+import datetime
+import json
+import logging
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from src.domain.domain import Transaction
+from src.domain.enums import TransactionType
+from src.domain.exceptions import PortfolioVersionConflictError
+from src.infrastructure.journal import Journal, read_segment
+from src.infrastructure.metrics.metrics import JOURNAL_PENDING_SEGMENTS, JOURNAL_TRANSACTIONS
+from src.service_layer.portfolio_service import AppliedTransactions, PortfolioService
+from src.service_layer.uow import AbstractUnitOfWork
+from src.service_layer.users_service import ABCUserService
+
+logger = logging.getLogger(__name__)
+
+REJECTED_FILE = 'rejected.jsonl'
+# Сколько раз пачка применяется заново, если её портфели изменили параллельно.
+_CONFLICT_ATTEMPTS = 5
+
+
+def _transaction_fields(transaction: Transaction) -> dict:
+    return {
+        'id': str(transaction.id),
+        'portfolio_id': str(transaction.portfolio_id),
+        'asset_id': transaction.asset_id,
+        'type': transaction.type.value,
+        'quantity': str(transaction.quantity),
+        'price_per_unit': str(transaction.price_per_unit),
+        'total_amount': str(transaction.total_amount),
+        'executed_at': transaction.executed_at.isoformat(),
+        'currency': transaction.currency,
+    }
+
+
+def dump_transaction(transaction: Transaction) -> bytes:
+    return json.dumps(_transaction_fields(transaction), separators=(',', ':')).encode()
+
+
+def load_transaction(data: bytes) -> Transaction:
+    raw = json.loads(data)
+    return Transaction(
+        portfolio_id=UUID(raw['portfolio_id']),
+        asset_id=raw['asset_id'],
+        transaction_type=TransactionType(raw['type']),
+        quantity=Decimal(raw['quantity']),
+        price_per_unit=Decimal(raw['price_per_unit']),
+        total_amount=Decimal(raw['total_amount']),
+        executed_at=datetime.datetime.fromisoformat(raw['executed_at']),
+        currency=raw['currency'],
+        transaction_id=UUID(raw['id']),
+    )
+
+
+async def journal_transaction(journal: Journal, transaction: Transaction) -> None:
+    """Принимает транзакцию в журнал; возвращает управление, когда она на диске."""
+    await journal.append(dump_transaction(transaction))
+    JOURNAL_TRANSACTIONS.labels(result='appended').inc()
+
+
+@dataclass(slots=True)
+class FlushReport:
+    segments: int = 0
+    applied: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+
+
+class JournalFlusher:
+    """Переносит закрытые сегменты журнала в БД.
+
+    Переносятся сегменты своего слота и слотов без владельца: их оставили упавшие
+    процессы или воркеры, которых стало меньше.
+
+    Args:
+        journal: Журнал процесса.
+        uow_factory: Создаёт новую единицу работы; у каждой пачки она своя.
+        user_service: Нужен ``PortfolioService``; при переносе не вызывается.
+        batch_size: Транзакций в одной транзакции БД.
+        interval: Пауза между переносами, в секундах.
+
+    """
+
+    def __init__(
+        self,
+        journal: Journal,
+        uow_factory: Callable[[], AbstractUnitOfWork],
+        user_service: ABCUserService,
+        batch_size: int = 1000,
+        interval: float = 1.0,
+    ) -> None:
+        self.journal = journal
+        self.uow_factory = uow_factory
+        self.user_service = user_service
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name='journal-flusher')
+
+    async def stop(self) -> None:
+        """Останавливает фоновый перенос и переносит то, что осталось в журнале."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception('Журнал приёма не перенесён при остановке; перенесётся после рестарта')
+
+    async def flush(self) -> FlushReport:
+        """Закрывает активный сегмент и переносит все закрытые сегменты."""
+        report = FlushReport()
+        await self.journal.seal()
+        with self.journal.orphaned_slots() as orphans:
+            pending = [
+                segment
+                for slot in [self.journal.slot, *orphans]
+                for segment in self.journal.sealed_segments(slot)
+            ]
+            JOURNAL_PENDING_SEGMENTS.set(len(pending))
+            for segment in pending:
+                await self._flush_segment(segment, report)
+                JOURNAL_PENDING_SEGMENTS.dec()
+        if report.segments:
+            logger.info(
+                'Журнал приёма: сегментов %d, применено %d, повторов %d, отклонено %d',
+                report.segments,
+                report.applied,
+                report.duplicates,
+                report.rejected,
+            )
+        return report
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Сегменты остаются на диске и переносятся в следующий раз.
+                logger.exception('Перенос журнала приёма в БД не удался')
+
+    async def _flush_segment(self, segment: Path, report: FlushReport) -> None:
+        records = await asyncio.to_thread(read_segment, segment)
+        transactions = [load_transaction(record) for record in records]
+        for start in range(0, len(transactions), self.batch_size):
+            await self._flush_batch(transactions[start : start + self.batch_size], report)
+        await asyncio.to_thread(segment.unlink)
+        report.segments += 1
+
+    async def _flush_batch(self, transactions: Sequence[Transaction], report: FlushReport) -> None:
+        """Применяет пачку; если БД отвергла данные пачки, делит её пополам.
+
+        Деление продолжается, пока отвергнутая запись не останется одна: она
+        пишется в ``rejected.jsonl``, а остальные записи сегмента применяются.
+        Иначе одна такая запись останавливала бы перенос всего журнала. Ошибки
+        соединения и таймауты не означают, что виновата запись, и пробрасываются:
+        сегмент переносится снова в следующий раз.
+        """
+        try:
+            result = await self._apply_batch(transactions)
+            rejected: list[tuple[Transaction, Exception]] = list(result.rejected)
+        except (DataError, IntegrityError) as e:
+            if len(transactions) == 1:
+                result = AppliedTransactions()
+                rejected = [(transactions[0], e.orig)]
+            else:
+                logger.warning(
+                    'БД отвергла пачку журнала из %d транзакций, пачка делится: %s',
+                    len(transactions),
+                    e.orig,
+                )
+                middle = len(transactions) // 2
+                await self._flush_batch(transactions[:middle], report)
+                await self._flush_batch(transactions[middle:], report)
+                return
+
+        if rejected:
+            await asyncio.to_thread(self._record_rejected, rejected)
+        report.applied += len(result.applied)
+        report.duplicates += len(result.duplicates)
+        report.rejected += len(rejected)
+        JOURNAL_TRANSACTIONS.labels(result='applied').inc(len(result.applied))
+        JOURNAL_TRANSACTIONS.labels(result='duplicate').inc(len(result.duplicates))
+        JOURNAL_TRANSACTIONS.labels(result='rejected').inc(len(rejected))
+
+    async def _apply_batch(self, transactions: Sequence[Transaction]) -> AppliedTransactions:
+        """Применяет пачку в своей транзакции БД.
+
+        Портфели пачки блокируются при чтении, но если их всё же изменили
+        параллельно (запись в обход журнала, перенос в другом воркере), пачка
+        откатывается и применяется заново: уже сохранённые транзакции распознаются
+        по id, остальные ложатся поверх свежих позиций.
+        """
+        for attempt in range(1, _CONFLICT_ATTEMPTS + 1):
+            try:
+                async with self.uow_factory() as u:
+                    service = PortfolioService(u.portfolio, self.user_service)
+                    result = await service.apply_transactions(transactions)
+                    await u.commit()
+            except PortfolioVersionConflictError as e:
+                if attempt == _CONFLICT_ATTEMPTS:
+                    raise
+                logger.info('Пачка журнала применяется заново (попытка %d): %s', attempt + 1, e)
+                continue
+            return result
+        raise AssertionError('unreachable')
+
+    def _record_rejected(self, rejected: list[tuple[Transaction, Exception]]) -> None:
+        with open(self.journal.root / REJECTED_FILE, 'a', encoding='utf-8') as f:
+            for transaction, error in rejected:
+                logger.warning('Транзакция %s из журнала отклонена: %s', transaction.id, error)
+                entry = {**_transaction_fields(transaction), 'error': str(error)}
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
@@ -1,16 +1,33 @@
 import abc
+import datetime
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
 from uuid import UUID
 
 from src.adapters.repository import AbstractPortfolioRepository
-from src.domain.domain import Portfolio, Transaction
+from src.domain.domain import Portfolio, PortfolioSummary, Transaction, UserPortfolioSummary
+from src.domain.exceptions import PortfolioDomainError, PortfolioNotFoundError
 from src.service_layer.users_service import ABCUserService
 
 
+@dataclass(slots=True)
+class AppliedTransactions:
+    """Итог применения пачки транзакций."""
+
+    applied: list[Transaction] = field(default_factory=list)
+    duplicates: list[Transaction] = field(default_factory=list)
+    rejected: list[tuple[Transaction, PortfolioDomainError]] = field(default_factory=list)
+
+
 class ABCPortfolioService(abc.ABC):
     @abc.abstractmethod
     async def add(self, portfolio: Portfolio) -> None:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def add_many(self, portfolios: Sequence[Portfolio]) -> None:
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def get_by_id(self, portfolio_id: UUID) -> Portfolio | None:
         raise NotImplementedError
@@ -19,6 +36,30 @@ class ABCPortfolioService(abc.ABC):
     async def get_by_user_id(self, user_id: UUID) -> list[Portfolio]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def get_many(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_summaries_by_user_id(self, user_id: UUID) -> list[PortfolioSummary]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_user_summary(self, user_id: UUID) -> UserPortfolioSummary:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_version(self, portfolio_id: UUID) -> int | None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_versions_by_user_id(self, user_id: UUID) -> dict[UUID, int]:
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def update(self, portfolio: Portfolio) -> None:
         raise NotImplementedError
@@ -31,6 +72,19 @@ class ABCPortfolioService(abc.ABC):
     async def add_transaction(self, transaction: Transaction) -> None:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def apply_transactions(self, transactions: Sequence[Transaction]) -> AppliedTransactions:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_transactions(
+        self,
+        portfolio_id: UUID,
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> list[Transaction]:
+        raise NotImplementedError
+
 
 class PortfolioService(ABCPortfolioService):
     def __init__(self, repo: AbstractPortfolioRepository, user_service: ABCUserService) -> None:
@@ -44,12 +98,45 @@ class PortfolioService(ABCPortfolioService):
 
         await self._repo.add(portfolio)
 
+    async def add_many(self, portfolios: Sequence[Portfolio]) -> None:
+        """Создаёт пачку портфелей: пользователи проверяются одним обращением к users-сервису.
+
+        Raises:
+            ValueError: Если хотя бы одного владельца не существует; ничего не добавляется.
+
+        """
+        users = await self._user_service.get_many(p.user_id for p in portfolios)
+        missing = sorted({str(p.user_id) for p in portfolios if p.user_id not in users})
+        if missing:
+            raise ValueError(f'Users not found: {", ".join(missing)}')
+
+        await self._repo.add_many(portfolios)
+
     async def get_by_id(self, portfolio_id: UUID) -> Portfolio | None:
         return await self._repo.get_by_id(portfolio_id)
 
     async def get_by_user_id(self, user_id: UUID) -> list[Portfolio]:
         return await self._repo.get_by_user_id(user_id)
 
+    async def get_many(self, portfolio_ids: Iterable[UUID]) -> dict[UUID, Portfolio]:
+        return await self._repo.get_many(portfolio_ids)
+
+    async def get_summaries_by_user_id(self, user_id: UUID) -> list[PortfolioSummary]:
+        return await self._repo.get_summaries_by_user_id(user_id)
+
+    async def get_user_summary(self, user_id: UUID) -> UserPortfolioSummary:
+        summaries = await self._repo.get_summaries_by_user_id(user_id)
+        return UserPortfolioSummary.from_summaries(user_id, summaries)
+
+    async def get_recently_active_ids(self, limit: int) -> list[UUID]:
+        return await self._repo.get_recently_active_ids(limit)
+
+    async def get_version(self, portfolio_id: UUID) -> int | None:
+        return await self._repo.get_version(portfolio_id)
+
+    async def get_versions_by_user_id(self, user_id: UUID) -> dict[UUID, int]:
+        return await self._repo.get_versions_by_user_id(user_id)
+
     async def update(self, portfolio: Portfolio) -> None:
         await self._repo.update(portfolio)
 
@@ -57,4 +144,76 @@ class PortfolioService(ABCPortfolioService):
         await self._repo.delete(portfolio_id)
 
     async def add_transaction(self, transaction: Transaction) -> None:
+        """Применяет транзакцию к позициям портфеля и сохраняет её.
+
+        Позиции, сводка и сама транзакция пишутся в рамках одной единицы работы.
+        Портфель блокируется при чтении, поэтому параллельные транзакции одного
+        портфеля применяются по очереди, а не затирают позиции друг друга.
+
+        Raises:
+            PortfolioNotFoundError: если портфеля нет.
+            PortfolioVersionConflictError: если портфель изменили параллельно.
+            PortfolioDomainError: если транзакцию нельзя применить к портфелю.
+
+        """
+        portfolio = await self._repo.get_for_update(transaction.portfolio_id)
+        if portfolio is None:
+            raise PortfolioNotFoundError(transaction.portfolio_id)
+
+        portfolio.execute_transaction(transaction)
+        await self._repo.update(portfolio)
         await self._repo.add_transaction(transaction)
+
+    async def apply_transactions(self, transactions: Sequence[Transaction]) -> AppliedTransactions:
+        """Применяет пачку транзакций по порядку и сохраняет их вместе с позициями.
+
+        На всю пачку — несколько запросов: затронутые портфели читаются и обновляются
+        разом, транзакции вставляются одним executemany. Транзакции, которые уже
+        сохранены (по id), пропускаются, поэтому повторное применение пачки безопасно.
+        Транзакция, которую нельзя применить, не прерывает пачку, а попадает
+        в ``rejected``. Затронутые портфели блокируются до конца единицы работы.
+
+        Returns:
+            AppliedTransactions: Применённые, повторные и отклонённые транзакции.
+
+        Raises:
+            PortfolioVersionConflictError: если портфель пачки изменили параллельно.
+
+        """
+        result = AppliedTransactions()
+        if not transactions:
+            return result
+        seen = await self._repo.get_existing_transaction_ids(
+            [t.id for t in transactions],
+            min(t.executed_at for t in transactions),
+            max(t.executed_at for t in transactions),
+        )
+        portfolios = await self._repo.get_many_for_update({t.portfolio_id for t in transactions})
+        touched: dict[UUID, Portfolio] = {}
+        for transaction in transactions:
+            if transaction.id in seen:
+                result.duplicates.append(transaction)
+                continue
+            portfolio = portfolios.get(transaction.portfolio_id)
+            try:
+                if portfolio is None:
+                    raise PortfolioNotFoundError(transaction.portfolio_id)
+                portfolio.execute_transaction(transaction)
+            except PortfolioDomainError as e:
+                result.rejected.append((transaction, e))
+                continue
+            seen.add(transaction.id)
+            touched[portfolio.id] = portfolio
+            result.applied.append(transaction)
+
+        await self._repo.update_many(list(touched.values()))
+        await self._repo.add_transactions(result.applied)
+        return result
+
+    async def get_transactions(
+        self,
+        portfolio_id: UUID,
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> list[Transaction]:
+        return await self._repo.get_transactions(portfolio_id, since, until)
@@ -0,0 +1,301 @@
+"""Сверка сохранённых позиций с воспроизведением журнала транзакций.
+
+Позиции портфеля — производные данные: они должны совпадать с результатом применения
+всех его транзакций через ``Portfolio.execute_transaction``. Сверка работает
+по диапазонам id портфелей (шардам), чтобы их можно было обрабатывать параллельно
+и возобновлять прерванный прогон.
+
+После каждой транзакции воспроизведённые позиции округляются до шкалы колонок
+``Numeric(20, 10)`` — так же, как при сохранении в БД после каждой операции. Порядок
+воспроизведения — ``executed_at``, затем ``id``. С ``fixed_point=True`` журнал
+воспроизводится в ``FixedPointPortfolio``: его арифметика уже в шкале колонок,
+результат тот же, но без округления Decimal после каждой транзакции.
+
+Позиции и транзакции шарда читаются из одного снимка БД (REPEATABLE READ), иначе
+транзакция, записанная между чтениями, выглядела бы как расхождение. Исправление
+пишется с проверкой версии портфеля из того же снимка: портфель, изменённый после
+чтения, не перезаписывается, а попадает в ``conflicts`` и сверяется в следующий раз.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.adapters.ledger import SqlAlchemyLedgerReader
+from src.adapters.repository import SqlAlchemyPortfolioRepository
+from src.domain.domain import Holding, Portfolio
+from src.domain.exceptions import PortfolioDomainError, PortfolioVersionConflictError
+from src.domain.fixed_point import QUANTUM, FixedPointPortfolio, FixedPointTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def to_column_scale(value: Decimal) -> Decimal:
+    """Округляет значение до шкалы колонок количества и стоимости."""
+    return value.quantize(QUANTUM, ROUND_HALF_UP)
+
+
+@dataclass(slots=True)
+class HoldingMismatch:
+    """Расхождение по одному активу; ``None`` — позиции нет на соответствующей стороне."""
+
+    portfolio_id: UUID
+    asset_id: str
+    stored_quantity: Decimal | None
+    stored_average_cost: Decimal | None
+    expected_quantity: Decimal | None
+    expected_average_cost: Decimal | None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'portfolio_id': str(self.portfolio_id),
+            'asset_id': self.asset_id,
+            'stored_quantity': _str_or_none(self.stored_quantity),
+            'stored_average_cost': _str_or_none(self.stored_average_cost),
+            'expected_quantity': _str_or_none(self.expected_quantity),
+            'expected_average_cost': _str_or_none(self.expected_average_cost),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'HoldingMismatch':
+        return cls(
+            portfolio_id=UUID(data['portfolio_id']),
+            asset_id=data['asset_id'],
+            stored_quantity=_decimal_or_none(data['stored_quantity']),
+            stored_average_cost=_decimal_or_none(data['stored_average_cost']),
+            expected_quantity=_decimal_or_none(data['expected_quantity']),
+            expected_average_cost=_decimal_or_none(data['expected_average_cost']),
+        )
+
+
+@dataclass(slots=True)
+class ShardReport:
+    """Итог сверки одного диапазона портфелей ``[lower, upper]``."""
+
+    lower: UUID
+    upper: UUID
+    portfolios: int = 0
+    transactions: int = 0
+    repaired_portfolios: int = 0
+    mismatches: list[HoldingMismatch] = field(default_factory=list)
+    replay_errors: dict[UUID, str] = field(default_factory=dict)
+    conflicts: list[UUID] = field(default_factory=list)
+
+    @property
+    def mismatched_portfolios(self) -> int:
+        return len({m.portfolio_id for m in self.mismatches})
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'lower': str(self.lower),
+            'upper': str(self.upper),
+            'portfolios': self.portfolios,
+            'transactions': self.transactions,
+            'repaired_portfolios': self.repaired_portfolios,
+            'mismatches': [m.to_dict() for m in self.mismatches],
+            'replay_errors': {str(k): v for k, v in self.replay_errors.items()},
+            'conflicts': [str(pid) for pid in self.conflicts],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'ShardReport':
+        return cls(
+            lower=UUID(data['lower']),
+            upper=UUID(data['upper']),
+            portfolios=data['portfolios'],
+            transactions=data['transactions'],
+            repaired_portfolios=data['repaired_portfolios'],
+            mismatches=[HoldingMismatch.from_dict(m) for m in data['mismatches']],
+            replay_errors={UUID(k): v for k, v in data['replay_errors'].items()},
+            # В checkpoint прежних версий конфликтов нет.
+            conflicts=[UUID(pid) for pid in data.get('conflicts', [])],
+        )
+
+
+def diff_holdings(
+    portfolio_id: UUID,
+    stored: list[Holding],
+    expected: list[Holding],
+) -> list[HoldingMismatch]:
+    """Сравнивает позиции с точностью до шкалы колонок; порядок позиций не важен."""
+    stored_by_asset = {h.asset_id: h for h in stored}
+    expected_by_asset = {h.asset_id: h for h in expected}
+
+    mismatches = []
+    for asset_id in sorted(stored_by_asset.keys() | expected_by_asset.keys()):
+        s = stored_by_asset.get(asset_id)
+        e = expected_by_asset.get(asset_id)
+        if (
+            s is not None
+            and e is not None
+            and to_column_scale(s.quantity) == to_column_scale(e.quantity)
+            and to_column_scale(s.average_cost) == to_column_scale(e.average_cost)
+        ):
+            continue
+        mismatches.append(
+            HoldingMismatch(
+                portfolio_id=portfolio_id,
+                asset_id=asset_id,
+                stored_quantity=s.quantity if s is not None else None,
+                stored_average_cost=s.average_cost if s is not None else None,
+                expected_quantity=e.quantity if e is not None else None,
+                expected_average_cost=e.average_cost if e is not None else None,
+            ),
+        )
+    return mismatches
+
+
+async def reconcile_range(
+    session_factory: async_sessionmaker[AsyncSession],
+    lower: UUID,
+    upper: UUID,
+    repair: bool = False,
+    repair_batch_size: int = 100,
+    fixed_point: bool = False,
+) -> ShardReport:
+    """Сверяет позиции портфелей с id в ``[lower, upper]`` с воспроизведением транзакций.
+
+    Транзакции читаются потоком, воспроизводятся на пустых копиях портфелей и
+    сравниваются с сохранёнными позициями. Портфели, журнал которых не удалось
+    воспроизвести (например, продажа больше остатка), попадают в ``replay_errors``
+    и не исправляются.
+
+    Args:
+        session_factory: фабрика сессий БД.
+        lower: нижняя граница id портфелей, включительно.
+        upper: верхняя граница id портфелей, включительно.
+        repair: перезаписать расхождения результатом воспроизведения.
+        repair_batch_size: сколько исправленных портфелей фиксировать одной транзакцией БД.
+        fixed_point: воспроизводить журнал в арифметике фиксированной точки.
+
+    Исправление не останавливает запись: портфели, изменённые после чтения снимка,
+    пропускаются и перечисляются в ``conflicts``.
+
+    """
+    report = ShardReport(lower=lower, upper=upper)
+    async with session_factory() as session:
+        await _begin_snapshot(session)
+        reader = SqlAlchemyLedgerReader(session)
+        stored = await reader.get_portfolios_in_range(lower, upper)
+        report.portfolios = len(stored)
+        replay = _replay_fixed_point if fixed_point else _replay
+        replayed = await replay(reader, stored, report)
+
+        to_repair = []
+        for portfolio_id, portfolio in stored.items():
+            if portfolio_id in report.replay_errors:
+                continue
+            expected = replayed[portfolio_id].holdings
+            mismatches = diff_holdings(portfolio_id, portfolio.holdings, expected)
+            if mismatches:
+                report.mismatches.extend(mismatches)
+                portfolio.holdings = expected
+                to_repair.append(portfolio)
+
+    if repair and to_repair:
+        await _repair(session_factory, to_repair, repair_batch_size, report)
+        logger.info(
+            'Исправлено портфелей в диапазоне %s..%s: %d, изменились во время сверки: %d',
+            lower,
+            upper,
+            report.repaired_portfolios,
+            len(report.conflicts),
+        )
+    return report
+
+
+async def _begin_snapshot(session: AsyncSession) -> None:
+    """Начинает транзакцию сессии на одном снимке БД.
+
+    В SQLite транзакции и так сериализуемы, уровень задаётся только для Postgres.
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        await session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+
+
+async def _replay(
+    reader: SqlAlchemyLedgerReader,
+    stored: dict[UUID, Portfolio],
+    report: ShardReport,
+) -> dict[UUID, Portfolio]:
+    """Воспроизводит журнал диапазона на пустых копиях портфелей."""
+    replayed = {
+        pid: Portfolio(p.user_id, p.name, p.currency, p.created_at, portfolio_id=pid)
+        for pid, p in stored.items()
+    }
+    async for transaction in reader.stream_transactions(report.lower, report.upper):
+        portfolio = replayed.get(transaction.portfolio_id)
+        if portfolio is None or transaction.portfolio_id in report.replay_errors:
+            continue
+        report.transactions += 1
+        try:
+            portfolio.execute_transaction(transaction)
+        except PortfolioDomainError as e:
+            report.replay_errors[portfolio.id] = str(e)
+            continue
+        for holding in portfolio.holdings:
+            holding.quantity = to_column_scale(holding.quantity)
+            holding.average_cost = to_column_scale(holding.average_cost)
+    return replayed
+
+
+async def _replay_fixed_point(
+    reader: SqlAlchemyLedgerReader,
+    stored: dict[UUID, Portfolio],
+    report: ShardReport,
+) -> dict[UUID, Portfolio]:
+    """Воспроизводит журнал диапазона так же, как ``_replay``, в целых числах."""
+    replayed = {
+        pid: FixedPointPortfolio(pid, p.user_id, p.name, p.currency, p.created_at)
+        for pid, p in stored.items()
+    }
+    async for transaction in reader.stream_transactions(report.lower, report.upper):
+        portfolio = replayed.get(transaction.portfolio_id)
+        if portfolio is None or transaction.portfolio_id in report.replay_errors:
+            continue
+        report.transactions += 1
+        try:
+            portfolio.execute_transaction(FixedPointTransaction.from_transaction(transaction))
+        except PortfolioDomainError as e:
+            report.replay_errors[portfolio.id] = str(e)
+    return {pid: portfolio.to_portfolio() for pid, portfolio in replayed.items()}
+
+
+async def _repair(
+    session_factory: async_sessionmaker[AsyncSession],
+    portfolios: list[Portfolio],
+    batch_size: int,
+    report: ShardReport,
+) -> None:
+    """Сохраняет исправленные портфели, фиксируя по ``batch_size`` за транзакцию БД.
+
+    Пишет в отдельных от снимка транзакциях: обновление с проверкой версии должно
+    видеть последние зафиксированные изменения, а не снимок.
+    """
+    for start in range(0, len(portfolios), batch_size):
+        async with session_factory() as session:
+            repo = SqlAlchemyPortfolioRepository(session)
+            for portfolio in portfolios[start : start + batch_size]:
+                try:
+                    await repo.update(portfolio)
+                except PortfolioVersionConflictError:
+                    logger.warning(
+                        'Портфель %s изменился во время сверки; не исправлен',
+                        portfolio.id,
+                    )
+                    report.conflicts.append(portfolio.id)
+                    continue
+                report.repaired_portfolios += 1
+            await session.commit()
+
+
+def _str_or_none(value: Decimal | None) -> str | None:
+    return str(value) if value is not None else None
+
+
+def _decimal_or_none(value: str | None) -> Decimal | None:
+    return Decimal(value) if value is not None else None
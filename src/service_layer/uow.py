@@ -9,6 +9,9 @@ from src.adapters.factory import ABCPortfolioRepositoryFactory
 from src.adapters.repository import (
     AbstractPortfolioRepository,
 )
+from src.infrastructure.database.memory import InMemorySession, InMemoryStore
+from src.infrastructure.metrics.metrics import UOW_OPERATION_DURATION, observe_duration
+from src.infrastructure.tracing.tracing import traced
 
 
 class AbstractUnitOfWork(abc.ABC):
@@ -96,6 +99,7 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
         self.session_factory = session_factory
         self.repo_factory = repo_factory
 
+    @traced('uow.enter')
     async def __aenter__(self) -> 'AbstractUnitOfWork':
         """Вход в контекстный менеджер.
 
@@ -127,6 +131,7 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
             await self._commit()
         await self.session.close()
 
+    @traced('uow.commit')
     async def _commit(self) -> None:
         """Фиксирует изменения в базе данных.
 
@@ -134,11 +139,52 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
             SQLAlchemyError: Если произошла ошибка при фиксации транзакции.
 
         """
-        await self.session.commit()
+        with observe_duration(UOW_OPERATION_DURATION, operation='commit'):
+            await self.session.commit()
 
+    @traced('uow.rollback')
     async def rollback(self) -> None:
         """Выполняет откат текущей транзакции.
 
         Отменяет все изменения, сделанные в рамках текущей сессии.
         """
-        await self.session.rollback()
+        with observe_duration(UOW_OPERATION_DURATION, operation='rollback'):
+            await self.session.rollback()
+
+
+class InMemoryUnitOfWork(AbstractUnitOfWork):
+    """Unit of Work поверх ``InMemoryStore``.
+
+    Повторяет поведение ``SqlAlchemyUnitOfWork``: изменения видны только внутри
+    единицы работы до фиксации, при выходе без исключения фиксируются, при
+    исключении — откатываются.
+    """
+
+    def __init__(self, store: InMemoryStore, repo_factory: ABCPortfolioRepositoryFactory) -> None:
+        """Инициализация InMemoryUnitOfWork.
+
+        Args:
+            store: Хранилище зафиксированного состояния.
+            repo_factory: Фабрика создания репозитория поверх in-memory сессии.
+
+        """
+        self.store = store
+        self.repo_factory = repo_factory
+
+    async def __aenter__(self) -> 'AbstractUnitOfWork':
+        self.session: InMemorySession = self.store.session()
+        self.portfolio = self.repo_factory.create(self.session)  # type: ignore[arg-type]
+        return await super().__aenter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type:
+            await self.rollback()
+        else:
+            await self._commit()
+        self.session.close()
+
+    async def _commit(self) -> None:
+        self.session.commit()
+
+    async def rollback(self) -> None:
+        self.session.rollback()
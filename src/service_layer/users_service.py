@@ -1,24 +1,56 @@
 import abc
+import asyncio
+import json
 import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
 from uuid import UUID
 
 import httpx
 import tenacity
+from opentelemetry import trace
+
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.infrastructure.metrics.metrics import (
+    USER_SERVICE_HEDGED_REQUESTS,
+    USER_SERVICE_REQUEST_DURATION,
+    observe_duration,
+)
+from src.infrastructure.redis_cache import SharedCache
+from src.infrastructure.tracing.tracing import traced, tracer
 
 from .exceptions import (
     UserNotFoundError,
+    UserServiceCircuitOpenError,
     UserServiceError,
     UserServiceUnavailableError,
 )
 
 logger = logging.getLogger(__name__)
 
-_RETRY_POLICY = tenacity.retry(
-    stop=tenacity.stop_after_attempt(3),
-    wait=tenacity.wait_exponential(multiplier=1, min=1, max=10),
-    retry=tenacity.retry_if_exception_type((UserServiceUnavailableError, httpx.RequestError)),
-    reraise=True,
-)
+
+def _record_retry(retry_state: tenacity.RetryCallState) -> None:
+    sleep = retry_state.next_action.sleep if retry_state.next_action else 0.0
+    trace.get_current_span().add_event(
+        'retry',
+        {'attempt': retry_state.attempt_number, 'sleep_seconds': sleep},
+    )
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Временный сбой, который имеет смысл повторить.
+
+    Разомкнутый выключатель — не повод повторять: запрос всё равно не уйдёт.
+    """
+    return isinstance(
+        error,
+        (UserServiceUnavailableError, httpx.RequestError),
+    ) and not isinstance(error, UserServiceCircuitOpenError)
+
+
+# Сколько id отправлять в одном запросе к batch API users-сервиса.
+MAX_USERS_PER_REQUEST = 100
 
 
 class ABCUserService(abc.ABC):
@@ -26,19 +58,134 @@ class ABCUserService(abc.ABC):
     async def get_by_id(self, user_id: UUID) -> dict:
         raise NotImplementedError
 
+    async def get_many(self, user_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """Пользователи по списку id; несуществующие id в результат не попадают.
+
+        Реализация по умолчанию делает по запросу на пользователя. Клиенты сервисов
+        с batch API переопределяют её.
+        """
+        users = {}
+        for user_id in dict.fromkeys(user_ids):
+            try:
+                users[user_id] = await self.get_by_id(user_id)
+            except UserNotFoundError:
+                continue
+        return users
+
+
+class CachingUserService(ABCUserService):
+    """Кеширует найденных пользователей поверх другого ``ABCUserService``.
+
+    Кешируются только положительные ответы: пользователи не удаляются так часто,
+    чтобы за ``ttl`` кеша это стало заметно, а отсутствующий пользователь может
+    появиться в любой момент. Ошибки сервиса не кешируются.
+
+    С ``shared`` промахи кеша процесса сначала ищутся в общем кеше реплик
+    (ключ ``user:<id>``), и только потом идут в users-сервис.
+    """
+
+    def __init__(
+        self,
+        inner: ABCUserService,
+        cache: TTLCache,
+        shared: SharedCache | None = None,
+        shared_ttl: float = 600.0,
+    ) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+
+    async def get_by_id(self, user_id: UUID) -> dict:
+        user = self.cache.get(user_id)
+        if user is not None:
+            return user
+        if self.shared is not None:
+            data = await self.shared.get(self.shared.key('user', user_id))
+            if data is not None:
+                user = json.loads(data)
+                self.cache.set(user_id, user)
+                return user
+        user = await self.inner.get_by_id(user_id)
+        await self._store({user_id: user})
+        return user
+
+    async def get_many(self, user_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        users: dict[UUID, dict] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.cache.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                users[user_id] = user
+        if missing and self.shared is not None:
+            cached = await self.shared.get_many([self.shared.key('user', i) for i in missing])
+            for user_id, data in zip(missing, cached, strict=True):
+                if data is not None:
+                    users[user_id] = json.loads(data)
+                    self.cache.set(user_id, users[user_id])
+            missing = [user_id for user_id in missing if user_id not in users]
+        if missing:
+            fetched = await self.inner.get_many(missing)
+            await self._store(fetched)
+            users.update(fetched)
+        return users
+
+    async def _store(self, users: dict[UUID, dict]) -> None:
+        for user_id, user in users.items():
+            self.cache.set(user_id, user)
+        if self.shared is not None:
+            await self.shared.set_many(
+                {self.shared.key('user', i): json.dumps(u).encode() for i, u in users.items()},
+                self.shared_ttl,
+            )
+
 
 class UserService(ABCUserService):
-    def __init__(self, base_url: str, max_retries: int = 3) -> None:
+    """HTTP-клиент users-сервиса с бюджетом времени, выключателем и hedging.
+
+    Каждый вызов (``get_by_id`` или пачка ``get_many``) укладывается в ``deadline``
+    секунд вместе со всеми повторами: попытка ограничена ``attempt_timeout``, повторы
+    с короткой экспоненциальной паузой идут, пока есть бюджет и не исчерпано
+    ``max_retries`` попыток. Так недоступный сервис держит запрос и сессию БД
+    не дольше ``deadline``, а не до ~20 с, как при независимых повторах.
+
+    Попытки проходят через ``breaker``: после серии сбоев вызовы сразу завершаются
+    ``UserServiceCircuitOpenError``. Выключатель должен жить дольше одного запроса,
+    поэтому экземпляр сервиса создаётся один на процесс.
+
+    Если задан ``hedge_after`` и ответа на попытку нет за это время, отправляется
+    второй такой же запрос и берётся первый ответ. Оба запроса только читают, так
+    что дублирование безопасно; цена — до двух запросов на медленный вызов.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_retries: int = 3,
+        transport: httpx.AsyncBaseTransport | None = None,
+        batch_size: int = MAX_USERS_PER_REQUEST,
+        deadline: float = 3.0,
+        attempt_timeout: float = 1.0,
+        hedge_after: float | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
         self._base_url = base_url.rstrip('/')
         self._max_retries = max_retries
+        self._transport = transport
+        self._batch_size = batch_size
+        self._deadline = deadline
+        self._attempt_timeout = attempt_timeout
+        self._hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker('user_service')
 
-    @_RETRY_POLICY
+    @traced('user_service.get_by_id')
     async def get_by_id(self, user_id: UUID) -> dict:
         """Получает данные пользователя по его идентификатору из внешнего микросервиса.
 
-        Метод выполняет HTTP-запрос к внешнему сервису с автоматическими повторными
-        попытками при временных сбоях (таймауты, 5xx ошибки). Поведение retry
-        настраивается через tenacity.
+        Метод выполняет HTTP-запрос к внешнему сервису с повторными попытками при
+        временных сбоях (таймауты, 5xx ошибки) в пределах общего бюджета времени.
 
         Args:
             user_id (UUID): Уникальный идентификатор пользователя.
@@ -48,7 +195,9 @@ class UserService(ABCUserService):
 
         Raises:
             UserNotFoundError: Если пользователь не найден (HTTP 404).
-            UserServiceUnavailableError: Если сервис недоступен (таймаут, 5xx и т.п.).
+            UserServiceCircuitOpenError: Если выключатель разомкнут после серии сбоев.
+            UserServiceUnavailableError: Если сервис недоступен (таймаут, 5xx и т.п.)
+                или бюджет времени исчерпан.
             UserServiceError: При других неожиданных ошибках (например, 400, 401).
 
         Example:
@@ -60,36 +209,163 @@ class UserService(ABCUserService):
             ...     print("Пользователь не существует")
 
         Note:
-            Метод использует внутренний retry-механизм (tenacity) и не требует
-            повторных вызовов со стороны клиента при временных ошибках.
+            Повторы выполняются внутри метода и не требуют повторных вызовов
+            со стороны клиента при временных ошибках.
 
         """
+        return await self._call('get_by_id', lambda: self._fetch_user(user_id))
+
+    @traced('user_service.get_many')
+    async def get_many(self, user_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """Проверяет пользователей пачками через ``POST /api/v1/users/batch``.
+
+        Повторяющиеся id отправляются один раз; в одном запросе не больше
+        ``batch_size`` id, так что N пользователей стоят ``ceil(N / batch_size)`` запросов.
+        Бюджет времени действует на каждую пачку.
+
+        Args:
+            user_ids (Iterable[UUID]): Идентификаторы пользователей.
+
+        Returns:
+            dict[UUID, dict]: Найденные пользователи по id; отсутствующих в словаре нет.
+
+        Raises:
+            UserServiceCircuitOpenError: Если выключатель разомкнут после серии сбоев.
+            UserServiceUnavailableError: Если сервис недоступен после всех повторов.
+            UserServiceError: При неожиданном ответе сервиса.
+
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        users: dict[UUID, dict] = {}
+        for start in range(0, len(unique_ids), self._batch_size):
+            chunk = unique_ids[start : start + self._batch_size]
+            batch = await self._call('get_many', lambda chunk=chunk: self._fetch_batch(chunk))
+            for user in batch:
+                users[UUID(str(user['id']))] = user
+        return users
+
+    async def _call(self, operation: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет запрос с повторами в пределах бюджета ``deadline``."""
+        retrying = tenacity.AsyncRetrying(
+            stop=tenacity.stop_after_attempt(self._max_retries)
+            | tenacity.stop_before_delay(self._deadline),
+            wait=tenacity.wait_random_exponential(multiplier=0.05, max=0.5),
+            retry=tenacity.retry_if_exception(_is_transient),
+            before_sleep=_record_retry,
+            reraise=True,
+        )
         try:
-            async with httpx.AsyncClient(base_url=self._base_url, timeout=5.0) as client:
-                resp = await client.get(f'/api/v1/users/{user_id}')
+            async with asyncio.timeout(self._deadline):
+                return await retrying(self._attempt, operation, send)
+        except TimeoutError as e:
+            logger.warning(
+                'Исчерпан бюджет %.1f с на запрос %s к users-сервису',
+                self._deadline,
+                operation,
+            )
+            raise UserServiceUnavailableError('Исчерпан бюджет времени запроса') from e
+
+    async def _attempt(self, operation: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise UserServiceCircuitOpenError(str(e), e.retry_after) from e
+
+        success = False
+        try:
+            with (
+                tracer.start_as_current_span(f'user_service.{operation}.attempt'),
+                observe_duration(USER_SERVICE_REQUEST_DURATION, operation=operation),
+            ):
+                result = await self._hedged(operation, send)
+            success = True
+            return result
+        except UserServiceError as e:
+            # 404 и прочие 4xx — ответ живого сервиса, выключатель их не считает сбоями.
+            success = not isinstance(e, UserServiceUnavailableError)
+            raise
+        finally:
+            self.breaker.record(success)
+
+    async def _hedged(self, operation: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        if self._hedge_after is None:
+            return await send()
 
-                if resp.status_code == 200:
-                    return resp.json()
-                elif resp.status_code == 404:
-                    raise UserNotFoundError(f'Пользователь с ID {user_id} не найден')
-                elif resp.status_code >= 500:
-                    raise UserServiceUnavailableError(
-                        f'User service вернул {resp.status_code}: {resp.text}',
-                    )
+        tasks = [asyncio.ensure_future(send())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_after)
+            if not done:
+                USER_SERVICE_HEDGED_REQUESTS.labels(operation=operation).inc()
+                tasks.append(asyncio.ensure_future(send()))
+
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Успешные ответы — первыми, если оба запроса завершились одновременно.
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    error = task.exception()
+                    # Ответ сервиса (включая 404) окончателен; временный сбой одного
+                    # запроса — не повод отказываться от второго.
+                    if error is None or not pending or not _is_transient(error):
+                        return task.result()
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()
                 else:
-                    raise UserServiceError(
-                        f'Неизвестный статус {resp.status_code}'
-                        f' для пользователя {user_id}: {resp.text}',
-                    )
+                    task.cancel()
 
+    async def _fetch_user(self, user_id: UUID) -> dict:
+        try:
+            async with self._client() as client:
+                resp = await client.get(f'/api/v1/users/{user_id}')
         except httpx.TimeoutException as e:
             logger.warning('Таймаут при запросе данных пользователя %s: %s', user_id, e)
             raise UserServiceUnavailableError('Таймаут запроса') from e
-
         except httpx.NetworkError as e:
             logger.exception('Сетевая ошибка при запросе пользователя %s: %s', user_id, e)
             raise UserServiceUnavailableError('Сетевая ошибка') from e
 
-        except httpx.HTTPStatusError as e:
-            logger.exception('Ошибка HTTP-статуса при запросе пользователя %s: %s', user_id, e)
-            raise UserServiceError('Ошибка HTTP-ответа') from e
+        if resp.status_code == 200:
+            return resp.json()
+        if resp.status_code == 404:
+            raise UserNotFoundError(f'Пользователь с ID {user_id} не найден')
+        if resp.status_code >= 500:
+            raise UserServiceUnavailableError(
+                f'User service вернул {resp.status_code}: {resp.text}',
+            )
+        raise UserServiceError(
+            f'Неизвестный статус {resp.status_code} для пользователя {user_id}: {resp.text}',
+        )
+
+    async def _fetch_batch(self, user_ids: list[UUID]) -> list[dict]:
+        trace.get_current_span().set_attribute('user_service.batch_size', len(user_ids))
+        try:
+            async with self._client() as client:
+                resp = await client.post(
+                    '/api/v1/users/batch',
+                    json={'ids': [str(user_id) for user_id in user_ids]},
+                )
+        except httpx.TimeoutException as e:
+            logger.warning('Таймаут при пакетном запросе %d пользователей: %s', len(user_ids), e)
+            raise UserServiceUnavailableError('Таймаут запроса') from e
+        except httpx.NetworkError as e:
+            logger.exception('Сетевая ошибка при пакетном запросе пользователей: %s', e)
+            raise UserServiceUnavailableError('Сетевая ошибка') from e
+
+        if resp.status_code == 200:
+            return resp.json()['users']
+        if resp.status_code >= 500:
+            raise UserServiceUnavailableError(
+                f'User service вернул {resp.status_code}: {resp.text}',
+            )
+        raise UserServiceError(
+            f'Неизвестный статус {resp.status_code} для пакетного запроса: {resp.text}',
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self._base_url,
+            timeout=self._attempt_timeout,
+            transport=self._transport,
+        )
@@ -0,0 +1,112 @@
+"""Прогрев кешей процесса перед тем, как под начнёт принимать трафик.
+
+Кандидаты — портфели с самой свежей активностью в БД (последняя транзакция или
+создание): их чаще всего читают сразу после деплоя. Прогрев ограничен по времени
+и по числу одновременных запросов, чтобы не задерживать старт и не нагружать БД
+и сервис пользователей сильнее обычного трафика; незавершённый прогрев не ошибка.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from uuid import UUID
+
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.metrics.metrics import WARMUP_LOADED
+from src.service_layer.exceptions import UserServiceUnavailableError
+from src.service_layer.portfolio_service import PortfolioService
+from src.service_layer.uow import AbstractUnitOfWork
+from src.service_layer.users_service import ABCUserService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class WarmupReport:
+    portfolios: int = 0
+    users: int = 0
+    timed_out: bool = False
+
+
+async def warm_caches(
+    uow_factory: Callable[[], AbstractUnitOfWork],
+    user_service: ABCUserService,
+    portfolio_cache: TTLCache,
+    limit: int,
+    batch_size: int = 100,
+    concurrency: int = 4,
+    timeout: float | None = None,
+) -> WarmupReport:
+    """Загружает в кеши недавно активные портфели и их владельцев.
+
+    Args:
+        uow_factory: Создаёт новую единицу работы; у каждой пачки она своя.
+        user_service: Сервис пользователей; прогревается его кеш, если он есть.
+        portfolio_cache: Кеш портфелей, который читает ``get_portfolio``.
+        limit: Сколько портфелей прогревать.
+        batch_size: Портфелей в одном запросе к БД.
+        concurrency: Сколько пачек загружается одновременно.
+        timeout: Предельная длительность прогрева в секундах.
+
+    Returns:
+        WarmupReport: Сколько записей загружено и был ли прогрев прерван по времени.
+
+    """
+    report = WarmupReport()
+    try:
+        async with asyncio.timeout(timeout):
+            async with uow_factory() as u:
+                ids = await PortfolioService(u.portfolio, user_service).get_recently_active_ids(
+                    limit,
+                )
+            semaphore = asyncio.Semaphore(concurrency)
+            batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+            await asyncio.gather(
+                *(
+                    _warm_batch(
+                        uow_factory,
+                        user_service,
+                        portfolio_cache,
+                        batch,
+                        semaphore,
+                        report,
+                    )
+                    for batch in batches
+                ),
+            )
+    except TimeoutError:
+        report.timed_out = True
+        logger.warning('Прогрев кешей прерван по таймауту %.1f с', timeout)
+    logger.info(
+        'Прогрев кешей: портфелей %d, пользователей %d',
+        report.portfolios,
+        report.users,
+    )
+    return report
+
+
+async def _warm_batch(
+    uow_factory: Callable[[], AbstractUnitOfWork],
+    user_service: ABCUserService,
+    portfolio_cache: TTLCache,
+    ids: list[UUID],
+    semaphore: asyncio.Semaphore,
+    report: WarmupReport,
+) -> None:
+    async with semaphore:
+        async with uow_factory() as u:
+            portfolios = await PortfolioService(u.portfolio, user_service).get_many(ids)
+        for portfolio_id, portfolio in portfolios.items():
+            portfolio_cache.set(portfolio_id, portfolio)
+        report.portfolios += len(portfolios)
+        WARMUP_LOADED.labels(cache=portfolio_cache.name).inc(len(portfolios))
+
+        try:
+            users = await user_service.get_many({p.user_id for p in portfolios.values()})
+        except UserServiceUnavailableError:
+            # Сервис пользователей недоступен — портфели уже в кеше, старт не блокируем.
+            logger.warning('Прогрев пользователей пропущен: сервис недоступен')
+            return
+        report.users += len(users)
+        WARMUP_LOADED.labels(cache='users').inc(len(users))
@@ -2,12 +2,32 @@ import uuid
 from decimal import Decimal
 from unittest.mock import patch, mock_open, AsyncMock
 
+import httpx
 import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-from src.adapters.factory import ABCPortfolioRepositoryFactory
+from src.adapters.factory import (
+    ABCPortfolioRepositoryFactory,
+    InMemoryPortfolioRepositoryFactory,
+    SQLAlchemyPortfolioRepositoryFactory,
+)
+from src.adapters.orm import metadata
 from src.adapters.repository import AbstractPortfolioRepository
 from src.adapters.vault_client import VaultClient
 from src.domain.domain import Portfolio, Holding
+from src.entrypoints.fastapi_app import create_app
+from src.infrastructure.database.partitions import partition_horizon
+from src.service_layer.dependencies import (
+    get_portfolio_cache,
+    get_transaction_horizon,
+    get_uow,
+    get_user_service,
+)
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.database.memory import InMemoryStore
+from src.service_layer.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
+from src.service_layer.users_service import ABCUserService
 
 
 @pytest.fixture
@@ -78,3 +98,56 @@ def fake_uow():
 class FakeRepoFactory(ABCPortfolioRepositoryFactory):
     def create(self, session):
         return 'fake_repo'
+
+
+@pytest_asyncio.fixture
+async def sqlite_engine():
+    """In-memory SQLite вместо Postgres для интеграционных тестов адаптеров."""
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def sqlite_session_factory(sqlite_engine):
+    return async_sessionmaker(bind=sqlite_engine, expire_on_commit=False)
+
+
+class StubUserService(ABCUserService):
+    """Users-сервис, для которого существует любой пользователь."""
+
+    async def get_by_id(self, user_id):
+        return {'id': str(user_id)}
+
+
+@pytest_asyncio.fixture(params=['sqlalchemy', 'memory'])
+async def api_client(request):
+    """HTTP-клиент к приложению из ``create_app()`` с заглушкой users-сервиса.
+
+    Параметризован бэкендом хранения: SQLite через SQLAlchemy и in-memory.
+    """
+    app = create_app()
+    if request.param == 'memory':
+        store = InMemoryStore()
+        app.dependency_overrides[get_uow] = lambda: InMemoryUnitOfWork(
+            store, InMemoryPortfolioRepositoryFactory()
+        )
+    else:
+        engine = create_async_engine('sqlite+aiosqlite://')
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        app.dependency_overrides[get_uow] = lambda: SqlAlchemyUnitOfWork(
+            session_factory, SQLAlchemyPortfolioRepositoryFactory()
+        )
+    app.dependency_overrides[get_user_service] = StubUserService
+    portfolio_cache = TTLCache('portfolios', maxsize=1000, ttl=60)
+    app.dependency_overrides[get_portfolio_cache] = lambda: portfolio_cache
+    app.dependency_overrides[get_transaction_horizon] = lambda: partition_horizon(3)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        yield client
+    if request.param == 'sqlalchemy':
+        await engine.dispose()
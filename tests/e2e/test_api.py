@@ -0,0 +1,342 @@
+import asyncio
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from src.entity.models import MAX_BATCH_PORTFOLIO_IDS, MAX_BULK_CREATE_PORTFOLIOS
+
+API = '/api/v1/portfolio'
+
+
+async def _create_portfolio(client, user_id, name='Main'):
+    resp = await client.post(
+        f'{API}/portfolios',
+        json={'user_id': str(user_id), 'name': name, 'currency': 'RUB'},
+    )
+    assert resp.status_code == 200
+    return resp.json()['id']
+
+
+@pytest.mark.asyncio
+async def test_create_and_read_portfolio(api_client):
+    user_id = uuid.uuid4()
+    portfolio_id = await _create_portfolio(api_client, user_id)
+
+    resp = await api_client.get(f'{API}/portfolios/{portfolio_id}')
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body['id'] == portfolio_id
+    assert body['user_id'] == str(user_id)
+    assert body['holdings'] == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_of_same_portfolio(api_client):
+    user_id = uuid.uuid4()
+    portfolio_id = await _create_portfolio(api_client, user_id)
+
+    responses = await asyncio.gather(
+        *(api_client.get(f'{API}/portfolios/{portfolio_id}') for _ in range(10)),
+        *(api_client.get(f'{API}/users/{user_id}/portfolios') for _ in range(10)),
+    )
+
+    assert all(r.status_code == 200 for r in responses)
+    assert {r.json()['id'] for r in responses[:10]} == {portfolio_id}
+    assert all([p['id'] for p in r.json()] == [portfolio_id] for r in responses[10:])
+
+
+@pytest.mark.asyncio
+async def test_list_user_portfolios(api_client):
+    user_id = uuid.uuid4()
+    ids = {await _create_portfolio(api_client, user_id, name=f'p{i}') for i in range(3)}
+
+    resp = await api_client.get(f'{API}/users/{user_id}/portfolios')
+
+    assert resp.status_code == 200
+    assert {p['id'] for p in resp.json()} == ids
+
+
+@pytest.mark.asyncio
+async def test_add_transaction(api_client):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+
+    resp = await api_client.post(
+        f'{API}/transactions',
+        json={
+            'portfolio_id': portfolio_id,
+            'asset_id': 'MOEX:SBER',
+            'transaction_type': 'BUY',
+            'quantity': '10',
+            'price_per_unit': '280.5',
+            'total_amount': '2805',
+            'executed_at': '2025-01-01T10:00:00+00:00',
+            'currency': 'RUB',
+        },
+    )
+
+    assert resp.status_code == 200
+    assert 'id' in resp.json()
+
+    portfolio = (await api_client.get(f'{API}/portfolios/{portfolio_id}')).json()
+    assert portfolio['version'] == 2
+    [holding] = portfolio['holdings']
+    assert holding['asset_id'] == 'MOEX:SBER'
+    assert Decimal(holding['quantity']) == Decimal('10')
+
+
+@pytest.mark.asyncio
+async def test_unknown_portfolio_returns_404(api_client):
+    resp = await api_client.get(f'{API}/portfolios/{uuid.uuid4()}')
+
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_portfolio_conditional(api_client):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+
+    first = await api_client.get(f'{API}/portfolios/{portfolio_id}')
+    etag = first.headers['ETag']
+    cached = await api_client.get(
+        f'{API}/portfolios/{portfolio_id}',
+        headers={'If-None-Match': etag},
+    )
+
+    assert first.json()['version'] == 1
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert cached.content == b''
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_after_update(api_client):
+    user_id = uuid.uuid4()
+    portfolio_id = await _create_portfolio(api_client, user_id)
+    item_etag = (await api_client.get(f'{API}/portfolios/{portfolio_id}')).headers['ETag']
+    list_etag = (await api_client.get(f'{API}/users/{user_id}/portfolios')).headers['ETag']
+
+    await api_client.put(
+        f'{API}/portfolios/{portfolio_id}',
+        json={'portfolio_id': portfolio_id, 'name': 'Renamed', 'currency': 'RUB'},
+    )
+    item = await api_client.get(
+        f'{API}/portfolios/{portfolio_id}',
+        headers={'If-None-Match': item_etag},
+    )
+    listing = await api_client.get(
+        f'{API}/users/{user_id}/portfolios',
+        headers={'If-None-Match': list_etag},
+    )
+
+    assert item.status_code == 200
+    assert item.json()['name'] == 'Renamed'
+    assert item.json()['version'] == 2
+    assert listing.status_code == 200
+    assert listing.headers['ETag'] != list_etag
+
+
+@pytest.mark.asyncio
+async def test_list_conditional_not_modified(api_client):
+    user_id = uuid.uuid4()
+    await _create_portfolio(api_client, user_id)
+    etag = (await api_client.get(f'{API}/users/{user_id}/portfolios')).headers['ETag']
+
+    resp = await api_client.get(
+        f'{API}/users/{user_id}/portfolios',
+        headers={'If-None-Match': f'W/"other", {etag}'},
+    )
+
+    assert resp.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_batch_get_portfolios_marks_missing_ids(api_client):
+    user_id = uuid.uuid4()
+    ids = [await _create_portfolio(api_client, user_id, name=f'p{i}') for i in range(2)]
+    missing_id = str(uuid.uuid4())
+
+    resp = await api_client.post(f'{API}/portfolios/batch', json={'ids': [*ids, missing_id]})
+
+    assert resp.status_code == 200
+    portfolios = resp.json()['portfolios']
+    assert list(portfolios) == [*ids, missing_id]
+    assert all(portfolios[pid]['found'] for pid in ids)
+    assert portfolios[ids[0]]['portfolio']['name'] == 'p0'
+    assert portfolios[missing_id] == {'found': False, 'portfolio': None}
+
+
+@pytest.mark.asyncio
+async def test_batch_get_portfolios_rejects_too_many_ids(api_client):
+    ids = [str(uuid.uuid4()) for _ in range(MAX_BATCH_PORTFOLIO_IDS + 1)]
+
+    resp = await api_client.post(f'{API}/portfolios/batch', json={'ids': ids})
+
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_portfolios(api_client):
+    user_ids = [uuid.uuid4(), uuid.uuid4()]
+    items = [
+        {'user_id': str(user_id), 'name': f'p{i}', 'currency': 'RUB'}
+        for user_id in user_ids
+        for i in range(2)
+    ]
+
+    resp = await api_client.post(f'{API}/portfolios/bulk', json={'portfolios': items})
+
+    assert resp.status_code == 200
+    ids = resp.json()['ids']
+    assert len(ids) == 4
+    batch = await api_client.post(f'{API}/portfolios/batch', json={'ids': ids})
+    portfolios = batch.json()['portfolios']
+    assert [portfolios[pid]['portfolio']['name'] for pid in ids] == ['p0', 'p1', 'p0', 'p1']
+    listed = await api_client.get(f'{API}/users/{user_ids[0]}/portfolios')
+    assert {p['id'] for p in listed.json()} == set(ids[:2])
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_rejects_too_many_portfolios(api_client):
+    item = {'user_id': str(uuid.uuid4()), 'name': 'p', 'currency': 'RUB'}
+
+    resp = await api_client.post(
+        f'{API}/portfolios/bulk',
+        json={'portfolios': [item] * (MAX_BULK_CREATE_PORTFOLIOS + 1)},
+    )
+
+    assert resp.status_code == 422
+
+
+def _transaction(portfolio_id, tx_type, quantity, price, executed_at='2025-01-01T10:00:00+00:00'):
+    return {
+        'portfolio_id': str(portfolio_id),
+        'asset_id': 'MOEX:SBER',
+        'transaction_type': tx_type,
+        'quantity': quantity,
+        'price_per_unit': price,
+        'total_amount': str(Decimal(quantity) * Decimal(price)),
+        'executed_at': executed_at,
+        'currency': 'RUB',
+    }
+
+
+@pytest.mark.asyncio
+async def test_transaction_rejected_by_domain_rules(api_client):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+
+    oversell = await api_client.post(
+        f'{API}/transactions', json=_transaction(portfolio_id, 'SELL', '1', '100')
+    )
+    unknown = await api_client.post(
+        f'{API}/transactions', json=_transaction(uuid.uuid4(), 'BUY', '1', '100')
+    )
+
+    assert oversell.status_code == 400
+    assert unknown.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_transaction_beyond_partition_horizon_is_rejected(api_client):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+
+    resp = await api_client.post(
+        f'{API}/transactions',
+        json=_transaction(portfolio_id, 'BUY', '1', '100', executed_at='2999-01-01T00:00:00Z'),
+    )
+
+    assert resp.status_code == 400
+    assert 'executed_at' in resp.json()['detail']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('field', 'value'),
+    [
+        ('asset_id', 'X' * 101),
+        ('currency', 'RUBLES-2025'),
+        ('price_per_unit', '10000000000'),
+        ('quantity', '9999999999.99999999999'),
+    ],
+)
+async def test_transaction_beyond_column_limits_is_rejected(api_client, field, value):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+
+    resp = await api_client.post(
+        f'{API}/transactions', json={**_transaction(portfolio_id, 'BUY', '1', '100'), field: value}
+    )
+
+    assert resp.status_code == 400
+    assert field in resp.json()['detail']
+
+
+@pytest.mark.asyncio
+async def test_user_summary_and_summary_list(api_client):
+    user_id = uuid.uuid4()
+    first = await _create_portfolio(api_client, user_id, name='first')
+    await _create_portfolio(api_client, user_id, name='second')
+    await api_client.post(f'{API}/transactions', json=_transaction(first, 'BUY', '10', '100'))
+    await api_client.post(
+        f'{API}/transactions',
+        json=_transaction(first, 'SELL', '4', '120', executed_at='2025-02-01T10:00:00+00:00'),
+    )
+
+    summary = (await api_client.get(f'{API}/users/{user_id}/summary')).json()
+    listing = await api_client.get(
+        f'{API}/users/{user_id}/portfolios', params={'view': 'summary'}
+    )
+
+    assert summary['portfolios_count'] == 2
+    assert summary['holdings_count'] == 1
+    assert Decimal(summary['total_cost_by_currency']['RUB']) == Decimal('600')
+    assert summary['last_transaction_at'].startswith('2025-02-01T10:00:00')
+    assert listing.status_code == 200
+    by_id = {p['id']: p for p in listing.json()}
+    assert 'holdings' not in by_id[first]
+    assert by_id[first]['holdings_count'] == 1
+    assert by_id[first]['version'] == 3
+
+
+@pytest.mark.asyncio
+async def test_transaction_history_is_limited_to_window(api_client):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+    for executed_at in ('2025-01-10T10:00:00+00:00', '2025-02-10T10:00:00+00:00'):
+        resp = await api_client.post(
+            f'{API}/transactions',
+            json=_transaction(portfolio_id, 'BUY', '1', '100', executed_at=executed_at),
+        )
+        assert resp.status_code == 200
+
+    resp = await api_client.get(
+        f'{API}/portfolios/{portfolio_id}/transactions',
+        params={'since': '2025-02-01T00:00:00+00:00', 'until': '2025-03-01T00:00:00+00:00'},
+    )
+    invalid = await api_client.get(
+        f'{API}/portfolios/{portfolio_id}/transactions',
+        params={'since': '2025-03-01T00:00:00+00:00', 'until': '2025-02-01T00:00:00+00:00'},
+    )
+
+    assert resp.status_code == 200
+    [transaction] = resp.json()
+    assert transaction['transaction_type'] == 'BUY'
+    assert transaction['executed_at'].startswith('2025-02-10T10:00:00')
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_default_history_includes_future_dated_transactions(api_client):
+    portfolio_id = await _create_portfolio(api_client, uuid.uuid4())
+    now = datetime.datetime.now(datetime.UTC)
+    for executed_at in (now - datetime.timedelta(days=1), now + datetime.timedelta(days=20)):
+        resp = await api_client.post(
+            f'{API}/transactions',
+            json=_transaction(portfolio_id, 'BUY', '1', '100', executed_at=executed_at.isoformat()),
+        )
+        assert resp.status_code == 200
+
+    resp = await api_client.get(f'{API}/portfolios/{portfolio_id}/transactions')
+
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
@@ -0,0 +1,30 @@
+import argparse
+
+import pytest
+
+from benchmarks.loadtest import DEFAULT_MIX, open_client, parse_mix, run_load
+
+
+def test_parse_mix_rejects_unknown_operation():
+    with pytest.raises(ValueError, match='delete'):
+        parse_mix('create=1,delete=2')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('backend', ['sqlalchemy', 'memory'])
+async def test_short_run_completes_without_errors(backend):
+    args = argparse.Namespace(
+        backend=backend,
+        base_url=None,
+        target='asgi',
+        concurrency=4,
+        database_url=None,
+        user_service_latency=0.0,
+    )
+    async with open_client(args) as client:
+        report = await run_load(client, concurrency=4, duration=0.5, mix=parse_mix(DEFAULT_MIX))
+
+    assert report.total_requests > 0
+    assert report.total_errors == 0
+    assert set(report.operations) <= {'create', 'transact', 'read', 'list'}
+    assert report.to_dict()['operations']['create']['latency_ms']['p99'] > 0
@@ -0,0 +1,110 @@
+import asyncio
+import datetime
+import uuid
+from decimal import Decimal
+
+import pyarrow.dataset as ds
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.adapters.orm import metadata, transaction_table
+from src.adapters.repository import SqlAlchemyPortfolioRepository
+from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.enums import TransactionType
+from src.entrypoints.cli import export
+from src.infrastructure.export.pipeline import ExportState
+
+
+def _tx(portfolio, executed_at):
+    return Transaction(
+        portfolio_id=portfolio.id,
+        asset_id='MOEX:SBER',
+        transaction_type=TransactionType.BUY,
+        quantity=Decimal('2'),
+        price_per_unit=Decimal('100.5'),
+        total_amount=Decimal('201'),
+        executed_at=executed_at,
+        currency='RUB',
+    )
+
+
+async def _add_transactions(session_factory, transactions, recorded_at):
+    """Пишет транзакции с заданным временем записи, чтобы не зависеть от часов БД."""
+    async with session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        for transaction in transactions:
+            await repo.add_transaction(transaction)
+        await session.execute(
+            update(transaction_table)
+            .where(transaction_table.c.id.in_([t.id for t in transactions]))
+            .values(recorded_at=recorded_at),
+        )
+        await session.commit()
+
+
+def _dataset(path):
+    return ds.dataset(path, format='parquet', partitioning='hive').to_table()
+
+
+def test_cli_exports_incrementally(tmp_path):
+    database_url = f'sqlite+aiosqlite:///{tmp_path}/export.db'
+    output = tmp_path / 'analytics'
+    portfolio = Portfolio(
+        user_id=uuid.uuid4(),
+        name='export',
+        currency='RUB',
+        holdings=[Holding('MOEX:SBER', Decimal('4'), Decimal('100.5'))],
+    )
+    january = datetime.datetime(2025, 1, 15, tzinfo=datetime.UTC)
+    february = datetime.datetime(2025, 2, 3, tzinfo=datetime.UTC)
+    long_ago = datetime.datetime(2025, 2, 5, tzinfo=datetime.UTC)
+
+    async def prepare():
+        engine = create_async_engine(database_url)
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await SqlAlchemyPortfolioRepository(session).add(portfolio)
+            await session.commit()
+        await _add_transactions(
+            session_factory,
+            [_tx(portfolio, january), _tx(portfolio, february)],
+            long_ago,
+        )
+        await engine.dispose()
+
+    async def add_backdated(recorded_at):
+        engine = create_async_engine(database_url)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        # Задним числом по executed_at, но записана после первой выгрузки.
+        await _add_transactions(
+            session_factory,
+            [_tx(portfolio, january)],
+            recorded_at,
+        )
+        await engine.dispose()
+
+    asyncio.run(prepare())
+    argv = ['--database-url', database_url, '--output', str(output), '--buckets', '4']
+
+    assert export.main(argv) == 0
+
+    transactions = _dataset(output / 'transactions')
+    assert transactions.num_rows == 2
+    assert sorted(transactions.column('month').to_pylist()) == ['2025-01', '2025-02']
+    assert transactions.column('price_per_unit').to_pylist() == [Decimal('100.5000000000')] * 2
+    holdings = _dataset(output / 'holdings')
+    assert holdings.column('portfolio_id').to_pylist() == [str(portfolio.id)]
+    assert holdings.column('quantity').to_pylist() == [Decimal('4.0000000000')]
+    first_mark = ExportState.load(output).transactions_high_water_mark
+    assert first_mark > long_ago
+
+    asyncio.run(add_backdated(first_mark + datetime.timedelta(seconds=1)))
+    assert export.main([*argv, '--tables', 'transactions', '--lag-seconds', '0']) == 0
+
+    transactions = _dataset(output / 'transactions')
+    assert transactions.num_rows == 3
+    assert sorted(transactions.column('month').to_pylist()) == ['2025-01', '2025-01', '2025-02']
+    assert ExportState.load(output).transactions_high_water_mark > first_mark
+    assert not list(output.rglob('*.tmp'))
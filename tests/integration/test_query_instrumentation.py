@@ -0,0 +1,172 @@
+import logging
+import re
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.adapters.assets import AssetRegistry
+from src.adapters.repository import SqlAlchemyPortfolioRepository
+from src.domain.domain import Holding, Portfolio
+from src.infrastructure.database import instrumentation
+from src.infrastructure.database.exceptions import RepeatedQueriesError
+from src.infrastructure.database.instrumentation import (
+    QueryInstrumentationConfig,
+    check_repeated_queries,
+    instrument_engine,
+    track_queries,
+)
+
+
+@pytest.fixture
+def restore_config():
+    config = instrumentation._config
+    yield
+    instrumentation._config = config
+
+
+async def _add_portfolios(session_factory, user_id, count):
+    async with session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        for i in range(count):
+            await repo.add(Portfolio(user_id=user_id, name=f'p{i}', currency='USD'))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_query_count_and_time_are_tracked(
+    sqlite_engine, sqlite_session_factory, restore_config
+):
+    instrument_engine(sqlite_engine, QueryInstrumentationConfig())
+    user_id = uuid.uuid4()
+    await _add_portfolios(sqlite_session_factory, user_id, 1)
+
+    async with sqlite_session_factory() as session:
+        with track_queries() as stats:
+            await SqlAlchemyPortfolioRepository(session).get_by_user_id(user_id)
+
+    assert stats.count == 2
+    assert stats.total_time > 0
+
+
+@pytest.mark.asyncio
+async def test_user_portfolios_load_without_n_plus_one(
+    sqlite_engine, sqlite_session_factory, restore_config
+):
+    instrument_engine(
+        sqlite_engine,
+        QueryInstrumentationConfig(repeated_queries_threshold=3, repeated_queries_action='raise'),
+    )
+    user_id = uuid.uuid4()
+    await _add_portfolios(sqlite_session_factory, user_id, 4)
+
+    async with sqlite_session_factory() as session:
+        with track_queries() as stats:
+            await SqlAlchemyPortfolioRepository(session).get_by_user_id(user_id)
+
+    assert stats.count == 2
+    check_repeated_queries(stats, source='get_by_user_id')
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_are_detected(
+    sqlite_engine, sqlite_session_factory, restore_config
+):
+    instrument_engine(
+        sqlite_engine,
+        QueryInstrumentationConfig(repeated_queries_threshold=3, repeated_queries_action='raise'),
+    )
+
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        with track_queries() as stats:
+            for _ in range(4):
+                await repo.get_by_id(uuid.uuid4())
+
+    with pytest.raises(RepeatedQueriesError, match='portfolios'):
+        check_repeated_queries(stats, source='get_by_id')
+
+
+@pytest.mark.asyncio
+async def test_summaries_do_not_read_holdings(
+    sqlite_engine, sqlite_session_factory, restore_config
+):
+    instrument_engine(sqlite_engine, QueryInstrumentationConfig())
+    user_id = uuid.uuid4()
+    await _add_portfolios(sqlite_session_factory, user_id, 3)
+
+    async with sqlite_session_factory() as session:
+        with track_queries() as stats:
+            await SqlAlchemyPortfolioRepository(session).get_summaries_by_user_id(user_id)
+
+    assert stats.count == 1
+    assert not any(re.search(r'\bholdings\b', fp) for fp in stats.fingerprints)
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_fingerprint(
+    sqlite_engine, sqlite_session_factory, restore_config, caplog
+):
+    instrument_engine(sqlite_engine, QueryInstrumentationConfig(slow_query_threshold=0))
+
+    async with sqlite_session_factory() as session:
+        with caplog.at_level(logging.WARNING, logger='src.infrastructure.database.slow_queries'):
+            await SqlAlchemyPortfolioRepository(session).get_by_id(uuid.uuid4())
+
+    assert 'Медленный запрос' in caplog.text
+    assert 'WHERE portfolios.id = ?' in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_failed_queries_are_tracked_and_logged(sqlite_engine, restore_config, caplog):
+    instrument_engine(sqlite_engine, QueryInstrumentationConfig(slow_query_threshold=0))
+
+    async with sqlite_engine.connect() as conn:
+        with (
+            track_queries() as stats,
+            caplog.at_level(logging.WARNING, logger='src.infrastructure.database.slow_queries'),
+        ):
+            for _ in range(2):
+                with pytest.raises(OperationalError):
+                    await conn.execute(text('SELECT * FROM missing WHERE id = 1'))
+        started = conn.sync_connection.info['query_start_time']
+
+    assert stats.count == 2
+    assert stats.fingerprints == {'SELECT * FROM missing WHERE id = ?': 2}
+    assert 'Медленный запрос с ошибкой' in caplog.text
+    assert started == []
+
+
+@pytest.mark.asyncio
+async def test_add_many_inserts_with_one_statement_per_table(
+    sqlite_engine, sqlite_session_factory, restore_config
+):
+    instrument_engine(sqlite_engine, QueryInstrumentationConfig())
+    user_id = uuid.uuid4()
+    portfolios = [
+        Portfolio(
+            user_id=user_id,
+            name=f'p{i}',
+            currency='USD',
+            holdings=[Holding('MOEX:SBER', Decimal('1'), Decimal('100'))],
+        )
+        for i in range(10)
+    ]
+
+    # Актив уже в справочнике; новый актив добавил бы постоянное число запросов.
+    assets = AssetRegistry()
+    async with sqlite_session_factory() as session:
+        await assets.keys(session, ['MOEX:SBER'])
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        with track_queries() as stats:
+            await SqlAlchemyPortfolioRepository(session, assets).add_many(portfolios)
+        await session.commit()
+
+    assert stats.count == 3
+    async with sqlite_session_factory() as session:
+        summaries = await SqlAlchemyPortfolioRepository(session).get_summaries_by_user_id(user_id)
+    assert [s.holdings_count for s in summaries] == [1] * 10
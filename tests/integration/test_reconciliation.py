@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.adapters.orm import metadata
+from src.adapters.repository import SqlAlchemyPortfolioRepository
+from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.enums import TransactionType
+from src.entrypoints.cli import reconcile
+from src.service_layer import reconciliation
+from src.service_layer.reconciliation import reconcile_range
+
+MIN_ID = uuid.UUID(int=0)
+MAX_ID = uuid.UUID(int=2**128 - 1)
+
+
+def _tx(portfolio, tx_type, quantity, price, minute):
+    return Transaction(
+        portfolio_id=portfolio.id,
+        asset_id='MOEX:SBER',
+        transaction_type=tx_type,
+        quantity=Decimal(quantity),
+        price_per_unit=Decimal(price),
+        total_amount=Decimal(quantity) * Decimal(price),
+        executed_at=datetime.datetime(2025, 1, 1, 10, minute, tzinfo=datetime.UTC),
+        currency='RUB',
+    )
+
+
+async def _seed(session_factory):
+    """Три портфеля: согласованный, с потерянной позицией и с невоспроизводимым журналом."""
+    user_id = uuid.uuid4()
+    consistent = Portfolio(
+        user_id=user_id,
+        name='consistent',
+        currency='RUB',
+        holdings=[Holding('MOEX:SBER', Decimal('15'), Decimal('150'))],
+    )
+    drifted = Portfolio(user_id=user_id, name='drifted', currency='RUB')
+    broken = Portfolio(user_id=user_id, name='broken', currency='RUB')
+    transactions = [
+        _tx(consistent, TransactionType.BUY, '10', '100', 0),
+        _tx(consistent, TransactionType.BUY, '10', '200', 1),
+        _tx(consistent, TransactionType.SELL, '5', '300', 2),
+        _tx(drifted, TransactionType.BUY, '3', '50', 0),
+        _tx(broken, TransactionType.SELL, '1', '10', 0),
+    ]
+    async with session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        for portfolio in (consistent, drifted, broken):
+            await repo.add(portfolio)
+        for transaction in transactions:
+            await repo.add_transaction(transaction)
+        await session.commit()
+    return consistent, drifted, broken
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('fixed_point', [False, True])
+async def test_reconcile_range_reports_and_repairs(sqlite_session_factory, fixed_point):
+    consistent, drifted, broken = await _seed(sqlite_session_factory)
+
+    report = await reconcile_range(
+        sqlite_session_factory, MIN_ID, MAX_ID, repair=True, fixed_point=fixed_point
+    )
+
+    assert report.portfolios == 3
+    assert report.transactions == 5
+    assert [m.portfolio_id for m in report.mismatches] == [drifted.id]
+    assert report.mismatches[0].stored_quantity is None
+    assert report.mismatches[0].expected_quantity == Decimal('3')
+    assert set(report.replay_errors) == {broken.id}
+    assert report.repaired_portfolios == 1
+
+    async with sqlite_session_factory() as session:
+        repaired = await SqlAlchemyPortfolioRepository(session).get_by_id(drifted.id)
+    assert [(h.asset_id, h.quantity) for h in repaired.holdings] == [('MOEX:SBER', Decimal('3'))]
+
+    again = await reconcile_range(sqlite_session_factory, MIN_ID, MAX_ID, fixed_point=fixed_point)
+    assert again.mismatches == []
+
+
+@pytest.mark.asyncio
+async def test_repair_skips_portfolio_changed_after_snapshot(sqlite_session_factory, monkeypatch):
+    _, drifted, _ = await _seed(sqlite_session_factory)
+    replay = reconciliation._replay
+
+    async def replay_then_concurrent_write(reader, stored, report):
+        replayed = await replay(reader, stored, report)
+        async with sqlite_session_factory() as session:
+            repo = SqlAlchemyPortfolioRepository(session)
+            portfolio = await repo.get_by_id(drifted.id)
+            portfolio.name = 'renamed'
+            await repo.update(portfolio)
+            await session.commit()
+        return replayed
+
+    monkeypatch.setattr(reconciliation, '_replay', replay_then_concurrent_write)
+    report = await reconcile_range(sqlite_session_factory, MIN_ID, MAX_ID, repair=True)
+
+    assert report.conflicts == [drifted.id]
+    assert report.repaired_portfolios == 0
+    async with sqlite_session_factory() as session:
+        stored = await SqlAlchemyPortfolioRepository(session).get_by_id(drifted.id)
+    assert (stored.name, stored.holdings) == ('renamed', [])
+
+
+def test_cli_runs_shards_in_processes_and_resumes(tmp_path):
+    database_url = f'sqlite+aiosqlite:///{tmp_path}/reconcile.db'
+
+    async def prepare():
+        engine = create_async_engine(database_url)
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+        try:
+            return await _seed(async_sessionmaker(engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    _, drifted, broken = asyncio.run(prepare())
+    checkpoint = tmp_path / 'checkpoint.jsonl'
+    report_path = tmp_path / 'report.json'
+    argv = [
+        '--database-url',
+        database_url,
+        '--workers',
+        '2',
+        '--shard-size',
+        '1',
+        '--checkpoint',
+        str(checkpoint),
+    ]
+
+    exit_code = reconcile.main([*argv, '--report', str(report_path)])
+
+    report = json.loads(report_path.read_text())
+    assert exit_code == 1
+    assert report['portfolios'] == 3
+    assert [m['portfolio_id'] for m in report['mismatches']] == [str(drifted.id)]
+    assert list(report['replay_errors']) == [str(broken.id)]
+    assert len(checkpoint.read_text().splitlines()) == 3
+
+    args = reconcile.parse_args(argv)
+    resumed = reconcile.run(args, database_url)
+
+    assert resumed.portfolios == 3
+    assert len(checkpoint.read_text().splitlines()) == 3
@@ -0,0 +1,359 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, text
+
+from src.adapters.assets import AssetRegistry
+from src.adapters.orm import asset_table, portfolio_summary_table, transaction_table
+from src.adapters.repository import SqlAlchemyPortfolioRepository
+from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.enums import TransactionType
+from src.domain.exceptions import PortfolioVersionConflictError
+from src.service_layer.portfolio_service import PortfolioService
+
+
+@pytest.mark.asyncio
+async def test_add_and_get_by_id(sqlite_session_factory):
+    portfolio = Portfolio(
+        user_id=uuid.uuid4(),
+        name='Test',
+        currency='USD',
+        holdings=[Holding('NASDAQ:AAPL', Decimal('10'), Decimal('150.5'))],
+    )
+    async with sqlite_session_factory() as session:
+        await SqlAlchemyPortfolioRepository(session).add(portfolio)
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        loaded = await SqlAlchemyPortfolioRepository(session).get_by_id(portfolio.id)
+
+    assert loaded.name == 'Test'
+    assert [(h.asset_id, h.quantity) for h in loaded.holdings] == [('NASDAQ:AAPL', Decimal('10'))]
+
+
+@pytest.mark.asyncio
+async def test_add_transaction_stores_type_value(sqlite_session_factory):
+    portfolio = Portfolio(user_id=uuid.uuid4(), name='Test', currency='USD')
+    tx = Transaction(
+        portfolio_id=portfolio.id,
+        asset_id='NASDAQ:AAPL',
+        transaction_type=TransactionType.SELL,
+        quantity=Decimal('1'),
+        price_per_unit=Decimal('150'),
+        total_amount=Decimal('150'),
+        executed_at=datetime.datetime.now(datetime.UTC),
+        currency='USD',
+    )
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        await repo.add(portfolio)
+        await repo.add_transaction(tx)
+        await session.commit()
+
+        stored = (await session.execute(select(transaction_table.c.transaction_type))).scalar()
+
+    assert stored == 'SELL'
+
+
+@pytest.mark.asyncio
+async def test_get_many_loads_portfolios_with_holdings(sqlite_session_factory):
+    user_id = uuid.uuid4()
+    first = Portfolio(
+        user_id=user_id,
+        name='First',
+        currency='USD',
+        holdings=[Holding('NASDAQ:AAPL', Decimal('10'), Decimal('150.5'))],
+    )
+    second = Portfolio(
+        user_id=uuid.uuid4(),
+        name='Second',
+        currency='RUB',
+        holdings=[
+            Holding('MOEX:SBER', Decimal('5'), Decimal('250')),
+            Holding('MOEX:GAZP', Decimal('2'), Decimal('160')),
+        ],
+    )
+    missing_id = uuid.uuid4()
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        await repo.add(first)
+        await repo.add(second)
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        loaded = await SqlAlchemyPortfolioRepository(session).get_many(
+            [first.id, missing_id, second.id, first.id],
+        )
+
+    assert set(loaded) == {first.id, second.id}
+    assert [h.asset_id for h in loaded[first.id].holdings] == ['NASDAQ:AAPL']
+    assert {h.asset_id for h in loaded[second.id].holdings} == {'MOEX:SBER', 'MOEX:GAZP'}
+
+
+@pytest.mark.asyncio
+async def test_summary_follows_holdings_and_transactions(sqlite_session_factory):
+    portfolio = Portfolio(
+        user_id=uuid.uuid4(),
+        name='Test',
+        currency='USD',
+        holdings=[Holding('NASDAQ:AAPL', Decimal('10'), Decimal('150'))],
+    )
+    executed_at = datetime.datetime(2025, 3, 1, 12, 0, tzinfo=datetime.UTC)
+    tx = Transaction(
+        portfolio_id=portfolio.id,
+        asset_id='NASDAQ:MSFT',
+        transaction_type=TransactionType.BUY,
+        quantity=Decimal('2'),
+        price_per_unit=Decimal('400'),
+        total_amount=Decimal('800'),
+        executed_at=executed_at,
+        currency='USD',
+    )
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        await repo.add(portfolio)
+        portfolio.execute_transaction(tx)
+        await repo.update(portfolio)
+        await repo.add_transaction(tx)
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        [summary] = await SqlAlchemyPortfolioRepository(session).get_summaries_by_user_id(
+            portfolio.user_id,
+        )
+
+    assert summary.portfolio_id == portfolio.id
+    assert summary.version == 2
+    assert summary.holdings_count == 2
+    assert summary.total_cost == Decimal('2300')
+    assert summary.last_transaction_at.replace(tzinfo=datetime.UTC) == executed_at
+
+
+@pytest.mark.asyncio
+async def test_recently_active_ids_prefer_last_transaction_over_creation(sqlite_session_factory):
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+    old, new, idle = (
+        Portfolio(
+            user_id=uuid.uuid4(),
+            name=name,
+            currency='USD',
+            created_at=base + datetime.timedelta(days=offset),
+        )
+        for name, offset in (('old', 0), ('new', 10), ('idle', 1))
+    )
+    tx = Transaction(
+        portfolio_id=old.id,
+        asset_id='NASDAQ:AAPL',
+        transaction_type=TransactionType.BUY,
+        quantity=Decimal('1'),
+        price_per_unit=Decimal('100'),
+        total_amount=Decimal('100'),
+        executed_at=base + datetime.timedelta(days=20),
+        currency='USD',
+    )
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        await repo.add_many([old, new, idle])
+        old.execute_transaction(tx)
+        await repo.update(old)
+        await repo.add_transaction(tx)
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        ids = await SqlAlchemyPortfolioRepository(session).get_recently_active_ids(limit=2)
+
+    assert ids == [old.id, new.id]
+
+
+@pytest.mark.asyncio
+async def test_activity_is_write_time_not_executed_at(sqlite_session_factory):
+    portfolio = Portfolio(user_id=uuid.uuid4(), name='p', currency='USD')
+    future, past = (
+        Transaction(
+            portfolio_id=portfolio.id,
+            asset_id='NASDAQ:AAPL',
+            transaction_type=TransactionType.BUY,
+            quantity=Decimal('1'),
+            price_per_unit=Decimal('100'),
+            total_amount=Decimal('100'),
+            executed_at=executed_at,
+            currency='USD',
+        )
+        for executed_at in (
+            datetime.datetime(2999, 1, 1, tzinfo=datetime.UTC),
+            datetime.datetime(2001, 1, 1, tzinfo=datetime.UTC),
+        )
+    )
+    started = datetime.datetime.now(datetime.UTC).replace(microsecond=0, tzinfo=None)
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        await repo.add(portfolio)
+        await repo.add_transaction(future)
+        await repo.add_transaction(past)
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        row = (await session.execute(select(portfolio_summary_table))).one()
+
+    # Будущая дата исполнения не держит портфель в начале списка, а задним числом
+    # запись всё равно считается свежей активностью.
+    assert row.last_transaction_at.year == 2999
+    assert started <= row.last_activity_at.replace(tzinfo=None) < datetime.datetime(2999, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_apply_transactions_writes_batch_and_skips_stored(sqlite_session_factory):
+    first = Portfolio(user_id=uuid.uuid4(), name='First', currency='USD')
+    second = Portfolio(user_id=uuid.uuid4(), name='Second', currency='USD')
+    base = datetime.datetime(2025, 4, 1, 10, 0, tzinfo=datetime.UTC)
+
+    def buy(portfolio, asset_id, minutes):
+        return Transaction(
+            portfolio_id=portfolio.id,
+            asset_id=asset_id,
+            transaction_type=TransactionType.BUY,
+            quantity=Decimal('1'),
+            price_per_unit=Decimal('10'),
+            total_amount=Decimal('10'),
+            executed_at=base + datetime.timedelta(minutes=minutes),
+            currency='USD',
+        )
+
+    batch = [buy(first, 'A', 0), buy(second, 'B', 1), buy(first, 'A', 2)]
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        await repo.add_many([first, second])
+        result = await PortfolioService(repo, None).apply_transactions(batch)
+        await session.commit()
+    assert len(result.applied) == 3
+
+    # Повторный перенос той же пачки ничего не меняет.
+    async with sqlite_session_factory() as session:
+        repo = SqlAlchemyPortfolioRepository(session)
+        replay = await PortfolioService(repo, None).apply_transactions(batch)
+        await session.commit()
+        loaded = await repo.get_many([first.id, second.id])
+        stored = (await session.execute(select(transaction_table.c.id))).scalars().all()
+
+    assert len(replay.duplicates) == 3
+    assert not replay.applied
+    assert sorted(stored) == sorted(t.id for t in batch)
+    assert loaded[first.id].get_holding('A').quantity == Decimal('2')
+    assert loaded[second.id].get_holding('B').quantity == Decimal('1')
+    assert loaded[first.id].version == 2
+
+
+@pytest.mark.asyncio
+async def test_assets_are_stored_once_and_interned_on_read(sqlite_session_factory):
+    assets = AssetRegistry()
+    portfolios = [
+        Portfolio(
+            user_id=uuid.uuid4(),
+            name=f'p{i}',
+            currency='RUB',
+            holdings=[Holding(''.join(['MOEX:', 'SBER']), Decimal('1'), Decimal('250'))],
+        )
+        for i in range(2)
+    ]
+    async with sqlite_session_factory() as session:
+        await SqlAlchemyPortfolioRepository(session, assets).add_many(portfolios)
+        # Актив незафиксированной транзакции в реестр процесса не попадает.
+        assert len(assets) == 0
+        await session.commit()
+    assert len(assets) == 1
+
+    async with sqlite_session_factory() as session:
+        loaded = await SqlAlchemyPortfolioRepository(session, assets).get_many(
+            [p.id for p in portfolios],
+        )
+        codes = (await session.execute(select(asset_table.c.code))).scalars().all()
+
+    first, second = (loaded[p.id].holdings[0].asset_id for p in portfolios)
+    assert first == 'MOEX:SBER'
+    assert first is second
+    assert codes == ['MOEX:SBER']
+
+
+@pytest.mark.asyncio
+async def test_asset_added_in_rolled_back_transaction_is_not_cached(sqlite_session_factory):
+    assets = AssetRegistry()
+    portfolio = Portfolio(
+        user_id=uuid.uuid4(),
+        name='p',
+        currency='USD',
+        holdings=[Holding('NASDAQ:AAPL', Decimal('1'), Decimal('150'))],
+    )
+    async with sqlite_session_factory() as session:
+        await SqlAlchemyPortfolioRepository(session, assets).add(portfolio)
+        await session.rollback()
+
+    async with sqlite_session_factory() as session:
+        await SqlAlchemyPortfolioRepository(session, assets).add(portfolio)
+        await session.commit()
+
+    async with sqlite_session_factory() as session:
+        loaded = await SqlAlchemyPortfolioRepository(session, AssetRegistry()).get_by_id(
+            portfolio.id,
+        )
+    assert loaded.holdings[0].asset_id == 'NASDAQ:AAPL'
+    assert len(assets) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writer_with_stale_version_is_rejected(sqlite_session_factory):
+    portfolio = Portfolio(user_id=uuid.uuid4(), name='p', currency='USD')
+    async with sqlite_session_factory() as session:
+        await SqlAlchemyPortfolioRepository(session).add(portfolio)
+        await session.commit()
+
+    def buy(quantity):
+        return Transaction(
+            portfolio_id=portfolio.id,
+            asset_id='NASDAQ:AAPL',
+            transaction_type=TransactionType.BUY,
+            quantity=Decimal(quantity),
+            price_per_unit=Decimal('100'),
+            total_amount=Decimal(quantity) * 100,
+            executed_at=datetime.datetime(2025, 5, 1, tzinfo=datetime.UTC),
+            currency='USD',
+        )
+
+    # Оба писателя прочитали одну и ту же версию портфеля.
+    first_session, second_session = sqlite_session_factory(), sqlite_session_factory()
+    first_repo = SqlAlchemyPortfolioRepository(first_session)
+    second_repo = SqlAlchemyPortfolioRepository(second_session)
+    first = await first_repo.get_by_id(portfolio.id)
+    second = await second_repo.get_by_id(portfolio.id)
+
+    first.execute_transaction(buy('1'))
+    await first_repo.update(first)
+    await first_session.commit()
+
+    second.execute_transaction(buy('5'))
+    with pytest.raises(PortfolioVersionConflictError):
+        await second_repo.update(second)
+    await second_session.rollback()
+    await first_session.close()
+    await second_session.close()
+
+    async with sqlite_session_factory() as session:
+        stored = await SqlAlchemyPortfolioRepository(session).get_by_id(portfolio.id)
+    assert stored.version == first.version == 2
+    assert stored.get_holding('NASDAQ:AAPL').quantity == Decimal('1')
+
+
+@pytest.mark.asyncio
+async def test_recently_active_ids_read_activity_index(sqlite_session_factory):
+    async with sqlite_session_factory() as session:
+        rows = await session.execute(
+            text(
+                'EXPLAIN QUERY PLAN SELECT portfolio_id FROM portfolio_summaries '
+                'ORDER BY last_activity_at DESC LIMIT 10',
+            ),
+        )
+        plan = ' '.join(row.detail for row in rows)
+
+    assert 'ix_portfolio_summaries_last_activity_at' in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,145 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.entrypoints.middlewares.admission import AdmissionControlMiddleware, route_class
+from src.infrastructure.admission import AdaptiveLimiter, AdmissionRejectedError
+
+
+class TestAdaptiveLimiter:
+    @pytest.mark.asyncio
+    async def test_queue_full_rejects_immediately(self):
+        limiter = AdaptiveLimiter('test-full', max_limit=1, max_queue=0)
+        await limiter.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await limiter.acquire()
+
+        assert exc_info.value.reason == 'queue_full'
+
+    @pytest.mark.asyncio
+    async def test_waiter_times_out(self):
+        limiter = AdaptiveLimiter('test-timeout', max_limit=1, queue_timeout=0.01)
+        await limiter.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await limiter.acquire()
+
+        assert exc_info.value.reason == 'timeout'
+        assert limiter.queued == 0
+        assert limiter.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_release_hands_slot_to_waiter(self):
+        limiter = AdaptiveLimiter('test-handoff', max_limit=1, queue_timeout=1.0)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        limiter.release(latency=0.001)
+        await waiter
+
+        assert limiter.in_flight == 1
+        assert limiter.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        limiter = AdaptiveLimiter('test-cancel', max_limit=1, queue_timeout=1.0)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release(latency=0.001)
+
+        assert limiter.queued == 0
+        assert limiter.in_flight == 0
+
+    def test_limit_decreases_on_slow_requests_and_recovers(self):
+        now = [100.0]
+        limiter = AdaptiveLimiter(
+            'test-aimd',
+            max_limit=10,
+            min_limit=2,
+            latency_target=0.1,
+            clock=lambda: now[0],
+        )
+        limiter.in_flight = 20
+
+        # Каждый медленный запрос допущен уже после предыдущего снижения.
+        for _ in range(10):
+            now[0] += 2.0
+            limiter.release(latency=1.0)
+        assert limiter.limit < 10 * 0.9**9
+        assert limiter.limit >= 2
+
+        limiter.in_flight = 1000
+        for _ in range(1000):
+            limiter.release(latency=0.01)
+        assert limiter.limit == 10
+
+    def test_concurrent_slow_requests_decrease_limit_once(self):
+        now = [100.0]
+        limiter = AdaptiveLimiter(
+            'test-aimd-window',
+            max_limit=30,
+            latency_target=0.1,
+            clock=lambda: now[0],
+        )
+        limiter.in_flight = 60
+
+        # Тридцать запросов одного эпизода медленной БД завершаются разом.
+        for _ in range(30):
+            limiter.release(latency=1.0)
+        assert limiter.limit == pytest.approx(30 * 0.9)
+
+        # Следующий эпизод — запросы, допущенные после снижения, — снижает ещё раз.
+        now[0] += 5.0
+        for _ in range(30):
+            limiter.release(latency=1.0)
+        assert limiter.limit == pytest.approx(30 * 0.9 * 0.9)
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_load_with_retry_after():
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get('/slow')
+    async def slow():
+        await release.wait()
+        return {'status': 'ok'}
+
+    limiter = AdaptiveLimiter('test-middleware', max_limit=1, max_queue=0)
+    app.add_middleware(AdmissionControlMiddleware, limiters={'read': limiter, 'write': limiter})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        first = asyncio.create_task(client.get('/slow'))
+        while limiter.in_flight == 0:
+            await asyncio.sleep(0)
+
+        rejected = await client.get('/slow')
+        release.set()
+        accepted = await first
+
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After'] == '1'
+    assert accepted.status_code == 200
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.parametrize(
+    ('method', 'path', 'expected'),
+    [
+        ('GET', '/api/v1/portfolio/portfolios/1', 'read'),
+        ('POST', '/api/v1/portfolio/portfolios/batch', 'read'),
+        ('POST', '/api/v1/portfolio/portfolios', 'write'),
+    ],
+)
+def test_route_class(method, path, expected):
+    assert route_class({'method': method, 'path': path}) == expected
@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+
+from src.infrastructure.cache import TTLCache
+from src.service_layer.exceptions import UserNotFoundError
+from src.service_layer.users_service import ABCUserService, CachingUserService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingUsers(ABCUserService):
+    def __init__(self, known):
+        self.known = set(known)
+        self.requested = []
+
+    async def get_by_id(self, user_id):
+        self.requested.append(user_id)
+        if user_id not in self.known:
+            raise UserNotFoundError(str(user_id))
+        return {'id': str(user_id)}
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache('test-ttl', maxsize=10, ttl=5.0, clock=clock)
+    cache.set('a', 1)
+
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache('test-lru', maxsize=2, ttl=60.0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+@pytest.mark.asyncio
+async def test_caching_user_service_caches_only_found_users():
+    known = uuid.uuid4()
+    missing = uuid.uuid4()
+    inner = CountingUsers([known])
+    service = CachingUserService(inner, TTLCache('test-users', maxsize=10, ttl=60.0))
+
+    for _ in range(2):
+        assert await service.get_by_id(known) == {'id': str(known)}
+        with pytest.raises(UserNotFoundError):
+            await service.get_by_id(missing)
+
+    assert inner.requested == [known, missing, missing]
+
+
+@pytest.mark.asyncio
+async def test_caching_user_service_get_many_fetches_only_misses():
+    cached, fresh, missing = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    inner = CountingUsers([cached, fresh])
+    service = CachingUserService(inner, TTLCache('test-users-many', maxsize=10, ttl=60.0))
+    await service.get_by_id(cached)
+
+    users = await service.get_many([cached, fresh, missing, fresh])
+
+    assert set(users) == {cached, fresh}
+    assert inner.requested == [cached, fresh, missing]
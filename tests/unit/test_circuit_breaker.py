@@ -0,0 +1,76 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from src.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state_metric(name):
+    return REGISTRY.get_sample_value('circuit_breaker_state', {'name': name})
+
+
+def _fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record(False)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test-open', failure_threshold=3, clock=FakeClock())
+    _fail(breaker, 2)
+    breaker.before_call()
+    breaker.record(True)
+    _fail(breaker, 2)
+
+    assert breaker.state is CircuitState.CLOSED
+
+    _fail(breaker, 1)
+
+    assert breaker.state is CircuitState.OPEN
+    assert _state_metric('test-open') == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_probe_success_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker('test-probe', failure_threshold=1, reset_timeout=10, clock=clock)
+    _fail(breaker, 1)
+
+    clock.now = 9.0
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after == pytest.approx(1.0)
+
+    clock.now = 10.0
+    breaker.before_call()
+    assert breaker.state is CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(True)
+
+    assert breaker.state is CircuitState.CLOSED
+    assert _state_metric('test-probe') == CircuitState.CLOSED
+    breaker.before_call()
+
+
+def test_half_open_probe_failure_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker('test-reopen', failure_threshold=1, reset_timeout=10, clock=clock)
+    _fail(breaker, 1)
+    clock.now = 10.0
+
+    _fail(breaker, 1)
+
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 19.0
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
@@ -4,7 +4,7 @@ import uuid
 import pytest
 from decimal import Decimal
 
-from src.domain.domain import Portfolio, Holding, Transaction
+from src.domain.domain import Portfolio, Holding, PortfolioSummary, Transaction, UserPortfolioSummary
 from src.domain.enums import TransactionType
 from src.domain.exceptions import (
     InsufficientHoldingsError,
@@ -178,3 +178,37 @@ class TestPortfolioModel:
 
         empty_portfolio.execute_transaction(sell_tx)
         assert empty_portfolio.get_holding('NASDAQ:AAPL').quantity == Decimal('5.0')
+
+
+class TestPortfolioSummary:
+    def test_summary_from_portfolio(self, portfolio_with_sber):
+        summary = PortfolioSummary.from_portfolio(portfolio_with_sber)
+
+        assert summary.holdings_count == 1
+        assert summary.total_cost == Decimal('280.2') * Decimal('281.43')
+        assert summary.last_transaction_at is None
+
+    def test_user_summary_sums_cost_per_currency(self, empty_portfolio, portfolio_with_sber):
+        usd = PortfolioSummary.from_portfolio(
+            portfolio_with_sber, datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+        )
+        rub = PortfolioSummary.from_portfolio(
+            Portfolio(
+                user_id=empty_portfolio.user_id,
+                name='RUB',
+                currency='RUB',
+                holdings=[Holding('MOEX:GAZP', Decimal('2'), Decimal('150'))],
+            ),
+            datetime.datetime(2025, 2, 1, tzinfo=datetime.UTC),
+        )
+        empty = PortfolioSummary.from_portfolio(empty_portfolio)
+
+        summary = UserPortfolioSummary.from_summaries(empty_portfolio.user_id, [usd, rub, empty])
+
+        assert summary.portfolios_count == 3
+        assert summary.holdings_count == 2
+        assert summary.total_cost_by_currency == {
+            'USD': usd.total_cost,
+            'RUB': Decimal('300'),
+        }
+        assert summary.last_transaction_at == datetime.datetime(2025, 2, 1, tzinfo=datetime.UTC)
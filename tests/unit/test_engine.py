@@ -0,0 +1,19 @@
+from src.config.settings import Settings
+from src.infrastructure.database.engine import asyncpg_connect_args
+
+
+def test_statement_cache_enabled_for_direct_connection():
+    args = asyncpg_connect_args(Settings.model_construct(DB_STATEMENT_CACHE_SIZE=128))
+
+    assert args['statement_cache_size'] == 128
+    assert args['prepared_statement_cache_size'] == 128
+    assert 'prepared_statement_name_func' not in args
+
+
+def test_statement_cache_disabled_behind_pgbouncer():
+    args = asyncpg_connect_args(Settings.model_construct(DB_PGBOUNCER=True))
+
+    assert args['statement_cache_size'] == 0
+    assert args['prepared_statement_cache_size'] == 0
+    name_func = args['prepared_statement_name_func']
+    assert name_func() != name_func()
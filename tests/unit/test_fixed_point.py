@@ -0,0 +1,154 @@
+import datetime
+import random
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+
+from src.domain.domain import Holding, Portfolio, Transaction
+from src.domain.enums import TransactionType
+from src.domain.exceptions import InsufficientHoldingsError, TransactionMismatchError
+from src.domain.fixed_point import (
+    QUANTUM,
+    FixedPointPortfolio,
+    FixedPointTransaction,
+    div_half_up,
+    from_fixed,
+    to_fixed,
+)
+
+EXECUTED_AT = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+
+
+def _tx(portfolio, asset_id, tx_type, quantity, price):
+    quantity, price = Decimal(quantity), Decimal(price)
+    return Transaction(
+        portfolio_id=portfolio.id,
+        asset_id=asset_id,
+        transaction_type=tx_type,
+        quantity=quantity,
+        price_per_unit=price,
+        total_amount=quantity * price,
+        executed_at=EXECUTED_AT,
+        currency='RUB',
+    )
+
+
+def _persist(portfolio: Portfolio) -> None:
+    """Имитирует запись в колонки Numeric(20, 10) и чтение обратно."""
+    for h in portfolio.holdings:
+        h.quantity = h.quantity.quantize(QUANTUM, rounding=ROUND_HALF_UP)
+        h.average_cost = h.average_cost.quantize(QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def _state(portfolio: Portfolio) -> list[tuple[str, Decimal, Decimal]]:
+    return [(h.asset_id, h.quantity, h.average_cost) for h in portfolio.holdings]
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected'),
+    [
+        ('1', 10**10),
+        ('0.00000000005', 1),
+        ('0.00000000004999', 0),
+        ('123.45678901234', 1234567890123),
+    ],
+)
+def test_to_fixed_rounds_half_up(value, expected):
+    assert to_fixed(Decimal(value)) == expected
+
+
+def test_round_trip_keeps_column_scale():
+    assert from_fixed(to_fixed(Decimal('281.43'))) == Decimal('281.4300000000')
+
+
+def test_portfolio_round_trip_keeps_version(portfolio_with_sber):
+    portfolio_with_sber.version = 7
+
+    restored = FixedPointPortfolio.from_portfolio(portfolio_with_sber).to_portfolio()
+
+    assert (restored.id, restored.version) == (portfolio_with_sber.id, 7)
+    assert _state(restored) == _state(portfolio_with_sber)
+
+
+@pytest.mark.parametrize(
+    ('numerator', 'denominator', 'expected'),
+    [(10, 4, 3), (9, 4, 2), (5, 2, 3), (7, 7, 1), (0, 3, 0)],
+)
+def test_div_half_up(numerator, denominator, expected):
+    assert div_half_up(numerator, denominator) == expected
+
+
+def test_buy_existing_asset_matches_persisted_decimal(portfolio_with_sber):
+    fixed = FixedPointPortfolio.from_portfolio(portfolio_with_sber)
+    tx = _tx(portfolio_with_sber, 'MOEX:SBER', TransactionType.BUY, '100.0', '300.0')
+
+    portfolio_with_sber.execute_transaction(tx)
+    _persist(portfolio_with_sber)
+    fixed.replay([tx])
+
+    assert _state(fixed.to_portfolio()) == _state(portfolio_with_sber)
+
+
+def test_sell_more_than_available_raises(portfolio_with_sber):
+    fixed = FixedPointPortfolio.from_portfolio(portfolio_with_sber)
+    tx = _tx(portfolio_with_sber, 'MOEX:SBER', TransactionType.SELL, '1000', '300')
+
+    with pytest.raises(InsufficientHoldingsError):
+        fixed.replay([tx])
+
+
+def test_sell_all_removes_holding(portfolio_with_sber):
+    fixed = FixedPointPortfolio.from_portfolio(portfolio_with_sber)
+    fixed.replay([_tx(portfolio_with_sber, 'MOEX:SBER', TransactionType.SELL, '280.2', '300')])
+
+    assert fixed.holdings == {}
+
+
+def test_foreign_transaction_raises(empty_portfolio):
+    fixed = FixedPointPortfolio.from_portfolio(empty_portfolio)
+    other = Portfolio(user_id=uuid.uuid4(), name='Other', currency='RUB')
+    tx = FixedPointTransaction.from_transaction(
+        _tx(other, 'MOEX:SBER', TransactionType.BUY, '1', '1'),
+    )
+
+    with pytest.raises(TransactionMismatchError):
+        fixed.execute_transaction(tx)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_replay_identical_to_decimal_path(seed):
+    rng = random.Random(seed)
+    assets = [f'MOEX:A{i}' for i in range(8)]
+    decimal_portfolio = Portfolio(
+        user_id=uuid.uuid4(),
+        name='Replay',
+        currency='RUB',
+        holdings=[Holding(assets[0], Decimal('12.5'), Decimal('101.3333333333'))],
+    )
+    fixed = FixedPointPortfolio.from_portfolio(decimal_portfolio)
+
+    for _ in range(2000):
+        asset_id = rng.choice(assets)
+        holding = decimal_portfolio.get_holding(asset_id)
+        if holding is not None and rng.random() < 0.4:
+            quantity = min(holding.quantity, Decimal(rng.randint(1, 50_000)) / 1000)
+            tx = _tx(decimal_portfolio, asset_id, TransactionType.SELL, quantity, '1')
+        else:
+            quantity = Decimal(rng.randint(1, 100_000)) / 1000
+            price = Decimal(rng.randint(1, 10**9)) / 10**6
+            tx = _tx(decimal_portfolio, asset_id, TransactionType.BUY, quantity, price)
+
+        decimal_portfolio.execute_transaction(tx)
+        _persist(decimal_portfolio)
+        fixed.replay([tx])
+
+    assert _state(fixed.to_portfolio()) == _state(decimal_portfolio)
+
+    prices = {asset_id: Decimal(rng.randint(1, 10**8)) / 10**4 for asset_id in assets}
+    expected_value = sum(
+        (h.quantity * prices[h.asset_id] for h in decimal_portfolio.holdings),
+        Decimal(0),
+    ).quantize(QUANTUM, rounding=ROUND_HALF_UP)
+    fixed_prices = {asset_id: to_fixed(price) for asset_id, price in prices.items()}
+    assert fixed.market_value(fixed_prices) == expected_value
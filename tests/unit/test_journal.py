@@ -0,0 +1,305 @@
+import asyncio
+import datetime
+import errno
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import DataError
+
+from src.adapters.factory import InMemoryPortfolioRepositoryFactory
+from src.domain.domain import Portfolio, Transaction
+from src.domain.enums import TransactionType
+from src.infrastructure.database.memory import InMemoryStore
+from src.infrastructure.journal import Journal, JournalClosedError, read_segment, segments
+from src.service_layer.ingestion import (
+    REJECTED_FILE,
+    JournalFlusher,
+    dump_transaction,
+    journal_transaction,
+    load_transaction,
+)
+from src.service_layer.uow import InMemoryUnitOfWork
+
+
+def _transaction(portfolio_id, transaction_type=TransactionType.BUY, quantity='1'):
+    return Transaction(
+        portfolio_id=portfolio_id,
+        asset_id='MOEX:SBER',
+        transaction_type=transaction_type,
+        quantity=Decimal(quantity),
+        price_per_unit=Decimal('250.5'),
+        total_amount=Decimal(quantity) * Decimal('250.5'),
+        executed_at=datetime.datetime(2025, 3, 3, 10, 0, tzinfo=datetime.UTC),
+        currency='RUB',
+    )
+
+
+async def _seed(store):
+    portfolio = Portfolio(user_id=uuid.uuid4(), name='p', currency='RUB')
+    async with InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory()) as uow:
+        await uow.portfolio.add(portfolio)
+        await uow.commit()
+    return portfolio
+
+
+def _flusher(journal, store):
+    return JournalFlusher(
+        journal,
+        lambda: InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory()),
+        user_service=None,
+        batch_size=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_share_fsync_and_survive_restart(tmp_path):
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0.01)
+    await journal.start()
+    await asyncio.gather(*(journal.append(f'r{i}'.encode()) for i in range(20)))
+    await journal.stop()
+
+    [segment] = segments(tmp_path / 'slot-0')
+    assert read_segment(segment) == [f'r{i}'.encode() for i in range(20)]
+    with pytest.raises(JournalClosedError):
+        await journal.append(b'late')
+
+    # Новый владелец слота не дописывает старые сегменты, а ждёт их переноса.
+    restarted = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await restarted.start()
+    assert restarted.sealed_segments() == [segment]
+    await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_segments_rotate_by_size(tmp_path):
+    journal = Journal(tmp_path, segment_max_bytes=48, fsync_interval=0)
+    await journal.start()
+    for i in range(4):
+        await journal.append(b'x' * 20 + bytes([i]))
+    sealed = journal.sealed_segments()
+    await journal.stop()
+
+    # Запись — 29 байт: сегмент закрывается на второй.
+    assert [[record[-1] for record in read_segment(path)] for path in sealed] == [[0, 1], [2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_read_stops_at_torn_record(tmp_path):
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    await journal.append(b'complete')
+    await journal.append(b'torn-by-crash')
+    await journal.stop()
+
+    [segment] = segments(tmp_path / 'slot-0')
+    segment.write_bytes(segment.read_bytes()[:-3])
+    assert read_segment(segment) == [b'complete']
+
+
+@pytest.mark.asyncio
+async def test_workers_take_separate_slots(tmp_path):
+    first = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    second = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await first.start()
+    await second.start()
+    try:
+        assert first.slot != second.slot
+        with first.orphaned_slots() as orphans:
+            assert orphans == []
+    finally:
+        await second.stop()
+    with first.orphaned_slots() as orphans:
+        assert orphans == [second.slot]
+    await first.stop()
+
+
+class _FlakyFile:
+    """Файл сегмента, первая запись в который обрывается на середине."""
+
+    def __init__(self, file, fail):
+        self.file = file
+        self.fail = fail
+        self.broken = False
+
+    def write(self, data):
+        if self.broken:
+            return self.file.write(data)
+        self.broken = True
+        written = self.file.write(bytes(data[: len(data) // 2]))
+        if self.fail:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_hide_later_records(tmp_path):
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    await journal.append(b'before')
+    journal._file = _FlakyFile(journal._file, fail=True)
+    with pytest.raises(OSError):
+        await journal.append(b'lost')
+    await journal.append(b'after')
+    await journal.stop()
+
+    assert [record for path in segments(journal.slot) for record in read_segment(path)] == [
+        b'before',
+        b'after',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_short_write_is_completed(tmp_path):
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    journal._file = _FlakyFile(journal._file, fail=False)
+    await journal.append(b'split-in-two')
+    await journal.append(b'next')
+    await journal.stop()
+
+    [segment] = segments(journal.slot)
+    assert read_segment(segment) == [b'split-in-two', b'next']
+
+
+def test_transaction_roundtrip():
+    transaction = _transaction(uuid.uuid4(), quantity='0.125')
+    loaded = load_transaction(dump_transaction(transaction))
+
+    assert loaded.id == transaction.id
+    assert loaded.type == TransactionType.BUY
+    assert loaded.quantity == Decimal('0.125')
+    assert loaded.executed_at == transaction.executed_at
+
+
+@pytest.mark.asyncio
+async def test_flush_applies_in_order_and_records_rejected(tmp_path):
+    store = InMemoryStore()
+    portfolio = await _seed(store)
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    buy = _transaction(portfolio.id, quantity='3')
+    sell = _transaction(portfolio.id, TransactionType.SELL, quantity='2')
+    oversell = _transaction(portfolio.id, TransactionType.SELL, quantity='5')
+    orphan = _transaction(uuid.uuid4())
+    for transaction in (buy, sell, oversell, orphan):
+        await journal_transaction(journal, transaction)
+
+    report = await _flusher(journal, store).flush()
+    await journal.stop()
+
+    assert (report.applied, report.rejected) == (2, 2)
+    assert store.portfolios[portfolio.id].get_holding('MOEX:SBER').quantity == Decimal('1')
+    assert set(store.transactions) == {buy.id, sell.id}
+    assert segments(journal.slot) == []
+    rejected = [json.loads(line) for line in (tmp_path / REJECTED_FILE).read_text().splitlines()]
+    assert [entry['id'] for entry in rejected] == [str(oversell.id), str(orphan.id)]
+
+
+@pytest.mark.asyncio
+async def test_replay_after_crash_skips_already_flushed(tmp_path):
+    store = InMemoryStore()
+    portfolio = await _seed(store)
+    crashed = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await crashed.start()
+    transactions = [_transaction(portfolio.id) for _ in range(3)]
+    for transaction in transactions:
+        await journal_transaction(crashed, transaction)
+    await crashed.stop()
+    [segment] = segments(crashed.slot)
+    # Первая пачка успела попасть в БД, но сегмент не был удалён.
+    async with InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory()) as uow:
+        stored = await uow.portfolio.get_by_id(portfolio.id)
+        stored.execute_transaction(transactions[0])
+        await uow.portfolio.update(stored)
+        await uow.portfolio.add_transaction(transactions[0])
+        await uow.commit()
+
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    report = await _flusher(journal, store).flush()
+    await journal.stop()
+
+    assert (report.applied, report.duplicates) == (2, 1)
+    assert not segment.exists()
+    assert store.portfolios[portfolio.id].get_holding('MOEX:SBER').quantity == Decimal('3')
+
+
+@pytest.mark.asyncio
+async def test_flush_retries_batch_after_concurrent_write(tmp_path):
+    store = InMemoryStore()
+    portfolio = await _seed(store)
+    concurrent = _transaction(portfolio.id, quantity='10')
+
+    class RacingUnitOfWork(InMemoryUnitOfWork):
+        raced = False
+
+        async def _commit(self):
+            # Перед первой фиксацией портфель успевает изменить запрос в обход журнала.
+            if not RacingUnitOfWork.raced:
+                RacingUnitOfWork.raced = True
+                async with InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory()) as uow:
+                    stored = await uow.portfolio.get_by_id(portfolio.id)
+                    stored.execute_transaction(concurrent)
+                    await uow.portfolio.update(stored)
+                    await uow.portfolio.add_transaction(concurrent)
+            await super()._commit()
+
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    batch = [_transaction(portfolio.id, quantity='1') for _ in range(2)]
+    for transaction in batch:
+        await journal_transaction(journal, transaction)
+    flusher = JournalFlusher(
+        journal,
+        lambda: RacingUnitOfWork(store, InMemoryPortfolioRepositoryFactory()),
+        user_service=None,
+    )
+    report = await flusher.flush()
+    await journal.stop()
+
+    assert report.applied == 2
+    assert store.portfolios[portfolio.id].get_holding('MOEX:SBER').quantity == Decimal('12')
+    assert set(store.transactions) == {concurrent.id, *(t.id for t in batch)}
+
+
+@pytest.mark.asyncio
+async def test_flush_isolates_record_rejected_by_database(tmp_path):
+    store = InMemoryStore()
+    portfolio = await _seed(store)
+    batch = [_transaction(portfolio.id) for _ in range(5)]
+    bad = batch[3]
+    attempts = []
+
+    class StrictUnitOfWork(InMemoryUnitOfWork):
+        async def _commit(self):
+            staged = [t.id for t in self.session._staged_transactions]
+            if staged:
+                attempts.append(len(staged))
+            # Так Postgres отвергает значение, не влезающее в колонку.
+            if bad.id in staged:
+                raise DataError('INSERT INTO transactions', {}, ValueError('value too long'))
+            await super()._commit()
+
+    journal = Journal(tmp_path, segment_max_bytes=1 << 20, fsync_interval=0)
+    await journal.start()
+    for transaction in batch:
+        await journal_transaction(journal, transaction)
+    flusher = JournalFlusher(
+        journal,
+        lambda: StrictUnitOfWork(store, InMemoryPortfolioRepositoryFactory()),
+        user_service=None,
+    )
+    report = await flusher.flush()
+    await journal.stop()
+
+    assert (report.applied, report.rejected) == (4, 1)
+    assert attempts == [5, 2, 3, 1, 2, 1, 1]
+    assert set(store.transactions) == {t.id for t in batch} - {bad.id}
+    assert segments(journal.slot) == []
+    [entry] = [json.loads(line) for line in (tmp_path / REJECTED_FILE).read_text().splitlines()]
+    assert entry == {**entry, 'id': str(bad.id), 'error': 'value too long'}
@@ -0,0 +1,97 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.entrypoints.api import metrics
+from src.entrypoints.middlewares.metrics import PrometheusMiddleware
+from src.infrastructure.metrics.metrics import UOW_OPERATION_DURATION, observe_duration
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+    app.include_router(metrics.router)
+
+    @app.get('/items/{item_id}')
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {'id': item_id}
+
+    return TestClient(app)
+
+
+class TestPrometheusMiddleware:
+    def test_records_route_template_and_status(self, client):
+        labels = {'method': 'GET', 'route': '/items/{item_id}', 'status_code': '200'}
+        before = _sample('http_request_duration_seconds_count', **labels)
+
+        client.get('/items/1')
+        client.get('/items/2')
+
+        assert _sample('http_request_duration_seconds_count', **labels) == before + 2
+
+    def test_records_error_status(self, client):
+        labels = {'method': 'GET', 'route': '/items/{item_id}', 'status_code': '404'}
+        before = _sample('http_request_duration_seconds_count', **labels)
+
+        client.get('/items/0')
+
+        assert _sample('http_request_duration_seconds_count', **labels) == before + 1
+
+    def test_unmatched_route_is_grouped(self, client):
+        labels = {'method': 'GET', 'route': '<unmatched>', 'status_code': '404'}
+        before = _sample('http_request_duration_seconds_count', **labels)
+
+        client.get('/unknown/1')
+        client.get('/unknown/2')
+
+        assert _sample('http_request_duration_seconds_count', **labels) == before + 2
+
+    def test_in_progress_returns_to_zero(self, client):
+        client.get('/items/1')
+        assert _sample('http_requests_in_progress', method='GET') == 0
+
+    def test_metrics_endpoint_exposes_histogram(self, client):
+        client.get('/items/1')
+        resp = client.get('/metrics')
+
+        assert resp.status_code == 200
+        assert 'http_request_duration_seconds_bucket' in resp.text
+
+    def test_metrics_endpoint_reads_multiprocess_dir(self, client, monkeypatch, tmp_path):
+        client.get('/items/1')
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+
+        resp = client.get('/metrics')
+
+        # Значения берутся из файлов воркеров, а не из реестра текущего процесса.
+        assert resp.status_code == 200
+        assert 'http_request_duration_seconds_bucket' not in resp.text
+
+
+class TestObserveDuration:
+    def test_success_outcome(self):
+        labels = {'operation': 'commit', 'outcome': 'success'}
+        before = _sample('uow_operation_duration_seconds_count', **labels)
+
+        with observe_duration(UOW_OPERATION_DURATION, operation='commit'):
+            pass
+
+        assert _sample('uow_operation_duration_seconds_count', **labels) == before + 1
+
+    def test_error_outcome_uses_exception_name(self):
+        labels = {'operation': 'commit', 'outcome': 'RuntimeError'}
+        before = _sample('uow_operation_duration_seconds_count', **labels)
+
+        with pytest.raises(RuntimeError):
+            with observe_duration(UOW_OPERATION_DURATION, operation='commit'):
+                raise RuntimeError()
+
+        assert _sample('uow_operation_duration_seconds_count', **labels) == before + 1
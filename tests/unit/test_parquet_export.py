@@ -0,0 +1,108 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from src.infrastructure.export.parquet import (
+    HOLDINGS_SCHEMA,
+    PartitionedParquetWriter,
+    portfolio_bucket,
+)
+from src.infrastructure.export.pipeline import ExportState
+
+
+def _row(asset_id='MOEX:SBER', quantity='1'):
+    return {
+        'portfolio_id': str(uuid.uuid4()),
+        'asset_id': asset_id,
+        'quantity': Decimal(quantity).quantize(Decimal('1E-10')),
+        'average_cost': Decimal('100.0000000000'),
+    }
+
+
+def _files(root):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob('*') if p.is_file())
+
+
+def test_commit_publishes_files_per_partition(tmp_path):
+    writer = PartitionedParquetWriter(tmp_path, HOLDINGS_SCHEMA, 'run1')
+    writer.write((('bucket', '000'),), _row('A'))
+    writer.write((('bucket', '001'),), _row('B'))
+    writer.write((('bucket', '000'),), _row('C'))
+
+    files = writer.commit()
+
+    assert _files(tmp_path) == [
+        'bucket=000/part-run1-00001.parquet',
+        'bucket=001/part-run1-00002.parquet',
+    ]
+    assert sorted(p.name for p in files) == ['part-run1-00001.parquet', 'part-run1-00002.parquet']
+    table = ds.dataset(tmp_path, format='parquet', partitioning='hive').to_table()
+    assert sorted(table.column('asset_id').to_pylist()) == ['A', 'B', 'C']
+    assert writer.rows_written == 3
+
+
+def test_files_are_hidden_until_commit_and_removed_on_abort(tmp_path):
+    writer = PartitionedParquetWriter(tmp_path, HOLDINGS_SCHEMA, 'run1', row_group_size=1)
+    writer.write((('bucket', '000'),), _row())
+
+    assert _files(tmp_path) == ['bucket=000/.part-run1-00001.parquet.tmp']
+
+    writer.abort()
+
+    assert _files(tmp_path) == []
+
+
+def test_row_groups_are_bounded(tmp_path):
+    writer = PartitionedParquetWriter(tmp_path, HOLDINGS_SCHEMA, 'run1', row_group_size=2)
+    for i in range(5):
+        writer.write((('bucket', '000'),), _row(quantity=str(i)))
+    [path] = writer.commit()
+
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_rows == 5
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [2, 2, 1]
+
+
+def test_evicted_partition_continues_in_new_file(tmp_path):
+    writer = PartitionedParquetWriter(
+        tmp_path,
+        HOLDINGS_SCHEMA,
+        'run1',
+        row_group_size=1,
+        max_open_files=1,
+    )
+    writer.write((('bucket', '000'),), _row())
+    writer.write((('bucket', '001'),), _row())
+    writer.write((('bucket', '000'),), _row())
+    writer.commit()
+
+    assert _files(tmp_path) == [
+        'bucket=000/part-run1-00001.parquet',
+        'bucket=000/part-run1-00003.parquet',
+        'bucket=001/part-run1-00002.parquet',
+    ]
+
+
+def test_portfolio_bucket_is_stable():
+    portfolio_id = uuid.UUID('00000000-0000-0000-0000-000000000011')
+
+    assert portfolio_bucket(portfolio_id, 16) == 1
+    assert all(0 <= portfolio_bucket(uuid.uuid4(), 16) < 16 for _ in range(100))
+
+
+@pytest.mark.parametrize(
+    'mark',
+    [None, datetime.datetime(2025, 1, 31, 12, 0, tzinfo=datetime.UTC)],
+)
+def test_export_state_roundtrip(tmp_path, mark):
+    ExportState(transactions_high_water_mark=mark, last_run_id='run1').save(tmp_path)
+
+    state = ExportState.load(tmp_path)
+
+    assert state.transactions_high_water_mark == mark
+    assert state.last_run_id == 'run1'
+    assert _files(tmp_path) == ['_export_state.json']
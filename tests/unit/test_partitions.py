@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from src.entrypoints.cli.partitions import parse_args
+from src.infrastructure.database.partitions import (
+    MonthPartition,
+    months_ahead,
+    partition_horizon,
+    partitions_before,
+)
+
+
+def test_month_partition_bounds_are_utc_month_edges():
+    partition = MonthPartition.for_date('transactions', datetime.date(2025, 12, 17))
+
+    assert partition.name == 'transactions_y2025m12'
+    assert partition.end == datetime.date(2026, 1, 1)
+    assert partition.create_sql() == (
+        'CREATE TABLE IF NOT EXISTS transactions_y2025m12 PARTITION OF transactions '
+        "FOR VALUES FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')"
+    )
+
+
+def test_months_ahead_includes_current_month():
+    partitions = months_ahead('transactions', datetime.date(2025, 11, 30), 3)
+
+    assert [p.name for p in partitions] == [
+        'transactions_y2025m11',
+        'transactions_y2025m12',
+        'transactions_y2026m01',
+        'transactions_y2026m02',
+    ]
+
+
+def test_partition_horizon_keeps_last_month_in_reserve():
+    horizon = partition_horizon(3, today=datetime.date(2025, 11, 30))
+
+    # Партиции созданы по февраль 2026, принимаются транзакции по январь.
+    assert horizon == datetime.datetime(2026, 2, 1, tzinfo=datetime.UTC)
+
+
+def test_partitions_before_skips_default_and_current_month():
+    names = [
+        'transactions_default',
+        'transactions_y2025m02',
+        'transactions_y2024m12',
+        'transactions_y2025m01',
+        'holdings_y2024m01',
+    ]
+
+    detached = partitions_before(names, 'transactions', datetime.date(2025, 2, 1))
+
+    assert [p.name for p in detached] == ['transactions_y2024m12', 'transactions_y2025m01']
+    assert detached[0].detach_sql() == (
+        'ALTER TABLE transactions DETACH PARTITION transactions_y2024m12'
+    )
+
+
+def test_detach_requires_month_argument():
+    args = parse_args(['detach', '--before', '2024-06'])
+
+    assert args.before == datetime.date(2024, 6, 1)
+    with pytest.raises(SystemExit):
+        parse_args(['detach', '--before', '2024-06-15'])
@@ -0,0 +1,105 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from src.entrypoints.middlewares.query_stats import QueryStatsMiddleware
+from src.infrastructure.database import instrumentation
+from src.infrastructure.database.exceptions import RepeatedQueriesError
+from src.infrastructure.database.instrumentation import (
+    QueryInstrumentationConfig,
+    QueryStats,
+    check_repeated_queries,
+    fingerprint,
+    repeated_queries_action_for,
+)
+
+
+@pytest.fixture
+def config(monkeypatch):
+    def _set(action, threshold=3):
+        cfg = QueryInstrumentationConfig(
+            repeated_queries_threshold=threshold,
+            repeated_queries_action=action,
+        )
+        monkeypatch.setattr(instrumentation, '_config', cfg)
+        return cfg
+
+    return _set
+
+
+class TestFingerprint:
+    def test_bind_params_are_normalized(self):
+        assert fingerprint('SELECT * FROM holdings WHERE portfolio_id = $1') == fingerprint(
+            'SELECT * FROM holdings WHERE portfolio_id = ?'
+        )
+
+    def test_literals_are_replaced(self):
+        assert fingerprint("SELECT * FROM t WHERE name = 'abc' AND n = 42") == (
+            'SELECT * FROM t WHERE name = ? AND n = ?'
+        )
+
+    def test_in_lists_are_collapsed(self):
+        assert fingerprint('SELECT * FROM t WHERE id IN ($1, $2, $3)') == fingerprint(
+            'SELECT * FROM t WHERE id IN ($1)'
+        )
+
+    def test_multi_values_are_collapsed(self):
+        assert fingerprint('INSERT INTO t (a, b) VALUES (?, ?), (?, ?)') == (
+            'INSERT INTO t (a, b) VALUES (...)'
+        )
+
+    def test_whitespace_is_normalized(self):
+        assert fingerprint('SELECT a\n  FROM t') == 'SELECT a FROM t'
+
+
+class TestCheckRepeatedQueries:
+    def _stats(self, repeats):
+        stats = QueryStats()
+        for _ in range(repeats):
+            stats.record('SELECT * FROM holdings WHERE portfolio_id = ?', 0.001)
+        return stats
+
+    def test_raise_mode(self, config):
+        config('raise')
+        with pytest.raises(RepeatedQueriesError, match='3x SELECT'):
+            check_repeated_queries(self._stats(3), source='GET /x')
+
+    def test_below_threshold_passes(self, config):
+        config('raise')
+        check_repeated_queries(self._stats(2), source='GET /x')
+
+    def test_warn_mode_logs(self, config, caplog):
+        config('warn')
+        check_repeated_queries(self._stats(5), source='GET /x')
+        assert 'N+1' in caplog.text
+
+    def test_ignore_mode(self, config, caplog):
+        config('ignore')
+        check_repeated_queries(self._stats(50), source='GET /x')
+        assert caplog.text == ''
+
+    @pytest.mark.parametrize(
+        'environment, action',
+        [('development', 'warn'), ('test', 'raise'), ('production', 'ignore')],
+    )
+    def test_action_by_environment(self, environment, action):
+        assert repeated_queries_action_for(environment) == action
+
+
+class _Route:
+    path = '/test/failing'
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_stats_for_failed_requests():
+    async def failing_app(scope, receive, send):
+        raise RuntimeError('boom')
+
+    labels = {'route': _Route.path}
+    before = REGISTRY.get_sample_value('db_queries_per_request_count', labels) or 0.0
+    middleware = QueryStatsMiddleware(failing_app)
+    scope = {'type': 'http', 'method': 'GET', 'route': _Route()}
+
+    with pytest.raises(RuntimeError):
+        await middleware(scope, None, None)
+
+    assert REGISTRY.get_sample_value('db_queries_per_request_count', labels) == before + 1
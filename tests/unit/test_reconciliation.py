@@ -0,0 +1,45 @@
+import uuid
+from decimal import Decimal
+
+from src.domain.domain import Holding
+from src.entrypoints.cli.reconcile import Checkpoint
+from src.service_layer.reconciliation import ShardReport, diff_holdings
+
+
+def test_diff_holdings_ignores_order_and_digits_beyond_column_scale():
+    portfolio_id = uuid.uuid4()
+    stored = [
+        Holding('B', Decimal('1'), Decimal('3.3333333333')),
+        Holding('A', Decimal('2'), Decimal('10')),
+    ]
+    expected = [
+        Holding('A', Decimal('2.0'), Decimal('10.00000000001')),
+        Holding('B', Decimal('1'), Decimal('10') / Decimal('3')),
+    ]
+
+    assert diff_holdings(portfolio_id, stored, expected) == []
+
+
+def test_diff_holdings_reports_missing_and_different_positions():
+    portfolio_id = uuid.uuid4()
+    stored = [Holding('A', Decimal('2'), Decimal('10')), Holding('C', Decimal('1'), Decimal('1'))]
+    expected = [Holding('A', Decimal('3'), Decimal('10')), Holding('B', Decimal('1'), Decimal('5'))]
+
+    mismatches = diff_holdings(portfolio_id, stored, expected)
+
+    assert [(m.asset_id, m.stored_quantity, m.expected_quantity) for m in mismatches] == [
+        ('A', Decimal('2'), Decimal('3')),
+        ('B', None, Decimal('1')),
+        ('C', Decimal('1'), None),
+    ]
+
+
+def test_checkpoint_restores_completed_ranges(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    ids = sorted(uuid.uuid4() for _ in range(5))
+    Checkpoint(str(path)).append(ShardReport(lower=ids[1], upper=ids[2], portfolios=2))
+
+    checkpoint = Checkpoint(str(path))
+
+    assert [checkpoint.is_done(pid) for pid in ids] == [False, True, True, False, False]
+    assert checkpoint.reports[0].portfolios == 2
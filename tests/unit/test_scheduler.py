@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.infrastructure.jobs import probe_pool
+from src.infrastructure.scheduler import (
+    CronSchedule,
+    IntervalSchedule,
+    Job,
+    LeaderElection,
+    Scheduler,
+)
+
+
+def _utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.UTC)
+
+
+@pytest.mark.parametrize(
+    ('expression', 'after', 'expected'),
+    [
+        ('*/15 * * * *', _utc(2025, 1, 1, 10, 7), _utc(2025, 1, 1, 10, 15)),
+        ('17 3 * * *', _utc(2025, 1, 1, 3, 17), _utc(2025, 1, 2, 3, 17)),
+        ('0 9-17/4 * * *', _utc(2025, 1, 1, 13, 30), _utc(2025, 1, 1, 17, 0)),
+        ('30 0 * * 1', _utc(2025, 1, 1), _utc(2025, 1, 6, 0, 30)),
+        ('0 0 * * 7', _utc(2025, 1, 1), _utc(2025, 1, 5)),
+        ('0 0 1 */3 *', _utc(2025, 2, 10), _utc(2025, 4, 1)),
+        ('0 0 29 2 *', _utc(2025, 3, 1), _utc(2028, 2, 29)),
+        ('0 0 31 12 *', _utc(2025, 12, 31, 0, 0, 30), _utc(2026, 12, 31)),
+    ],
+)
+def test_cron_next_run(expression, after, expected):
+    assert CronSchedule(expression).next_run(after) == expected
+
+
+def test_cron_day_of_month_or_weekday():
+    schedule = CronSchedule('0 0 13 * 5')
+
+    # Пятница 3 января раньше 13-го числа.
+    assert schedule.next_run(_utc(2025, 1, 1)) == _utc(2025, 1, 3)
+    assert schedule.next_run(_utc(2025, 1, 12)) == _utc(2025, 1, 13)
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '0 0 31 2 *', '*/0 * * * *'])
+def test_cron_rejects_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+class FakeLeader(LeaderElection):
+    def __init__(self, is_leader):
+        self.is_leader = is_leader
+        self.released = False
+
+    async def acquire(self):
+        return self.is_leader
+
+    async def release(self):
+        self.released = True
+
+
+class Counter:
+    def __init__(self, error=None, delay=0.0):
+        self.calls = 0
+        self.error = error
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+
+@pytest.mark.asyncio
+async def test_interval_job_keeps_running_after_errors():
+    func = Counter(error=RuntimeError('boom'))
+    scheduler = Scheduler([Job('failing', func, IntervalSchedule(0.01))])
+
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert func.calls >= 3
+
+
+@pytest.mark.asyncio
+async def test_overlapping_run_is_skipped():
+    func = Counter(delay=0.05)
+    job = Job('slow', func, IntervalSchedule(60))
+    scheduler = Scheduler([job])
+
+    first, second = await asyncio.gather(scheduler.run_job(job), scheduler.run_job(job))
+
+    assert (first, second) == (True, False)
+    assert func.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_only_jobs_run_on_leader():
+    leader = FakeLeader(is_leader=False)
+    cluster_job = Job('cluster', Counter(), IntervalSchedule(0.01))
+    local_job = Job('local', Counter(), IntervalSchedule(0.01), leader_only=False)
+    scheduler = Scheduler([cluster_job, local_job], leader=leader, leader_check_interval=0.01)
+
+    scheduler.start()
+    await asyncio.sleep(0.05)
+    assert cluster_job.func.calls == 0
+    assert local_job.func.calls > 0
+
+    leader.is_leader = True
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+    assert cluster_job.func.calls > 0
+    assert leader.released
+    assert not scheduler.is_leader
+
+
+@pytest.mark.asyncio
+async def test_job_timeout_ends_run():
+    func = Counter(delay=10.0)
+    job = Job('stuck', func, IntervalSchedule(60), timeout=0.01)
+
+    assert await Scheduler([job]).run_job(job)
+
+
+@pytest.mark.asyncio
+async def test_pool_probe_records_duration(sqlite_engine):
+    labels = {'outcome': 'success'}
+    before = REGISTRY.get_sample_value('db_pool_probe_duration_seconds_count', labels) or 0.0
+
+    await probe_pool(sqlite_engine)
+
+    assert REGISTRY.get_sample_value('db_pool_probe_duration_seconds_count', labels) == before + 1
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from src.entrypoints.cli import serve
+from src.infrastructure.database.engine import pool_limits
+
+
+@pytest.mark.parametrize(
+    ('budget', 'workers', 'expected'),
+    [
+        (None, 8, (5, 10)),
+        (60, 4, (5, 10)),
+        (40, 4, (5, 5)),
+        (12, 4, (3, 0)),
+        (4, 4, (1, 0)),
+    ],
+)
+def test_pool_limits_split_budget_between_workers(budget, workers, expected):
+    pool_size, max_overflow = pool_limits(5, 10, budget, workers)
+
+    assert (pool_size, max_overflow) == expected
+    if budget is not None:
+        assert (pool_size + max_overflow) * workers <= budget
+
+
+def test_pool_limits_reject_budget_smaller_than_workers():
+    with pytest.raises(ValueError, match='воркеров'):
+        pool_limits(5, 10, budget=3, workers=4)
+
+
+def test_serve_passes_worker_count_to_workers_and_uvicorn(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(serve.uvicorn, 'run', lambda app, **kwargs: calls.append((app, kwargs)))
+    monkeypatch.setattr(serve.os, 'cpu_count', lambda: 6)
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+
+    serve.main(['--workers', '0', '--max-requests', '1000', '--max-requests-jitter', '100'])
+
+    [(app, kwargs)] = calls
+    assert app == 'src.entrypoints.fastapi_app:app'
+    assert kwargs['workers'] == 6
+    assert kwargs['limit_max_requests'] == 1000
+    assert kwargs['limit_max_requests_jitter'] == 100
+    assert os.environ['WEB_CONCURRENCY'] == '6'
+
+
+def test_multiprocess_metrics_dir_is_cleared_only_for_several_workers(monkeypatch, tmp_path):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    (tmp_path / 'counter_123.db').write_bytes(b'stale')
+    (tmp_path / 'notes.txt').write_text('keep')
+
+    assert serve.prepare_multiprocess_metrics(1) is None
+    assert (tmp_path / 'counter_123.db').exists()
+
+    assert serve.prepare_multiprocess_metrics(4) == str(tmp_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['notes.txt']
@@ -0,0 +1,201 @@
+import asyncio
+import uuid
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from src.adapters.cached_repository import (
+    INVALIDATION_CHANNEL,
+    CachedPortfolioRepositoryFactory,
+)
+from src.adapters.factory import InMemoryPortfolioRepositoryFactory
+from src.adapters.repository import InMemoryPortfolioRepository
+from src.domain.domain import Holding, Portfolio
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.circuit_breaker import CircuitBreaker, CircuitState
+from src.infrastructure.database.memory import InMemoryStore
+from src.infrastructure.redis_cache import InvalidationSubscriber, SharedCache
+from src.service_layer.uow import InMemoryUnitOfWork
+from src.service_layer.users_service import ABCUserService, CachingUserService
+
+
+class CountingRepoFactory(InMemoryPortfolioRepositoryFactory):
+    """Считает загрузки портфелей из «БД» — in-memory репозитория."""
+
+    def __init__(self):
+        self.loads = 0
+
+    def create(self, session):
+        factory = self
+
+        class Repo(InMemoryPortfolioRepository):
+            async def get_by_id(self, portfolio_id):
+                factory.loads += 1
+                return await super().get_by_id(portfolio_id)
+
+            async def get_many(self, portfolio_ids):
+                ids = list(portfolio_ids)
+                factory.loads += len(ids)
+                return await super().get_many(ids)
+
+        return Repo(session)
+
+
+class CountingUsers(ABCUserService):
+    def __init__(self):
+        self.requested = []
+
+    async def get_by_id(self, user_id):
+        self.requested.append(user_id)
+        return {'id': str(user_id)}
+
+
+def _shared(server, threshold=5):
+    return SharedCache(
+        fakeredis.FakeAsyncRedis(server=server),
+        'test',
+        CircuitBreaker(f'test-redis-{uuid.uuid4()}', failure_threshold=threshold),
+    )
+
+
+def _uow(store, factory):
+    return InMemoryUnitOfWork(store, factory)
+
+
+async def _seed(store, *portfolios):
+    async with _uow(store, InMemoryPortfolioRepositoryFactory()) as uow:
+        await uow.portfolio.add_many(portfolios)
+        await uow.commit()
+
+
+def _portfolio(user_id=None):
+    return Portfolio(
+        user_id=user_id or uuid.uuid4(),
+        name='Test',
+        currency='USD',
+        holdings=[Holding('NASDAQ:AAPL', Decimal('1.5'), Decimal('100.25'))],
+    )
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_portfolios_under_versioned_keys():
+    server = fakeredis.FakeServer()
+    store = InMemoryStore()
+    portfolio = _portfolio()
+    await _seed(store, portfolio)
+    db = CountingRepoFactory()
+    replicas = [CachedPortfolioRepositoryFactory(db, _shared(server), ttl=60) for _ in range(2)]
+
+    for replica in replicas:
+        async with _uow(store, replica) as uow:
+            loaded = await uow.portfolio.get_by_id(portfolio.id)
+        assert [(h.asset_id, h.quantity, h.average_cost) for h in loaded.holdings] == [
+            ('NASDAQ:AAPL', Decimal('1.5'), Decimal('100.25')),
+        ]
+        assert loaded.created_at == portfolio.created_at
+    assert db.loads == 1
+
+    async with _uow(store, replicas[0]) as uow:
+        loaded.name = 'Renamed'
+        await uow.portfolio.update(loaded)
+        await uow.commit()
+    async with _uow(store, replicas[1]) as uow:
+        fresh = await uow.portfolio.get_by_id(portfolio.id)
+
+    assert (fresh.name, fresh.version) == ('Renamed', 2)
+    assert db.loads == 2
+    keys = await fakeredis.FakeAsyncRedis(server=server).keys()
+    assert sorted(keys) == [
+        f'test:portfolio:{portfolio.id}:1'.encode(),
+        f'test:portfolio:{portfolio.id}:2'.encode(),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_by_user_id_loads_only_missing_portfolios():
+    server = fakeredis.FakeServer()
+    store = InMemoryStore()
+    user_id = uuid.uuid4()
+    first, second = _portfolio(user_id), _portfolio(user_id)
+    await _seed(store, first, second)
+    db = CountingRepoFactory()
+    factory = CachedPortfolioRepositoryFactory(db, _shared(server), ttl=60)
+
+    async with _uow(store, factory) as uow:
+        await uow.portfolio.get_by_id(first.id)
+        portfolios = await uow.portfolio.get_by_user_id(user_id)
+
+    assert {p.id for p in portfolios} == {first.id, second.id}
+    assert db.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_unavailable_server_falls_back_to_database_and_opens_breaker():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    store = InMemoryStore()
+    portfolio = _portfolio()
+    await _seed(store, portfolio)
+    shared = _shared(server, threshold=2)
+    factory = CachedPortfolioRepositoryFactory(CountingRepoFactory(), shared, ttl=60)
+
+    async with _uow(store, factory) as uow:
+        loaded = await uow.portfolio.get_by_id(portfolio.id)
+
+    assert loaded.id == portfolio.id
+    assert shared.breaker.state is CircuitState.OPEN
+    assert await shared.get('anything') is None
+
+
+@pytest.mark.asyncio
+async def test_invalidation_drops_entry_from_other_replica_process_cache():
+    server = fakeredis.FakeServer()
+    store = InMemoryStore()
+    portfolio = _portfolio()
+    await _seed(store, portfolio)
+    local = TTLCache('test-invalidation', maxsize=10, ttl=60)
+    local.set(portfolio.id, portfolio)
+    subscriber = InvalidationSubscriber(
+        _shared(server),
+        INVALIDATION_CHANNEL,
+        {'portfolio': lambda key: local.invalidate(uuid.UUID(key))},
+    )
+    subscriber.start()
+    try:
+        await asyncio.wait_for(subscriber.subscribed.wait(), 1)
+        factory = CachedPortfolioRepositoryFactory(
+            InMemoryPortfolioRepositoryFactory(),
+            _shared(server),
+            ttl=60,
+        )
+        async with _uow(store, factory) as uow:
+            await uow.portfolio.update(portfolio.copy())
+            await uow.commit()
+
+        for _ in range(100):
+            if len(local) == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert len(local) == 0
+    finally:
+        await subscriber.stop()
+
+
+@pytest.mark.asyncio
+async def test_user_cached_by_one_replica_is_reused_by_another():
+    server = fakeredis.FakeServer()
+    inner = CountingUsers()
+    user_id = uuid.uuid4()
+    replicas = [
+        CachingUserService(
+            inner,
+            TTLCache('test-shared-users', maxsize=10, ttl=60),
+            shared=_shared(server),
+        )
+        for _ in range(2)
+    ]
+
+    assert await replicas[0].get_by_id(user_id) == {'id': str(user_id)}
+    assert await replicas[1].get_many([user_id]) == {user_id: {'id': str(user_id)}}
+    assert inner.requested == [user_id]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.infrastructure.singleflight import SingleFlight
+
+
+def _calls(operation, role):
+    labels = {'operation': operation, 'role': role}
+    return REGISTRY.get_sample_value('singleflight_calls_total', labels) or 0.0
+
+
+class Loader:
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load_and_get_own_copies():
+    flight = SingleFlight('test-share', clone=list)
+    load = Loader(result=['a'])
+
+    callers = [asyncio.create_task(flight.do('key', load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    load.release.set()
+    results = await asyncio.gather(*callers)
+
+    assert load.calls == 1
+    assert results == [['a']] * 5
+    assert len({id(r) for r in results}) == 5
+    assert _calls('test-share', 'leader') == 1
+    assert _calls('test-share', 'follower') == 4
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_result_is_not_cached_after_load_completes():
+    flight = SingleFlight('test-no-cache', clone=lambda r: r)
+    load = Loader(result=1)
+    load.release.set()
+
+    await flight.do('key', load)
+    await flight.do('key', load)
+
+    assert load.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_caller():
+    flight = SingleFlight('test-error', clone=lambda r: r)
+    load = Loader(error=RuntimeError('db down'))
+
+    callers = [asyncio.create_task(flight.do('key', load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    load.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert [str(r) for r in results] == ['db down'] * 3
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_does_not_cancel_followers():
+    flight = SingleFlight('test-cancel', clone=lambda r: r)
+    load = Loader(result='ok')
+
+    leader = asyncio.create_task(flight.do('key', load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do('key', load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    load.release.set()
+
+    assert await follower == 'ok'
+    assert leader.cancelled()
+    assert load.calls == 1
@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.bootstrap import bootstrap
+from src.config.settings import get_settings
+from src.infrastructure.database.engine import prewarm_pool
+from src.infrastructure.metrics.metrics import STARTUP_PHASE_DURATION
+from src.infrastructure.startup import StartupTimer
+
+
+class FakeSettingsLoader:
+    async def load(self):
+        pass
+
+
+@pytest.fixture
+def memory_backend_env(monkeypatch):
+    for name in ('FASTAPI_SECRET', 'POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_DB'):
+        monkeypatch.setenv(name, 'test')
+    monkeypatch.setenv('POSTGRES_HOST', 'localhost')
+    monkeypatch.setenv('POSTGRES_PORT', '5432')
+    monkeypatch.setenv('REPOSITORY_BACKEND', 'memory')
+    monkeypatch.setattr('src.bootstrap.SettingsLoader', FakeSettingsLoader)
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_startup_timer_reports_phases(caplog):
+    timer = StartupTimer()
+    with timer.phase('first'):
+        pass
+
+    with caplog.at_level(logging.INFO, logger='src.infrastructure.startup'):
+        total = timer.report()
+
+    assert set(timer.phases) == {'first'}
+    assert total >= timer.phases['first']
+    assert 'first=' in caplog.text
+    assert STARTUP_PHASE_DURATION.labels(phase='total')._value.get() == total
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_records_phases(memory_backend_env):
+    settings = await bootstrap()
+
+    assert settings.REPOSITORY_BACKEND == 'memory'
+    for phase in ('logging', 'secrets', 'settings', 'tracing'):
+        assert STARTUP_PHASE_DURATION.labels(phase=phase)._value.get() > 0
+
+
+@pytest.mark.asyncio
+async def test_prewarm_pool_opens_connections(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/db.sqlite', pool_size=3)
+    try:
+        warmed = await prewarm_pool(engine, 10)
+
+        assert warmed == 3
+        assert engine.sync_engine.pool.checkedin() == 3
+    finally:
+        await engine.dispose()
@@ -0,0 +1,96 @@
+import json
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from src.config.settings import get_settings
+from src.entrypoints.api import endpoints
+from src.infrastructure.tracing.sdk import JsonLinesFileSpanExporter
+from src.infrastructure.tracing.tracing import tracer
+from src.service_layer.uow import SqlAlchemyUnitOfWork
+from src.service_layer.users_service import UserService
+from tests.conftest import FakeRepoFactory
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture(scope='module', autouse=True)
+def tracer_provider():
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(_exporter))
+    trace.set_tracer_provider(provider)
+    yield provider
+
+
+@pytest.fixture
+def spans():
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def _by_name(finished, name):
+    return [s for s in finished.get_finished_spans() if s.name == name]
+
+
+@pytest.mark.asyncio
+async def test_uow_spans_are_children_of_caller(spans):
+    session_factory = MagicMock(return_value=AsyncMock())
+
+    with tracer.start_as_current_span('caller') as caller:
+        async with SqlAlchemyUnitOfWork(session_factory, FakeRepoFactory()):
+            pass
+
+    parent_id = caller.get_span_context().span_id
+    assert _by_name(spans, 'uow.enter')[0].parent.span_id == parent_id
+    assert _by_name(spans, 'uow.commit')[0].parent.span_id == parent_id
+
+
+@pytest.mark.asyncio
+async def test_user_service_attempts_are_traced(spans):
+    responses = iter([503, 503, 200])
+
+    def handler(request):
+        return httpx.Response(next(responses), json={'id': 'u'})
+
+    service = UserService('http://users', transport=httpx.MockTransport(handler))
+    await service.get_by_id(uuid.uuid4())
+
+    (outer,) = _by_name(spans, 'user_service.get_by_id')
+    attempts = _by_name(spans, 'user_service.get_by_id.attempt')
+    assert len(attempts) == 3
+    assert all(a.parent.span_id == outer.context.span_id for a in attempts)
+    assert [e.attributes['attempt'] for e in outer.events if e.name == 'retry'] == [1, 2]
+
+
+def test_endpoint_span(spans):
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    app.dependency_overrides[get_settings] = lambda: MagicMock(POSTGRES_HOST='db')
+
+    resp = TestClient(app).get('/api/v1/portfolio/health')
+
+    assert resp.status_code == 200
+    assert len(_by_name(spans, 'endpoint.health')) == 1
+
+
+def test_json_lines_file_exporter(tmp_path, tracer_provider):
+    path = tmp_path / 'traces.jsonl'
+    file_exporter = JsonLinesFileSpanExporter(str(path))
+    local_tracer = tracer_provider.get_tracer('test')
+    with local_tracer.start_as_current_span('a'):
+        pass
+
+    file_exporter.export(_exporter.get_finished_spans()[-1:])
+    file_exporter.shutdown()
+
+    (line,) = path.read_text().splitlines()
+    assert json.loads(line)['name'] == 'a'
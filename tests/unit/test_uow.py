@@ -1,8 +1,13 @@
 from unittest.mock import AsyncMock, MagicMock
 
+from decimal import Decimal
+
 import pytest
 
-from src.service_layer.uow import SqlAlchemyUnitOfWork
+from src.adapters.factory import InMemoryPortfolioRepositoryFactory
+from src.domain.exceptions import PortfolioVersionConflictError
+from src.infrastructure.database.memory import InMemoryStore
+from src.service_layer.uow import InMemoryUnitOfWork, SqlAlchemyUnitOfWork
 from tests.conftest import FakeRepoFactory
 
 
@@ -41,3 +46,82 @@ class TestSqlAlchemyUnitOfWork:
         fake_session.rollback.assert_called_once()
         fake_session.commit.assert_not_called()
         fake_session.close.assert_called_once()
+
+
+class TestInMemoryUnitOfWork:
+    @staticmethod
+    def _uow(store):
+        return InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory())
+
+    @pytest.mark.asyncio
+    async def test_changes_visible_only_after_commit(self, empty_portfolio):
+        store = InMemoryStore()
+
+        async with self._uow(store) as uow:
+            await uow.portfolio.add(empty_portfolio)
+            assert await uow.portfolio.get_by_id(empty_portfolio.id) is not None
+            assert empty_portfolio.id not in store.portfolios
+
+        assert empty_portfolio.id in store.portfolios
+        assert store.portfolio_ids_by_user[empty_portfolio.user_id] == {empty_portfolio.id}
+
+    @pytest.mark.asyncio
+    async def test_rollback_on_exception(self, empty_portfolio):
+        store = InMemoryStore()
+
+        with pytest.raises(RuntimeError):
+            async with self._uow(store) as uow:
+                await uow.portfolio.add(empty_portfolio)
+                raise RuntimeError()
+
+        assert store.portfolios == {}
+
+    @pytest.mark.asyncio
+    async def test_loaded_portfolio_is_a_copy(self, portfolio_with_sber):
+        store = InMemoryStore()
+        async with self._uow(store) as uow:
+            await uow.portfolio.add(portfolio_with_sber)
+
+        async with self._uow(store) as uow:
+            loaded = await uow.portfolio.get_by_id(portfolio_with_sber.id)
+            loaded.holdings[0].quantity = Decimal('1')
+            loaded.name = 'Changed'
+
+        stored = store.portfolios[portfolio_with_sber.id]
+        assert stored.name == 'Test Portfolio'
+        assert stored.holdings[0].quantity == Decimal('280.2')
+
+    @pytest.mark.asyncio
+    async def test_delete_updates_user_index(self, empty_portfolio):
+        store = InMemoryStore()
+        async with self._uow(store) as uow:
+            await uow.portfolio.add(empty_portfolio)
+
+        async with self._uow(store) as uow:
+            await uow.portfolio.delete(empty_portfolio.id)
+            assert await uow.portfolio.get_by_user_id(empty_portfolio.user_id) == []
+
+        assert store.portfolios == {}
+        assert store.portfolio_ids_by_user == {}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_second_commit_conflicts(self, portfolio_with_sber):
+        store = InMemoryStore()
+        async with self._uow(store) as uow:
+            await uow.portfolio.add(portfolio_with_sber)
+
+        first, second = self._uow(store), self._uow(store)
+        async with first, second:
+            mine = await first.portfolio.get_by_id(portfolio_with_sber.id)
+            theirs = await second.portfolio.get_by_id(portfolio_with_sber.id)
+            mine.name = 'Mine'
+            theirs.name = 'Theirs'
+            await first.portfolio.update(mine)
+            await second.portfolio.update(theirs)
+            await first.commit()
+            with pytest.raises(PortfolioVersionConflictError):
+                await second.commit()
+            await second.rollback()
+
+        stored = store.portfolios[portfolio_with_sber.id]
+        assert (stored.name, stored.version) == ('Mine', portfolio_with_sber.version + 1)
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.adapters.factory import InMemoryPortfolioRepositoryFactory
+from src.adapters.repository import InMemoryPortfolioRepository
+from src.domain.domain import Portfolio
+from src.entrypoints.api import endpoints
+from src.infrastructure.circuit_breaker import CircuitBreaker, CircuitState
+from src.infrastructure.database.memory import InMemorySession, InMemoryStore
+from src.service_layer.dependencies import get_uow, get_user_service
+from src.service_layer.exceptions import (
+    UserNotFoundError,
+    UserServiceCircuitOpenError,
+    UserServiceUnavailableError,
+)
+from src.service_layer.portfolio_service import PortfolioService
+from src.service_layer.uow import InMemoryUnitOfWork
+from src.service_layer.users_service import ABCUserService, UserService
+
+
+class BatchUsersApi:
+    """Заглушка batch API users-сервиса: знает только ``known`` пользователей."""
+
+    def __init__(self, known, statuses=()):
+        self.known = {str(user_id) for user_id in known}
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def __call__(self, request):
+        assert request.method == 'POST'
+        assert request.url.path == '/api/v1/users/batch'
+        ids = json.loads(request.content)['ids']
+        self.requests.append(ids)
+        if self.statuses:
+            return httpx.Response(self.statuses.pop(0))
+        return httpx.Response(200, json={'users': [{'id': i} for i in ids if i in self.known]})
+
+
+class KnownUsers(ABCUserService):
+    def __init__(self, known):
+        self.known = set(known)
+
+    async def get_by_id(self, user_id):
+        if user_id not in self.known:
+            raise UserNotFoundError(str(user_id))
+        return {'id': str(user_id)}
+
+
+@pytest.mark.asyncio
+async def test_get_many_sends_unique_ids_in_chunks():
+    known = [uuid.uuid4() for _ in range(4)]
+    missing = uuid.uuid4()
+    api = BatchUsersApi(known)
+    service = UserService('http://users', transport=httpx.MockTransport(api), batch_size=2)
+
+    users = await service.get_many([*known, known[0], missing])
+
+    assert set(users) == set(known)
+    assert [len(ids) for ids in api.requests] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_get_many_retries_unavailable_batch():
+    user_id = uuid.uuid4()
+    api = BatchUsersApi([user_id], statuses=[503])
+    service = UserService('http://users', transport=httpx.MockTransport(api))
+
+    users = await service.get_many([user_id])
+
+    assert list(users) == [user_id]
+    assert len(api.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_default_get_many_skips_missing_users():
+    user_id = uuid.uuid4()
+
+    users = await KnownUsers([user_id]).get_many([user_id, uuid.uuid4()])
+
+    assert users == {user_id: {'id': str(user_id)}}
+
+
+@pytest.mark.asyncio
+async def test_add_many_rejects_batch_with_unknown_user():
+    store = InMemoryStore()
+    known, unknown = uuid.uuid4(), uuid.uuid4()
+    session = InMemorySession(store)
+    service = PortfolioService(InMemoryPortfolioRepository(session), KnownUsers([known]))
+    portfolios = [
+        Portfolio(user_id=known, name='a', currency='RUB'),
+        Portfolio(user_id=unknown, name='b', currency='RUB'),
+    ]
+
+    with pytest.raises(ValueError, match=str(unknown)):
+        await service.add_many(portfolios)
+    session.commit()
+
+    assert store.portfolios == {}
+
+
+class CountingHandler:
+    """Заглушка ``GET /api/v1/users/{id}``: отвечает статусами по очереди, затем 200."""
+
+    def __init__(self, statuses=(), delays=()):
+        self.statuses = list(statuses)
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def __call__(self, request):
+        self.calls += 1
+        if self.delays:
+            await asyncio.sleep(self.delays.pop(0))
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status, json={'id': request.url.path.rsplit('/', 1)[-1]})
+
+
+def _service(handler, **kwargs):
+    return UserService('http://users', transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_total_call_time():
+    handler = CountingHandler(delays=[10.0] * 3)
+    service = _service(handler, deadline=0.1)
+
+    start = time.perf_counter()
+    with pytest.raises(UserServiceUnavailableError):
+        await service.get_by_id(uuid.uuid4())
+
+    assert time.perf_counter() - start < 1.0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_stops_retries():
+    handler = CountingHandler(statuses=[503] * 10)
+    breaker = CircuitBreaker('test-user-service', failure_threshold=2, reset_timeout=60)
+    service = _service(handler, breaker=breaker)
+
+    with pytest.raises(UserServiceCircuitOpenError):
+        await service.get_by_id(uuid.uuid4())
+    with pytest.raises(UserServiceCircuitOpenError) as exc_info:
+        await service.get_by_id(uuid.uuid4())
+
+    assert handler.calls == 2
+    assert breaker.state is CircuitState.OPEN
+    assert exc_info.value.retry_after > 59
+
+
+@pytest.mark.asyncio
+async def test_not_found_does_not_trip_breaker():
+    handler = CountingHandler(statuses=[404] * 3)
+    breaker = CircuitBreaker('test-not-found', failure_threshold=2)
+    service = _service(handler, breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(UserNotFoundError):
+            await service.get_by_id(uuid.uuid4())
+
+    assert breaker.state is CircuitState.CLOSED
+    assert handler.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged():
+    handler = CountingHandler(delays=[10.0, 0.0])
+    service = _service(handler, hedge_after=0.02)
+    user_id = uuid.uuid4()
+
+    start = time.perf_counter()
+    user = await service.get_by_id(user_id)
+
+    assert user == {'id': str(user_id)}
+    assert handler.calls == 2
+    assert time.perf_counter() - start < 1.0
+
+
+class OpenCircuitUsers(ABCUserService):
+    async def get_by_id(self, user_id):
+        raise UserServiceCircuitOpenError('open', retry_after=12.3)
+
+
+def test_create_portfolio_returns_503_when_circuit_is_open():
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    store = InMemoryStore()
+    app.dependency_overrides[get_uow] = lambda: InMemoryUnitOfWork(
+        store, InMemoryPortfolioRepositoryFactory()
+    )
+    app.dependency_overrides[get_user_service] = OpenCircuitUsers
+
+    resp = TestClient(app).post(
+        '/api/v1/portfolio/portfolios',
+        json={'user_id': str(uuid.uuid4()), 'name': 'p', 'currency': 'RUB'},
+    )
+
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After'] == '13'
+    assert store.portfolios == {}
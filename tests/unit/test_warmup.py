@@ -0,0 +1,97 @@
+import asyncio
+import datetime
+import uuid
+
+import pytest
+
+from src.adapters.factory import InMemoryPortfolioRepositoryFactory
+from src.domain.domain import Portfolio
+from src.infrastructure.cache import TTLCache
+from src.infrastructure.database.memory import InMemoryStore
+from src.service_layer.exceptions import UserServiceUnavailableError
+from src.service_layer.uow import InMemoryUnitOfWork
+from src.service_layer.users_service import ABCUserService, CachingUserService
+from src.service_layer.warmup import warm_caches
+
+
+class AnyUser(ABCUserService):
+    def __init__(self):
+        self.requested = []
+
+    async def get_by_id(self, user_id):
+        self.requested.append(user_id)
+        return {'id': str(user_id)}
+
+
+class UnavailableUsers(ABCUserService):
+    async def get_by_id(self, user_id):
+        raise UserServiceUnavailableError('down')
+
+
+async def _seed(store, count):
+    """Создаёт портфели; чем больше индекс, тем свежее портфель."""
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    portfolios = [
+        Portfolio(
+            user_id=uuid.uuid4(),
+            name=f'p{i}',
+            currency='USD',
+            created_at=base + datetime.timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    async with InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory()) as uow:
+        await uow.portfolio.add_many(portfolios)
+        await uow.commit()
+    return portfolios
+
+
+def _uow_factory(store):
+    return lambda: InMemoryUnitOfWork(store, InMemoryPortfolioRepositoryFactory())
+
+
+@pytest.mark.asyncio
+async def test_warms_most_recently_active_portfolios_and_their_owners():
+    store = InMemoryStore()
+    portfolios = await _seed(store, 5)
+    inner = AnyUser()
+    users = CachingUserService(inner, TTLCache('test-warm-users', maxsize=10, ttl=60.0))
+    cache = TTLCache('test-warm-portfolios', maxsize=10, ttl=60.0)
+
+    report = await warm_caches(_uow_factory(store), users, cache, limit=3, batch_size=2)
+
+    assert (report.portfolios, report.users, report.timed_out) == (3, 3, False)
+    hot = portfolios[2:]
+    assert all(cache.get(p.id).version == p.version for p in hot)
+    assert cache.get(portfolios[0].id) is None
+    assert set(inner.requested) == {p.user_id for p in hot}
+    await users.get_by_id(hot[0].user_id)
+    assert len(inner.requested) == 3
+
+
+@pytest.mark.asyncio
+async def test_unavailable_user_service_does_not_fail_warmup():
+    store = InMemoryStore()
+    await _seed(store, 2)
+    cache = TTLCache('test-warm-unavailable', maxsize=10, ttl=60.0)
+
+    report = await warm_caches(_uow_factory(store), UnavailableUsers(), cache, limit=10)
+
+    assert (report.portfolios, report.users) == (2, 0)
+
+
+@pytest.mark.asyncio
+async def test_warmup_stops_at_timeout():
+    class SlowUsers(ABCUserService):
+        async def get_by_id(self, user_id):
+            await asyncio.sleep(10)
+
+    store = InMemoryStore()
+    await _seed(store, 2)
+    cache = TTLCache('test-warm-timeout', maxsize=10, ttl=60.0)
+
+    report = await warm_caches(_uow_factory(store), SlowUsers(), cache, limit=10, timeout=0.05)
+
+    assert report.timed_out
+    assert report.portfolios == 2
+    assert report.users == 0